@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 import asyncio
 import os
 import sys
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 
@@ -236,11 +237,27 @@ LOGGING = {
             "()": "django.utils.log.RequireDebugTrue",
         }
     },
+    "formatters": {
+        "request": {
+            "()": "zane_api.formatters.RequestLogFormatter",
+        },
+    },
     "handlers": {
         "console": {
             "class": "logging.StreamHandler",
             "level": "DEBUG",
         },
+        "request_console": {
+            "class": "logging.StreamHandler",
+            "level": "DEBUG",
+            "formatter": "request",
+        },
+        # the access logs are formatted and written by a separate thread, off the request thread
+        "request_queue": {
+            "class": "logging.handlers.QueueHandler",
+            "handlers": ["request_console"],
+            "respect_handler_level": True,
+        },
     },
     "loggers": {
         # uncomment only when we really need debugging as it pollutes way too much the logs
@@ -249,13 +266,39 @@ LOGGING = {
         #     "level": "DEBUG",
         # },
         "request_logger": {
-            "handlers": ["console"],
+            "handlers": ["request_queue"],
             "level": "DEBUG",
             "propagate": True,
         },
+        # the workflows that failed to start or to be signaled from a batch, after the response was sent
+        "temporal.client": {
+            "handlers": ["console"],
+            "level": "WARNING",
+            "propagate": False,
+        },
     },
 }
 
+# Format of the access logs, `pretty` for colored lines or `json` for structured logs
+REQUEST_LOG_FORMAT = os.environ.get("REQUEST_LOG_FORMAT", "pretty")
+# Names of the routes whose request body is included in the access logs, separated by commas.
+# None by default: the bodies can contain passwords and secrets, each route must be allowed explicitly
+REQUEST_LOG_BODY_ROUTES = [
+    route
+    for route in os.environ.get("REQUEST_LOG_BODY_ROUTES", "").split(",")
+    if route
+]
+# The bodies of these routes are never logged: they are large or contain secrets
+REQUEST_LOG_BODY_EXCLUDED_ROUTES = [
+    "zane_api:logs.ingest",
+    "zane_api:services.docker.webhook_deploy",
+    "zane_api:services.git.webhook_deploy",
+    "git_connectors:github.webhook",
+    "git_connectors:gitlab.webhook",
+]
+# Request bodies are truncated to this size in the access logs
+REQUEST_LOG_BODY_MAX_BYTES = int(os.environ.get("REQUEST_LOG_BODY_MAX_BYTES", 4096))
+
 
 # Django Rest framework
 
@@ -283,7 +326,7 @@ REST_FRAMEWORK = {
         "tls_certificates": "60/minute",
         "deploy_webhook": "60/minute",
         "gitapp_webhook": "120/minute",
-        "log_collect": "30/minute",
+        "log_collect": "600/minute",
         "initial_registration": "30/minute",
     },
     "DEFAULT_RENDERER_CLASSES": REST_FRAMEWORK_DEFAULT_RENDERER_CLASSES,
@@ -379,6 +422,37 @@ CADDY_PROXY_ADMIN_HOST = os.environ.get(
     "http://127.0.0.1:2020" if TESTING else "http://127.0.0.1:2019",
 )
 
+# Insert and remove routes one by one at their sorted position instead of replacing the whole list
+CADDY_PROXY_INCREMENTAL_ROUTE_UPDATES = (
+    os.environ.get("CADDY_PROXY_INCREMENTAL_ROUTE_UPDATES", "true") == "true"
+)
+
+# Collect the metrics of all the deployments running on the node in a single schedule,
+# instead of running one schedule per deployment
+METRICS_NODE_COLLECTOR_ENABLED = (
+    os.environ.get("METRICS_NODE_COLLECTOR_ENABLED", "true") == "true"
+)
+METRICS_NODE_COLLECTOR_MAX_WORKERS = int(
+    os.environ.get("METRICS_NODE_COLLECTOR_MAX_WORKERS", 16)
+)
+
+# Run the monitoring healthchecks of all the deployments from a single long-lived monitor,
+# instead of running one schedule per deployment
+HEALTHCHECK_MONITOR_ENGINE_ENABLED = (
+    os.environ.get("HEALTHCHECK_MONITOR_ENGINE_ENABLED", "true") == "true"
+)
+HEALTHCHECK_MONITOR_MAX_CONCURRENT_CHECKS = int(
+    os.environ.get("HEALTHCHECK_MONITOR_MAX_CONCURRENT_CHECKS", 32)
+)
+
+# Check the availability of the host ports with an index of the ports published by the swarm services,
+# instead of launching a container binding the port for each check
+HOST_PORTS_INDEX_ENABLED = os.environ.get("HOST_PORTS_INDEX_ENABLED", "true") == "true"
+# Also bind the ports not in the index with a socket, only relevant when running in the host network
+HOST_PORTS_SOCKET_PROBE = (
+    os.environ.get("HOST_PORTS_SOCKET_PROBE", "false") == "true"
+)
+
 ZANE_FRONT_SERVICE_INTERNAL_DOMAIN = (
     "host.docker.internal:5173"
     if ENVIRONMENT != PRODUCTION_ENV
@@ -398,6 +472,26 @@ DEFAULT_HEALTHCHECK_TIMEOUT = 30  # seconds
 DEFAULT_HEALTHCHECK_INTERVAL = 30  # seconds
 DEFAULT_HEALTHCHECK_WAIT_INTERVAL = 5.0  # seconds
 
+# Wait for the changes of the swarm services with a single docker events stream per worker,
+# instead of polling docker every `DEFAULT_HEALTHCHECK_WAIT_INTERVAL`, the waits go back to polling when the stream drops
+DOCKER_EVENTS_LISTENER_ENABLED = (
+    os.environ.get("DOCKER_EVENTS_LISTENER_ENABLED", "true") == "true"
+)
+# Upper bound of a wait for an event, for the changes that docker doesn't report (a task rejected before its container is created...)
+DOCKER_EVENTS_WAIT_TIMEOUT = 10.0  # seconds
+
+# Keep a bare mirror of each git repository on the worker, the deployments only fetch the new commits
+# into the mirror and clone it locally, instead of cloning the whole repository from the remote
+GIT_MIRROR_CACHE_ENABLED = os.environ.get("GIT_MIRROR_CACHE_ENABLED", "true") == "true"
+# on the same filesystem as the build directories, so that the local clones are hardlinked
+GIT_MIRROR_CACHE_DIR = os.environ.get(
+    "GIT_MIRROR_CACHE_DIR", os.path.join(tempfile.gettempdir(), "zane-git-mirrors")
+)
+# the least recently used mirrors are deleted when the cache is over this size
+GIT_MIRROR_CACHE_MAX_SIZE = int(
+    os.environ.get("GIT_MIRROR_CACHE_MAX_SIZE", 5 * 1024 * 1024 * 1024)
+)  # bytes
+
 # temporalio config
 TEMPORALIO_WORKFLOW_EXECUTION_MAX_TIMEOUT = (
     timedelta(minutes=30) if not TESTING else timedelta(seconds=7)
@@ -409,6 +503,14 @@ TEMPORALIO_WORKER_TASK_QUEUE = os.environ.get(
     "TEMPORALIO_WORKER_TASK_QUEUE", TEMPORALIO_MAIN_TASK_QUEUE
 )
 TEMPORALIO_WORKER_NAMESPACE = "zane"
+# port of the prometheus metrics of the worker, `0` to disable them
+TEMPORALIO_WORKER_METRICS_PORT = int(
+    os.environ.get("TEMPORALIO_WORKER_METRICS_PORT", 9464)
+)
+# maximum number of requests sent at the same time to temporal when starting or signaling a batch of workflows
+TEMPORALIO_BATCH_MAX_CONCURRENCY = int(
+    os.environ.get("TEMPORALIO_BATCH_MAX_CONCURRENCY", 10)
+)
 try:
     TEMPORALIO_MAX_CONCURRENT_DEPLOYS = int(os.environ.get("MAX_CONCURRENT_DEPLOYS", 5))
 except Exception:
@@ -11,7 +11,7 @@ from typing import Optional
 import asyncio
 import jwt
 from datetime import timedelta
-import requests
+from zane_api.http_client import github_http_session, gitlab_http_session
 
 from zane_api.models.base import TimestampedModel
 import hashlib
@@ -91,7 +91,7 @@ class GitHubApp(TimestampedModel):
         assert self.is_installed
 
         jwt = self._generate_jwt()
-        response = requests.post(
+        response = github_http_session().post(
             f"https://api.github.com/app/installations/{self.installation_id}/access_tokens",
             headers={
                 "Authorization": f"Bearer {jwt}",
@@ -210,7 +210,7 @@ class GitlabApp(TimestampedModel):
             if cursor is not None:
                 querystring["id_before"] = cursor
 
-            response = requests.get(
+            response = gitlab_http_session().get(
                 base_url + "?" + urlencode(querystring, doseq=True),
                 headers=dict(Authorization=f"Bearer {access_token}"),
             )
@@ -320,7 +320,7 @@ class GitlabApp(TimestampedModel):
             "branch_filter_strategy": "all_branches",
         }
 
-        response = requests.get(
+        response = gitlab_http_session().get(
             base_url,
             headers=dict(Authorization=f"Bearer {access_token}"),
         )
@@ -329,7 +329,7 @@ class GitlabApp(TimestampedModel):
         data: list[dict[str, int | str | bool]] = response.json()
         hook_found = find_item_in_sequence(lambda hook: hook["name"] == hook_name, data)
         if not hook_found:
-            response = requests.post(
+            response = gitlab_http_session().post(
                 base_url,
                 json=request_body,
                 headers=dict(Authorization=f"Bearer {access_token}"),
@@ -337,7 +337,7 @@ class GitlabApp(TimestampedModel):
             response.raise_for_status()
             return
 
-        response = requests.put(
+        response = gitlab_http_session().put(
             base_url + f"/{hook_found['id']}",
             json=request_body,
             headers=dict(Authorization=f"Bearer {access_token}"),
@@ -355,7 +355,7 @@ class GitlabApp(TimestampedModel):
     def ensure_fresh_access_token(cls, app: "GitlabApp") -> str:
         assert app.is_installed
 
-        response = requests.post(
+        response = gitlab_http_session().post(
             f"{app.gitlab_url}/oauth/token",
             data=dict(
                 client_id=app.app_id,
@@ -395,7 +395,7 @@ class DeployGitServiceFromGithubAPIViewTests(AuthAPITestCase):
                 url="https://github.com/Fredkiss3/private-ac.git"
             )
             url = gh_app.get_authenticated_repository_url(git_repo.url)
-            mock_git.ls_remote.assert_called_with("--heads", url, "main")
+            mock_git.ls_remote.assert_called_with("--heads", url)
 
     @responses.activate
     async def test_deploy_service_with_git_app_changes_clone_with_access_token(self):
@@ -341,7 +341,7 @@ class DeployGitServiceFromGitlabAPIViewTests(AuthAPITestCase):
                 url="https://gitlab.com/fredkiss3/private-ac.git"
             )
             url = gitlab.get_authenticated_repository_url(git_repo.url)
-            mock_git.ls_remote.assert_called_with("--heads", url, "main")
+            mock_git.ls_remote.assert_called_with("--heads", url)
 
     @responses.activate
     async def test_deploy_service_with_gitlab_app_changes_clone_with_access_token(self):
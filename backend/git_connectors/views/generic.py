@@ -99,7 +99,9 @@ class ListGitRepositoryBranchesAPIView(APIView):
             if gitapp.gitlab is not None:
                 repo_url = gitapp.gitlab.get_authenticated_repository_url(repo_url)
 
-        branches = git.list_branches_for_repository(repo_url)
+        branches = git.list_branches_for_repository(
+            repo_url, git_app_id=gitapp.id if gitapp is not None else None
+        )
         serializer = GitRepositoryBranchesResponseSerializer(branches)
         return Response(data=serializer.data)
 
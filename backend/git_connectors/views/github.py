@@ -2,7 +2,8 @@ from datetime import timedelta
 import time
 from typing import List, cast
 from faker import Faker
-import requests
+from zane_api.http_client import github_http_session
+from zane_api.git_client import update_cached_git_ref
 from rest_framework.views import APIView
 from rest_framework.generics import RetrieveUpdateAPIView
 from rest_framework import exceptions, permissions
@@ -93,7 +94,7 @@ class SetupGithubAppAPIView(APIView):
                     "Accept": "application/json",
                     "X-GitHub-Api-Version": "2022-11-28",
                 }
-                response = requests.post(url, headers=headers)
+                response = github_http_session().post(url, headers=headers)
 
                 if not status.is_success(response.status_code):
                     raise BadRequest("invalid Github app installation code")
@@ -162,7 +163,7 @@ class TestGithubAppAPIView(APIView):
             "Authorization": f"Bearer {access_token}",
             "X-GitHub-Api-Version": "2022-11-28",
         }
-        response = requests.get(url, headers=headers)
+        response = github_http_session().get(url, headers=headers)
         if not status.is_success(response.status_code):
             raise BadRequest(
                 "This github app may not be correctly installed or it has been deleted on github"
@@ -324,6 +325,18 @@ class GithubWebhookAPIView(APIView):
                     repository_url = (
                         f"https://github.com/{data["repository"]["full_name"]}.git"
                     )
+                    # keep the cached branches of the repository up to date
+                    if branch_deleted:
+                        update_cached_git_ref(
+                            repository_url, branch_name, None, git_app_id=gitapp.id
+                        )
+                    elif head_commit is not None:
+                        update_cached_git_ref(
+                            repository_url,
+                            branch_name,
+                            head_commit["id"],
+                            git_app_id=gitapp.id,
+                        )
                     if branch_deleted:
                         environment_delete_payload: list[
                             tuple[EnvironmentDetails, str]
@@ -351,12 +364,16 @@ class GithubWebhookAPIView(APIView):
                             environment.delete()
 
                         def on_commit():
-                            for details, workflow_id in environment_delete_payload:
-                                TemporalClient.start_workflow(
-                                    ArchiveEnvWorkflow.run,
-                                    details,
-                                    id=workflow_id,
-                                )
+                            TemporalClient.start_workflows(
+                                [
+                                    StartWorkflowArg(
+                                        ArchiveEnvWorkflow.run,
+                                        details,
+                                        workflow_id,
+                                    )
+                                    for details, workflow_id in environment_delete_payload
+                                ]
+                            )
 
                         transaction.on_commit(on_commit)
                     else:
@@ -410,21 +427,29 @@ class GithubWebhookAPIView(APIView):
                             )
 
                         def commit_callback():
-                            for dpl in deployments_to_cancel:
-                                TemporalClient.workflow_signal(
-                                    workflow=DeployGitServiceWorkflow.run,
-                                    input=CancelDeploymentSignalInput(
-                                        deployment_hash=dpl.hash
-                                    ),
-                                    signal=DeployGitServiceWorkflow.cancel_deployment,  # type: ignore
-                                    workflow_id=dpl.workflow_id,
-                                )
-                            for payload in payloads_for_workflows_to_run:
-                                TemporalClient.start_workflow(
-                                    workflow=DeployGitServiceWorkflow.run,
-                                    arg=payload,
-                                    id=payload.workflow_id,
-                                )
+                            TemporalClient.signal_workflows(
+                                [
+                                    SignalWorkflowArg(
+                                        workflow=DeployGitServiceWorkflow.run,
+                                        input=CancelDeploymentSignalInput(
+                                            deployment_hash=dpl.hash
+                                        ),
+                                        signal=DeployGitServiceWorkflow.cancel_deployment,  # type: ignore
+                                        workflow_id=dpl.workflow_id,
+                                    )
+                                    for dpl in deployments_to_cancel
+                                ]
+                            )
+                            TemporalClient.start_workflows(
+                                [
+                                    StartWorkflowArg(
+                                        workflow=DeployGitServiceWorkflow.run,
+                                        payload=payload,
+                                        workflow_id=payload.workflow_id,
+                                    )
+                                    for payload in payloads_for_workflows_to_run
+                                ]
+                            )
 
                         transaction.on_commit(commit_callback)
 
@@ -451,6 +476,7 @@ class GithubWebhookAPIView(APIView):
 
                 base_repository_url = f"https://github.com/{pull_request["base"]['repo']["full_name"]}.git"
                 head_repository_url = f"https://github.com/{pull_request["head"]['repo']["full_name"]}.git"
+                network_workflows: List[StartWorkflowArg] = []
                 workflows_to_run: List[StartWorkflowArg] = []
                 workflows_signals: List[SignalWorkflowArg] = []
 
@@ -560,7 +586,7 @@ class GithubWebhookAPIView(APIView):
                                 }
 
                                 # 3️⃣ Make the POST request
-                                response = requests.post(
+                                response = github_http_session().post(
                                     url, headers=headers, json=payload
                                 )
                                 # 4️⃣ Check the response
@@ -582,7 +608,7 @@ class GithubWebhookAPIView(APIView):
                                         response.text,
                                     )
                             else:
-                                workflows_to_run.append(
+                                network_workflows.append(
                                     StartWorkflowArg(
                                         workflow=CreateEnvNetworkWorkflow.run,
                                         payload=EnvironmentDetails(
@@ -645,7 +671,7 @@ class GithubWebhookAPIView(APIView):
                                         }
 
                                         # 3️⃣ Make the POST request
-                                        response = requests.post(
+                                        response = github_http_session().post(
                                             url, headers=headers, json=payload
                                         )
                                         # 4️⃣ Check the response
@@ -785,20 +811,10 @@ class GithubWebhookAPIView(APIView):
                         pass
 
                 def on_commit():
-                    for signal in workflows_signals:
-                        TemporalClient.workflow_signal(
-                            workflow=signal.workflow,
-                            input=signal.input,
-                            signal=signal.signal,  # type: ignore
-                            workflow_id=signal.workflow_id,
-                        )
-                    for wf in workflows_to_run:
-                        TemporalClient.start_workflow(
-                            workflow=wf.workflow,
-                            arg=wf.payload,
-                            id=wf.workflow_id,
-                            start_delay=wf.start_delay,
-                        )
+                    TemporalClient.signal_workflows(workflows_signals)
+                    # the networks of the environments are created before their services are deployed
+                    TemporalClient.start_workflows(network_workflows)
+                    TemporalClient.start_workflows(workflows_to_run)
 
                 transaction.on_commit(on_commit)
 
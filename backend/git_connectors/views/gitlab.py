@@ -3,6 +3,8 @@ import time
 from typing import List, cast
 from urllib.parse import urlencode, urlparse
 import requests
+from zane_api.http_client import gitlab_http_session
+from zane_api.git_client import update_cached_git_ref
 from rest_framework.views import APIView
 from rest_framework.generics import RetrieveAPIView
 from rest_framework import exceptions
@@ -112,7 +114,7 @@ class SetupGitlabAppAPIView(APIView):
             case state if isinstance(state, str) and state.startswith(
                 GitlabApp.SETUP_STATE_CACHE_PREFIX
             ):
-                response = requests.post(
+                response = gitlab_http_session().post(
                     f"{state_data['gitlab_url']}/oauth/token",
                     data=dict(
                         client_id=state_data["app_id"],
@@ -153,7 +155,7 @@ class SetupGitlabAppAPIView(APIView):
                     )
 
                 gl_app = cast(GitlabApp, git_app.gitlab)
-                response = requests.post(
+                response = gitlab_http_session().post(
                     f"{gl_app.gitlab_url}/oauth/token",
                     data=dict(
                         client_id=gl_app.app_id,
@@ -213,7 +215,7 @@ class TestGitlabAppAPIView(APIView):
                 "Accept": "application/json",
                 "Authorization": f"Bearer {access_token}",
             }
-            response = requests.get(
+            response = gitlab_http_session().get(
                 url + "?" + urlencode(params, doseq=True), headers=headers
             )
 
@@ -369,6 +371,13 @@ class GitlabWebhookAPIView(APIView):
                 if ref.startswith("refs/heads/"):
                     head_branch_name = ref.replace("refs/heads/", "")
                     repository_url = data["repository"]["git_http_url"]
+                    # keep the cached branches of the repository up to date
+                    update_cached_git_ref(
+                        repository_url,
+                        head_branch_name,
+                        None if is_branch_deleted else data["after"],
+                        git_app_id=gitapp.id,
+                    )
 
                     if is_branch_deleted:
                         environment_delete_payload: list[
@@ -397,12 +406,16 @@ class GitlabWebhookAPIView(APIView):
                             environment.delete()
 
                         def on_commit():
-                            for details, workflow_id in environment_delete_payload:
-                                TemporalClient.start_workflow(
-                                    ArchiveEnvWorkflow.run,
-                                    details,
-                                    id=workflow_id,
-                                )
+                            TemporalClient.start_workflows(
+                                [
+                                    StartWorkflowArg(
+                                        ArchiveEnvWorkflow.run,
+                                        details,
+                                        workflow_id,
+                                    )
+                                    for details, workflow_id in environment_delete_payload
+                                ]
+                            )
 
                         transaction.on_commit(on_commit)
                     else:
@@ -456,21 +469,29 @@ class GitlabWebhookAPIView(APIView):
                             )
 
                         def commit_callback():
-                            for dpl in deployments_to_cancel:
-                                TemporalClient.workflow_signal(
-                                    workflow=DeployGitServiceWorkflow.run,
-                                    input=CancelDeploymentSignalInput(
-                                        deployment_hash=dpl.hash
-                                    ),
-                                    signal=DeployGitServiceWorkflow.cancel_deployment,  # type: ignore
-                                    workflow_id=dpl.workflow_id,
-                                )
-                            for payload in payloads_for_workflows_to_run:
-                                TemporalClient.start_workflow(
-                                    workflow=DeployGitServiceWorkflow.run,
-                                    arg=payload,
-                                    id=payload.workflow_id,
-                                )
+                            TemporalClient.signal_workflows(
+                                [
+                                    SignalWorkflowArg(
+                                        workflow=DeployGitServiceWorkflow.run,
+                                        input=CancelDeploymentSignalInput(
+                                            deployment_hash=dpl.hash
+                                        ),
+                                        signal=DeployGitServiceWorkflow.cancel_deployment,  # type: ignore
+                                        workflow_id=dpl.workflow_id,
+                                    )
+                                    for dpl in deployments_to_cancel
+                                ]
+                            )
+                            TemporalClient.start_workflows(
+                                [
+                                    StartWorkflowArg(
+                                        workflow=DeployGitServiceWorkflow.run,
+                                        payload=payload,
+                                        workflow_id=payload.workflow_id,
+                                    )
+                                    for payload in payloads_for_workflows_to_run
+                                ]
+                            )
 
                         transaction.on_commit(commit_callback)
 
@@ -483,6 +504,7 @@ class GitlabWebhookAPIView(APIView):
 
                 is_fork = base_repository_url != head_repository_url
 
+                network_workflows: List[StartWorkflowArg] = []
                 workflows_to_run: List[StartWorkflowArg] = []
                 workflows_signals: List[SignalWorkflowArg] = []
 
@@ -593,7 +615,7 @@ class GitlabWebhookAPIView(APIView):
                                 }
 
                                 # 3️⃣ Make the POST request
-                                response = requests.post(
+                                response = gitlab_http_session().post(
                                     url, headers=headers, json=payload
                                 )
                                 # 4️⃣ Check the response
@@ -617,7 +639,7 @@ class GitlabWebhookAPIView(APIView):
                                 pass
 
                             else:
-                                workflows_to_run.append(
+                                network_workflows.append(
                                     StartWorkflowArg(
                                         workflow=CreateEnvNetworkWorkflow.run,
                                         payload=EnvironmentDetails(
@@ -679,7 +701,7 @@ class GitlabWebhookAPIView(APIView):
                                         }
 
                                         # 3️⃣ Make the POST request
-                                        response = requests.post(
+                                        response = gitlab_http_session().post(
                                             url, headers=headers, json=payload
                                         )
                                         # 4️⃣ Check the response
@@ -818,20 +840,10 @@ class GitlabWebhookAPIView(APIView):
                         pass
 
                 def on_commit():
-                    for signal in workflows_signals:
-                        TemporalClient.workflow_signal(
-                            workflow=signal.workflow,
-                            input=signal.input,
-                            signal=signal.signal,  # type: ignore
-                            workflow_id=signal.workflow_id,
-                        )
-                    for wf in workflows_to_run:
-                        TemporalClient.start_workflow(
-                            workflow=wf.workflow,
-                            arg=wf.payload,
-                            id=wf.workflow_id,
-                            start_delay=wf.start_delay,
-                        )
+                    TemporalClient.signal_workflows(workflows_signals)
+                    # the networks of the environments are created before their services are deployed
+                    TemporalClient.start_workflows(network_workflows)
+                    TemporalClient.start_workflows(workflows_to_run)
 
                 transaction.on_commit(on_commit)
             case _:
@@ -6,3 +6,11 @@ workers = int(os.environ.get("GUNICORN_WORKERS", 2))
 bind = "unix:/run/gunicorn/gunicorn.sock"
 loglevel = "info"
 timeout = 120
+
+
+def child_exit(server, worker):
+    # remove the prometheus metrics of the dead worker, when they are shared between workers
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
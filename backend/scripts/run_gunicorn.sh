@@ -5,4 +5,10 @@ source /venv/bin/activate
 python manage.py migrate 
 python manage.py create_metrics_cleanup_schedule 
 python manage.py create_system_cleanup_schedule
+python manage.py create_metrics_collector_schedule
+python manage.py create_healthcheck_monitor
+# the metrics of the gunicorn workers are shared through this directory, emptied at each start
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus-metrics}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
 gunicorn --config=/app/gunicorn.conf.py backend.wsgi:application
\ No newline at end of file
@@ -0,0 +1,250 @@
+import asyncio
+import time
+import weakref
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from django.conf import settings
+
+from zane_api.utils import Colors
+from .dtos import RuntimeLogDto
+from .loki_client import LokiSearchClient
+
+
+@dataclass
+class LogSinkStats:
+    queued_lines: int
+    flushed_lines: int
+    dropped_lines: int
+    flushes: int
+    failed_flushes: int
+
+
+@dataclass
+class LogSinkMark:
+    """
+    Position in the sink of the last line written in a context, see `track_log_sink_writes`.
+    """
+
+    position: int = 0
+
+
+_log_sink_mark: ContextVar[Optional[LogSinkMark]] = ContextVar(
+    "log_sink_mark", default=None
+)
+
+
+def track_log_sink_writes() -> LogSinkMark:
+    """
+    Track the lines written to the sinks from the current context and the tasks it starts,
+    so that only these lines are waited for with `flush(until=mark.position)`.
+    """
+    mark = LogSinkMark()
+    _log_sink_mark.set(mark)
+    return mark
+
+
+class LokiLogSink:
+    """
+    Asynchronous, buffered writer for pushing deployment logs to Loki.
+
+    Log lines are put into a bounded queue and pushed by a single background task
+    in batches, either when `max_batch_size` lines are buffered or when `flush_interval`
+    seconds have elapsed since the first buffered line, whichever comes first.
+    Pushes are done in a thread with a pooled HTTP session, so that the event loop is never
+    blocked by the network round-trip.
+
+    When the queue is full, producers wait (back-pressure) up to `put_timeout` seconds,
+    after which the lines are dropped and accounted in `dropped_lines`.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        max_batch_size: int = 500,
+        flush_interval: float = 0.25,
+        max_queue_size: int = 20_000,
+        put_timeout: float = 5.0,
+        push_timeout: float = 10.0,
+        max_push_attempts: int = 3,
+    ):
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.push_timeout = push_timeout
+        self.max_push_attempts = max_push_attempts
+
+        self.client = LokiSearchClient(host=host)
+
+        self._queue: asyncio.Queue[RuntimeLogDto] = asyncio.Queue(
+            maxsize=max_queue_size
+        )
+        self._flush_requested = asyncio.Event()
+        # set and replaced each time a batch is pushed or dropped
+        self._progress = asyncio.Event()
+        self._enqueued_lines = 0
+        self._processed_lines = 0
+        self._consumer_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+        self.flushed_lines = 0
+        self.dropped_lines = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+
+    @property
+    def stats(self) -> LogSinkStats:
+        return LogSinkStats(
+            queued_lines=self._queue.qsize(),
+            flushed_lines=self.flushed_lines,
+            dropped_lines=self.dropped_lines,
+            flushes=self.flushes,
+            failed_flushes=self.failed_flushes,
+        )
+
+    def _ensure_consumer(self):
+        if self._consumer_task is None or self._consumer_task.done():
+            self._consumer_task = asyncio.create_task(self._consume())
+
+    async def put(self, docs: Sequence[RuntimeLogDto]):
+        """
+        Enqueue log lines to be pushed to Loki, waiting for free space if the queue is full.
+        """
+        if self._closed:
+            raise RuntimeError("Cannot write to a closed log sink")
+        self._ensure_consumer()
+        mark = _log_sink_mark.get()
+        deadline = time.monotonic() + self.put_timeout
+        try:
+            for index, doc in enumerate(docs):
+                try:
+                    self._queue.put_nowait(doc)
+                except asyncio.QueueFull:
+                    self._flush_requested.set()
+                    try:
+                        await asyncio.wait_for(
+                            self._queue.put(doc),
+                            timeout=max(0, deadline - time.monotonic()),
+                        )
+                    except asyncio.TimeoutError:
+                        dropped = len(docs) - index
+                        self.dropped_lines += dropped
+                        print(
+                            f"[{Colors.YELLOW}log sink{Colors.ENDC}] {Colors.RED}Queue full, dropped {dropped} log lines{Colors.ENDC}"
+                        )
+                        return
+                self._enqueued_lines += 1
+
+                if self._queue.qsize() >= self.max_batch_size:
+                    self._flush_requested.set()
+        finally:
+            if mark is not None:
+                mark.position = self._enqueued_lines
+
+    async def flush(self, until: Optional[int] = None):
+        """
+        Wait for all the lines enqueued so far to be pushed to Loki (or dropped).
+        With `until`, only wait for the lines enqueued up to that position, the lines
+        written afterward by other producers are not waited for.
+        """
+        if self._consumer_task is None:
+            return
+        self._ensure_consumer()
+        self._flush_requested.set()
+        if until is None:
+            await self._queue.join()
+            return
+        while self._processed_lines < until:
+            progress = self._progress
+            self._flush_requested.set()
+            await progress.wait()
+
+    async def close(self):
+        await self.flush()
+        self._closed = True
+        if self._consumer_task is not None:
+            self._consumer_task.cancel()
+            try:
+                await self._consumer_task
+            except asyncio.CancelledError:
+                pass
+
+    async def _next_batch(self) -> List[RuntimeLogDto]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._flush_requested.is_set():
+                break
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+        if self._queue.empty():
+            self._flush_requested.clear()
+        return batch
+
+    async def _consume(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._push(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+                self._processed_lines += len(batch)
+                self._progress.set()
+                self._progress = asyncio.Event()
+
+    async def _push(self, batch: List[RuntimeLogDto]):
+        for attempt in range(1, self.max_push_attempts + 1):
+            try:
+                await asyncio.to_thread(
+                    self.client.bulk_insert, batch, timeout=self.push_timeout
+                )
+            except Exception as e:
+                self.failed_flushes += 1
+                print(
+                    f"[{Colors.YELLOW}log sink{Colors.ENDC}] {Colors.RED}Failed pushing {len(batch)} log lines to loki (attempt {attempt}/{self.max_push_attempts}){Colors.ENDC}: {Colors.GREY}{e}{Colors.ENDC}"
+                )
+                if attempt < self.max_push_attempts:
+                    await asyncio.sleep(0.1 * 2**attempt)
+            else:
+                self.flushes += 1
+                self.flushed_lines += len(batch)
+                return
+        self.dropped_lines += len(batch)
+
+
+_sinks: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, LokiLogSink] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_loki_log_sink() -> LokiLogSink:
+    """
+    Return the log sink bound to the running event loop, creating it if necessary.
+    There is one sink per event loop, which means one per worker process in production.
+    """
+    loop = asyncio.get_running_loop()
+    sink = _sinks.get(loop)
+    if sink is None:
+        sink = LokiLogSink(host=settings.LOKI_HOST)
+        _sinks[loop] = sink
+    return sink
+
+
+async def flush_loki_log_sink(until: Optional[int] = None):
+    """
+    Flush the log sink of the running event loop, if it has been created.
+    """
+    sink = _sinks.get(asyncio.get_running_loop())
+    if sink is not None:
+        await sink.flush(until=until)
@@ -1,30 +1,84 @@
 import base64
+import hashlib
 import json
 import datetime
+import math
 import requests
+from dataclasses import dataclass
 from datetime import timedelta
 from typing import Sequence
 from zane_api.utils import Colors
+from zane_api.prometheus import loki_push_duration, loki_push_failures
+from zane_api.http_client import loki_http_session
 from .serializers import RuntimeLogsQuerySerializer, RuntimeLogsSearchSerializer
-from .dtos import RuntimeLogDto
+from .dtos import LiveRuntimeLogQueryDto, RuntimeLogDto
 from django.conf import settings
+from django.core.cache import cache
 from uuid import uuid4
 import re
-from rest_framework import status
+import urllib.parse
+
+
+@dataclass
+class LokiQueryStats:
+    """
+    Number of queries sent to Loki by a client, and the time Loki spent on them.
+    """
+
+    round_trips: int = 0
+    queue_time_ms: float = 0
+    exec_time_ms: float = 0
+
+    @property
+    def time_ms(self) -> float:
+        return self.queue_time_ms + self.exec_time_ms
+
+    def record(self, summary: dict):
+        self.round_trips += 1
+        self.queue_time_ms += summary.get("queueTime", 0) * 1000
+        self.exec_time_ms += summary.get("execTime", 0) * 1000
+
+    def as_server_timing(self) -> str:
+        return f'loki;desc="{self.round_trips} queries";dur={self.time_ms:.2f}'
 
 
 class LokiSearchClient:
-    def __init__(self, host: str):
+    # logs can be ingested with a delay, a time range is only considered closed after this margin
+    CLOSED_RANGE_MARGIN = timedelta(minutes=5)
+    CLOSED_RANGE_CACHE_TTL = timedelta(hours=1)
+
+    def __init__(self, host: str, session: requests.Session | None = None):
         # host should include the protocol and port, e.g., "http://localhost:3100"
         self.base_url = host.rstrip("/")
+        # all the clients share the connection pool of the loki session by default
+        self.http = session if session is not None else loki_http_session()
+        self.stats = LokiQueryStats()
 
-    def bulk_insert(self, docs: Sequence[RuntimeLogDto]):
+    def bulk_insert(self, docs: Sequence[RuntimeLogDto], timeout: float | None = None):
         """
         Push multiple log entries to Loki.
         Each document must follow the structure of RuntimeLogDto
         """
         if len(docs) == 0:
             return
+        payload = self._build_push_payload(docs)
+        self._push(payload, timeout=timeout)
+
+    def _push(self, payload: dict, timeout: float | None = None):
+        try:
+            with loki_push_duration.time():
+                response = self.http.post(
+                    f"{self.base_url}/loki/api/v1/push",
+                    json=payload,
+                    stream=False,
+                    timeout=timeout,
+                )
+                response.raise_for_status()
+        except requests.RequestException:
+            loki_push_failures.inc()
+            raise
+
+    def _build_push_payload(self, docs: Sequence[RuntimeLogDto]):
         streams = {}
         for doc in docs:
             # Convert RuntimeLogDto to dict if needed
@@ -47,13 +101,7 @@ class LokiSearchClient:
                 streams[label_key] = {"stream": labels, "values": []}
             streams[label_key]["values"].append([ts, value])
 
-        payload = {"streams": list(streams.values())}
-        response = requests.post(
-            f"{self.base_url}/loki/api/v1/push",
-            json=payload,
-            stream=False,
-        )
-        response.raise_for_status()
+        return {"streams": list(streams.values())}
 
     def insert(self, document: RuntimeLogDto):
         """
@@ -73,12 +121,67 @@ class LokiSearchClient:
         payload = {
             "streams": [{"stream": labels, "values": [[ts, json.dumps(log_dict)]]}]
         }
-        response = requests.post(
-            f"{self.base_url}/loki/api/v1/push",
-            json=payload,
-            stream=False,
+        self._push(payload)
+
+    def _query(self, path: str, params: dict) -> dict:
+        """
+        Run a LogQL query and record its stats.
+        The body is decoded once, directly from the response stream.
+        """
+        response = self.http.get(
+            f"{self.base_url}/loki/api/v1/{path}",
+            params=params,
+            stream=True,
         )
-        response.raise_for_status()
+        try:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            result = json.load(response.raw)
+        finally:
+            response.close()
+        self.stats.record(result.get("data", {}).get("stats", {}).get("summary", {}))
+        return result
+
+    def _query_range(self, params: dict) -> dict:
+        return self._query("query_range", params)
+
+    def _query_metric(self, path: str, params: dict, end_ns: int) -> dict:
+        """
+        Run a LogQL metric query, the result is cached if the time range is closed,
+        as no log can be added to it anymore.
+        """
+        closed_before = datetime.datetime.now() - self.CLOSED_RANGE_MARGIN
+        if end_ns > closed_before.timestamp() * 10**9:
+            return self._query(path, params)
+
+        key = hashlib.sha256(
+            json.dumps([self.base_url, path, params], sort_keys=True).encode()
+        ).hexdigest()
+        key = f"loki-metric-{key}"
+        result = cache.get(key)
+        if result is None:
+            result = self._query(path, params)
+            cache.set(key, result, int(self.CLOSED_RANGE_CACHE_TTL.total_seconds()))
+        return result
+
+    @staticmethod
+    def _metric_range(filters: dict) -> tuple[int, int]:
+        """
+        Narrow the range of the query to the `time_after` and `time_before` filters,
+        so that closed ranges can be cached and the range vector isn't larger than needed.
+        """
+        start_ns, end_ns = filters["start"], filters["end"]
+        if filters["time_after"] is not None:
+            start_ns = max(start_ns, filters["time_after"])
+        if filters["time_before"] is not None:
+            end_ns = min(end_ns, filters["time_before"] + 1)
+        return start_ns, end_ns
+
+    @staticmethod
+    def _encode_cursor(timestamp: int, order: str) -> str:
+        return base64.b64encode(
+            json.dumps({"sort": [str(timestamp)], "order": order}).encode()
+        ).decode()
 
     def search(self, query: dict | None = None):
         print("\n====== LOGS SEARCH (Loki) ======")
@@ -90,31 +193,20 @@ class LokiSearchClient:
         end_ns = filters["end"]
         order = filters["order"]
 
+        # one more log than the page size is fetched, to know if there is a page after this one
         params = {
             "query": query_string,
-            "limit": page_size,
+            "limit": page_size + 1,
             "start": start_ns,
             "end": end_ns,
             "direction": "backward" if order == "desc" else "forward",
         }
 
         print(f"params={Colors.GREY}{params}{Colors.ENDC}")
-        response = requests.get(
-            f"{self.base_url}/loki/api/v1/query_range",
-            params=params,
-            stream=False,
-        )
-        response.raise_for_status()
+        round_trips, loki_time_ms = self.stats.round_trips, self.stats.time_ms
+        result = self._query_range(params)
+        query_time_ms = float(f"{self.stats.time_ms - loki_time_ms:.2f}")
 
-        summary = (
-            response.json()
-            .get("data", {})
-            .get("stats", {})
-            .get("summary", {"queueTime": 0, "execTime": 0})
-        )
-        query_time_ms = (summary["queueTime"] + summary["execTime"]) * 1000
-        query_time_ms = float(f"{query_time_ms:.2f}")
-        result = response.json()
         hits: list[dict] = []
         # Loki returns streams; each stream contains a list of log entries.
         for stream in result.get("data", {}).get("result", []):
@@ -137,66 +229,25 @@ class LokiSearchClient:
             hits, key=lambda hit: (hit["timestamp"], hit["created_at"]), reverse=True
         )
 
-        # Generate next cursor if total equals page size.
         next_cursor = None
-        if hits:
-            # the last log is the oldest log
-            last_timestamp = hits[-1]["timestamp"]
-            # Prepare parameters to check existence of older logs after this one
-            next_params = {
-                "query": query_string,
-                "limit": 1,
-                "end": last_timestamp,  # end is not included in the range, so it will not reference this timestamp
-                "direction": "backward",
-            }
-
-            next_response = requests.get(
-                f"{self.base_url}/loki/api/v1/query_range", params=next_params
-            )
-            if next_response.status_code == status.HTTP_200_OK:
-                next_result = next_response.json()
-                streams = next_result.get("data", {}).get("result", [])
-                if len(streams) > 0:
-                    log_data = streams[0].get("stream")
-                    if log_data:
-                        next_cursor_obj = {
-                            "sort": [str(int(float(log_data["time"])))],
-                            "order": "desc",
-                        }
-                        next_cursor = base64.b64encode(
-                            json.dumps(next_cursor_obj).encode()
-                        ).decode()
-
-        # Generate previous cursor only if there is at least one log in the inverse order.
         previous_cursor = None
-        if hits:
-            # the first log is the most recent log
-            first_timestamp = hits[0]["timestamp"]
-            # Prepare parameters to check existence of more recent logs after this one
-            prev_params = {
-                "query": query_string,
-                "limit": 1,
-                "start": (
-                    first_timestamp + 1
-                ),  # we do not want to include the first timestamp in the results
-                "direction": "forward",
-            }
-
-            prev_response = requests.get(
-                f"{self.base_url}/loki/api/v1/query_range", params=prev_params
-            )
-            if prev_response.status_code == status.HTTP_200_OK:
-                prev_result = prev_response.json()
-                streams = prev_result.get("data", {}).get("result", [])
-                if len(streams) > 0:
-                    log_data = streams[0].get("stream")
-                    previous_cursor_obj = {
-                        "sort": [str(int(float(log_data["time"])))],
-                        "order": "asc",
-                    }
-                    previous_cursor = base64.b64encode(
-                        json.dumps(previous_cursor_obj).encode()
-                    ).decode()
+        if order == "desc":
+            if len(hits) > page_size:
+                # the extra log is the oldest one, the next page starts with it
+                extra = hits.pop()
+                next_cursor = self._encode_cursor(extra["timestamp"], "desc")
+            if hits and filters["cursor_data"] is not None:
+                # this page was reached from a page of more recent logs
+                previous_cursor = self._encode_cursor(hits[0]["timestamp"] + 1, "asc")
+        else:
+            if len(hits) > page_size:
+                # the extra log is the most recent one, the previous page starts with it
+                extra = hits.pop(0)
+                previous_cursor = self._encode_cursor(extra["timestamp"], "asc")
+            if hits:
+                # whether there are older logs is only known when that page is requested,
+                # `end` is not included in the range so it will not reference the last log
+                next_cursor = self._encode_cursor(hits[-1]["timestamp"] - 1, "desc")
 
         data = {
             "query_time_ms": query_time_ms,
@@ -204,7 +255,7 @@ class LokiSearchClient:
                 {
                     "id": hit["id"],
                     "time": datetime.datetime.fromtimestamp(
-                        (hit["time"] // 1_000) / 1e6
+                        (hit["time"] // 1_000) / 1e6, tz=datetime.timezone.utc
                     ).isoformat(),  # remove nanoseconds, then divide by 1 million to get microseconds
                     "level": hit["level"],
                     "source": hit["source"],
@@ -224,34 +275,149 @@ class LokiSearchClient:
 
         print(
             f"Found {Colors.BLUE}{len(hits)}{Colors.ENDC} logs in Loki in {Colors.GREEN}{query_time_ms}ms{Colors.ENDC}"
+            f" ({Colors.GREY}{self.stats.round_trips - round_trips} round-trip{Colors.ENDC})"
         )
         print("====== END LOGS SEARCH (Loki) ======\n")
         return serializer.data
 
     def count(self, query: dict | None = None) -> int:
+        """
+        Count the logs matching `query` with a metric query,
+        so that Loki only returns the total instead of the logs.
+        """
         filters = self._compute_filters(query)
         print("====== LOGS COUNT (Loki) ======")
         print(f"{filters=}")
-        query_string = filters["query_string"]
+        start_ns, end_ns = self._metric_range(filters)
+        if end_ns <= start_ns:
+            return 0
+        range_seconds = math.ceil((end_ns - start_ns) / 10**9)
         params = {
-            "query": query_string,
-            "limit": 5000,
-            "start": filters["start"],
-            "end": filters["end"],
+            "query": f"sum(count_over_time({filters['query_string']} [{range_seconds}s]))",
+            "time": end_ns,
         }
-        response = requests.get(
-            f"{self.base_url}/loki/api/v1/query_range", params=params
-        )
-        if response.status_code != status.HTTP_200_OK:
-            raise Exception(f"Count failed: {response.text}")
-        result = response.json()
-        total = sum(
-            len(stream.get("values", []))
-            for stream in result.get("data", {}).get("result", [])
-        )
+        try:
+            result = self._query_metric("query", params, end_ns)
+        except requests.HTTPError as e:
+            raise Exception(f"Count failed: {e}")
+        vector = result.get("data", {}).get("result", [])
+        total = int(float(vector[0]["value"][1])) if vector else 0
         print("====== END LOGS COUNT (Loki) ======")
         return total
 
+    def histogram(self, query: dict | None = None, buckets: int = 60) -> dict:
+        """
+        Count the logs matching `query` per time bucket, splitting the time range in
+        about `buckets` buckets of the same size.
+        """
+        filters = self._compute_filters(query)
+        print("====== LOGS HISTOGRAM (Loki) ======")
+        print(f"{filters=}")
+        start_ns, end_ns = self._metric_range(filters)
+        step_seconds = max(1, math.ceil((end_ns - start_ns) / 10**9 / buckets))
+
+        # Loki returns the time of the steps in seconds, with a millisecond precision
+        counts: dict[int, int] = {}
+        if end_ns > start_ns:
+            params = {
+                "query": f"sum(count_over_time({filters['query_string']} [{step_seconds}s]))",
+                "start": start_ns,
+                "end": end_ns,
+                "step": f"{step_seconds}s",
+            }
+            result = self._query_metric("query_range", params, end_ns)
+            for series in result.get("data", {}).get("result", []):
+                for timestamp, value in series["values"]:
+                    counts[round(float(timestamp) * 1000)] = int(float(value))
+
+        # Loki omits the steps without any log, they are filled with zeros.
+        # Each step counts the logs in the `step` before it, so a bucket starts one step earlier
+        start_ms, end_ms, step_ms = start_ns // 10**6, end_ns // 10**6, step_seconds * 1000
+        first_step = min(counts) if counts else start_ms + step_ms
+        first_step -= ((first_step - start_ms) // step_ms) * step_ms
+        histogram = [
+            {
+                "time": datetime.datetime.fromtimestamp(
+                    (step - step_ms) / 1000, tz=datetime.timezone.utc
+                ),
+                "count": counts.get(step, 0),
+            }
+            for step in range(first_step, end_ms + 1, step_ms)
+        ]
+        print("====== END LOGS HISTOGRAM (Loki) ======")
+        return {
+            "total": sum(bucket["count"] for bucket in histogram),
+            "step_seconds": step_seconds,
+            "buckets": histogram,
+        }
+
+    # Loki refuses to return more entries than `max_entries_limit_per_query`
+    TAIL_MAX_ENTRIES = 5000
+
+    @staticmethod
+    def _live_query_string(query: LiveRuntimeLogQueryDto) -> str:
+        label_selectors = [
+            f'deployment_id="{query.deployment_id}"',
+            'source=~"(' + "|".join(query.sources) + ')"',
+            f'app="{settings.LOKI_APP_NAME}"',
+        ]
+        return "{" + ",".join(label_selectors) + "}"
+
+    def tail_url(self, query: LiveRuntimeLogQueryDto) -> str:
+        """
+        URL of the websocket streaming the logs matching `query` as they are ingested,
+        starting at `query.start`.
+        """
+        params = urllib.parse.urlencode(
+            {
+                "query": self._live_query_string(query),
+                "start": int(query.start.timestamp() * 10**9),
+                "limit": self.TAIL_MAX_ENTRIES,
+            }
+        )
+        base_url = re.sub(r"^http", "ws", self.base_url)
+        return f"{base_url}/loki/api/v1/tail?{params}"
+
+    @staticmethod
+    def log_from_entry(timestamp: str, line: str) -> dict:
+        """
+        Convert an entry `[timestamp, line]` of a Loki stream to the format of the search results.
+        """
+        log_data = json.loads(line)
+        return {
+            "id": log_data["id"],
+            "time": datetime.datetime.fromtimestamp(
+                (int(timestamp) // 1_000) / 1e6, tz=datetime.timezone.utc
+            ).isoformat(),
+            "level": log_data["level"],
+            "source": log_data["source"],
+            "service_id": log_data["service_id"],
+            "deployment_id": log_data["deployment_id"],
+            "content": log_data["content"],
+            "content_text": log_data["content_text"],
+            "timestamp": int(timestamp),
+        }
+
+    def logs_after(self, query: LiveRuntimeLogQueryDto, after_ns: int) -> list[dict]:
+        """
+        Logs matching `query` ingested after the timestamp `after_ns`, from the oldest to the most recent.
+        Used to resume a live stream of logs.
+        """
+        params = {
+            "query": self._live_query_string(query),
+            "limit": self.TAIL_MAX_ENTRIES,
+            "start": after_ns + 1,
+            "end": int(datetime.datetime.now().timestamp() * 10**9),
+            "direction": "forward",
+        }
+        result = self._query_range(params)
+        logs = [
+            self.log_from_entry(timestamp, line)
+            for stream in result.get("data", {}).get("result", [])
+            for timestamp, line in stream["values"]
+        ]
+        return sorted(logs, key=lambda log: log["timestamp"])
+
     def delete(self, query: dict | None = None):
         print("====== LOGS DELETE (Loki) ======")
         filters = self._compute_filters(query)
@@ -266,7 +432,7 @@ class LokiSearchClient:
         }
         print(f"{params=}")
 
-        response = requests.post(f"{self.base_url}/loki/api/v1/delete", params=params)
+        response = self.http.post(f"{self.base_url}/loki/api/v1/delete", params=params)
         response.raise_for_status()
         print("====== END LOGS DELETE (Loki) ======")
         return True
@@ -298,15 +464,17 @@ class LokiSearchClient:
         label_selectors.append(f'app="{settings.LOKI_APP_NAME}"')
         base_selector = "{" + ",".join(label_selectors) + "} | json"
 
+        time_after_ns = None
+        time_before_ns = None
         if search_params.get("time_after"):
             print(f"{search_params['time_after']=}")
             dt = search_params["time_after"]
-            dt = int(dt.timestamp() * 1e9)
+            time_after_ns = dt = int(dt.timestamp() * 1e9)
             base_selector = " ".join([base_selector, f"| time >= {dt}"])
         if search_params.get("time_before"):
             print(f"{search_params['time_before']=}")
             dt = search_params["time_before"]
-            dt = int(dt.timestamp() * 1e9)
+            time_before_ns = dt = int(dt.timestamp() * 1e9)
             base_selector = " ".join([base_selector, f"| time <= {dt}"])
 
         # Default time range: start=14 days ago, end=now.
@@ -355,4 +523,6 @@ class LokiSearchClient:
             "order": order,
             "cursor": cursor,
             "cursor_data": cursor_data,
+            "time_after": time_after_ns,
+            "time_before": time_before_ns,
         }
@@ -29,6 +29,17 @@ class RuntimeLogsSearchSerializer(serializers.Serializer):
     query_time_ms = serializers.FloatField(required=False)
 
 
+class RuntimeLogsHistogramBucketSerializer(serializers.Serializer):
+    time = serializers.DateTimeField()
+    count = serializers.IntegerField()
+
+
+class RuntimeLogsHistogramSerializer(serializers.Serializer):
+    total = serializers.IntegerField()
+    step_seconds = serializers.IntegerField()
+    buckets = RuntimeLogsHistogramBucketSerializer(many=True)
+
+
 class RuntimeLogsQuerySerializer(serializers.Serializer):
     deployment_id = serializers.CharField(required=False)
     service_id = serializers.CharField(required=False)
@@ -8,18 +8,19 @@ from temporalio.exceptions import ApplicationError
 import os
 import os.path
 import re
-import requests
 
 from rest_framework import status
 
 with workflow.unsafe.imports_passed_through():
     from zane_api.models import Deployment, Environment, GitApp
     from zane_api.constants import HEAD_COMMIT
+    from zane_api.http_client import github_http_session, gitlab_http_session
     import shutil
     from zane_api.git_client import (
         GitClient,
         GitCloneFailedError,
         GitCheckoutFailedError,
+        get_git_mirror_cache,
     )
     from ..helpers import (
         deployment_log,
@@ -43,6 +44,7 @@ with workflow.unsafe.imports_passed_through():
     )
 
     from zane_api.process import AyncSubProcessRunner
+    from django.conf import settings
     from django.utils import timezone
     from django.db.models import OuterRef, Subquery
 
@@ -140,16 +142,22 @@ class GitActivities:
         # 3️⃣ Make the request
         if preview_meta.pr_comment_id is not None:
             url = url_base + f"/comments/{preview_meta.pr_comment_id}"
-            response = requests.patch(url, headers=headers, json=payload)
+            response = await asyncio.to_thread(
+                github_http_session().patch, url, headers=headers, json=payload
+            )
 
             # we will need to recreate the PR comment
             if response.status_code == status.HTTP_404_NOT_FOUND:
                 url = url_base + f"/{issue_number}/comments"
-                response = requests.post(url, headers=headers, json=payload)
+                response = await asyncio.to_thread(
+                    github_http_session().post, url, headers=headers, json=payload
+                )
 
         else:
             url = url_base + f"/{issue_number}/comments"
-            response = requests.post(url, headers=headers, json=payload)
+            response = await asyncio.to_thread(
+                github_http_session().post, url, headers=headers, json=payload
+            )
 
         # 4️⃣ Check the response
         if status.is_success(response.status_code):
@@ -235,7 +243,8 @@ class GitActivities:
         # 3️⃣ Make the request
         if preview_meta.pr_comment_id is not None:
             url = f"{url_base}/{preview_meta.pr_comment_id}"
-            response = requests.put(
+            response = await asyncio.to_thread(
+                gitlab_http_session().put,
                 url,
                 headers=headers,
                 json=payload,
@@ -244,11 +253,15 @@ class GitActivities:
             # we will need to recreate the PR comment
             if response.status_code == status.HTTP_404_NOT_FOUND:
                 url = url_base
-                response = requests.post(url_base, headers=headers, json=payload)
+                response = await asyncio.to_thread(
+                    gitlab_http_session().post, url_base, headers=headers, json=payload
+                )
 
         else:
             url = url_base
-            response = requests.post(url_base, headers=headers, json=payload)
+            response = await asyncio.to_thread(
+                gitlab_http_session().post, url_base, headers=headers, json=payload
+            )
 
         # 4️⃣ Check the response
         if status.is_success(response.status_code):
@@ -391,15 +404,25 @@ class GitActivities:
                             repo_url
                         )
 
-                clone_task = asyncio.create_task(
-                    self.git_client.aclone_repository(
+                if settings.GIT_MIRROR_CACHE_ENABLED:
+                    # only the new commits are fetched from the remote
+                    clone = self.git_client.aclone_repository_with_mirror(
                         url=repo_url,
                         dest_path=build_location,
                         branch=service.branch_name,  # type: ignore - this is defined in the case of git services
+                        mirror_cache=get_git_mirror_cache(),
                         message_handler=message_handler,
                         cancel_event=cancel_event,
                     )
-                )
+                else:
+                    clone = self.git_client.aclone_repository(
+                        url=repo_url,
+                        dest_path=build_location,
+                        branch=service.branch_name,  # type: ignore - this is defined in the case of git services
+                        message_handler=message_handler,
+                        cancel_event=cancel_event,
+                    )
+                clone_task = asyncio.create_task(clone)
                 done_first, _ = await asyncio.wait(
                     [clone_task, heartbeat_task], return_when=asyncio.FIRST_COMPLETED
                 )
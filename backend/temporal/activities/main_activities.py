@@ -57,6 +57,12 @@ with workflow.unsafe.imports_passed_through():
         replace_placeholders,
     )
     from ..semaphore import AsyncSemaphore
+    from ..docker_events import get_docker_events_listener
+    from ..image_pulls import (
+        DockerImagePullError,
+        IMAGE_PULL_PROGRESS_INTERVAL,
+        start_image_pull,
+    )
     from ..helpers import (
         deployment_log,
         ZaneProxyClient,
@@ -94,13 +100,21 @@ from ..shared import (
 from ..constants import ZANEOPS_SLEEP_MANUAL_MARKER, DEPLOY_SEMAPHORE_KEY
 
 
+def get_deploy_semaphore(semaphore_timeout: timedelta) -> AsyncSemaphore:
+    # the slot is held by the workflow, as it is acquired and released in different activities
+    return AsyncSemaphore(
+        key=DEPLOY_SEMAPHORE_KEY,
+        limit=settings.TEMPORALIO_MAX_CONCURRENT_DEPLOYS,
+        semaphore_timeout=semaphore_timeout,
+        token=activity.info().workflow_id,
+    )
+
+
 @activity.defn
 async def acquire_deploy_semaphore():
     if settings.TESTING:
         return  # semaphores are causing issues in testing, blocking execution
-    semaphore = AsyncSemaphore(
-        key=DEPLOY_SEMAPHORE_KEY,
-        limit=settings.TEMPORALIO_MAX_CONCURRENT_DEPLOYS,
+    semaphore = get_deploy_semaphore(
         semaphore_timeout=settings.TEMPORALIO_WORKFLOW_EXECUTION_MAX_TIMEOUT,
     )
     await semaphore.acquire()
@@ -110,9 +124,7 @@ async def acquire_deploy_semaphore():
 async def release_deploy_semaphore():
     if settings.TESTING:
         return  # semaphores are causing issues in testing, blocking execution
-    semaphore = AsyncSemaphore(
-        key=DEPLOY_SEMAPHORE_KEY,
-        limit=settings.TEMPORALIO_MAX_CONCURRENT_DEPLOYS,
+    semaphore = get_deploy_semaphore(
         semaphore_timeout=settings.TEMPORALIO_WORKFLOW_EXECUTION_MAX_TIMEOUT,
     )
     await semaphore.release()
@@ -120,9 +132,7 @@ async def release_deploy_semaphore():
 
 @activity.defn
 async def lock_deploy_semaphore():
-    semaphore = AsyncSemaphore(
-        key=DEPLOY_SEMAPHORE_KEY,
-        limit=settings.TEMPORALIO_MAX_CONCURRENT_DEPLOYS,
+    semaphore = get_deploy_semaphore(
         semaphore_timeout=timedelta(
             minutes=5
         ),  # this is to prevent the system cleanup from blocking for too long
@@ -132,9 +142,7 @@ async def lock_deploy_semaphore():
 
 @activity.defn
 async def reset_deploy_semaphore():
-    semaphore = AsyncSemaphore(
-        key=DEPLOY_SEMAPHORE_KEY,
-        limit=settings.TEMPORALIO_MAX_CONCURRENT_DEPLOYS,
+    semaphore = get_deploy_semaphore(
         semaphore_timeout=timedelta(
             minutes=5
         ),  # this is to prevent the system cleanup from blocking for too long
@@ -393,35 +401,39 @@ class DockerSwarmActivities:
                 service_id=deployment.service_id,
                 project_id=deployment.project_id,
             )
-            try:
-                swarm_service = self.docker_client.services.get(service_name)
-            except docker.errors.NotFound:
-                print(f"service `{service_name}` not found")
-                # we will assume the service has already been deleted
-                pass
-            else:
-                swarm_service.remove()
+            # subscribe before removing the service, to not miss the removal of its containers
+            with get_docker_events_listener().subscribe(service_name) as docker_events:
+                try:
+                    swarm_service = self.docker_client.services.get(service_name)
+                except docker.errors.NotFound:
+                    print(f"service `{service_name}` not found")
+                    # we will assume the service has already been deleted
+                    pass
+                else:
+                    swarm_service.remove()
 
-            async def wait_for_service_containers_to_be_removed():
-                print(
-                    f"waiting for containers for service {service_name=} to be removed..."
-                )
-                container_list = self.docker_client.containers.list(
-                    filters={"name": service_name}
-                )
-                while len(container_list) > 0:
+                async def wait_for_service_containers_to_be_removed():
                     print(
-                        f"service {service_name=} is not removed yet, "
-                        + f"retrying in {settings.DEFAULT_HEALTHCHECK_WAIT_INTERVAL} seconds..."
+                        f"waiting for containers for service {service_name=} to be removed..."
                     )
-                    await asyncio.sleep(settings.DEFAULT_HEALTHCHECK_WAIT_INTERVAL)
                     container_list = self.docker_client.containers.list(
                         filters={"name": service_name}
                     )
-                    continue
-                print(f"service {service_name=} is removed, YAY !! 🎉")
+                    while len(container_list) > 0:
+                        print(
+                            f"service {service_name=} is not removed yet, "
+                            + "waiting for the next change of its containers..."
+                        )
+                        await docker_events.wait(
+                            timeout=settings.DOCKER_EVENTS_WAIT_TIMEOUT
+                        )
+                        container_list = self.docker_client.containers.list(
+                            filters={"name": service_name}
+                        )
+                        continue
+                    print(f"service {service_name=} is removed, YAY !! 🎉")
 
-            await wait_for_service_containers_to_be_removed()
+                await wait_for_service_containers_to_be_removed()
 
             print("Removed service. YAY !! 🎉")
             try:
@@ -955,23 +967,30 @@ class DockerSwarmActivities:
             if deployment.service_snapshot is not None:
                 update_attributes.update(endpoint_spec=EndpointSpec())
 
-            swarm_service.update(**update_attributes)
+            with get_docker_events_listener().subscribe(
+                swarm_service.name
+            ) as docker_events:
+                swarm_service.update(**update_attributes)
 
-            async def wait_for_service_to_be_down():
-                print(f"waiting for service `{swarm_service.name=}` to be down...")
-                task_list = swarm_service.tasks(filters={"desired-state": "running"})
-                while len(task_list) > 0:
-                    print(
-                        f"service `{swarm_service.name=}` is not down yet, "
-                        + f"retrying in `{settings.DEFAULT_HEALTHCHECK_WAIT_INTERVAL}` seconds..."
-                    )
-                    await asyncio.sleep(settings.DEFAULT_HEALTHCHECK_WAIT_INTERVAL)
+                async def wait_for_service_to_be_down():
+                    print(f"waiting for service `{swarm_service.name=}` to be down...")
                     task_list = swarm_service.tasks(
                         filters={"desired-state": "running"}
                     )
-                print(f"service `{swarm_service.name=}` is down, YAY !! 🎉")
+                    while len(task_list) > 0:
+                        print(
+                            f"service `{swarm_service.name=}` is not down yet, "
+                            + "waiting for the next change of its tasks..."
+                        )
+                        await docker_events.wait(
+                            timeout=settings.DOCKER_EVENTS_WAIT_TIMEOUT
+                        )
+                        task_list = swarm_service.tasks(
+                            filters={"desired-state": "running"}
+                        )
+                    print(f"service `{swarm_service.name=}` is down, YAY !! 🎉")
 
-            await wait_for_service_to_be_down()
+                await wait_for_service_to_be_down()
             # Change the status to be accurate
             deployment_query = Deployment.objects.filter(
                 hash=deployment.hash, service_id=deployment.service_id
@@ -1082,15 +1101,44 @@ class DockerSwarmActivities:
             deployment,
             f"Pulling image {Colors.ORANGE}{service.image}{Colors.ENDC}...",
         )
-        try:
-            self.docker_client.images.pull(
-                repository=service.image,  # type: ignore
-                auth_config=(
-                    service.credentials.to_dict()
-                    if service.credentials is not None
-                    else None
-                ),
+        image_pull, is_shared = start_image_pull(
+            self.docker_client,
+            image=service.image,  # type: ignore
+            auth_config=(
+                service.credentials.to_dict()
+                if service.credentials is not None
+                else None
+            ),
+        )
+        if is_shared:
+            await deployment_log(
+                deployment,
+                f"Image {Colors.ORANGE}{service.image}{Colors.ENDC} is already being pulled by another deployment, waiting for it...",
             )
+
+        reported_layers: dict[str, str] = {}
+        try:
+            while True:
+                # the pull is shared, it continues for the other deployments if this activity is cancelled
+                done, _ = await asyncio.wait(
+                    {image_pull.task}, timeout=IMAGE_PULL_PROGRESS_INTERVAL
+                )
+                activity.heartbeat("pulling image")
+                for layer_id, layer in list(image_pull.layers.items()):
+                    progress = str(layer)
+                    if reported_layers.get(layer_id) != progress:
+                        reported_layers[layer_id] = progress
+                        await deployment_log(
+                            deployment,
+                            f"{Colors.GREY}{layer_id}{Colors.ENDC}: {progress}",
+                        )
+                if done:
+                    break
+                await deployment_log(
+                    deployment,
+                    f"Pulling image {Colors.ORANGE}{service.image}{Colors.ENDC} | {Colors.BLUE}{image_pull.summary}{Colors.ENDC}",
+                )
+            image_pull.task.result()  # type: ignore
         except docker.errors.ImageNotFound:
             await deployment_log(
                 deployment,
@@ -1103,10 +1151,16 @@ class DockerSwarmActivities:
                 f"Error when pulling image {Colors.ORANGE}{service.image}{Colors.ENDC} {Colors.GREY}{e.explanation} ❌{Colors.ENDC}",
             )
             return False
+        except DockerImagePullError as e:
+            await deployment_log(
+                deployment,
+                f"Error when pulling image {Colors.ORANGE}{service.image}{Colors.ENDC} {Colors.GREY}{e} ❌{Colors.ENDC}",
+            )
+            return False
         else:
             await deployment_log(
                 deployment,
-                f"Finished pulling image {Colors.ORANGE}{service.image}{Colors.ENDC} ✅",
+                f"Finished pulling image {Colors.ORANGE}{service.image}{Colors.ENDC} | {Colors.BLUE}{image_pull.summary}{Colors.ENDC} ✅",
             )
             return True
 
@@ -1358,207 +1412,217 @@ class DockerSwarmActivities:
             deployment,
             f"Running healthchecks for deployment {Colors.ORANGE}{deployment.hash}{Colors.ENDC}...",
         )
-        while (monotonic() - start_time) < healthcheck_timeout:
-            healthcheck_attempts += 1
-            healthcheck_time_left = healthcheck_timeout - (monotonic() - start_time)
-
-            await deployment_log(
-                deployment,
-                f"Healthcheck for deployment {Colors.ORANGE}{service_deployment.hash}{Colors.ENDC}"
-                f" | {Colors.BLUE}ATTEMPT #{healthcheck_attempts}{Colors.ENDC}"
-                f" | healthcheck_time_left={Colors.ORANGE}{format_duration(healthcheck_time_left)}{Colors.ENDC} 💓",
-            )
-
-            task_list = swarm_service.tasks(
-                filters={
-                    "label": f"deployment_hash={service_deployment.hash}",
-                    "desired-state": "running",
-                }
-            )
-            if len(task_list) > 0:
-                most_recent_swarm_task = DockerSwarmTask.from_dict(
-                    max(
-                        task_list,
-                        key=lambda task: task["Version"]["Index"],
-                    )
+        # subscribe before the first attempt, to not miss the changes happening in between
+        with get_docker_events_listener().subscribe(swarm_service.name) as docker_events:
+            while (monotonic() - start_time) < healthcheck_timeout:
+                healthcheck_attempts += 1
+                healthcheck_time_left = healthcheck_timeout - (monotonic() - start_time)
+                # the next attempt is made as soon as the tasks of the service change
+                wait_timeout = min(
+                    healthcheck_time_left, settings.DOCKER_EVENTS_WAIT_TIMEOUT
                 )
 
-                # starting_status = DockerDeployment.DeploymentStatus.STARTING
-                # # We set the status to restarting, because we get more than one task for this service when we restart it
-                # if len(task_list) > 1:
-                #     starting_status = DockerDeployment.DeploymentStatus.RESTARTING
-
-                state_matrix = {
-                    DockerSwarmTaskState.NEW: Deployment.DeploymentStatus.STARTING,
-                    DockerSwarmTaskState.PENDING: Deployment.DeploymentStatus.STARTING,
-                    DockerSwarmTaskState.ASSIGNED: Deployment.DeploymentStatus.STARTING,
-                    DockerSwarmTaskState.ACCEPTED: Deployment.DeploymentStatus.STARTING,
-                    DockerSwarmTaskState.READY: Deployment.DeploymentStatus.STARTING,
-                    DockerSwarmTaskState.PREPARING: Deployment.DeploymentStatus.STARTING,
-                    DockerSwarmTaskState.STARTING: Deployment.DeploymentStatus.STARTING,
-                    DockerSwarmTaskState.RUNNING: Deployment.DeploymentStatus.HEALTHY,
-                    DockerSwarmTaskState.COMPLETE: Deployment.DeploymentStatus.REMOVED,
-                    DockerSwarmTaskState.FAILED: Deployment.DeploymentStatus.UNHEALTHY,
-                    DockerSwarmTaskState.SHUTDOWN: Deployment.DeploymentStatus.REMOVED,
-                    DockerSwarmTaskState.REJECTED: Deployment.DeploymentStatus.UNHEALTHY,
-                    DockerSwarmTaskState.ORPHANED: Deployment.DeploymentStatus.UNHEALTHY,
-                    DockerSwarmTaskState.REMOVE: Deployment.DeploymentStatus.REMOVED,
-                }
-
-                exited_without_error = 0
-                deployment_status = state_matrix[most_recent_swarm_task.state]
+                await deployment_log(
+                    deployment,
+                    f"Healthcheck for deployment {Colors.ORANGE}{service_deployment.hash}{Colors.ENDC}"
+                    f" | {Colors.BLUE}ATTEMPT #{healthcheck_attempts}{Colors.ENDC}"
+                    f" | healthcheck_time_left={Colors.ORANGE}{format_duration(healthcheck_time_left)}{Colors.ENDC} 💓",
+                )
 
-                all_tasks = swarm_service.tasks(
+                task_list = swarm_service.tasks(
                     filters={
                         "label": f"deployment_hash={service_deployment.hash}",
+                        "desired-state": "running",
                     }
                 )
-                if deployment_status == Deployment.DeploymentStatus.STARTING:
-                    # We set the status to restarting, because we get more than one task for this service when we restart it
-                    if len(all_tasks) > 1:
-                        deployment_status = Deployment.DeploymentStatus.RESTARTING
+                if len(task_list) > 0:
+                    most_recent_swarm_task = DockerSwarmTask.from_dict(
+                        max(
+                            task_list,
+                            key=lambda task: task["Version"]["Index"],
+                        )
+                    )
 
-                    service_deployment.status = deployment_status
-                    await service_deployment.asave(
-                        update_fields=["status", "updated_at"]
+                    # starting_status = DockerDeployment.DeploymentStatus.STARTING
+                    # # We set the status to restarting, because we get more than one task for this service when we restart it
+                    # if len(task_list) > 1:
+                    #     starting_status = DockerDeployment.DeploymentStatus.RESTARTING
+
+                    state_matrix = {
+                        DockerSwarmTaskState.NEW: Deployment.DeploymentStatus.STARTING,
+                        DockerSwarmTaskState.PENDING: Deployment.DeploymentStatus.STARTING,
+                        DockerSwarmTaskState.ASSIGNED: Deployment.DeploymentStatus.STARTING,
+                        DockerSwarmTaskState.ACCEPTED: Deployment.DeploymentStatus.STARTING,
+                        DockerSwarmTaskState.READY: Deployment.DeploymentStatus.STARTING,
+                        DockerSwarmTaskState.PREPARING: Deployment.DeploymentStatus.STARTING,
+                        DockerSwarmTaskState.STARTING: Deployment.DeploymentStatus.STARTING,
+                        DockerSwarmTaskState.RUNNING: Deployment.DeploymentStatus.HEALTHY,
+                        DockerSwarmTaskState.COMPLETE: Deployment.DeploymentStatus.REMOVED,
+                        DockerSwarmTaskState.FAILED: Deployment.DeploymentStatus.UNHEALTHY,
+                        DockerSwarmTaskState.SHUTDOWN: Deployment.DeploymentStatus.REMOVED,
+                        DockerSwarmTaskState.REJECTED: Deployment.DeploymentStatus.UNHEALTHY,
+                        DockerSwarmTaskState.ORPHANED: Deployment.DeploymentStatus.UNHEALTHY,
+                        DockerSwarmTaskState.REMOVE: Deployment.DeploymentStatus.REMOVED,
+                    }
+
+                    exited_without_error = 0
+                    deployment_status = state_matrix[most_recent_swarm_task.state]
+
+                    all_tasks = swarm_service.tasks(
+                        filters={
+                            "label": f"deployment_hash={service_deployment.hash}",
+                        }
+                    )
+                    if deployment_status == Deployment.DeploymentStatus.STARTING:
+                        # We set the status to restarting, because we get more than one task for this service when we restart it
+                        if len(all_tasks) > 1:
+                            deployment_status = Deployment.DeploymentStatus.RESTARTING
+
+                        service_deployment.status = deployment_status
+                        await service_deployment.asave(
+                            update_fields=["status", "updated_at"]
+                        )
+
+                    deployment_status_reason = (
+                        most_recent_swarm_task.Status.Err
+                        if most_recent_swarm_task.Status.Err is not None
+                        else most_recent_swarm_task.Status.Message
                     )
 
-                deployment_status_reason = (
-                    most_recent_swarm_task.Status.Err
-                    if most_recent_swarm_task.Status.Err is not None
-                    else most_recent_swarm_task.Status.Message
-                )
+                    if most_recent_swarm_task.state == DockerSwarmTaskState.SHUTDOWN:
+                        status_code = most_recent_swarm_task.Status.ContainerStatus.ExitCode  # type: ignore
+                        if (
+                            status_code is not None and status_code != exited_without_error
+                        ) or most_recent_swarm_task.Status.Err is not None:
+                            deployment_status = Deployment.DeploymentStatus.UNHEALTHY
 
-                if most_recent_swarm_task.state == DockerSwarmTaskState.SHUTDOWN:
-                    status_code = most_recent_swarm_task.Status.ContainerStatus.ExitCode  # type: ignore
                     if (
-                        status_code is not None and status_code != exited_without_error
-                    ) or most_recent_swarm_task.Status.Err is not None:
-                        deployment_status = Deployment.DeploymentStatus.UNHEALTHY
-
-                if (
-                    most_recent_swarm_task.state == DockerSwarmTaskState.RUNNING
-                    and most_recent_swarm_task.container_id is not None
-                ):
-                    if healthcheck is not None:
-                        try:
-                            print(
-                                f"Running custom healthcheck {healthcheck.type=} - {healthcheck.value=}"
+                        most_recent_swarm_task.state == DockerSwarmTaskState.RUNNING
+                        and most_recent_swarm_task.container_id is not None
+                    ):
+                        if healthcheck is not None:
+                            # docker doesn't tell when the app is ready, the healthcheck is retried after an interval
+                            wait_timeout = min(
+                                wait_timeout, settings.DEFAULT_HEALTHCHECK_WAIT_INTERVAL
                             )
-                            container = self.docker_client.containers.get(
-                                most_recent_swarm_task.container_id
-                            )
-                            if healthcheck.type == HealthCheck.HealthCheckType.COMMAND:
-                                await deployment_log(
-                                    deployment=deployment,
-                                    message=f"Running command {Colors.GREY}{healthcheck.value}{Colors.ENDC}",
-                                )
-                                exit_code, output = container.exec_run(
-                                    cmd=healthcheck.value,
-                                    stdout=True,
-                                    stderr=True,
-                                    stdin=False,
+                            try:
+                                print(
+                                    f"Running custom healthcheck {healthcheck.type=} - {healthcheck.value=}"
                                 )
-                                color = Colors.GREEN if exit_code == 0 else Colors.RED
-                                await deployment_log(
-                                    deployment=deployment,
-                                    message=f"Command finished with exit_code {color}{exit_code}{Colors.ENDC}",
+                                container = self.docker_client.containers.get(
+                                    most_recent_swarm_task.container_id
                                 )
-                                if exit_code == 0:
-                                    deployment_status = (
-                                        Deployment.DeploymentStatus.HEALTHY
+                                if healthcheck.type == HealthCheck.HealthCheckType.COMMAND:
+                                    await deployment_log(
+                                        deployment=deployment,
+                                        message=f"Running command {Colors.GREY}{healthcheck.value}{Colors.ENDC}",
                                     )
-                                else:
-                                    deployment_status = (
-                                        Deployment.DeploymentStatus.UNHEALTHY
+                                    exit_code, output = container.exec_run(
+                                        cmd=healthcheck.value,
+                                        stdout=True,
+                                        stderr=True,
+                                        stdin=False,
                                     )
-                                deployment_status_reason = output.decode("utf-8")
-                            else:
-                                container_networks = container.attrs["NetworkSettings"][
-                                    "Networks"
-                                ]
-                                dns_names = container_networks["zane"]["DNSNames"]
-                                container_hostname_in_network: str = next(
-                                    host
-                                    for host in dns_names
-                                    if container.id.startswith(host)  # type: ignore
-                                )
-                                full_url = f"http://{container_hostname_in_network}:{healthcheck.associated_port}{healthcheck.value}"
-                                timeout = min(healthcheck_time_left, 5)
-                                await deployment_log(
-                                    deployment=deployment,
-                                    message=f"Running {Colors.GREY}GET {full_url} (timeout: {timeout:.2f}s){Colors.ENDC}",
-                                )
-                                response = requests.get(
-                                    full_url,
-                                    timeout=timeout,
-                                )
-                                color = (
-                                    Colors.GREEN
-                                    if status.is_success(response.status_code)
-                                    else Colors.RED
-                                )
-                                await deployment_log(
-                                    deployment=deployment,
-                                    message=f"Got response with status code {color}{response.status_code}{Colors.ENDC}",
-                                )
-                                if status.is_success(response.status_code):
-                                    deployment_status = (
-                                        Deployment.DeploymentStatus.HEALTHY
+                                    color = Colors.GREEN if exit_code == 0 else Colors.RED
+                                    await deployment_log(
+                                        deployment=deployment,
+                                        message=f"Command finished with exit_code {color}{exit_code}{Colors.ENDC}",
                                     )
+                                    if exit_code == 0:
+                                        deployment_status = (
+                                            Deployment.DeploymentStatus.HEALTHY
+                                        )
+                                    else:
+                                        deployment_status = (
+                                            Deployment.DeploymentStatus.UNHEALTHY
+                                        )
+                                    deployment_status_reason = output.decode("utf-8")
                                 else:
-                                    deployment_status = (
-                                        Deployment.DeploymentStatus.UNHEALTHY
+                                    container_networks = container.attrs["NetworkSettings"][
+                                        "Networks"
+                                    ]
+                                    dns_names = container_networks["zane"]["DNSNames"]
+                                    container_hostname_in_network: str = next(
+                                        host
+                                        for host in dns_names
+                                        if container.id.startswith(host)  # type: ignore
                                     )
-                                deployment_status_reason = response.content.decode(
-                                    "utf-8"
-                                )
-                        except (HTTPError, RequestException) as e:
-                            deployment_status = Deployment.DeploymentStatus.UNHEALTHY
-                            deployment_status_reason = str(e)
-
-                healthcheck_time_left = healthcheck_timeout - (monotonic() - start_time)
-                if (
-                    deployment_status == Deployment.DeploymentStatus.HEALTHY
-                    or healthcheck_time_left
-                    <= settings.DEFAULT_HEALTHCHECK_WAIT_INTERVAL
-                ):
-                    status_color = (
-                        Colors.GREEN
-                        if deployment_status == Deployment.DeploymentStatus.HEALTHY
-                        else Colors.RED
-                    )
-                    await deployment_log(
-                        deployment,
-                        f"Healthcheck for deployment {Colors.ORANGE}{service_deployment.hash}{Colors.ENDC}"
-                        f" | {Colors.BLUE}ATTEMPT #{healthcheck_attempts}{Colors.ENDC} "
-                        f"| finished with result : {Colors.GREY}{deployment_status_reason}{Colors.ENDC}",
-                        error=status_color == Colors.RED,
-                    )
-                    await deployment_log(
-                        deployment,
-                        f"Healthcheck for deployment {Colors.ORANGE}{service_deployment.hash}{Colors.ENDC}"
-                        f" | {Colors.BLUE}ATTEMPT #{healthcheck_attempts}{Colors.ENDC} "
-                        f"| finished with status {status_color}{deployment_status}{Colors.ENDC}",
-                        error=status_color == Colors.RED,
-                    )
-                    return deployment_status, deployment_status_reason
+                                    full_url = f"http://{container_hostname_in_network}:{healthcheck.associated_port}{healthcheck.value}"
+                                    timeout = min(healthcheck_time_left, 5)
+                                    await deployment_log(
+                                        deployment=deployment,
+                                        message=f"Running {Colors.GREY}GET {full_url} (timeout: {timeout:.2f}s){Colors.ENDC}",
+                                    )
+                                    response = requests.get(
+                                        full_url,
+                                        timeout=timeout,
+                                    )
+                                    color = (
+                                        Colors.GREEN
+                                        if status.is_success(response.status_code)
+                                        else Colors.RED
+                                    )
+                                    await deployment_log(
+                                        deployment=deployment,
+                                        message=f"Got response with status code {color}{response.status_code}{Colors.ENDC}",
+                                    )
+                                    if status.is_success(response.status_code):
+                                        deployment_status = (
+                                            Deployment.DeploymentStatus.HEALTHY
+                                        )
+                                    else:
+                                        deployment_status = (
+                                            Deployment.DeploymentStatus.UNHEALTHY
+                                        )
+                                    deployment_status_reason = response.content.decode(
+                                        "utf-8"
+                                    )
+                            except (HTTPError, RequestException) as e:
+                                deployment_status = Deployment.DeploymentStatus.UNHEALTHY
+                                deployment_status_reason = str(e)
 
-            await deployment_log(
-                deployment,
-                f"Healthcheck for deployment {Colors.ORANGE}{service_deployment.hash}{Colors.ENDC}"
-                f" | {Colors.BLUE}ATTEMPT #{healthcheck_attempts}{Colors.ENDC} "
-                f"| finished with result : {Colors.GREY}{deployment_status_reason}{Colors.ENDC}",
-                error=True,
-            )
-            await deployment_log(
-                deployment,
-                f"Healthcheck for deployment deployment {Colors.ORANGE}{service_deployment.hash}{Colors.ENDC}"
-                f" | {Colors.BLUE}ATTEMPT #{healthcheck_attempts}{Colors.ENDC} "
-                f"| FAILED, Retrying in {Colors.ORANGE}{format_duration(settings.DEFAULT_HEALTHCHECK_WAIT_INTERVAL)}{Colors.ENDC} 🔄",
-                error=True,
-            )
-            await asyncio.sleep(settings.DEFAULT_HEALTHCHECK_WAIT_INTERVAL)
+                    healthcheck_time_left = healthcheck_timeout - (monotonic() - start_time)
+                    if (
+                        deployment_status == Deployment.DeploymentStatus.HEALTHY
+                        or healthcheck_time_left
+                        <= settings.DEFAULT_HEALTHCHECK_WAIT_INTERVAL
+                    ):
+                        status_color = (
+                            Colors.GREEN
+                            if deployment_status == Deployment.DeploymentStatus.HEALTHY
+                            else Colors.RED
+                        )
+                        await deployment_log(
+                            deployment,
+                            f"Healthcheck for deployment {Colors.ORANGE}{service_deployment.hash}{Colors.ENDC}"
+                            f" | {Colors.BLUE}ATTEMPT #{healthcheck_attempts}{Colors.ENDC} "
+                            f"| finished with result : {Colors.GREY}{deployment_status_reason}{Colors.ENDC}",
+                            error=status_color == Colors.RED,
+                        )
+                        await deployment_log(
+                            deployment,
+                            f"Healthcheck for deployment {Colors.ORANGE}{service_deployment.hash}{Colors.ENDC}"
+                            f" | {Colors.BLUE}ATTEMPT #{healthcheck_attempts}{Colors.ENDC} "
+                            f"| finished with status {status_color}{deployment_status}{Colors.ENDC}",
+                            error=status_color == Colors.RED,
+                        )
+                        return deployment_status, deployment_status_reason
+
+                await deployment_log(
+                    deployment,
+                    f"Healthcheck for deployment {Colors.ORANGE}{service_deployment.hash}{Colors.ENDC}"
+                    f" | {Colors.BLUE}ATTEMPT #{healthcheck_attempts}{Colors.ENDC} "
+                    f"| finished with result : {Colors.GREY}{deployment_status_reason}{Colors.ENDC}",
+                    error=True,
+                )
+                await deployment_log(
+                    deployment,
+                    f"Healthcheck for deployment deployment {Colors.ORANGE}{service_deployment.hash}{Colors.ENDC}"
+                    f" | {Colors.BLUE}ATTEMPT #{healthcheck_attempts}{Colors.ENDC} "
+                    f"| FAILED, Retrying in at most {Colors.ORANGE}{format_duration(wait_timeout)}{Colors.ENDC} 🔄",
+                    error=True,
+                )
+                await docker_events.wait(timeout=wait_timeout)
 
         status_color = (
             Colors.GREEN
@@ -1638,23 +1702,28 @@ class DockerSwarmActivities:
             # Do nothing, The service has already been deleted
             pass
         else:
-            swarm_service.scale(0)
+            with get_docker_events_listener().subscribe(service_name) as docker_events:
+                swarm_service.scale(0)
 
-            async def wait_for_service_to_be_down():
-                print(f"waiting for service {swarm_service.name=} to be down...")
-                task_list = swarm_service.tasks(filters={"desired-state": "running"})
-                while len(task_list) > 0:
-                    print(
-                        f"service {swarm_service.name=} is not down yet, "
-                        + f"retrying in {settings.DEFAULT_HEALTHCHECK_WAIT_INTERVAL} seconds..."
-                    )
-                    await asyncio.sleep(settings.DEFAULT_HEALTHCHECK_WAIT_INTERVAL)
+                async def wait_for_service_to_be_down():
+                    print(f"waiting for service {swarm_service.name=} to be down...")
                     task_list = swarm_service.tasks(
                         filters={"desired-state": "running"}
                     )
-                print(f"service {swarm_service.name=} is down, YAY !! 🎉")
+                    while len(task_list) > 0:
+                        print(
+                            f"service {swarm_service.name=} is not down yet, "
+                            + "waiting for the next change of its tasks..."
+                        )
+                        await docker_events.wait(
+                            timeout=settings.DOCKER_EVENTS_WAIT_TIMEOUT
+                        )
+                        task_list = swarm_service.tasks(
+                            filters={"desired-state": "running"}
+                        )
+                    print(f"service {swarm_service.name=} is down, YAY !! 🎉")
 
-            await wait_for_service_to_be_down()
+                await wait_for_service_to_be_down()
             swarm_service.remove()
         finally:
             return service_name
@@ -1805,6 +1874,9 @@ class DockerSwarmActivities:
                 non_retryable=True,
             )
         else:
+            if settings.METRICS_NODE_COLLECTOR_ENABLED:
+                # the stats are collected for all deployments at once by `CollectNodeDeploymentStatsWorkflow`
+                return None
             details = SimpleDeploymentDetails(
                 hash=deployment.hash,
                 service_id=deployment.service.id,
@@ -1844,6 +1916,9 @@ class DockerSwarmActivities:
                 non_retryable=True,
             )
         else:
+            if settings.HEALTHCHECK_MONITOR_ENGINE_ENABLED:
+                # the deployment is monitored with all the others by `HealthcheckMonitorWorkflow`
+                return None
             healthcheck: Optional[HealthCheck] = docker_deployment.service.healthcheck
             healthcheck_details = HealthcheckDeploymentDetails(
                 deployment=SimpleDeploymentDetails(
@@ -6,6 +6,7 @@ with workflow.unsafe.imports_passed_through():
     from django.core.cache import cache
     from django.conf import settings
     from zane_api.utils import DockerSwarmTask, DockerSwarmTaskState
+    from zane_api.prometheus import instrument_docker_client
 
 from ..shared import UpdateDetails, UpdateOnGoingDetails
 from ..constants import ZANEOPS_ONGOING_UPDATE_CACHE_KEY
@@ -17,7 +18,7 @@ docker_client: docker.DockerClient | None = None
 def get_docker_client():
     global docker_client
     if docker_client is None:
-        docker_client = docker.from_env()
+        docker_client = instrument_docker_client(docker.from_env())
     return docker_client
 
 
@@ -1,4 +1,6 @@
+import asyncio
 from datetime import timedelta
+import logging
 import traceback
 from typing import Any, Awaitable, Callable, List, Optional, Union
 
@@ -28,6 +30,8 @@ with workflow.unsafe.imports_passed_through():
     from asgiref.sync import async_to_sync
     from django.conf import settings
 
+logger = logging.getLogger(__name__)
+
 
 async def get_temporalio_client():
     return await Client.connect(
@@ -51,6 +55,16 @@ class SignalWorkflowArg:
     workflow_id: str
 
 
+@dataclass
+class WorkflowBatchResult:
+    workflow_id: str
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
 class TemporalClient:
     _client: Optional[Client] = None
 
@@ -153,6 +167,105 @@ class TemporalClient:
         except RPCError:
             pass
 
+    @classmethod
+    async def _run_batch(
+        cls,
+        ids: List[str],
+        calls: List[Callable[[], Awaitable[Any]]],
+        max_concurrency: int,
+        action: str,
+    ) -> List[WorkflowBatchResult]:
+        # the requests of a batch run concurrently and can reach temporal in any order,
+        # a workflow that must start before the others should be started in an earlier batch
+        semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+
+        async def run(call: Callable[[], Awaitable[Any]]):
+            async with semaphore:
+                return await call()
+
+        # the client is shared by all the requests of the batch
+        await cls._ensure_client()
+        outcomes = await asyncio.gather(
+            *[run(call) for call in calls], return_exceptions=True
+        )
+        results = []
+        for workflow_id, outcome in zip(ids, outcomes):
+            error = outcome if isinstance(outcome, BaseException) else None
+            if error is not None:
+                logger.error(
+                    f"Failed to {action} the workflow {workflow_id=}",
+                    exc_info=error,
+                )
+            results.append(WorkflowBatchResult(workflow_id=workflow_id, error=error))
+        return results
+
+    @classmethod
+    def start_workflows(
+        cls,
+        workflows: List[StartWorkflowArg],
+        max_concurrency: int = settings.TEMPORALIO_BATCH_MAX_CONCURRENCY,
+    ) -> List[WorkflowBatchResult]:
+        return async_to_sync(cls.astart_workflows)(workflows, max_concurrency)
+
+    @classmethod
+    async def astart_workflows(
+        cls,
+        workflows: List[StartWorkflowArg],
+        max_concurrency: int = settings.TEMPORALIO_BATCH_MAX_CONCURRENCY,
+    ) -> List[WorkflowBatchResult]:
+        """
+        Start all the `workflows` on the same event loop, with at most `max_concurrency` requests at a time.
+        The failure of a workflow doesn't prevent the others from starting,
+        the result of each workflow is returned in the order of `workflows`.
+        """
+        return await cls._run_batch(
+            [wf.workflow_id for wf in workflows],
+            [
+                lambda wf=wf: cls.astart_workflow(
+                    workflow=wf.workflow,
+                    arg=wf.payload,
+                    id=wf.workflow_id,
+                    start_delay=wf.start_delay,
+                )
+                for wf in workflows
+            ],
+            max_concurrency,
+            action="start",
+        )
+
+    @classmethod
+    def signal_workflows(
+        cls,
+        signals: List[SignalWorkflowArg],
+        max_concurrency: int = settings.TEMPORALIO_BATCH_MAX_CONCURRENCY,
+    ) -> List[WorkflowBatchResult]:
+        return async_to_sync(cls.asignal_workflows)(signals, max_concurrency)
+
+    @classmethod
+    async def asignal_workflows(
+        cls,
+        signals: List[SignalWorkflowArg],
+        max_concurrency: int = settings.TEMPORALIO_BATCH_MAX_CONCURRENCY,
+    ) -> List[WorkflowBatchResult]:
+        """
+        Send all the `signals` on the same event loop, with at most `max_concurrency` requests at a time.
+        The result of each signal is returned in the order of `signals`.
+        """
+        return await cls._run_batch(
+            [signal.workflow_id for signal in signals],
+            [
+                lambda signal=signal: cls.aworkflow_signal(
+                    workflow=signal.workflow,  # type: ignore
+                    workflow_id=signal.workflow_id,
+                    signal=signal.signal,  # type: ignore
+                    arg=signal.input,
+                )
+                for signal in signals
+            ],
+            max_concurrency,
+            action="signal",
+        )
+
     @classmethod
     def create_schedule(
         cls,
@@ -0,0 +1,160 @@
+import asyncio
+import threading
+from collections import defaultdict
+from typing import Callable, Iterable, Optional
+
+from django.conf import settings
+
+from .helpers import get_docker_client
+
+# label set by swarm on the containers of the tasks of a service
+SWARM_SERVICE_NAME_LABEL = "com.docker.swarm.service.name"
+
+
+class DockerEventsSubscription:
+    """
+    Wake up an activity waiting for a change of the tasks of a swarm service.
+    The subscription only tells that *something* changed, the waiter re-checks the state itself.
+    Events received before `wait()` is called are not lost, the next `wait()` returns immediately.
+    """
+
+    def __init__(self, listener: "DockerEventsListener", service_name: str):
+        self.listener = listener
+        self.service_name = service_name
+        self.loop = asyncio.get_running_loop()
+        self.changed = asyncio.Event()
+
+    def notify(self):
+        # called from the thread of the listener
+        try:
+            self.loop.call_soon_threadsafe(self.changed.set)
+        except RuntimeError:
+            # the loop of the waiter is closed
+            pass
+
+    async def wait(self, timeout: float) -> bool:
+        """
+        Wait for the next change of the service, for at most `timeout` seconds.
+        When the listener is not connected to docker, this falls back to polling
+        every `DEFAULT_HEALTHCHECK_WAIT_INTERVAL` seconds.
+        Return `True` if an event was received.
+        """
+        if not self.listener.is_connected:
+            timeout = min(timeout, settings.DEFAULT_HEALTHCHECK_WAIT_INTERVAL)
+        try:
+            await asyncio.wait_for(self.changed.wait(), timeout=max(timeout, 0))
+        except asyncio.TimeoutError:
+            return False
+        self.changed.clear()
+        return True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.listener.unsubscribe(self)
+
+
+class DockerEventsListener:
+    """
+    A single subscription per worker to the docker `/events` stream, shared by all the activities
+    waiting for the tasks of a swarm service to change (start, die, health status, removal...).
+    The stream is read in a background thread, and reconnected when it drops.
+    """
+
+    RECONNECT_INTERVAL = 5
+
+    def __init__(self, event_source: Callable[[], Iterable[dict]]):
+        self.event_source = event_source
+        self.subscriptions: dict[str, set[DockerEventsSubscription]] = defaultdict(set)
+        self.lock = threading.Lock()
+        self.is_connected = False
+        self.stopped = threading.Event()
+
+    def subscribe(self, service_name: str) -> DockerEventsSubscription:
+        subscription = DockerEventsSubscription(self, service_name)
+        with self.lock:
+            self.subscriptions[service_name].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: DockerEventsSubscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.service_name)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if len(subscriptions) == 0:
+                    del self.subscriptions[subscription.service_name]
+
+    def dispatch(self, event: dict):
+        attributes = event.get("Actor", {}).get("Attributes", {})
+        service_name = attributes.get(SWARM_SERVICE_NAME_LABEL)
+        if service_name is None:
+            return
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(service_name, ()))
+        for subscription in subscriptions:
+            subscription.notify()
+
+    def notify_all(self):
+        with self.lock:
+            subscriptions = [
+                subscription
+                for service_subscriptions in self.subscriptions.values()
+                for subscription in service_subscriptions
+            ]
+        for subscription in subscriptions:
+            subscription.notify()
+
+    def listen(self):
+        """
+        Dispatch the events of the stream to the subscriptions until `stop()` is called.
+        This blocks, it is meant to run in a background thread.
+        """
+        while not self.stopped.is_set():
+            try:
+                events = self.event_source()
+                self.is_connected = True
+                # the changes that happened while disconnected were missed
+                self.notify_all()
+                for event in events:
+                    if self.stopped.is_set():
+                        break
+                    self.dispatch(event)
+            except Exception as e:
+                # the stream can also fail while it is read (daemon restarted, connection reset, truncated json...),
+                # the listener must always reconnect instead of leaving the waiters polling until the worker restarts
+                print(f"Failed to listen to the docker events: {e!r}")
+            finally:
+                self.is_connected = False
+                # the waiters go back to polling until the stream is reconnected
+                self.notify_all()
+            self.stopped.wait(self.RECONNECT_INTERVAL)
+
+    def start(self):
+        threading.Thread(target=self.listen, name="docker-events", daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+
+
+docker_events_listener: Optional[DockerEventsListener] = None
+
+
+def get_docker_events_listener() -> DockerEventsListener:
+    """
+    Return the listener of the worker, it is only connected once `start_docker_events_listener()`
+    is called, until then the subscriptions poll.
+    """
+    global docker_events_listener
+    if docker_events_listener is None:
+        docker_events_listener = DockerEventsListener(
+            event_source=lambda: get_docker_client().events(
+                decode=True,
+                filters={"type": "container", "label": SWARM_SERVICE_NAME_LABEL},
+            )
+        )
+    return docker_events_listener
+
+
+def start_docker_events_listener():
+    get_docker_events_listener().start()
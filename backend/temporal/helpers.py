@@ -1,5 +1,11 @@
+import bisect
+import hashlib
+import json
 import os
 import shutil
+import socket
+import threading
+import time
 
 from typing import Any, Dict, List, Literal, TypedDict
 from .shared import (
@@ -8,6 +14,7 @@ from .shared import (
 )
 from zane_api.models import (
     Deployment,
+    Service as ZaneService,
     URL,
 )
 from zane_api.utils import (
@@ -15,11 +22,19 @@ from zane_api.utils import (
     find_item_in_sequence,
     cache_result,
     excerpt,
+    TieredCache,
     escape_ansi,
 )
-from search.loki_client import LokiSearchClient
+from search.log_sink import get_loki_log_sink
+from zane_api.http_client import get_http_session
+from zane_api.prometheus import (
+    caddy_etag_retries,
+    instrument_docker_client,
+    observe_caddy_admin_response,
+)
 from search.dtos import RuntimeLogDto, RuntimeLogLevel, RuntimeLogSource
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 import docker
 import docker.errors
@@ -48,7 +63,7 @@ docker_client: docker.DockerClient | None = None
 def get_docker_client():
     global docker_client
     if docker_client is None:
-        docker_client = docker.from_env()
+        docker_client = instrument_docker_client(docker.from_env())
     return docker_client
 
 
@@ -66,7 +81,94 @@ def get_docker_volume_size_in_bytes(volume_id: str) -> int:
     return int(size_string)
 
 
-def check_if_port_is_available_on_host(port: int) -> bool:
+HOST_PORTS_INDEX_CACHE_KEY = "host_ports_index"
+# the index is refreshed on each change of a swarm service, this is only a safety net
+HOST_PORTS_INDEX_TTL = timedelta(minutes=5)
+
+
+def build_host_ports_index() -> dict[int, str | None]:
+    """
+    Map the host ports published by the swarm services and the ports of the services in the DB
+    to the id of the service using them, `None` for the swarm services not managed by zane.
+    The index is stored in the cache, so that looking up a port doesn't need any call to docker.
+    """
+    index: dict[int, str | None] = {}
+    for host, service_id in ZaneService.objects.filter(
+        ports__host__isnull=False
+    ).values_list("ports__host", "id"):
+        index[host] = service_id
+
+    for swarm_service in get_docker_client().services.list():
+        labels = swarm_service.attrs["Spec"].get("Labels", {})
+        for port in swarm_service.attrs.get("Endpoint", {}).get("Ports", []):
+            if port.get("PublishedPort") is not None:
+                index.setdefault(port["PublishedPort"], labels.get("service"))
+
+    cache.set(
+        HOST_PORTS_INDEX_CACHE_KEY, index, int(HOST_PORTS_INDEX_TTL.total_seconds())
+    )
+    return index
+
+
+def get_host_ports_index() -> dict[int, str | None]:
+    index = cache.get(HOST_PORTS_INDEX_CACHE_KEY)
+    if index is None:
+        index = build_host_ports_index()
+    return index
+
+
+def watch_host_ports_index():
+    """
+    Rebuild the host ports index each time a swarm service is created, updated or removed.
+    This blocks forever, it is meant to run in a background thread.
+    """
+    while True:
+        try:
+            build_host_ports_index()
+            for _ in get_docker_client().events(
+                decode=True, filters={"type": "service"}
+            ):
+                build_host_ports_index()
+        except (docker.errors.APIError, requests.exceptions.RequestException) as e:
+            print(f"Failed to watch the docker events for the host ports index: {e}")
+        time.sleep(5)
+
+
+def start_host_ports_index_watcher():
+    threading.Thread(
+        target=watch_host_ports_index, name="host-ports-index", daemon=True
+    ).start()
+
+
+def check_if_port_is_free_with_socket(port: int) -> bool:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        try:
+            sock.bind(("0.0.0.0", port))
+        except OSError:
+            return False
+        return True
+
+
+def check_if_port_is_available_on_host(
+    port: int, service_id: str | None = None
+) -> bool:
+    """
+    Check that `port` isn't published by another service than `service_id`, with the host ports index.
+    With `HOST_PORTS_INDEX_ENABLED=false`, a container binding the port is launched instead,
+    which is slow but also detects the ports used by the processes running outside of docker.
+    """
+    if not settings.HOST_PORTS_INDEX_ENABLED:
+        return check_if_port_is_available_on_host_with_container(port)
+
+    index = get_host_ports_index()
+    if port in index:
+        return service_id is not None and index[port] == service_id
+    if settings.HOST_PORTS_SOCKET_PROBE:
+        return check_if_port_is_free_with_socket(port)
+    return True
+
+
+def check_if_port_is_available_on_host_with_container(port: int) -> bool:
     client = get_docker_client()
     try:
         client.containers.run(
@@ -81,16 +183,37 @@ def check_if_port_is_available_on_host(port: int) -> bool:
         return True
 
 
+image_registry_cache = TieredCache(prefix="image_registry")
+IMAGE_EXISTS_CACHE_TTL = timedelta(minutes=10)
+# an image can be pushed just after a failed check, so it is cached for a shorter time
+IMAGE_NOT_FOUND_CACHE_TTL = timedelta(seconds=30)
+IMAGE_SEARCH_CACHE_TTL = timedelta(minutes=10)
+IMAGE_SEARCH_LIMIT = 30
+
+
 def check_if_docker_image_exists(
     image: str, credentials: dict[str, Any] | None = None
 ) -> bool:
-    client = get_docker_client()
-    try:
-        client.images.get_registry_data(image, auth_config=credentials)
-    except docker.errors.APIError:
-        return False
-    else:
-        return True
+    def get_registry_data():
+        client = get_docker_client()
+        try:
+            client.images.get_registry_data(image, auth_config=credentials)
+        except docker.errors.APIError:
+            return False
+        else:
+            return True
+
+    # the credentials are part of the key, as they change the result, but only as a hash
+    fingerprint = hashlib.sha256(
+        json.dumps(credentials, sort_keys=True).encode()
+    ).hexdigest()
+    return image_registry_cache.get_or_set(
+        f"exists:{image}:{fingerprint}",
+        get_registry_data,
+        ttl=lambda exists: (
+            IMAGE_EXISTS_CACHE_TTL if exists else IMAGE_NOT_FOUND_CACHE_TTL
+        ),
+    )
 
 
 class DockerImageResultFromRegistry(TypedDict):
@@ -108,23 +231,47 @@ class DockerImageResult(TypedDict):
 def search_images_docker_hub(term: str) -> List[DockerImageResult]:
     """
     List all images in registry starting with a certain term.
+    As the term is typed one character at a time, when the results of a prefix of the term
+    are cached and complete (fewer than the limit), they are filtered instead of searching again.
     """
-    client = get_docker_client()
-    result: List[DockerImageResultFromRegistry] = []
-    try:
-        result = client.images.search(term=term, limit=30)
-    except docker.errors.APIError:
-        pass
-    images_to_return: List[DockerImageResult] = []
+    term = term.strip().lower()
+    prefixes = [term[:length] for length in range(len(term) - 1, 0, -1)]
+    cached = image_registry_cache.get_many([f"search:{prefix}" for prefix in prefixes])
+    for prefix in prefixes:
+        prefix_results = cached.get(f"search:{prefix}")
+        if prefix_results is not None and len(prefix_results) < IMAGE_SEARCH_LIMIT:
+            return [
+                image
+                for image in prefix_results
+                if term in image["full_image"].lower()
+                or term in (image["description"] or "").lower()
+            ]
 
-    for image in result:
-        images_to_return.append(
-            {
-                "full_image": image["name"],
-                "description": image["description"],
-            }
-        )
-    return images_to_return
+    def search() -> List[DockerImageResult]:
+        client = get_docker_client()
+        result: List[DockerImageResultFromRegistry] = []
+        try:
+            result = client.images.search(term=term, limit=IMAGE_SEARCH_LIMIT)
+        except docker.errors.APIError:
+            pass
+        images_to_return: List[DockerImageResult] = []
+
+        for image in result:
+            images_to_return.append(
+                {
+                    "full_image": image["name"],
+                    "description": image["description"],
+                }
+            )
+        return images_to_return
+
+    return image_registry_cache.get_or_set(
+        f"search:{term}",
+        search,
+        ttl=lambda images: (
+            IMAGE_SEARCH_CACHE_TTL if images else IMAGE_NOT_FOUND_CACHE_TTL
+        ),
+    )
 
 
 def get_network_resource_name(project_id: str) -> str:
@@ -214,7 +361,6 @@ async def deployment_log(
             raise TypeError(
                 f"type {type(deployment)} doesn't match {DeploymentLike} or {DeploymentResultLike}"
             )
-    search_client = LokiSearchClient(host=settings.LOKI_HOST)
 
     MAX_COLORED_CHARS = 1000
     messages = []
@@ -240,17 +386,70 @@ async def deployment_log(
             )
         )
 
-    search_client.bulk_insert(
-        docs=logs,
-    )
+    # logs are buffered and pushed to loki in batches,
+    # the sink is flushed at the end of each activity by `LogSinkActivityInterceptor`
+    await get_loki_log_sink().put(logs)
 
 
 class ZaneProxyEtagError(Exception):
     pass
 
 
+class CaddyRoutesIndex:
+    """
+    In-memory mirror of the ids of the routes in `zane-url-root`, in the same order as in caddy,
+    along with their sort keys, used to compute the position at which a new route must be inserted
+    without having to download the whole list of routes.
+    """
+
+    def __init__(self):
+        self.ids: list[str] = []
+        self.keys: list[tuple] = []
+        self.is_stale = True
+        self.lock = threading.RLock()
+
+    def load(self, route_ids: list[str], keys: list[tuple]):
+        self.ids = list(route_ids)
+        self.keys = list(keys)
+        self.is_stale = False
+
+    def invalidate(self):
+        self.is_stale = True
+
+    def insertion_position(self, key: tuple) -> int:
+        # `bisect_right` puts the new route after the routes with the same key,
+        # which is the position `sorted()` would give to an appended route
+        return bisect.bisect_right(self.keys, key)
+
+    def key_of(self, route_id: str) -> tuple | None:
+        try:
+            return self.keys[self.ids.index(route_id)]
+        except ValueError:
+            return None
+
+    def insert(self, position: int, route_id: str, key: tuple):
+        self.ids.insert(position, route_id)
+        self.keys.insert(position, key)
+
+    def remove(self, route_id: str):
+        try:
+            position = self.ids.index(route_id)
+        except ValueError:
+            return
+        del self.ids[position]
+        del self.keys[position]
+
+
 class ZaneProxyClient:
     MAX_ETAG_ATTEMPTS = 3
+    routes_index = CaddyRoutesIndex()
+    # keep-alive session for the admin API of caddy, its calls are timed by a response hook
+    http = get_http_session("caddy", hooks=[observe_caddy_admin_response])
+    # caddy inserts the route on a `PUT` to an index of an array, a retried `PUT` would insert it twice:
+    # these calls are sent through a session that never retries
+    positional_http = get_http_session(
+        "caddy-positional", retries=0, hooks=[observe_caddy_admin_response]
+    )
 
     @classmethod
     def _get_id_for_deployment(cls, deployment_hash: str, domain: str):
@@ -345,7 +544,7 @@ class ZaneProxyClient:
         return f"{service_id}-{url.domain}-{normalized_path}"
 
     @classmethod
-    def _sort_routes(cls, routes: list[dict[str, list[dict[str, list[str]]]]]):
+    def _route_sort_key(cls, route: dict[str, list[dict[str, list[str]]]]) -> tuple:
         """
         This function implement the same ordering as caddy to pass to the caddy proxy API
         reference: https://caddyserver.com/docs/caddyfile/directives#sorting-algorithm
@@ -390,18 +589,144 @@ class ZaneProxyClient:
             host = route["match"][0].get("host", [""])[0]
             return host
 
-        return sorted(
-            routes,
-            key=lambda route: (
-                # First, sort by path specificity,
-                path_specificity(route),
-                # Then sort by host, grouping the same hosts together
-                host_specificity(route),
-                # Then apply a custom order that put the catchall at the end
-                custom_order(route),
-            ),
+        return (
+            # First, sort by path specificity,
+            path_specificity(route),
+            # Then sort by host, grouping the same hosts together
+            host_specificity(route),
+            # Then apply a custom order that put the catchall at the end
+            custom_order(route),
         )
 
+    @classmethod
+    def _sort_routes(cls, routes: list[dict[str, list[dict[str, list[str]]]]]):
+        return sorted(routes, key=cls._route_sort_key)
+
+    @classmethod
+    def _resync_routes_index(cls):
+        """
+        Download all the routes, sort them in caddy if they are not already sorted
+        and rebuild the routes index from them.
+        """
+        with cls.routes_index.lock:
+            for _ in range(cls.MAX_ETAG_ATTEMPTS):
+                response = cls.http.get(
+                    f"{settings.CADDY_PROXY_ADMIN_HOST}/id/zane-url-root/routes",
+                    timeout=5,
+                )
+                etag = response.headers.get("etag")
+                routes = response.json()
+                sorted_routes = cls._sort_routes(routes)
+
+                if [route.get("@id") for route in routes] != [
+                    route.get("@id") for route in sorted_routes
+                ]:
+                    response = cls.http.patch(
+                        f"{settings.CADDY_PROXY_ADMIN_HOST}/id/zane-url-root/routes",
+                        headers={"content-type": "application/json", "If-Match": etag},
+                        json=sorted_routes,
+                        timeout=5,
+                    )
+                    if response.status_code == status.HTTP_412_PRECONDITION_FAILED:
+                        caddy_etag_retries.labels(operation="sort_routes").inc()
+                        continue
+
+                cls.routes_index.load(
+                    route_ids=[route.get("@id") for route in sorted_routes],
+                    keys=[cls._route_sort_key(route) for route in sorted_routes],
+                )
+                return
+
+        raise ZaneProxyEtagError(
+            "Failed sorting the routes in the proxy because `Etag` precondtion failed"
+        )
+
+    @classmethod
+    def _insert_route(cls, route: dict) -> bool:
+        """
+        Insert a new route at its sorted position using caddy's positional `PUT` endpoint,
+        after checking with the `Etag` of the route currently at that position that the index is not stale.
+        Returns `False` if the route could not be inserted incrementally.
+        """
+        route_id = route["@id"]
+        key = cls._route_sort_key(route)
+        index = cls.routes_index
+
+        for _ in range(cls.MAX_ETAG_ATTEMPTS):
+            with index.lock:
+                if index.is_stale:
+                    cls._resync_routes_index()
+
+                position = index.insertion_position(key)
+                if position >= len(index.ids):
+                    # there is always a catchall route at the end,
+                    # if we are asked to insert after it, something is wrong
+                    return False
+
+                response = cls.http.get(
+                    f"{settings.CADDY_PROXY_ADMIN_HOST}/id/zane-url-root/routes/{position}",
+                    timeout=5,
+                )
+                if (
+                    response.status_code != status.HTTP_200_OK
+                    or response.json().get("@id") != index.ids[position]
+                ):
+                    index.invalidate()
+                    caddy_etag_retries.labels(operation="insert_route").inc()
+                    continue
+
+                response = cls.positional_http.put(
+                    f"{settings.CADDY_PROXY_ADMIN_HOST}/id/zane-url-root/routes/{position}",
+                    headers={
+                        "content-type": "application/json",
+                        "If-Match": response.headers.get("etag"),
+                    },
+                    json=route,
+                    timeout=5,
+                )
+                if response.status_code != status.HTTP_200_OK:
+                    index.invalidate()
+                    caddy_etag_retries.labels(operation="insert_route").inc()
+                    continue
+
+                index.insert(position, route_id, key)
+                return True
+        return False
+
+    @classmethod
+    def _upsert_route(cls, route: dict) -> bool:
+        """
+        Replace the route in place if it already exists, or insert it at its sorted position.
+        Returns `False` if the route could not be upserted incrementally.
+        """
+        route_id = route["@id"]
+        index = cls.routes_index
+        with index.lock:
+            existing_key = index.key_of(route_id)
+            if existing_key is not None and existing_key != cls._route_sort_key(route):
+                # the route needs to move, remove it and insert it again
+                cls._remove_route(route_id)
+            else:
+                response = cls.http.patch(
+                    f"{settings.CADDY_PROXY_ADMIN_HOST}/id/{route_id}",
+                    headers={"content-type": "application/json"},
+                    json=route,
+                    timeout=5,
+                )
+                if response.status_code == status.HTTP_200_OK:
+                    return True
+
+            return cls._insert_route(route)
+
+    @classmethod
+    def _remove_route(cls, route_id: str):
+        response = cls.http.delete(
+            f"{settings.CADDY_PROXY_ADMIN_HOST}/id/{route_id}",
+            timeout=5,
+        )
+        if response.status_code == status.HTTP_200_OK:
+            cls.routes_index.remove(route_id)
+
     @classmethod
     def _get_request_for_service_url(
         cls,
@@ -599,7 +924,7 @@ class ZaneProxyClient:
     @classmethod
     def insert_deployment_urls(cls, deployment: DeploymentDetails):
         for url in deployment.urls:
-            response = requests.get(
+            response = cls.http.get(
                 cls.get_uri_for_deployment(deployment.hash, url.domain),
                 timeout=5,
             )
@@ -610,14 +935,21 @@ class ZaneProxyClient:
                     lambda u: u.domain == url.domain, deployment.urls
                 )
                 if deployment_url is not None:
-                    requests.put(
+                    route = cls._get_request_for_deployment_url(
+                        deployment, deployment_url
+                    )
+                    if (
+                        settings.CADDY_PROXY_INCREMENTAL_ROUTE_UPDATES
+                        and cls._insert_route(route)
+                    ):
+                        continue
+                    cls.positional_http.put(
                         f"{settings.CADDY_PROXY_ADMIN_HOST}/id/zane-url-root/routes/0",
                         headers={"content-type": "application/json"},
-                        json=cls._get_request_for_deployment_url(
-                            deployment, deployment_url
-                        ),
+                        json=route,
                         timeout=5,
                     )
+                    cls.routes_index.invalidate()
 
     @classmethod
     def upsert_service_url(
@@ -626,42 +958,53 @@ class ZaneProxyClient:
         current_deployment: DeploymentDetails | Deployment,
         previous_deployment: Deployment | DeploymentDetails | None,
     ) -> bool:
+        new_url = cls._get_request_for_service_url(
+            url=url,
+            current_deployment=current_deployment,
+            previous_deployment=previous_deployment,
+        )
+        if settings.CADDY_PROXY_INCREMENTAL_ROUTE_UPDATES and cls._upsert_route(
+            new_url
+        ):
+            return True
+
+        # Fallback to replacing the whole list of routes
+        return cls._upsert_route_in_all_routes(new_url)
+
+    @classmethod
+    def _upsert_route_in_all_routes(cls, route: dict) -> bool:
+        cls.routes_index.invalidate()
         attempts = 0
 
         while attempts < cls.MAX_ETAG_ATTEMPTS:
             attempts += 1
             # now we create or modify the config for the URL
-            response = requests.get(
+            response = cls.http.get(
                 f"{settings.CADDY_PROXY_ADMIN_HOST}/id/zane-url-root/routes", timeout=5
             )
             etag = response.headers.get("etag")
 
             routes: list[dict[str, dict]] = [
-                route
-                for route in response.json()
-                if route["@id"]
-                != cls._get_id_for_service_url(current_deployment.service.id, url)
+                existing_route
+                for existing_route in response.json()
+                if existing_route["@id"] != route["@id"]
             ]
-            new_url = cls._get_request_for_service_url(
-                url=url,
-                current_deployment=current_deployment,
-                previous_deployment=previous_deployment,
-            )
-            routes.append(new_url)
+            routes.append(route)
             routes = cls._sort_routes(routes)  # type: ignore
 
-            response = requests.patch(
+            response = cls.http.patch(
                 f"{settings.CADDY_PROXY_ADMIN_HOST}/id/zane-url-root/routes",
                 headers={"content-type": "application/json", "If-Match": etag},
                 json=routes,
                 timeout=5,
             )
             if response.status_code == status.HTTP_412_PRECONDITION_FAILED:
+                caddy_etag_retries.labels(operation="upsert_route").inc()
                 continue
             return True
 
         raise ZaneProxyEtagError(
-            f"Failed inserting the url {url} in the proxy because `Etag` precondtion failed"
+            f"Failed inserting the route `{route['@id']}` in the proxy because `Etag` precondtion failed"
         )
 
     @classmethod
@@ -674,20 +1017,22 @@ class ZaneProxyClient:
 
         while attempts < cls.MAX_ETAG_ATTEMPTS:
             attempts += 1
-            response = requests.get(
+            response = cls.http.get(
                 cls.get_uri_for_service_url(service_id, url),
                 timeout=5,
             )
             etag = response.headers.get("etag")
 
             if response.status_code != status.HTTP_404_NOT_FOUND:
-                response = requests.delete(
+                response = cls.http.delete(
                     cls.get_uri_for_service_url(service_id, url),
                     headers={"If-Match": etag},
                     timeout=5,
                 )
                 if response.status_code == status.HTTP_412_PRECONDITION_FAILED:
+                    caddy_etag_retries.labels(operation="remove_route").inc()
                     continue
+            cls.routes_index.remove(cls._get_id_for_service_url(service_id, url))
             return
 
         raise ZaneProxyEtagError(
@@ -700,7 +1045,7 @@ class ZaneProxyClient:
         Remove old URLs that are not attached to the service anymore
         """
         service = deployment.service
-        response = requests.get(
+        response = cls.http.get(
             f"{settings.CADDY_PROXY_ADMIN_HOST}/id/zane-url-root/routes", timeout=5
         )
         service_url_ids = [
@@ -711,17 +1056,11 @@ class ZaneProxyClient:
                 route["@id"].startswith(service.id)
                 and route["@id"] not in service_url_ids
             ):
-                requests.delete(
-                    f"{settings.CADDY_PROXY_ADMIN_HOST}/id/{route['@id']}",
-                    timeout=5,
-                )
+                cls._remove_route(route["@id"])
 
     @classmethod
     def remove_deployment_url(cls, deployment_hash: str, domain: str):
-        requests.delete(
-            cls.get_uri_for_deployment(deployment_hash, domain),
-            timeout=5,
-        )
+        cls._remove_route(cls._get_id_for_deployment(deployment_hash, domain))
 
 
 class GitDeploymentStep(Enum):
@@ -859,7 +1198,7 @@ def get_swarm_service_aliases_ips_on_network(
     :param network_name: Name of the Docker network to query.
     :return: A dict mapping each network alias (str) to its IP address (str).
     """
-    client = docker.from_env()
+    client = instrument_docker_client(docker.from_env())
     # get target network ID
     network = client.networks.get(network_name)
     network_id = network.id
@@ -0,0 +1,121 @@
+import asyncio
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Optional
+
+import docker
+import docker.errors
+
+from zane_api.utils import format_storage_value
+
+# interval between the reports of the progress of a pull in the deployment logs
+IMAGE_PULL_PROGRESS_INTERVAL = 2  # seconds
+# the statuses of a layer once it is on the host
+LAYER_DONE_STATUSES = {"Download complete", "Pull complete", "Already exists"}
+
+
+class DockerImagePullError(Exception):
+    """Error reported in the progress stream of a pull, after the request succeeded."""
+
+
+@dataclass
+class ImageLayerProgress:
+    status: str
+    downloaded: int = 0
+    size: int = 0
+
+    @property
+    def is_done(self) -> bool:
+        return self.status in LAYER_DONE_STATUSES
+
+    def __str__(self):
+        if self.size > 0:
+            return f"{self.status} {format_storage_value(self.downloaded)} / {format_storage_value(self.size)}"
+        return self.status
+
+
+class DockerImagePull:
+    """
+    A pull of an image, shared by all the deployments of that image running at the same time on this worker.
+    The progress of each layer is read from the stream of the docker API,
+    the deployments waiting for the pull report it in their logs.
+    """
+
+    def __init__(
+        self,
+        docker_client: docker.DockerClient,
+        image: str,
+        auth_config: Optional[dict],
+    ):
+        self.docker_client = docker_client
+        self.image = image
+        self.auth_config = auth_config
+        self.layers: dict[str, ImageLayerProgress] = {}
+        self.task: Optional[asyncio.Task] = None
+
+    def update(self, chunk: dict):
+        if "error" in chunk:
+            raise DockerImagePullError(chunk["error"])
+        layer_id, status = chunk.get("id"), chunk.get("status")
+        # the other chunks are about the whole image: `Pulling from ...`, `Digest: ...`, `Status: ...`
+        if layer_id is None or status is None or status.startswith("Pulling from"):
+            return
+        layer = self.layers.setdefault(layer_id, ImageLayerProgress(status=status))
+        layer.status = status
+        progress = chunk.get("progressDetail") or {}
+        if status == "Downloading" and progress.get("total"):
+            layer.downloaded, layer.size = progress["current"], progress["total"]
+        elif layer.is_done:
+            layer.downloaded = layer.size
+
+    def run(self):
+        """
+        Pull the image, this blocks until the pull is finished, it is meant to run in a thread.
+        """
+        for chunk in self.docker_client.api.pull(
+            self.image,
+            stream=True,
+            decode=True,
+            auth_config=self.auth_config,
+        ):
+            self.update(chunk)
+
+    @property
+    def summary(self) -> str:
+        done = sum(1 for layer in self.layers.values() if layer.is_done)
+        downloaded = sum(layer.downloaded for layer in self.layers.values())
+        size = sum(layer.size for layer in self.layers.values())
+        return (
+            f"{done}/{len(self.layers)} layers pulled,"
+            f" {format_storage_value(downloaded)} / {format_storage_value(size)} downloaded"
+        )
+
+
+image_pulls: dict[str, DockerImagePull] = {}
+
+
+def get_image_pull_key(image: str, auth_config: Optional[dict]) -> str:
+    # the deployments only share a pull if they use the same credentials
+    credentials = json.dumps(auth_config, sort_keys=True) if auth_config else ""
+    return hashlib.sha256(f"{image}|{credentials}".encode()).hexdigest()
+
+
+def start_image_pull(
+    docker_client: docker.DockerClient, image: str, auth_config: Optional[dict]
+) -> tuple[DockerImagePull, bool]:
+    """
+    Start pulling `image` in a thread, or join the pull of the same image already in progress.
+    Return the pull, and whether it was already in progress.
+    """
+    key = get_image_pull_key(image, auth_config)
+    image_pull = image_pulls.get(key)
+    if image_pull is not None:
+        return image_pull, True
+
+    image_pull = DockerImagePull(docker_client, image, auth_config)
+    image_pull.task = asyncio.create_task(asyncio.to_thread(image_pull.run))
+    image_pulls[key] = image_pull
+    # the next deployments of the image pull it again, to get the updates of its tag
+    image_pull.task.add_done_callback(lambda _: image_pulls.pop(key, None))
+    return image_pull, False
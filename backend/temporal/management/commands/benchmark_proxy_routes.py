@@ -0,0 +1,200 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from ...helpers import ZaneProxyClient
+from zane_api.utils import Colors
+
+
+class FakeCaddyAdminServer(ThreadingHTTPServer):
+    """
+    Minimal stand-in for the caddy admin API, only supporting the endpoints
+    used by `ZaneProxyClient` on the `zane-url-root` routes.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, routes: list[dict]):
+        super().__init__(("127.0.0.1", 0), FakeCaddyAdminHandler)
+        self.routes = routes
+        self.lock = threading.Lock()
+        self.bytes_transferred = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class FakeCaddyAdminHandler(BaseHTTPRequestHandler):
+    server: FakeCaddyAdminServer
+    ROUTES_PATH = "/id/zane-url-root/routes"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _etag(self, path: str, value) -> str:
+        digest = hashlib.sha256(json.dumps(value).encode()).hexdigest()
+        return f'"{path} {digest}"'
+
+    def _send(self, status: int, body=None, etag: str | None = None):
+        content = json.dumps(body).encode() if body is not None else b""
+        self.server.bytes_transferred += len(content)
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(content)))
+        if etag is not None:
+            self.send_header("etag", etag)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _body(self):
+        content = self.rfile.read(int(self.headers.get("content-length", 0)))
+        self.server.bytes_transferred += len(content)
+        return json.loads(content) if content else None
+
+    def _precondition_failed(self, path: str, value) -> bool:
+        if_match = self.headers.get("If-Match")
+        return if_match is not None and if_match != self._etag(path, value)
+
+    def _handle(self):
+        routes = self.server.routes
+        body = self._body()
+        if self.path == self.ROUTES_PATH:
+            if self.command == "GET":
+                return self._send(200, routes, self._etag(self.path, routes))
+            if self.command == "PATCH":
+                if self._precondition_failed(self.path, routes):
+                    return self._send(412)
+                self.server.routes = body
+                return self._send(200)
+
+        if match := re.fullmatch(rf"{self.ROUTES_PATH}/(\d+)", self.path):
+            position = int(match.group(1))
+            if position >= len(routes):
+                return self._send(404)
+            if self.command == "GET":
+                return self._send(
+                    200, routes[position], self._etag(self.path, routes[position])
+                )
+            if self.command == "PUT":
+                if self._precondition_failed(self.path, routes[position]):
+                    return self._send(412)
+                routes.insert(position, body)
+                return self._send(200)
+
+        if match := re.fullmatch(r"/id/(.+)", self.path):
+            route_id = match.group(1)
+            position = next(
+                (i for i, route in enumerate(routes) if route.get("@id") == route_id),
+                None,
+            )
+            if position is None:
+                return self._send(404)
+            if self.command == "GET":
+                return self._send(200, routes[position])
+            if self.command == "PATCH":
+                routes[position] = body
+                return self._send(200)
+            if self.command == "DELETE":
+                del routes[position]
+                return self._send(200)
+
+        return self._send(400)
+
+    def do_GET(self):
+        with self.server.lock:
+            self._handle()
+
+    do_PUT = do_PATCH = do_DELETE = do_GET
+
+
+def make_route(index: int) -> dict:
+    domain = f"app-{index}.127-0-0-1.sslip.io"
+    base_path = "/" if index % 3 else f"/api-{index}"
+    return {
+        "@id": f"srv_dkr_{index}-{domain}-{base_path.strip('/') or '*'}",
+        "handle": [
+            {
+                "handler": "subroute",
+                "routes": [
+                    {
+                        "handle": [
+                            {"handler": "encode", "encodings": {"gzip": {}}},
+                            {
+                                "handler": "reverse_proxy",
+                                "upstreams": [{"dial": f"zn-srv-{index}:80"}],
+                            },
+                        ]
+                    }
+                ],
+            }
+        ],
+        "match": [{"path": ["/*" if base_path == "/" else f"{base_path}*"], "host": [domain]}],
+    }
+
+
+class Command(BaseCommand):
+    help = "Benchmark the cost of upserting a service URL in the proxy, depending on the number of routes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--routes",
+            type=int,
+            nargs="+",
+            default=[100, 1000, 5000],
+            help="Number of existing routes to benchmark with (default: 100 1000 5000)",
+        )
+        parser.add_argument(
+            "--upserts",
+            type=int,
+            default=20,
+            help="Number of new routes upserted for each run (default: 20)",
+        )
+
+    def handle(self, *args, **options):
+        catchall = {"@id": "zane-catchall", "handle": [{"handler": "static_response"}]}
+        for route_count in options["routes"]:
+            for mode in ["whole list", "incremental"]:
+                initial_routes = ZaneProxyClient._sort_routes(
+                    [make_route(i) for i in range(route_count)] + [catchall]  # type: ignore
+                )
+                server = FakeCaddyAdminServer(routes=initial_routes)
+                thread = threading.Thread(target=server.serve_forever, daemon=True)
+                thread.start()
+                ZaneProxyClient.routes_index.invalidate()
+
+                with override_settings(CADDY_PROXY_ADMIN_HOST=server.url):
+                    if mode == "incremental":
+                        # load the index before starting the timer
+                        ZaneProxyClient._resync_routes_index()
+                        server.bytes_transferred = 0
+
+                    start = time.perf_counter()
+                    for i in range(options["upserts"]):
+                        route = make_route(route_count + i)
+                        if mode == "incremental":
+                            ZaneProxyClient._upsert_route(route)
+                        else:
+                            ZaneProxyClient._upsert_route_in_all_routes(route)
+                    elapsed = time.perf_counter() - start
+
+                server.shutdown()
+                server.server_close()
+
+                expected = ZaneProxyClient._sort_routes(server.routes)  # type: ignore
+                is_sorted = [r["@id"] for r in server.routes] == [
+                    r["@id"] for r in expected
+                ]
+                per_upsert_ms = elapsed / options["upserts"] * 1000
+                per_upsert_kb = server.bytes_transferred / options["upserts"] / 1024
+                self.stdout.write(
+                    f"{route_count:>6} routes | {mode:<11} | {Colors.GREEN}{per_upsert_ms:8.2f} ms{Colors.ENDC}/upsert"
+                    f" | {Colors.BLUE}{per_upsert_kb:10.1f} KB{Colors.ENDC}/upsert"
+                    f" | sorted={Colors.GREY}{is_sorted}{Colors.ENDC}"
+                )
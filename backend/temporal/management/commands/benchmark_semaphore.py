@@ -0,0 +1,90 @@
+import asyncio
+import math
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from ...semaphore import AsyncSemaphore, get_redis_client
+from zane_api.utils import Colors
+
+
+async def run_benchmark(acquirers: int, limit: int, hold: float):
+    key = f"benchmark-{uuid.uuid4().hex}"
+    client = get_redis_client()
+    commands_before = (await client.info("stats"))["total_commands_processed"]
+
+    active = 0
+    max_active = 0
+    wait_times: list[float] = []
+
+    async def acquirer():
+        nonlocal active, max_active
+        semaphore = AsyncSemaphore(
+            key=key, limit=limit, semaphore_timeout=timedelta(minutes=1)
+        )
+        start = time.perf_counter()
+        await semaphore.acquire()
+        wait_times.append(time.perf_counter() - start)
+        active += 1
+        max_active = max(max_active, active)
+        try:
+            await asyncio.sleep(hold)
+        finally:
+            active -= 1
+            await semaphore.release()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[acquirer() for _ in range(acquirers)])
+    elapsed = time.perf_counter() - start
+
+    commands_after = (await client.info("stats"))["total_commands_processed"]
+    await AsyncSemaphore(key=key).reset()
+    await client.aclose()
+    return dict(
+        elapsed=elapsed,
+        ideal=math.ceil(acquirers / limit) * hold,
+        max_active=max_active,
+        p50=statistics.median(wait_times),
+        p99=statistics.quantiles(wait_times, n=100)[98],
+        # minus the first `INFO` command
+        redis_commands=commands_after - commands_before - 1,
+    )
+
+
+class Command(BaseCommand):
+    help = "Benchmark the deploy semaphore with many concurrent acquirers"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--acquirers",
+            type=int,
+            default=100,
+            help="Number of concurrent acquirers (default: 100)",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=5,
+            help="Number of slots of the semaphore (default: 5)",
+        )
+        parser.add_argument(
+            "--hold",
+            type=float,
+            default=0.05,
+            help="Seconds each acquirer holds its slot (default: 0.05)",
+        )
+
+    def handle(self, *args, **options):
+        result = asyncio.run(
+            run_benchmark(options["acquirers"], options["limit"], options["hold"])
+        )
+        self.stdout.write(
+            f"{options['acquirers']} acquirers | limit={options['limit']} | hold={options['hold']}s\n"
+            f"  total         : {Colors.GREEN}{result['elapsed']:.3f}s{Colors.ENDC} (ideal {result['ideal']:.3f}s)\n"
+            f"  wait p50/p99  : {result['p50'] * 1000:.1f} ms / {result['p99'] * 1000:.1f} ms\n"
+            f"  max holders   : {Colors.BLUE}{result['max_active']}{Colors.ENDC}\n"
+            f"  redis commands: {Colors.GREY}{result['redis_commands']}{Colors.ENDC}"
+        )
@@ -0,0 +1,56 @@
+import asyncio
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.conf import settings
+
+from ...client import get_temporalio_client
+from ...schedules import HealthcheckMonitorWorkflow
+from temporalio.common import WorkflowIDReusePolicy
+from temporalio.exceptions import WorkflowAlreadyStartedError
+from temporalio.service import RPCError
+
+MONITOR_WORKFLOW_ID = "healthcheck-monitor"
+
+
+async def create_healthcheck_monitor():
+    client = await get_temporalio_client()
+
+    if not settings.HEALTHCHECK_MONITOR_ENGINE_ENABLED:
+        # deployments are monitored by the per deployment schedules instead
+        try:
+            await client.get_workflow_handle(MONITOR_WORKFLOW_ID).cancel(
+                rpc_timeout=timedelta(seconds=5)
+            )
+        except RPCError:
+            # probably because the workflow is not running
+            pass
+        return
+
+    try:
+        # the workflow continues as new forever, it has no execution timeout
+        await client.start_workflow(
+            HealthcheckMonitorWorkflow.run,
+            id=MONITOR_WORKFLOW_ID,
+            task_queue=settings.TEMPORALIO_SCHEDULE_TASK_QUEUE,
+            id_reuse_policy=WorkflowIDReusePolicy.ALLOW_DUPLICATE,
+            rpc_timeout=timedelta(seconds=5),
+        )
+    except WorkflowAlreadyStartedError:
+        # only one monitor runs at a time
+        pass
+
+    # the schedules created per deployment would run the same healthchecks a second time
+    async for description in await client.list_schedules():
+        if description.id.startswith("schedule-monitor-"):
+            try:
+                await client.get_schedule_handle(description.id).delete()
+            except RPCError:
+                pass
+
+
+class Command(BaseCommand):
+    help = "Start the workflow running the monitoring healthchecks of all the deployments"
+
+    def handle(self, *args, **options):
+        asyncio.run(create_healthcheck_monitor())
@@ -0,0 +1,93 @@
+import asyncio
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.conf import settings
+
+from ...client import get_temporalio_client
+from ...schedules import CollectNodeDeploymentStatsWorkflow
+from temporalio.client import (
+    Schedule,
+    ScheduleActionStartWorkflow,
+    ScheduleIntervalSpec,
+    ScheduleSpec,
+    ScheduleUpdateInput,
+    ScheduleUpdate,
+    ScheduleAlreadyRunningError,
+)
+from temporalio.service import RPCError
+
+COLLECTOR_SCHEDULE_ID = "node-metrics-collector"
+COLLECTOR_INTERVAL = timedelta(seconds=30)
+
+
+async def update_schedule_simple(input: ScheduleUpdateInput):
+    schedule = input.description.schedule
+
+    # Update the schedule
+    new_schedule = Schedule(
+        action=schedule.action,
+        spec=ScheduleSpec(
+            intervals=[ScheduleIntervalSpec(every=COLLECTOR_INTERVAL)]
+        ),  # New schedule spec
+        # Keep other properties the same
+        policy=schedule.policy,
+        state=schedule.state,
+    )
+
+    return ScheduleUpdate(schedule=new_schedule)
+
+
+async def create_metrics_collector_schedule():
+    client = await get_temporalio_client()
+    handle = client.get_schedule_handle(COLLECTOR_SCHEDULE_ID)
+
+    if not settings.METRICS_NODE_COLLECTOR_ENABLED:
+        # stats are collected by the per deployment schedules instead
+        try:
+            await handle.delete(rpc_timeout=timedelta(seconds=5))
+        except RPCError:
+            # probably because the schedule doesn't exist
+            pass
+        return
+
+    schedule = Schedule(
+        action=ScheduleActionStartWorkflow(
+            CollectNodeDeploymentStatsWorkflow.run,
+            id="collect-node-deployment-stats",
+            task_queue=settings.TEMPORALIO_SCHEDULE_TASK_QUEUE,
+        ),
+        spec=ScheduleSpec(intervals=[ScheduleIntervalSpec(every=COLLECTOR_INTERVAL)]),
+    )
+
+    try:
+        await handle.update(update_schedule_simple, rpc_timeout=timedelta(seconds=5))
+    except RPCError:
+        # probably because the schedule doesn't exist
+        try:
+            await client.create_schedule(
+                COLLECTOR_SCHEDULE_ID,
+                schedule,
+                rpc_timeout=timedelta(seconds=5),
+            )
+        except ScheduleAlreadyRunningError:
+            # because the schedule already exists and is running, we can ignore it
+            pass
+    except ScheduleAlreadyRunningError:
+        # because the schedule already exists  and is running, we can ignore it
+        pass
+
+    # the schedules created per deployment would collect the same stats a second time
+    async for description in await client.list_schedules():
+        if description.id.startswith("schedule-metrics-"):
+            try:
+                await client.get_schedule_handle(description.id).delete()
+            except RPCError:
+                pass
+
+
+class Command(BaseCommand):
+    help = "Create the schedule collecting the stats of all the deployments running on the node"
+
+    def handle(self, *args, **options):
+        asyncio.run(create_metrics_collector_schedule())
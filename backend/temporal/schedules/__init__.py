@@ -1,2 +1,3 @@
 from .activities import *
+from .monitor import *
 from .workflows import *
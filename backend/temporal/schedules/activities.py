@@ -1,4 +1,7 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
+from typing import Optional
 from rest_framework import status
 from temporalio import workflow, activity
 from temporalio.exceptions import ApplicationError
@@ -8,6 +11,8 @@ from ..shared import (
     CleanupResult,
     HealthcheckDeploymentDetails,
     DeploymentHealthcheckResult,
+    NodeMetricsResult,
+    PartitionsRotationResult,
     ServiceMetricsResult,
     SimpleDeploymentDetails,
 )
@@ -18,9 +23,19 @@ with workflow.unsafe.imports_passed_through():
     from django.utils import timezone
     import docker
     import docker.errors
+    from docker.models.containers import Container
+    from docker.models.services import Service as DockerService
     from django import db
     from django.db.models import Q
-    from zane_api.models import Deployment, HealthCheck, ServiceMetrics
+    from asgiref.sync import sync_to_async
+    from zane_api.models import (
+        Deployment,
+        HealthCheck,
+        HttpLog,
+        ServiceMetrics,
+        ServiceMetricsRollup,
+    )
+    from zane_api.partitions import create_daily_partitions, drop_daily_partitions
     from zane_api.utils import (
         DockerSwarmTaskState,
         DockerSwarmTask,
@@ -28,7 +43,8 @@ with workflow.unsafe.imports_passed_through():
         escape_ansi,
         excerpt,
     )
-    from search.loki_client import LokiSearchClient
+    from search.log_sink import get_loki_log_sink
+    from zane_api.prometheus import instrument_docker_client
     from search.dtos import RuntimeLogDto, RuntimeLogLevel, RuntimeLogSource
 
 docker_client: docker.DockerClient | None = None
@@ -37,7 +53,7 @@ docker_client: docker.DockerClient | None = None
 def get_docker_client():
     global docker_client
     if docker_client is None:
-        docker_client = docker.from_env()
+        docker_client = instrument_docker_client(docker.from_env())
     return docker_client
 
 
@@ -49,26 +65,253 @@ def get_swarm_service_name_for_deployment(
     return f"srv-{project_id}-{service_id}-{deployment_hash}"
 
 
+def parse_container_stats(stats: dict, previous_cpu_stats: Optional[dict] = None):
+    """
+    Extract the metrics we save from the result of `container.stats()`.
+    `previous_cpu_stats` is used as the reference for the CPU usage when the stats
+    have been fetched with `one_shot=True`, as docker leaves `precpu_stats` empty in that case.
+    """
+    cpu_stats = stats["cpu_stats"]
+    precpu_stats = previous_cpu_stats or stats["precpu_stats"]
+
+    # Calculate CPU usage percentage
+    cpu_delta = (
+        cpu_stats["cpu_usage"]["total_usage"] - precpu_stats["cpu_usage"]["total_usage"]
+    )
+    system_delta = cpu_stats.get("system_cpu_usage", 0) - precpu_stats.get(
+        "system_cpu_usage", 0
+    )
+    cpu_percent: float = (
+        (cpu_delta / system_delta) * cpu_stats["online_cpus"] * 100
+        if system_delta > 0
+        else 0.0
+    )
+
+    # Memory usage
+    memory_usage: int = stats["memory_stats"]["usage"]
+
+    # Network usage
+    networks = (stats.get("networks") or {}).values()
+    rx_bytes: int = sum(network["rx_bytes"] for network in networks)
+    tx_bytes: int = sum(network["tx_bytes"] for network in networks)
+
+    # Disk I/O usage
+    io_service_bytes = (
+        stats.get("blkio_stats", {}).get("io_service_bytes_recursive", []) or []
+    )
+    read_bytes: int = sum(
+        io.get("value", 0) for io in io_service_bytes if io.get("op") == "read"
+    )
+    write_bytes: int = sum(
+        io.get("value", 0) for io in io_service_bytes if io.get("op") == "write"
+    )
+
+    return dict(
+        cpu_percent=cpu_percent,
+        memory_bytes=memory_usage,
+        disk_read_bytes=read_bytes,
+        disk_writes_bytes=write_bytes,
+        net_rx_bytes=rx_bytes,
+        net_tx_bytes=tx_bytes,
+    )
+
+
 async def deployment_log(deployment: SimpleDeploymentDetails, message: str, error=True):
     current_time = timezone.now()
     print(f"[{current_time.isoformat()}]: {message}")
 
-    search_client = LokiSearchClient(host=settings.LOKI_HOST)
     # This is the max number of characters that we show in color on the frontend
     MAX_COLORED_CHARS = 1000
-    search_client.insert(
-        document=RuntimeLogDto(
-            source=RuntimeLogSource.SYSTEM,
-            level=RuntimeLogLevel.ERROR if error else RuntimeLogLevel.INFO,
-            content=excerpt(message, MAX_COLORED_CHARS),
-            content_text=excerpt(escape_ansi(message), MAX_COLORED_CHARS),
-            time=current_time,
-            created_at=current_time,
-            deployment_id=deployment.hash,
-            service_id=deployment.service_id,
-        ),
+    await get_loki_log_sink().put(
+        [
+            RuntimeLogDto(
+                source=RuntimeLogSource.SYSTEM,
+                level=RuntimeLogLevel.ERROR if error else RuntimeLogLevel.INFO,
+                content=excerpt(message, MAX_COLORED_CHARS),
+                content_text=excerpt(escape_ansi(message), MAX_COLORED_CHARS),
+                time=current_time,
+                created_at=current_time,
+                deployment_id=deployment.hash,
+                service_id=deployment.service_id,
+            )
+        ]
+    )
+
+
+def get_deployment_health(
+    docker_client: docker.DockerClient,
+    swarm_service: DockerService,
+    details: HealthcheckDeploymentDetails,
+) -> tuple[Deployment.DeploymentStatus, str]:
+    """
+    Status of a deployment from the state of its swarm tasks, and from its healthcheck when it is running.
+    """
+    healthcheck = details.healthcheck
+
+    healthcheck_timeout = (
+        healthcheck.timeout_seconds
+        if healthcheck is not None
+        else settings.DEFAULT_HEALTHCHECK_TIMEOUT
     )
 
+    task_list = swarm_service.tasks(
+        filters={
+            "label": f"deployment_hash={details.deployment.hash}",
+            "desired-state": "running",
+        }
+    )
+    if len(task_list) == 0:
+        deployment_status = Deployment.DeploymentStatus.UNHEALTHY
+        deployment_status_reason = "Error: The service is down, did you manually scale down the service ?"
+    else:
+        most_recent_swarm_task = DockerSwarmTask.from_dict(
+            max(
+                task_list,
+                key=lambda task: task["Version"]["Index"],
+            )
+        )
+
+        state_matrix = {
+            DockerSwarmTaskState.NEW: Deployment.DeploymentStatus.STARTING,
+            DockerSwarmTaskState.PENDING: Deployment.DeploymentStatus.STARTING,
+            DockerSwarmTaskState.ASSIGNED: Deployment.DeploymentStatus.STARTING,
+            DockerSwarmTaskState.ACCEPTED: Deployment.DeploymentStatus.STARTING,
+            DockerSwarmTaskState.READY: Deployment.DeploymentStatus.STARTING,
+            DockerSwarmTaskState.PREPARING: Deployment.DeploymentStatus.STARTING,
+            DockerSwarmTaskState.STARTING: Deployment.DeploymentStatus.STARTING,
+            DockerSwarmTaskState.RUNNING: Deployment.DeploymentStatus.HEALTHY,
+            DockerSwarmTaskState.COMPLETE: Deployment.DeploymentStatus.UNHEALTHY,
+            DockerSwarmTaskState.FAILED: Deployment.DeploymentStatus.UNHEALTHY,
+            DockerSwarmTaskState.SHUTDOWN: Deployment.DeploymentStatus.UNHEALTHY,
+            DockerSwarmTaskState.REJECTED: Deployment.DeploymentStatus.UNHEALTHY,
+            DockerSwarmTaskState.ORPHANED: Deployment.DeploymentStatus.UNHEALTHY,
+            DockerSwarmTaskState.REMOVE: Deployment.DeploymentStatus.UNHEALTHY,
+        }
+
+        exited_without_error = 0
+        deployment_status = state_matrix[most_recent_swarm_task.state]
+
+        all_tasks = swarm_service.tasks(
+            filters={
+                "label": f"deployment_hash={details.deployment.hash}",
+            }
+        )
+        # We set the status to restarting, because we get more than one task for this service when we restart it
+        if (
+            deployment_status == Deployment.DeploymentStatus.STARTING
+            and len(all_tasks) > 1
+        ):
+            deployment_status = Deployment.DeploymentStatus.RESTARTING
+        deployment_status_reason = (
+            most_recent_swarm_task.Status.Err
+            if most_recent_swarm_task.Status.Err is not None
+            else most_recent_swarm_task.Status.Message
+        )
+
+        if most_recent_swarm_task.state == DockerSwarmTaskState.SHUTDOWN:
+            status_code = most_recent_swarm_task.Status.ContainerStatus.ExitCode  # type: ignore
+            if (
+                status_code is not None and status_code != exited_without_error
+            ) or most_recent_swarm_task.Status.Err is not None:
+                deployment_status = Deployment.DeploymentStatus.UNHEALTHY
+
+        if (
+            most_recent_swarm_task.state == DockerSwarmTaskState.RUNNING
+            and most_recent_swarm_task.container_id is not None
+        ):
+            if healthcheck is not None:
+                try:
+                    print(
+                        f"Running custom healthcheck {healthcheck.type=} - {healthcheck.value=}"
+                    )
+                    container = docker_client.containers.get(
+                        most_recent_swarm_task.container_id
+                    )
+                    if healthcheck.type == HealthCheck.HealthCheckType.COMMAND:
+                        exit_code, output = container.exec_run(
+                            cmd=healthcheck.value,
+                            stdout=True,
+                            stderr=True,
+                            stdin=False,
+                        )
+
+                        if exit_code == 0:
+                            deployment_status = (
+                                Deployment.DeploymentStatus.HEALTHY
+                            )
+                        else:
+                            deployment_status = (
+                                Deployment.DeploymentStatus.UNHEALTHY
+                            )
+                        deployment_status_reason = output.decode("utf-8")
+                    else:
+                        container_networks = container.attrs["NetworkSettings"][
+                            "Networks"
+                        ]
+                        dns_names = container_networks["zane"]["DNSNames"]
+                        container_hostname_in_network: str = next(
+                            host
+                            for host in dns_names
+                            if container.id.startswith(host)  # type: ignore
+                        )
+                        full_url = f"http://{container_hostname_in_network}:{healthcheck.associated_port}{healthcheck.value}"
+                        response = requests.get(
+                            full_url,
+                            timeout=healthcheck_timeout,
+                        )
+                        if response.status_code == status.HTTP_200_OK:
+                            deployment_status = (
+                                Deployment.DeploymentStatus.HEALTHY
+                            )
+                        else:
+                            deployment_status = (
+                                Deployment.DeploymentStatus.UNHEALTHY
+                            )
+                        deployment_status_reason = response.content.decode(
+                            "utf-8"
+                        )
+
+                except TimeoutError as e:
+                    deployment_status = Deployment.DeploymentStatus.UNHEALTHY
+                    deployment_status_reason = str(e)
+
+    return deployment_status, deployment_status_reason
+
+
+async def log_deployment_health(
+    details: HealthcheckDeploymentDetails,
+    deployment_status: Deployment.DeploymentStatus,
+    deployment_status_reason: str,
+):
+    status_color = (
+        Colors.GREEN
+        if deployment_status == Deployment.DeploymentStatus.HEALTHY
+        else Colors.RED
+    )
+
+    print(
+        f"Healthcheck for {details.deployment.hash=} | finished with {deployment_status=} 🏁"
+    )
+
+    unhealthy = deployment_status != Deployment.DeploymentStatus.HEALTHY
+
+    if unhealthy:
+        if deployment_status == Deployment.DeploymentStatus.UNHEALTHY:
+            status_flag = "❌"
+        else:
+            status_flag = "🏁"
+
+        await deployment_log(
+            deployment=details.deployment,
+            message=f"Monitoring Healthcheck for deployment {Colors.ORANGE}{details.deployment.hash}{Colors.ENDC} "
+            f"| finished with result : {Colors.GREY}{deployment_status_reason}{Colors.ENDC}",
+        )
+        await deployment_log(
+            deployment=details.deployment,
+            message=f"Monitoring Healthcheck for deployment {Colors.ORANGE}{details.deployment.hash}{Colors.ENDC} "
+            f"| finished with status {status_color}{deployment_status}{Colors.ENDC} {status_flag}",
+        )
+
 
 class MonitorDockerDeploymentActivities:
     def __init__(self):
@@ -118,163 +361,12 @@ class MonitorDockerDeploymentActivities:
                     "Deployment is sleeping, skipping monitoring health check ",
                 )
 
-            healthcheck = details.healthcheck
-
-            healthcheck_timeout = (
-                healthcheck.timeout_seconds
-                if healthcheck is not None
-                else settings.DEFAULT_HEALTHCHECK_TIMEOUT
+            deployment_status, deployment_status_reason = get_deployment_health(
+                self.docker_client, swarm_service, details
             )
-
-            task_list = swarm_service.tasks(
-                filters={
-                    "label": f"deployment_hash={details.deployment.hash}",
-                    "desired-state": "running",
-                }
+            await log_deployment_health(
+                details, deployment_status, deployment_status_reason
             )
-            if len(task_list) == 0:
-                deployment_status = Deployment.DeploymentStatus.UNHEALTHY
-                deployment_status_reason = "Error: The service is down, did you manually scale down the service ?"
-            else:
-                most_recent_swarm_task = DockerSwarmTask.from_dict(
-                    max(
-                        task_list,
-                        key=lambda task: task["Version"]["Index"],
-                    )
-                )
-
-                state_matrix = {
-                    DockerSwarmTaskState.NEW: Deployment.DeploymentStatus.STARTING,
-                    DockerSwarmTaskState.PENDING: Deployment.DeploymentStatus.STARTING,
-                    DockerSwarmTaskState.ASSIGNED: Deployment.DeploymentStatus.STARTING,
-                    DockerSwarmTaskState.ACCEPTED: Deployment.DeploymentStatus.STARTING,
-                    DockerSwarmTaskState.READY: Deployment.DeploymentStatus.STARTING,
-                    DockerSwarmTaskState.PREPARING: Deployment.DeploymentStatus.STARTING,
-                    DockerSwarmTaskState.STARTING: Deployment.DeploymentStatus.STARTING,
-                    DockerSwarmTaskState.RUNNING: Deployment.DeploymentStatus.HEALTHY,
-                    DockerSwarmTaskState.COMPLETE: Deployment.DeploymentStatus.UNHEALTHY,
-                    DockerSwarmTaskState.FAILED: Deployment.DeploymentStatus.UNHEALTHY,
-                    DockerSwarmTaskState.SHUTDOWN: Deployment.DeploymentStatus.UNHEALTHY,
-                    DockerSwarmTaskState.REJECTED: Deployment.DeploymentStatus.UNHEALTHY,
-                    DockerSwarmTaskState.ORPHANED: Deployment.DeploymentStatus.UNHEALTHY,
-                    DockerSwarmTaskState.REMOVE: Deployment.DeploymentStatus.UNHEALTHY,
-                }
-
-                exited_without_error = 0
-                deployment_status = state_matrix[most_recent_swarm_task.state]
-
-                all_tasks = swarm_service.tasks(
-                    filters={
-                        "label": f"deployment_hash={details.deployment.hash}",
-                    }
-                )
-                # We set the status to restarting, because we get more than one task for this service when we restart it
-                if (
-                    deployment_status == Deployment.DeploymentStatus.STARTING
-                    and len(all_tasks) > 1
-                ):
-                    deployment_status = Deployment.DeploymentStatus.RESTARTING
-                deployment_status_reason = (
-                    most_recent_swarm_task.Status.Err
-                    if most_recent_swarm_task.Status.Err is not None
-                    else most_recent_swarm_task.Status.Message
-                )
-
-                if most_recent_swarm_task.state == DockerSwarmTaskState.SHUTDOWN:
-                    status_code = most_recent_swarm_task.Status.ContainerStatus.ExitCode  # type: ignore
-                    if (
-                        status_code is not None and status_code != exited_without_error
-                    ) or most_recent_swarm_task.Status.Err is not None:
-                        deployment_status = Deployment.DeploymentStatus.UNHEALTHY
-
-                if (
-                    most_recent_swarm_task.state == DockerSwarmTaskState.RUNNING
-                    and most_recent_swarm_task.container_id is not None
-                ):
-                    if healthcheck is not None:
-                        try:
-                            print(
-                                f"Running custom healthcheck {healthcheck.type=} - {healthcheck.value=}"
-                            )
-                            container = self.docker_client.containers.get(
-                                most_recent_swarm_task.container_id
-                            )
-                            if healthcheck.type == HealthCheck.HealthCheckType.COMMAND:
-                                exit_code, output = container.exec_run(
-                                    cmd=healthcheck.value,
-                                    stdout=True,
-                                    stderr=True,
-                                    stdin=False,
-                                )
-
-                                if exit_code == 0:
-                                    deployment_status = (
-                                        Deployment.DeploymentStatus.HEALTHY
-                                    )
-                                else:
-                                    deployment_status = (
-                                        Deployment.DeploymentStatus.UNHEALTHY
-                                    )
-                                deployment_status_reason = output.decode("utf-8")
-                            else:
-                                container_networks = container.attrs["NetworkSettings"][
-                                    "Networks"
-                                ]
-                                dns_names = container_networks["zane"]["DNSNames"]
-                                container_hostname_in_network: str = next(
-                                    host
-                                    for host in dns_names
-                                    if container.id.startswith(host)  # type: ignore
-                                )
-                                full_url = f"http://{container_hostname_in_network}:{healthcheck.associated_port}{healthcheck.value}"
-                                response = requests.get(
-                                    full_url,
-                                    timeout=healthcheck_timeout,
-                                )
-                                if response.status_code == status.HTTP_200_OK:
-                                    deployment_status = (
-                                        Deployment.DeploymentStatus.HEALTHY
-                                    )
-                                else:
-                                    deployment_status = (
-                                        Deployment.DeploymentStatus.UNHEALTHY
-                                    )
-                                deployment_status_reason = response.content.decode(
-                                    "utf-8"
-                                )
-
-                        except TimeoutError as e:
-                            deployment_status = Deployment.DeploymentStatus.UNHEALTHY
-                            deployment_status_reason = str(e)
-
-            status_color = (
-                Colors.GREEN
-                if deployment_status == Deployment.DeploymentStatus.HEALTHY
-                else Colors.RED
-            )
-
-            print(
-                f"Healthcheck for {details.deployment.hash=} | finished with {deployment_status=} 🏁"
-            )
-
-            unhealthy = deployment_status != Deployment.DeploymentStatus.HEALTHY
-
-            if unhealthy:
-                if deployment_status == Deployment.DeploymentStatus.UNHEALTHY:
-                    status_flag = "❌"
-                else:
-                    status_flag = "🏁"
-
-                await deployment_log(
-                    deployment=details.deployment,
-                    message=f"Monitoring Healthcheck for deployment {Colors.ORANGE}{details.deployment.hash}{Colors.ENDC} "
-                    f"| finished with result : {Colors.GREY}{deployment_status_reason}{Colors.ENDC}",
-                )
-                await deployment_log(
-                    deployment=details.deployment,
-                    message=f"Monitoring Healthcheck for deployment {Colors.ORANGE}{details.deployment.hash}{Colors.ENDC} "
-                    f"| finished with status {status_color}{deployment_status}{Colors.ENDC} {status_flag}",
-                )
 
             return deployment_status, deployment_status_reason
 
@@ -298,8 +390,16 @@ class MonitorDockerDeploymentActivities:
 
 
 class DockerDeploymentStatsActivities:
+    SWARM_SERVICE_LABEL = "com.docker.swarm.service.name"
+
     def __init__(self):
         self.docker_client = get_docker_client()
+        self.stats_executor = ThreadPoolExecutor(
+            max_workers=settings.METRICS_NODE_COLLECTOR_MAX_WORKERS,
+            thread_name_prefix="metrics-collector",
+        )
+        # last CPU sample of each container, the CPU usage is computed against it
+        self.previous_cpu_stats: dict[str, dict] = {}
 
     @activity.defn
     async def get_deployment_stats(
@@ -353,65 +453,8 @@ class DockerDeploymentStatsActivities:
                             return  # we cannot get the stats of a dead container
 
                         stats = container.stats(stream=False)
-
-                        # Calculate CPU usage percentage
-                        cpu_delta = (
-                            stats["cpu_stats"]["cpu_usage"]["total_usage"]
-                            - stats["precpu_stats"]["cpu_usage"]["total_usage"]
-                        )
-                        system_delta = (
-                            stats["cpu_stats"]["system_cpu_usage"]
-                            - stats["precpu_stats"]["system_cpu_usage"]
-                        )
-                        cpu_percent: float = (
-                            (cpu_delta / system_delta)
-                            * stats["cpu_stats"]["online_cpus"]
-                            * 100
-                        )
-
-                        # Memory usage
-                        memory_usage: int = stats["memory_stats"]["usage"]
-
-                        # Network usage
-                        rx_bytes: int = sum(
-                            network["rx_bytes"]
-                            for network in stats["networks"].values()
-                        )
-                        tx_bytes: int = sum(
-                            network["tx_bytes"]
-                            for network in stats["networks"].values()
-                        )
-
-                        # Disk I/O usage
-                        read_bytes: int = sum(
-                            io.get("value", 0)
-                            for io in (
-                                stats.get("blkio_stats", {}).get(
-                                    "io_service_bytes_recursive", []
-                                )
-                                or []
-                            )
-                            if io.get("op") == "read"
-                        )
-
-                        write_bytes: int = sum(
-                            io["value"]
-                            for io in (
-                                stats.get("blkio_stats", {}).get(
-                                    "io_service_bytes_recursive", []
-                                )
-                                or []
-                            )
-                            if io["op"] == "write"
-                        )
-
                         return ServiceMetricsResult(
-                            cpu_percent=cpu_percent,
-                            memory_bytes=memory_usage,
-                            disk_read_bytes=read_bytes,
-                            disk_writes_bytes=write_bytes,
-                            net_rx_bytes=rx_bytes,
-                            net_tx_bytes=tx_bytes,
+                            **parse_container_stats(stats),
                             deployment=details,
                         )
 
@@ -430,23 +473,167 @@ class DockerDeploymentStatsActivities:
                 non_retryable=True,
             )
 
-        await ServiceMetrics.objects.acreate(
-            cpu_percent=metrics.cpu_percent,
-            memory_bytes=metrics.memory_bytes,
-            disk_read_bytes=metrics.disk_read_bytes,
-            disk_writes_bytes=metrics.disk_writes_bytes,
-            net_rx_bytes=metrics.net_rx_bytes,
-            net_tx_bytes=metrics.net_tx_bytes,
-            deployment=deployment,
-            service=deployment.service,
+        await sync_to_async(ServiceMetrics.bulk_create_with_rollups)(
+            [
+                ServiceMetrics(
+                    cpu_percent=metrics.cpu_percent,
+                    memory_bytes=metrics.memory_bytes,
+                    disk_read_bytes=metrics.disk_read_bytes,
+                    disk_writes_bytes=metrics.disk_writes_bytes,
+                    net_rx_bytes=metrics.net_rx_bytes,
+                    net_tx_bytes=metrics.net_tx_bytes,
+                    deployment=deployment,
+                    service=deployment.service,
+                )
+            ]
         )
 
+    @staticmethod
+    def _get_container_stats(container: Container) -> Optional[dict]:
+        try:
+            # `one_shot` returns right away instead of sampling the container twice
+            return container.stats(stream=False, one_shot=True)
+        except docker.errors.NotFound:
+            return None  # this container may have been deleted already
+        except docker.errors.APIError as e:
+            print(f"Cannot get the stats of container {container.id=}: {e}")
+            return None
+
+    @activity.defn
+    async def collect_node_deployment_stats(self) -> NodeMetricsResult:
+        """
+        Get the stats of all the deployments running on this node at once:
+        list the running containers in a single call, and fetch their stats concurrently.
+        """
+        deployments: dict[str, SimpleDeploymentDetails] = {}
+        async for deployment in (
+            Deployment.objects.filter(is_current_production=True)
+            .exclude(status=Deployment.DeploymentStatus.SLEEPING)
+            .select_related("service")
+        ):
+            details = SimpleDeploymentDetails(
+                hash=deployment.hash,
+                service_id=deployment.service.id,
+                project_id=deployment.service.project_id,
+            )
+            service_name = get_swarm_service_name_for_deployment(
+                deployment_hash=details.hash,
+                project_id=details.project_id,
+                service_id=details.service_id,
+            )
+            deployments[service_name] = details
+
+        # `sparse` avoids inspecting every container, the labels are already in the listing
+        containers = self.docker_client.containers.list(
+            sparse=True,
+            filters={"label": self.SWARM_SERVICE_LABEL, "status": "running"},
+        )
+        running_containers: dict[str, Container] = {}
+        for container in sorted(
+            containers, key=lambda container: container.attrs.get("Created", 0)
+        ):
+            labels = container.attrs.get("Labels") or {}
+            service_name = labels.get(self.SWARM_SERVICE_LABEL)
+            if service_name in deployments:
+                # the most recent container of a service wins
+                running_containers[service_name] = container
+
+        loop = asyncio.get_running_loop()
+        all_stats = await asyncio.gather(
+            *[
+                loop.run_in_executor(
+                    self.stats_executor, self._get_container_stats, container
+                )
+                for container in running_containers.values()
+            ]
+        )
+
+        result = NodeMetricsResult()
+        previous_cpu_stats: dict[str, dict] = {}
+        for (service_name, container), stats in zip(
+            running_containers.items(), all_stats
+        ):
+            if stats is None:
+                continue
+            container_id: str = container.id  # type: ignore
+            previous_cpu_stats[container_id] = stats["cpu_stats"]
+
+            reference_cpu_stats = None
+            if not stats.get("precpu_stats", {}).get("system_cpu_usage"):
+                reference_cpu_stats = self.previous_cpu_stats.get(container_id)
+                if reference_cpu_stats is None:
+                    continue  # the CPU usage will be available on the next collection
+
+            result.metrics.append(
+                ServiceMetricsResult(
+                    **parse_container_stats(stats, reference_cpu_stats),
+                    deployment=deployments[service_name],
+                )
+            )
+
+        # only keep the samples of running containers
+        self.previous_cpu_stats = previous_cpu_stats
+        print(
+            f"Collected stats of {Colors.BLUE}{len(result.metrics)}{Colors.ENDC}/{len(running_containers)} deployments"
+        )
+        return result
+
+    @activity.defn
+    async def save_node_deployment_stats(self, result: NodeMetricsResult) -> int:
+        deployment_ids = {
+            hash: id
+            async for hash, id in Deployment.objects.filter(
+                hash__in=[metrics.deployment.hash for metrics in result.metrics]
+            ).values_list("hash", "id")
+        }
+
+        created = await sync_to_async(ServiceMetrics.bulk_create_with_rollups)(
+            [
+                ServiceMetrics(
+                    cpu_percent=metrics.cpu_percent,
+                    memory_bytes=metrics.memory_bytes,
+                    disk_read_bytes=metrics.disk_read_bytes,
+                    disk_writes_bytes=metrics.disk_writes_bytes,
+                    net_rx_bytes=metrics.net_rx_bytes,
+                    net_tx_bytes=metrics.net_tx_bytes,
+                    deployment_id=deployment_ids[metrics.deployment.hash],
+                    service_id=metrics.deployment.service_id,
+                )
+                for metrics in result.metrics
+                # the deployment may have been deleted since the collection
+                if metrics.deployment.hash in deployment_ids
+            ]
+        )
+        return len(created)
+
 
 class CleanupActivities:
     @activity.defn
     async def cleanup_service_metrics(self) -> CleanupResult:
         today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        deleted = await ServiceMetrics.objects.filter(
-            created_at__lt=today - timedelta(days=30)
+        deleted_count, _ = await ServiceMetrics.objects.filter(
+            created_at__lt=today - ServiceMetricsRollup.RAW_METRICS_RETENTION
         ).adelete()
-        return CleanupResult(deleted_count=deleted[0])
+
+        # coarser rollups are kept longer, as they are used for longer time ranges
+        for resolution, retention in ServiceMetricsRollup.RETENTION.items():
+            deleted, _ = await ServiceMetricsRollup.objects.filter(
+                resolution=resolution, bucket__lt=today - retention
+            ).adelete()
+            deleted_count += deleted
+        return CleanupResult(deleted_count=deleted_count)
+
+    @activity.defn
+    async def rotate_http_log_partitions(self) -> PartitionsRotationResult:
+        today = timezone.now().date()
+        table = HttpLog._meta.db_table
+        # one more partition than needed, so that tomorrow's exists even if a run is missed
+        created = await sync_to_async(create_daily_partitions)(
+            table, start=today, days=HttpLog.PARTITIONS_AHEAD + 1
+        )
+        dropped, deleted_count = await sync_to_async(drop_daily_partitions)(
+            table, before=today - HttpLog.RETENTION
+        )
+        return PartitionsRotationResult(
+            created=created, dropped=dropped, deleted_count=deleted_count
+        )
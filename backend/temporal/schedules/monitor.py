@@ -0,0 +1,314 @@
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable, Optional
+
+from temporalio import activity, workflow
+
+from .activities import (
+    get_deployment_health,
+    get_docker_client,
+    get_swarm_service_name_for_deployment,
+    log_deployment_health,
+)
+from ..shared import (
+    DeploymentHealthcheckResult,
+    HealthcheckDeploymentDetails,
+    HealthcheckMonitorResult,
+    SimpleDeploymentDetails,
+)
+
+with workflow.unsafe.imports_passed_through():
+    import docker
+    import docker.errors
+    import requests
+    from django.conf import settings
+    from django.db.models import Case, F, Q, TextField, Value, When
+    from django.utils import timezone
+    from zane_api.dtos import HealthCheckDto
+    from zane_api.models import Deployment
+    from zane_api.prometheus import (
+        healthcheck_check_lag,
+        healthcheck_checks,
+        healthcheck_monitored_deployments,
+    )
+    from zane_api.utils import Colors
+
+
+def get_healthcheck_details(deployment: Deployment) -> HealthcheckDeploymentDetails:
+    healthcheck = deployment.service.healthcheck
+    return HealthcheckDeploymentDetails(
+        deployment=SimpleDeploymentDetails(
+            hash=deployment.hash,
+            service_id=deployment.service.id,
+            project_id=deployment.service.project_id,
+        ),
+        healthcheck=(
+            HealthCheckDto.from_dict(
+                dict(
+                    type=healthcheck.type,
+                    value=healthcheck.value,
+                    timeout_seconds=healthcheck.timeout_seconds,
+                    interval_seconds=healthcheck.interval_seconds,
+                    id=healthcheck.id,
+                    associated_port=healthcheck.associated_port,
+                )
+            )
+            if healthcheck is not None
+            else None
+        ),
+    )
+
+
+@dataclass
+class MonitoredDeployment:
+    details: HealthcheckDeploymentDetails
+    status: str
+    next_check_at: float
+
+    @property
+    def interval(self) -> float:
+        if self.details.healthcheck is not None:
+            return self.details.healthcheck.interval_seconds
+        return settings.DEFAULT_HEALTHCHECK_INTERVAL
+
+    @property
+    def timeout(self) -> float:
+        if self.details.healthcheck is not None:
+            return self.details.healthcheck.timeout_seconds
+        return settings.DEFAULT_HEALTHCHECK_TIMEOUT
+
+
+class HealthcheckMonitor:
+    """
+    Run the monitoring healthchecks of all the production deployments from a single loop,
+    instead of one schedule (and one workflow per check) for each deployment.
+
+    The healthchecks of the deployments are reloaded from the database regularly, the due checks
+    are run concurrently in a thread pool (the docker client is blocking), and only the changes of status
+    are saved, in batches.
+    """
+
+    # the statuses set by the monitoring healthchecks, the other deployments are not monitored
+    MONITORED_STATUSES = [
+        Deployment.DeploymentStatus.HEALTHY,
+        Deployment.DeploymentStatus.UNHEALTHY,
+        Deployment.DeploymentStatus.STARTING,
+        Deployment.DeploymentStatus.RESTARTING,
+    ]
+    RELOAD_INTERVAL = 15
+    SAVE_INTERVAL = 2
+    TICK_INTERVAL = 0.5
+    # spread of the checks of a deployment around its interval
+    INTERVAL_JITTER = 0.05
+    # added to the timeout of the healthcheck, for the calls to the docker API around it
+    TIMEOUT_GRACE = 5
+
+    def __init__(self, docker_client: docker.DockerClient, max_concurrent_checks: int):
+        self.docker_client = docker_client
+        self.deployments: dict[str, MonitoredDeployment] = {}
+        self.running_checks: dict[str, asyncio.Task] = {}
+        self.status_changes: dict[str, DeploymentHealthcheckResult] = {}
+        self.semaphore = asyncio.Semaphore(max_concurrent_checks)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_concurrent_checks, thread_name_prefix="healthcheck-monitor"
+        )
+        self.result = HealthcheckMonitorResult()
+
+    async def reload(self):
+        now = time.monotonic()
+        deployments: dict[str, MonitoredDeployment] = {}
+        async for deployment in Deployment.objects.filter(
+            is_current_production=True, status__in=self.MONITORED_STATUSES
+        ).select_related("service", "service__healthcheck"):
+            monitored = MonitoredDeployment(
+                details=get_healthcheck_details(deployment),
+                status=deployment.status,
+                next_check_at=now,
+            )
+            previous = self.deployments.get(deployment.hash)
+            if previous is not None:
+                monitored.next_check_at = previous.next_check_at
+            else:
+                # the first checks are staggered over the interval, so that they don't all run at once
+                monitored.next_check_at = now + random.uniform(0, monitored.interval)
+            status_change = self.status_changes.get(deployment.hash)
+            if status_change is not None:
+                monitored.status = status_change.status
+            deployments[deployment.hash] = monitored
+        self.deployments = deployments
+        healthcheck_monitored_deployments.set(len(deployments))
+
+    def start_due_checks(self):
+        now = time.monotonic()
+        for hash, monitored in self.deployments.items():
+            if monitored.next_check_at > now or hash in self.running_checks:
+                continue
+            due_at = monitored.next_check_at
+            # checks missed while the monitor was late are skipped, not caught up
+            monitored.next_check_at = max(now, due_at) + monitored.interval * (
+                1 + random.uniform(-self.INTERVAL_JITTER, self.INTERVAL_JITTER)
+            )
+            task = asyncio.create_task(self.check(monitored, due_at))
+            self.running_checks[hash] = task
+            task.add_done_callback(
+                lambda _, hash=hash: self.running_checks.pop(hash, None)
+            )
+
+    def get_health(
+        self, details: HealthcheckDeploymentDetails
+    ) -> Optional[tuple[Deployment.DeploymentStatus, str]]:
+        try:
+            swarm_service = self.docker_client.services.get(
+                get_swarm_service_name_for_deployment(
+                    deployment_hash=details.deployment.hash,
+                    project_id=details.deployment.project_id,
+                    service_id=details.deployment.service_id,
+                )
+            )
+        except docker.errors.NotFound:
+            # the deployment was removed since the last reload
+            return None
+        labels = swarm_service.attrs["Spec"].get("Labels") or {}
+        if labels.get("status") == "sleeping":
+            # the service is scaled down, its schedule used to be paused in that case
+            return None
+        return get_deployment_health(self.docker_client, swarm_service, details)
+
+    def run_health_check(
+        self,
+        details: HealthcheckDeploymentDetails,
+        loop: asyncio.AbstractEventLoop,
+        started: asyncio.Event,
+    ) -> Optional[tuple[Deployment.DeploymentStatus, str]]:
+        loop.call_soon_threadsafe(started.set)
+        return self.get_health(details)
+
+    async def check(self, monitored: MonitoredDeployment, due_at: float):
+        details = monitored.details
+        timeout = monitored.timeout + self.TIMEOUT_GRACE
+        async with self.semaphore:
+            healthcheck_check_lag.observe(max(0, time.monotonic() - due_at))
+            loop = asyncio.get_running_loop()
+            started = asyncio.Event()
+            future = loop.run_in_executor(
+                self.executor, self.run_health_check, details, loop, started
+            )
+            try:
+                # a hung check keeps its thread after timing out, so the timeout only starts
+                # once a thread picks the check up: queued checks are not marked as unhealthy without running
+                await started.wait()
+                health = await asyncio.wait_for(future, timeout=timeout)
+            except asyncio.TimeoutError:
+                health = (
+                    Deployment.DeploymentStatus.UNHEALTHY,
+                    f"The healthcheck did not finish in {timeout} seconds",
+                )
+            except (docker.errors.APIError, requests.RequestException) as e:
+                print(
+                    f"{Colors.RED}Cannot run the healthcheck of {details.deployment.hash=}: {e}{Colors.ENDC}"
+                )
+                return
+
+        if health is None:
+            return
+        deployment_status, deployment_status_reason = health
+        self.result.checks += 1
+        healthcheck_checks.labels(status=deployment_status).inc()
+        await log_deployment_health(
+            details, deployment_status, deployment_status_reason
+        )
+        if deployment_status != monitored.status:
+            monitored.status = deployment_status
+            self.status_changes[details.deployment.hash] = DeploymentHealthcheckResult(
+                deployment_hash=details.deployment.hash,
+                status=deployment_status,
+                reason=deployment_status_reason,
+                service_id=details.deployment.service_id,
+            )
+
+    async def save_status_changes(self):
+        if len(self.status_changes) == 0:
+            return
+        changes = list(self.status_changes.values())
+        self.status_changes = {}
+        await Deployment.objects.filter(
+            Q(
+                hash__in=[change.deployment_hash for change in changes],
+                is_current_production=True,
+            )
+            & ~Q(
+                status__in=[
+                    Deployment.DeploymentStatus.SLEEPING,
+                    Deployment.DeploymentStatus.REMOVED,
+                ]
+            )
+        ).aupdate(
+            status=Case(
+                *[
+                    When(hash=change.deployment_hash, then=Value(change.status))
+                    for change in changes
+                ],
+                default=F("status"),
+            ),
+            status_reason=Case(
+                *[
+                    When(
+                        hash=change.deployment_hash,
+                        then=Value(change.reason, output_field=TextField()),
+                    )
+                    for change in changes
+                ],
+                default=F("status_reason"),
+            ),
+            updated_at=timezone.now(),
+        )
+        self.result.status_changes += len(changes)
+
+    async def wait_for_running_checks(self):
+        await asyncio.gather(*self.running_checks.values(), return_exceptions=True)
+
+    async def run(self, duration: timedelta, heartbeat: Callable[[], None]):
+        deadline = time.monotonic() + duration.total_seconds()
+        reloaded_at = saved_at = float("-inf")
+        try:
+            while time.monotonic() < deadline:
+                if time.monotonic() - reloaded_at >= self.RELOAD_INTERVAL:
+                    await self.save_status_changes()
+                    await self.reload()
+                    reloaded_at = time.monotonic()
+                self.start_due_checks()
+                if time.monotonic() - saved_at >= self.SAVE_INTERVAL:
+                    await self.save_status_changes()
+                    saved_at = time.monotonic()
+                heartbeat()
+                await asyncio.sleep(self.TICK_INTERVAL)
+            await self.wait_for_running_checks()
+        finally:
+            for task in list(self.running_checks.values()):
+                task.cancel()
+            await self.save_status_changes()
+            self.executor.shutdown(wait=False)
+        return self.result
+
+
+class HealthcheckMonitorActivities:
+    # the activity returns after this duration, so that the history of the workflow stays small
+    RUN_DURATION = timedelta(hours=1)
+    HEARTBEAT_TIMEOUT = timedelta(seconds=60)
+
+    @activity.defn
+    async def run_healthcheck_monitor(self) -> HealthcheckMonitorResult:
+        monitor = HealthcheckMonitor(
+            docker_client=get_docker_client(),
+            max_concurrent_checks=settings.HEALTHCHECK_MONITOR_MAX_CONCURRENT_CHECKS,
+        )
+        result = await monitor.run(self.RUN_DURATION, heartbeat=activity.heartbeat)
+        print(
+            f"Healthcheck monitor ran {Colors.BLUE}{result.checks}{Colors.ENDC} checks,"
+            f" with {Colors.BLUE}{result.status_changes}{Colors.ENDC} status changes"
+        )
+        return result
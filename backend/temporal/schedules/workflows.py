@@ -8,10 +8,13 @@ from .activities import (
     MonitorDockerDeploymentActivities,
     CleanupActivities,
 )
+from .monitor import HealthcheckMonitorActivities
 from ..shared import (
     HealthcheckDeploymentDetails,
     DeploymentHealthcheckResult,
     CleanupResult,
+    HealthcheckMonitorResult,
+    NodeMetricsResult,
     SimpleDeploymentDetails,
 )
 
@@ -72,6 +75,28 @@ class MonitorDockerDeploymentWorkflow:
         return deployment_status, deployment_status_reason
 
 
+@workflow.defn(name="healthcheck-monitor")
+class HealthcheckMonitorWorkflow:
+    """
+    Run the monitoring healthchecks of all the deployments, in a single long-lived activity.
+    The workflow is restarted as new after each run of the activity, so that its history stays small.
+    """
+
+    @workflow.run
+    async def run(self) -> None:
+        print("\nRunning workflow HealthcheckMonitorWorkflow")
+        result: HealthcheckMonitorResult = await workflow.execute_activity_method(
+            HealthcheckMonitorActivities.run_healthcheck_monitor,
+            start_to_close_timeout=HealthcheckMonitorActivities.RUN_DURATION
+            + timedelta(minutes=5),
+            heartbeat_timeout=HealthcheckMonitorActivities.HEARTBEAT_TIMEOUT,
+            # the monitor is restarted on another worker when this one stops
+            retry_policy=RetryPolicy(maximum_interval=timedelta(seconds=30)),
+        )
+        print(f"Healthcheck monitor finished with {result=}, restarting it")
+        workflow.continue_as_new()
+
+
 @workflow.defn(name="get-docker-deployment-stats")
 class GetDockerDeploymentStatsWorkflow:
     @workflow.run
@@ -107,6 +132,42 @@ class GetDockerDeploymentStatsWorkflow:
         return metrics_result
 
 
+@workflow.defn(name="collect-node-deployment-stats")
+class CollectNodeDeploymentStatsWorkflow:
+    @workflow.run
+    async def run(self) -> NodeMetricsResult:
+        print("\nRunning workflow CollectNodeDeploymentStatsWorkflow")
+        retry_policy = RetryPolicy(
+            maximum_attempts=5, maximum_interval=timedelta(seconds=30)
+        )
+        print("Running activity `monitor_close_faulty_db_connections()`")
+        await workflow.execute_activity_method(
+            MonitorDockerDeploymentActivities.monitor_close_faulty_db_connections,
+            retry_policy=retry_policy,
+            start_to_close_timeout=timedelta(seconds=10),
+        )
+
+        print("Running activity `collect_node_deployment_stats()`")
+        metrics_result = await workflow.execute_activity_method(
+            DockerDeploymentStatsActivities.collect_node_deployment_stats,
+            retry_policy=retry_policy,
+            start_to_close_timeout=timedelta(seconds=30),
+        )
+
+        if metrics_result.metrics:
+            print(
+                f"Running activity `save_node_deployment_stats({len(metrics_result.metrics)=})`"
+            )
+            await workflow.execute_activity_method(
+                DockerDeploymentStatsActivities.save_node_deployment_stats,
+                metrics_result,
+                retry_policy=retry_policy,
+                start_to_close_timeout=timedelta(seconds=30),
+            )
+
+        return metrics_result
+
+
 @workflow.defn(name="cleanup-app-logs")
 class CleanupAppLogsWorkflow:
     @workflow.run
@@ -114,9 +175,14 @@ class CleanupAppLogsWorkflow:
         retry_policy = RetryPolicy(
             maximum_attempts=5, maximum_interval=timedelta(seconds=30)
         )
+        await workflow.execute_activity_method(
+            CleanupActivities.rotate_http_log_partitions,
+            start_to_close_timeout=timedelta(seconds=60),
+            retry_policy=retry_policy,
+        )
         result = await workflow.execute_activity_method(
             CleanupActivities.cleanup_service_metrics,
-            start_to_close_timeout=timedelta(seconds=5),
+            start_to_close_timeout=timedelta(seconds=60),
             retry_policy=retry_policy,
         )
 
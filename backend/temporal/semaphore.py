@@ -1,92 +1,186 @@
 import asyncio
-from django.core.cache import cache
-from asgiref.sync import sync_to_async
+import uuid
+import weakref
 from datetime import timedelta
+from typing import Optional
+
+import redis.asyncio as redis
+from django.conf import settings
+
+
+# All the scripts reap the holders whose lease expired before doing anything,
+# so that a crashed holder only blocks its slot until `semaphore_timeout`.
+# Expiries are computed with the redis server time, to not depend on the clocks of the workers.
+_REAP_EXPIRED_HOLDERS = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+"""
+
+_EXPIRE_WITH_LAST_HOLDER = """
+local last = redis.call('ZRANGE', KEYS[1], -1, -1, 'WITHSCORES')
+if last[2] then
+    redis.call('PEXPIREAT', KEYS[1], last[2])
+end
+"""
+
+# KEYS[1]: holders, ARGV[1]: token, ARGV[2]: limit, ARGV[3]: lease in ms
+ACQUIRE_SCRIPT = (
+    _REAP_EXPIRED_HOLDERS
+    + """
+local expires_at = now + tonumber(ARGV[3])
+if redis.call('ZSCORE', KEYS[1], ARGV[1]) or redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[2]) then
+    redis.call('ZADD', KEYS[1], expires_at, ARGV[1])
+"""
+    + _EXPIRE_WITH_LAST_HOLDER
+    + """
+    return 1
+end
+return 0
+"""
+)
+
+# KEYS[1]: holders, ARGV[1]: token, ARGV[2]: limit, ARGV[3]: lease in ms
+ACQUIRE_ALL_SCRIPT = (
+    _REAP_EXPIRED_HOLDERS
+    + """
+local expires_at = now + tonumber(ARGV[3])
+if redis.call('ZCARD', KEYS[1]) == 0 then
+    for i = 1, tonumber(ARGV[2]) do
+        redis.call('ZADD', KEYS[1], expires_at, ARGV[1] .. '#' .. i)
+    end
+"""
+    + _EXPIRE_WITH_LAST_HOLDER
+    + """
+    return 1
+end
+return 0
+"""
+)
+
+# KEYS[1]: holders, KEYS[2]: channel, ARGV[1]: token, ARGV[2]: limit
+RELEASE_SCRIPT = """
+local released = redis.call('ZREM', KEYS[1], ARGV[1])
+for i = 1, tonumber(ARGV[2]) do
+    released = released + redis.call('ZREM', KEYS[1], ARGV[1] .. '#' .. i)
+end
+if released > 0 then
+    redis.call('PUBLISH', KEYS[2], released)
+end
+return released
+"""
+
+# KEYS[1]: holders, KEYS[2]: channel
+RESET_SCRIPT = """
+redis.call('DEL', KEYS[1])
+redis.call('PUBLISH', KEYS[2], 0)
+"""
+
+
+_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, redis.Redis] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_redis_client() -> redis.Redis:
+    """
+    Return the redis client bound to the running event loop, creating it if necessary,
+    as async connections cannot be shared between event loops.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = redis.from_url(settings.REDIS_URL)
+        _clients[loop] = client
+    return client
 
 
 class AsyncSemaphore:
+    """
+    Counting semaphore shared between processes, stored in redis.
+
+    Each holder is a `token` in a sorted set, scored by the time its lease expires,
+    every operation is a single atomic script. Waiters are woken up by a pub/sub message
+    when a slot is released, and check again every `poll_interval` seconds in case
+    a slot was freed by an expired lease.
+    """
+
     def __init__(
         self,
         key: str,
         limit=1,
         semaphore_timeout=timedelta(seconds=10),
-        lock_timeout=timedelta(seconds=5),
+        token: Optional[str] = None,
+        poll_interval: float = 1.0,
     ):
         self.key = f"semaphore:{key}"
-        self.lock_key = f"{self.key}:lock"
+        self.channel = f"{self.key}:released"
         self.limit = limit
-        self.semaphore_timeout = semaphore_timeout.seconds
-        self.lock_timeout = lock_timeout.seconds
-
-    async def _acquire_lock(self):
-        return await sync_to_async(cache.add)(self.lock_key, "1", self.lock_timeout)
-
-    async def _release_lock(self):
-        await sync_to_async(cache.delete)(self.lock_key)
-
-    async def acquire(self, retry_delay=0.1, max_retries: int | None = None):
-        retries = 0
-        while max_retries is None or retries < max_retries:
-            if await self._acquire_lock():
-                try:
-                    count = await sync_to_async(cache.get)(self.key, 0)
-                    if count < self.limit:
-                        await sync_to_async(cache.set)(
-                            self.key, count + 1, self.semaphore_timeout
-                        )
-                        return True
-                finally:
-                    await self._release_lock()
-            retries += 1
-            await asyncio.sleep(retry_delay)
-        return False
+        self.lease_ms = int(semaphore_timeout.total_seconds() * 1000)
+        self.token = token or uuid.uuid4().hex
+        self.poll_interval = poll_interval
+        self.client = get_redis_client()
+        self._acquire_script = self.client.register_script(ACQUIRE_SCRIPT)
+        self._acquire_all_script = self.client.register_script(ACQUIRE_ALL_SCRIPT)
+        self._release_script = self.client.register_script(RELEASE_SCRIPT)
+        self._reset_script = self.client.register_script(RESET_SCRIPT)
+
+    async def _try_acquire(self, script) -> bool:
+        acquired = await script(
+            keys=[self.key], args=[self.token, self.limit, self.lease_ms]
+        )
+        return acquired == 1
+
+    async def _wait_for(self, script, timeout: Optional[timedelta]) -> bool:
+        if await self._try_acquire(script):
+            return True
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout.total_seconds() if timeout else None
+        pubsub = self.client.pubsub()
+        await pubsub.subscribe(self.channel)
+        try:
+            while True:
+                # check again after subscribing, a slot may have been released in between
+                if await self._try_acquire(script):
+                    return True
+                wait_for = self.poll_interval
+                if deadline is not None:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        return False
+                    wait_for = min(wait_for, remaining)
+                await pubsub.get_message(ignore_subscribe_messages=True, timeout=wait_for)
+        finally:
+            await pubsub.reset()
+
+    async def acquire(self, timeout: Optional[timedelta] = None) -> bool:
+        """
+        Wait for a free slot and take it, returns `False` if none was freed before `timeout`.
+        Acquiring again with the same token only renews its lease.
+        """
+        return await self._wait_for(self._acquire_script, timeout)
+
+    async def acquire_all(self, timeout: Optional[timedelta] = None) -> bool:
+        """
+        Wait until the semaphore is completely free and then acquire all available slots,
+        effectively blocking any other acquirer.
+        """
+        return await self._wait_for(self._acquire_all_script, timeout)
 
     async def release(self):
-        if await self._acquire_lock():
-            try:
-                count = await sync_to_async(cache.get)(self.key, 0)
-                if count > 0:
-                    await sync_to_async(cache.set)(
-                        self.key, count - 1, self.semaphore_timeout
-                    )
-            finally:
-                await self._release_lock()
-
-    async def reset(self, retry_delay=0.1):
         """
-        Reset the semaphore by setting its counter to 0, effectively releasing all acquired slots.
-        This method uses the same lock mechanism to ensure an atomic update.
+        Release the slots held by this token, and wake up the waiters.
         """
-        while True:
-            if await self._acquire_lock():
-                try:
-                    await sync_to_async(cache.set)(self.key, 0, self.semaphore_timeout)
-                    return
-                finally:
-                    await self._release_lock()
-            await asyncio.sleep(retry_delay)
-
-    async def acquire_all(self, retry_delay=0.1, max_retries: int | None = None):
+        await self._release_script(
+            keys=[self.key, self.channel], args=[self.token, self.limit]
+        )
+
+    async def reset(self):
         """
-        Wait until the semaphore is completely free and then acquire all available slots.
-        This method sets the counter to the full limit, effectively blocking any other acquirer.
+        Reset the semaphore by removing all its holders, effectively releasing all acquired slots.
         """
-        retries = 0
-        while max_retries is None or retries < max_retries:
-            if await self._acquire_lock():
-                try:
-                    count: int = await sync_to_async(cache.get)(self.key, 0)
-                    if count == 0:
-                        # Acquire all tokens at once.
-                        await sync_to_async(cache.set)(
-                            self.key, self.limit, self.semaphore_timeout
-                        )
-                        return True
-                finally:
-                    await self._release_lock()
-            retries += 1
-            await asyncio.sleep(retry_delay)
-        return False
+        await self._reset_script(keys=[self.key, self.channel])
 
     async def __aenter__(self):
         acquired = await self.acquire()
@@ -379,6 +379,17 @@ class ServiceMetricsResult:
     deployment: SimpleDeploymentDetails
 
 
+@dataclass
+class NodeMetricsResult:
+    metrics: List[ServiceMetricsResult] = field(default_factory=list)
+
+
+@dataclass
+class HealthcheckMonitorResult:
+    checks: int = 0
+    status_changes: int = 0
+
+
 @dataclass
 class DeployServiceWorkflowResult:
     deployment_status: str
@@ -397,6 +408,13 @@ class CleanupResult:
     deleted_count: int
 
 
+@dataclass
+class PartitionsRotationResult:
+    created: List[str]
+    dropped: List[str]
+    deleted_count: int
+
+
 @dataclass
 class UpdateDetails:
     desired_version: str
@@ -1,3 +1,5 @@
+import asyncio
+import time
 from django.conf import settings
 from temporalio.client import Client
 from temporalio.service import KeepAliveConfig
@@ -7,7 +9,7 @@ from temporalio.worker import (
     Interceptor,
     ExecuteActivityInput,
 )
-from temporalio import workflow
+from temporalio import activity, workflow
 
 from .workflows import get_workflows_and_activities
 
@@ -15,6 +17,11 @@ from .workflows import get_workflows_and_activities
 with workflow.unsafe.imports_passed_through():
     from django import db
     from asgiref.sync import sync_to_async
+    from search.log_sink import flush_loki_log_sink, track_log_sink_writes
+    from .helpers import start_host_ports_index_watcher
+    from .docker_events import start_docker_events_listener
+    from prometheus_client import start_http_server
+    from zane_api.prometheus import temporal_activity_duration
 
 
 async def close_old_db_connections():
@@ -32,23 +39,59 @@ async def close_old_db_connections():
 class MainActivityInterceptor(ActivityInboundInterceptor):
     async def execute_activity(self, input: ExecuteActivityInput):
         result = None
+        start_time = time.monotonic()
+        outcome = "failed"
         try:
             result = await super().execute_activity(input)
+            outcome = "completed"
         except (db.utils.InterfaceError, db.utils.OperationalError):
             print("=== Closing dead DB connections before retry ===")
             await close_old_db_connections()
             result = await super().execute_activity(input)
+            outcome = "completed"
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
         finally:
+            temporal_activity_duration.labels(
+                activity=activity.info().activity_type, outcome=outcome
+            ).observe(time.monotonic() - start_time)
             print("=== Closing dead DB connections after activity execution ===")
             await close_old_db_connections()
         return result
 
 
+class LogSinkActivityInterceptor(ActivityInboundInterceptor):
+    """
+    Make sure that all the deployment logs buffered during an activity
+    are pushed to loki before the activity finishes, even when it is cancelled.
+    Only the lines written by the activity are waited for, not the ones of the other activities.
+    """
+
+    async def execute_activity(self, input: ExecuteActivityInput):
+        mark = track_log_sink_writes()
+        try:
+            return await super().execute_activity(input)
+        finally:
+            if mark.position > 0:
+                await asyncio.shield(flush_loki_log_sink(until=mark.position))
+
+
+class LogSinkInterceptor(Interceptor):
+    def intercept_activity(
+        self, next: ActivityInboundInterceptor
+    ) -> ActivityInboundInterceptor:
+        return LogSinkActivityInterceptor(next)
+
+    def workflow_interceptor_class(self, input):
+        return None
+
+
 class MainInterceptor(Interceptor):
     def intercept_activity(
         self, next: ActivityInboundInterceptor
     ) -> ActivityInboundInterceptor:
-        return MainActivityInterceptor(next)
+        return MainActivityInterceptor(LogSinkActivityInterceptor(next))
 
     def workflow_interceptor_class(self, input):
         return None
@@ -62,6 +105,16 @@ async def run_worker():
         keep_alive_config=KeepAliveConfig(timeout_millis=120_000),
     )
     print("worker connected ✅")
+    # the index of the host ports is kept up to date by the worker, for the validation of the API
+    start_host_ports_index_watcher()
+    if settings.DOCKER_EVENTS_LISTENER_ENABLED:
+        # the activities waiting for the swarm services are woken up by the docker events
+        start_docker_events_listener()
+    if settings.TEMPORALIO_WORKER_METRICS_PORT:
+        start_http_server(settings.TEMPORALIO_WORKER_METRICS_PORT)
+        print(
+            f"serving worker metrics on port `{settings.TEMPORALIO_WORKER_METRICS_PORT}` ✅"
+        )
     worker = Worker(
         client,
         task_queue=settings.TEMPORALIO_WORKER_TASK_QUEUE,
@@ -72,4 +125,7 @@ async def run_worker():
     print(
         f"running worker on task queue `{settings.TEMPORALIO_WORKER_TASK_QUEUE}`...🔄"
     )
-    await worker.run()
+    try:
+        await worker.run()
+    finally:
+        await flush_loki_log_sink()
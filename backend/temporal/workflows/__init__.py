@@ -43,6 +43,9 @@ with workflow.unsafe.imports_passed_through():
         CleanupAppLogsWorkflow,
         DockerDeploymentStatsActivities,
         GetDockerDeploymentStatsWorkflow,
+        CollectNodeDeploymentStatsWorkflow,
+        HealthcheckMonitorWorkflow,
+        HealthcheckMonitorActivities,
     )
 
 
@@ -52,6 +55,7 @@ def get_workflows_and_activities():
     cleanup_activites = CleanupActivities()
     system_cleanup_activities = SystemCleanupActivities()
     metrics_activities = DockerDeploymentStatsActivities()
+    healthcheck_monitor_activities = HealthcheckMonitorActivities()
     git_activities = GitActivities()
 
     return dict(
@@ -65,6 +69,8 @@ def get_workflows_and_activities():
             CleanupAppLogsWorkflow,
             SystemCleanupWorkflow,
             GetDockerDeploymentStatsWorkflow,
+            CollectNodeDeploymentStatsWorkflow,
+            HealthcheckMonitorWorkflow,
             AutoUpdateDockerServiceWorkflow,
             CreateEnvNetworkWorkflow,
             ArchiveEnvWorkflow,
@@ -89,6 +95,8 @@ def get_workflows_and_activities():
             git_activities.build_service_with_railpack_dockerfile,
             metrics_activities.get_deployment_stats,
             metrics_activities.save_deployment_stats,
+            metrics_activities.collect_node_deployment_stats,
+            metrics_activities.save_node_deployment_stats,
             swarm_activities.set_cancelling_status,
             swarm_activities.create_environment_network,
             swarm_activities.get_archived_env_services,
@@ -128,7 +136,9 @@ def get_workflows_and_activities():
             swarm_activities.delete_created_configs,
             monitor_activities.save_deployment_status,
             monitor_activities.run_deployment_monitor_healthcheck,
+            healthcheck_monitor_activities.run_healthcheck_monitor,
             cleanup_activites.cleanup_service_metrics,
+            cleanup_activites.rotate_http_log_partitions,
             system_cleanup_activities.cleanup_images,
             system_cleanup_activities.cleanup_containers,
             system_cleanup_activities.cleanup_volumes,
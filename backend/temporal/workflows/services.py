@@ -114,6 +114,10 @@ class BaseDeploymentWorklow:
 
 @workflow.defn(name="deploy-docker-service-workflow")
 class DeployDockerServiceWorkflow(BaseDeploymentWorklow):
+    def __init__(self):
+        super().__init__()
+        self.image_pull_activity_handle: Optional[ActivityHandle[bool]] = None
+
     @workflow.run
     async def run(self, deployment: DeploymentDetails) -> DeployServiceWorkflowResult:
         print("Running DeployDockerServiceWorkflow with payload: ")
@@ -148,6 +152,15 @@ class DeployDockerServiceWorkflow(BaseDeploymentWorklow):
                     DockerDeploymentStep.INITIALIZED,
                 )
 
+            # the image is pulled while the resources of the deployment are created
+            self.image_pull_activity_handle = workflow.start_activity_method(
+                DockerSwarmActivities.pull_image_for_deployment,
+                deployment,
+                start_to_close_timeout=timedelta(minutes=10),
+                heartbeat_timeout=timedelta(seconds=30),
+                retry_policy=self.retry_policy,
+            )
+
             previous_production_deployment = await workflow.execute_activity_method(
                 DockerSwarmActivities.get_previous_production_deployment,
                 deployment,
@@ -190,8 +203,12 @@ class DeployDockerServiceWorkflow(BaseDeploymentWorklow):
                     deployment, DockerDeploymentStep.CONFIGS_CREATED
                 )
 
+            # the previous deployment is only scaled down once the image is on the host,
+            # so that it keeps running during the pull
+            image_pulled_successfully = await self.image_pull_activity_handle
             if (
-                (len(service.non_read_only_volumes) > 0 or len(service.ports) > 0)
+                image_pulled_successfully
+                and (len(service.non_read_only_volumes) > 0 or len(service.ports) > 0)
                 and previous_production_deployment is not None
                 and previous_production_deployment.status
                 != Deployment.DeploymentStatus.FAILED
@@ -214,12 +231,6 @@ class DeployDockerServiceWorkflow(BaseDeploymentWorklow):
                     deployment, DockerDeploymentStep.PREVIOUS_DEPLOYMENT_SCALED_DOWN
                 )
 
-            image_pulled_successfully = await workflow.execute_activity_method(
-                DockerSwarmActivities.pull_image_for_deployment,
-                deployment,
-                start_to_close_timeout=timedelta(seconds=60),
-                retry_policy=self.retry_policy,
-            )
             if not image_pulled_successfully:
                 deployment_status = Deployment.DeploymentStatus.FAILED
                 deployment_status_reason = "Failed to pull image"
@@ -391,6 +402,12 @@ class DeployDockerServiceWorkflow(BaseDeploymentWorklow):
                 "Cannot cancel a deployment that already finished", non_retryable=True
             )
 
+        if (
+            self.image_pull_activity_handle is not None
+            and not self.image_pull_activity_handle.done()
+        ):
+            self.image_pull_activity_handle.cancel()
+
         await workflow.execute_activity_method(
             DockerSwarmActivities.set_cancelling_status,
             deployment,
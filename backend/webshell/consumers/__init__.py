@@ -1,2 +1,3 @@
 from .deployment_terminal import *
 from .server_terminal import *
+from .deployment_logs import *
@@ -0,0 +1,236 @@
+import asyncio
+import datetime
+import json
+import urllib.parse
+from typing import Optional, cast
+
+from asgiref.sync import sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
+from rest_framework.utils.serializer_helpers import ReturnDict
+from websockets.asyncio.client import connect
+
+from search.dtos import LiveRuntimeLogQueryDto
+from search.loki_client import LokiSearchClient
+from zane_api.models import Project, Environment, Deployment, Service
+from zane_api.utils import Colors
+
+from ..exceptions import log_consumer_exceptions
+from ..serializers import DeploymentLogsQuerySerializer
+
+
+class DeploymentLogsTail:
+    """
+    A single subscription to the tail API of Loki for the logs of a deployment,
+    shared by all the viewers of these logs in this process.
+    The logs received are sent to the viewers in batches, every `BATCH_INTERVAL` seconds.
+    """
+
+    BATCH_INTERVAL = 0.1
+    RECONNECT_DELAY = 1
+
+    # tails are keyed by `(deployment_id, sources)`
+    tails: dict[tuple[str, tuple[str, ...]], "DeploymentLogsTail"] = {}
+
+    def __init__(self, query: LiveRuntimeLogQueryDto):
+        self.query = query
+        self.viewers: set["DeploymentLogsConsumer"] = set()
+        self.pending: list[dict] = []
+        # timestamp of the most recent log received, the tail resumes after it when reconnecting
+        self.cursor = int(query.start.timestamp() * 10**9)
+        self.resumed_after = self.cursor
+        self.task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def _key(cls, query: LiveRuntimeLogQueryDto):
+        return query.deployment_id, tuple(sorted(query.sources))
+
+    @classmethod
+    def subscribe(
+        cls, query: LiveRuntimeLogQueryDto, viewer: "DeploymentLogsConsumer"
+    ) -> "DeploymentLogsTail":
+        key = cls._key(query)
+        tail = cls.tails.get(key)
+        if tail is None:
+            tail = cls.tails[key] = cls(query)
+            tail.task = asyncio.create_task(tail._run())
+        tail.viewers.add(viewer)
+        return tail
+
+    async def unsubscribe(self, viewer: "DeploymentLogsConsumer"):
+        self.viewers.discard(viewer)
+        if self.viewers:
+            return
+        # the last viewer left, the tail is closed
+        self.tails.pop(self._key(self.query), None)
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        await asyncio.gather(self._tail(), self._flush())
+
+    async def _tail(self):
+        search_client = LokiSearchClient(host=settings.LOKI_HOST)
+        while True:
+            self.resumed_after = self.cursor
+            self.query.start = datetime.datetime.fromtimestamp(
+                (self.cursor + 1) / 1e9, tz=datetime.timezone.utc
+            )
+            try:
+                async with connect(search_client.tail_url(self.query)) as websocket:
+                    async for message in websocket:
+                        self._receive(json.loads(message))
+            except Exception as e:
+                # whatever the error, the tail is restarted, it is shared by all the viewers
+                print(
+                    f"{Colors.RED}Loki tail of the deployment `{self.query.deployment_id}` closed: {e}{Colors.ENDC}"
+                )
+            await asyncio.sleep(self.RECONNECT_DELAY)
+
+    def _receive(self, data: dict):
+        for stream in data.get("streams", []):
+            for timestamp, line in stream["values"]:
+                # logs ingested late can be older than the cursor, but the ones
+                # before the start of the tail were already sent before it was restarted
+                if int(timestamp) <= self.resumed_after:
+                    continue
+                log = LokiSearchClient.log_from_entry(timestamp, line)
+                self.cursor = max(self.cursor, log["timestamp"])
+                self.pending.append(log)
+        if data.get("dropped_entries"):
+            print(
+                f"{Colors.YELLOW}Loki dropped {len(data['dropped_entries'])} logs"
+                f" of the deployment `{self.query.deployment_id}`{Colors.ENDC}"
+            )
+
+    async def _flush(self):
+        while True:
+            await asyncio.sleep(self.BATCH_INTERVAL)
+            if not self.pending:
+                continue
+            logs = sorted(self.pending, key=lambda log: log["timestamp"])
+            self.pending = []
+            await asyncio.gather(
+                *(viewer.send_logs(logs) for viewer in list(self.viewers)),
+                return_exceptions=True,
+            )
+
+
+@log_consumer_exceptions
+class DeploymentLogsConsumer(AsyncWebsocketConsumer):
+    """
+    Stream the logs of a deployment as they are ingested.
+    Each message is a JSON object `{"logs": [...], "cursor": "<timestamp>"}`, the logs having
+    the same format as the search results. A client can pass the last `cursor` it received
+    when reconnecting, to get the logs it missed before the live ones.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tail: Optional[DeploymentLogsTail] = None
+        # the live logs received while the missed ones are fetched are buffered
+        self.buffered: Optional[list[dict]] = []
+
+    async def connect(self):
+        kwargs = self.scope["url_route"]["kwargs"]  # type: ignore
+        project_slug = kwargs["project_slug"]
+        service_slug = kwargs["service_slug"]
+        env_slug = kwargs.get("env_slug") or Environment.PRODUCTION_ENV_NAME
+        deployment_hash = kwargs["deployment_hash"]
+
+        user = self.scope.get("user")
+        if user is None or not user.is_authenticated:
+            return await self.close()
+
+        await self.accept()
+
+        try:
+            project = await Project.objects.aget(slug=project_slug, owner=user)
+            environment = await Environment.objects.aget(
+                name=env_slug.lower(), project=project
+            )
+            service = await Service.objects.aget(
+                slug=service_slug, project=project, environment=environment
+            )
+            deployment = await Deployment.objects.aget(
+                service=service, hash=deployment_hash
+            )
+        except Project.DoesNotExist:
+            return await self._send_error(
+                f"A project with the slug `{project_slug}` does not exist."
+            )
+        except Environment.DoesNotExist:
+            return await self._send_error(
+                f"An environment with the name `{env_slug}` does not exist in this project"
+            )
+        except Service.DoesNotExist:
+            return await self._send_error(
+                f"A service with the slug `{service_slug}` does not exist within the environment `{env_slug}` of the project `{project_slug}`"
+            )
+        except Deployment.DoesNotExist:
+            return await self._send_error(
+                f"A deployment with the hash `{deployment_hash}` does not exist for this service."
+            )
+
+        params = urllib.parse.parse_qs(self.scope["query_string"].decode())
+        serializer = DeploymentLogsQuerySerializer(data=params)
+        if not serializer.is_valid():
+            return await self._send_error(f"Invalid query: {serializer.errors}")
+        data = cast(ReturnDict, serializer.data)
+
+        query = LiveRuntimeLogQueryDto(
+            deployment_id=deployment.hash,
+            start=datetime.datetime.now(datetime.timezone.utc),
+            sources=data["source"],
+        )
+        self.tail = DeploymentLogsTail.subscribe(query, viewer=self)
+        await self.send_missed_logs(query, cursor=data.get("cursor"))
+
+    async def send_missed_logs(
+        self, query: LiveRuntimeLogQueryDto, cursor: Optional[list[int]]
+    ):
+        """
+        Send the logs ingested after `cursor`, followed by the live logs buffered while they were fetched.
+        """
+        missed_logs: list[dict] = []
+        try:
+            if cursor:
+                search_client = LokiSearchClient(host=settings.LOKI_HOST)
+                missed_logs = await sync_to_async(search_client.logs_after)(
+                    query, after_ns=cursor[0]
+                )
+        except Exception as e:
+            print(
+                f"{Colors.RED}Failed fetching the missed logs of the deployment `{query.deployment_id}`: {e}{Colors.ENDC}"
+            )
+        finally:
+            # the live logs received in the meantime can also be part of the missed ones
+            missed_ids = {log["id"] for log in missed_logs}
+            buffered = [
+                log for log in self.buffered or [] if log["id"] not in missed_ids
+            ]
+            # the next live logs are sent as they arrive, even if the missed ones couldn't be fetched
+            self.buffered = None
+        await self.send_logs(missed_logs + buffered)
+
+    async def _send_error(self, message: str):
+        await self.send(text_data=json.dumps({"error": message}), close=True)
+
+    async def send_logs(self, logs: list[dict]):
+        if self.buffered is not None:
+            self.buffered.extend(logs)
+            return
+        if not logs:
+            return
+        # the cursor is sent as a string, as javascript numbers can't hold nanoseconds
+        cursor = max(log["timestamp"] for log in logs)
+        await self.send(text_data=json.dumps({"logs": logs, "cursor": str(cursor)}))
+
+    async def disconnect(self, code):
+        if self.tail is not None:
+            await self.tail.unsubscribe(self)
+            self.tail = None
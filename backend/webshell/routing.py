@@ -8,6 +8,11 @@ websocket_urlpatterns = [
         rf"/(?P<service_slug>{DJANGO_SLUG_REGEX})/(?P<deployment_hash>[a-zA-Z0-9-_]+)/?$",
         consumers.DeploymentTerminalConsumer.as_asgi(),
     ),
+    re_path(
+        rf"ws/deployment-logs/(?P<project_slug>{DJANGO_SLUG_REGEX})/(?P<env_slug>{DJANGO_SLUG_REGEX})"
+        rf"/(?P<service_slug>{DJANGO_SLUG_REGEX})/(?P<deployment_hash>[a-zA-Z0-9-_]+)/?$",
+        consumers.DeploymentLogsConsumer.as_asgi(),
+    ),
     re_path(
         rf"ws/server-ssh/(?P<slug>{DJANGO_SLUG_REGEX})/?$",
         consumers.ServerTerminalConsumer.as_asgi(),
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from . import models
 from .validators import validate_unix_username
+from search.dtos import RuntimeLogSource
 
 
 class CreateSSHKeyRequestSerializer(serializers.Serializer):
@@ -49,3 +50,22 @@ class DeploymentTerminalResizeSerializer(serializers.Serializer):
     type = serializers.ChoiceField(choices=["resize"])
     rows = serializers.IntegerField(required=True)
     cols = serializers.IntegerField(required=True)
+
+
+class DeploymentLogsQuerySerializer(serializers.Serializer):
+    source = serializers.ListField(
+        child=serializers.ChoiceField(
+            choices=[
+                RuntimeLogSource.SERVICE,
+                RuntimeLogSource.SYSTEM,
+                RuntimeLogSource.BUILD,
+            ]
+        ),
+        default=[RuntimeLogSource.SERVICE, RuntimeLogSource.SYSTEM],
+    )
+    # timestamp in nanoseconds of the last log received, to resume after a reconnection
+    cursor = serializers.ListField(
+        child=serializers.IntegerField(min_value=0),
+        allow_empty=True,
+        required=False,
+    )
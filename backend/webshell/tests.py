@@ -1,3 +1,227 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import json
+from typing import Optional
+from unittest.mock import AsyncMock, patch
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from search.dtos import LiveRuntimeLogQueryDto
+from .consumers.deployment_logs import DeploymentLogsConsumer, DeploymentLogsTail
+
+START = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+START_NS = int(START.timestamp() * 10**9)
+
+
+def loki_entry(id: str, timestamp: int) -> list:
+    line = json.dumps(
+        {
+            "id": id,
+            "level": "INFO",
+            "source": "SERVICE",
+            "service_id": "srv_dkr_logs",
+            "deployment_id": "dpl_dkr_logs",
+            "content": id,
+            "content_text": id,
+        }
+    )
+    return [str(timestamp), line]
+
+
+def loki_message(*entries: list) -> str:
+    return json.dumps({"streams": [{"stream": {}, "values": list(entries)}]})
+
+
+class FakeTailConnection:
+    def __init__(self, messages: Optional[list[str]]):
+        self.messages = messages
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def __aiter__(self):
+        if self.messages is None:
+            # the last connection stays open without receiving anything
+            await asyncio.Event().wait()
+        for message in self.messages or []:
+            yield message
+
+
+class FakeLokiTail:
+    """
+    Replaces `websockets.connect`, each connection receives the next list of messages then closes.
+    """
+
+    def __init__(self, *connections: list[str]):
+        self.connections = list(connections)
+        self.urls: list[str] = []
+
+    def __call__(self, url: str):
+        self.urls.append(url)
+        messages = self.connections.pop(0) if self.connections else None
+        return FakeTailConnection(messages)
+
+
+class FakeViewer:
+    def __init__(self):
+        self.logs: list[dict] = []
+
+    async def send_logs(self, logs: list[dict]):
+        self.logs.extend(logs)
+
+
+class DeploymentLogsTailTests(SimpleTestCase):
+    def setUp(self):
+        for patcher in (
+            patch.object(DeploymentLogsTail, "tails", {}),
+            patch.object(DeploymentLogsTail, "BATCH_INTERVAL", 0.01),
+            patch.object(DeploymentLogsTail, "RECONNECT_DELAY", 0),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def make_query(self) -> LiveRuntimeLogQueryDto:
+        return LiveRuntimeLogQueryDto(
+            deployment_id="dpl_dkr_logs", start=START, sources=["SERVICE"]
+        )
+
+    async def wait_for_logs(self, viewer: FakeViewer, count: int):
+        async def wait():
+            while len(viewer.logs) < count:
+                await asyncio.sleep(0.01)
+
+        await asyncio.wait_for(wait(), timeout=2)
+
+    async def test_viewers_of_a_deployment_share_the_same_tail(self):
+        loki_tail = FakeLokiTail(
+            [
+                loki_message(
+                    loki_entry("b", START_NS + 2), loki_entry("a", START_NS + 1)
+                )
+            ]
+        )
+        first, second = FakeViewer(), FakeViewer()
+        with patch("webshell.consumers.deployment_logs.connect", loki_tail):
+            tail = DeploymentLogsTail.subscribe(self.make_query(), viewer=first)
+            self.assertIs(
+                tail, DeploymentLogsTail.subscribe(self.make_query(), viewer=second)
+            )
+            await self.wait_for_logs(first, 2)
+            await self.wait_for_logs(second, 2)
+
+            await tail.unsubscribe(first)
+            self.assertFalse(tail.task.done())
+            await tail.unsubscribe(second)
+
+        self.assertEqual(["a", "b"], [log["id"] for log in first.logs])
+        self.assertEqual(["a", "b"], [log["id"] for log in second.logs])
+        self.assertTrue(tail.task.done())
+        self.assertEqual({}, DeploymentLogsTail.tails)
+
+    async def test_tail_resumes_after_the_last_log_received(self):
+        loki_tail = FakeLokiTail(
+            [
+                loki_message(
+                    loki_entry("a", START_NS + 1), loki_entry("b", START_NS + 2)
+                )
+            ],
+            # loki sends the logs at the start of the range again after a reconnection
+            [
+                loki_message(
+                    loki_entry("b", START_NS + 2), loki_entry("c", START_NS + 3)
+                )
+            ],
+        )
+        viewer = FakeViewer()
+        with patch("webshell.consumers.deployment_logs.connect", loki_tail):
+            tail = DeploymentLogsTail.subscribe(self.make_query(), viewer=viewer)
+            await self.wait_for_logs(viewer, 3)
+            await tail.unsubscribe(viewer)
+
+        self.assertEqual(["a", "b", "c"], [log["id"] for log in viewer.logs])
+        self.assertEqual(START_NS + 3, tail.cursor)
+        self.assertGreaterEqual(len(loki_tail.urls), 2)
+
+    async def test_tail_reconnects_after_an_invalid_message(self):
+        loki_tail = FakeLokiTail(
+            ["not json"],
+            [loki_message(loki_entry("a", START_NS + 1))],
+        )
+        viewer = FakeViewer()
+        with patch("webshell.consumers.deployment_logs.connect", loki_tail):
+            tail = DeploymentLogsTail.subscribe(self.make_query(), viewer=viewer)
+            await self.wait_for_logs(viewer, 1)
+            await tail.unsubscribe(viewer)
+
+        self.assertEqual(["a"], [log["id"] for log in viewer.logs])
+
+
+class DeploymentLogsConsumerTests(SimpleTestCase):
+    def setUp(self):
+        self.consumer = DeploymentLogsConsumer()
+        self.consumer.send = AsyncMock()
+        self.query = LiveRuntimeLogQueryDto(
+            deployment_id="dpl_dkr_logs", start=START, sources=["SERVICE"]
+        )
+
+    def log(self, id: str, timestamp: int) -> dict:
+        return {"id": id, "timestamp": timestamp}
+
+    def sent_messages(self) -> list[dict]:
+        return [
+            json.loads(call.kwargs["text_data"])
+            for call in self.consumer.send.call_args_list
+        ]
+
+    async def test_missed_logs_are_sent_before_the_live_ones_without_duplicates(
+        self,
+    ):
+        def logs_after(query, after_ns: int):
+            # live logs are received while the missed ones are fetched
+            self.consumer.buffered.extend(
+                [self.log("b", START_NS + 2), self.log("c", START_NS + 3)]
+            )
+            return [self.log("a", START_NS + 1), self.log("b", START_NS + 2)]
+
+        with patch(
+            "webshell.consumers.deployment_logs.LokiSearchClient.logs_after",
+            side_effect=logs_after,
+        ):
+            await self.consumer.send_missed_logs(self.query, cursor=[START_NS])
+
+        self.assertEqual(
+            [
+                {
+                    "logs": [
+                        self.log("a", START_NS + 1),
+                        self.log("b", START_NS + 2),
+                        self.log("c", START_NS + 3),
+                    ],
+                    "cursor": str(START_NS + 3),
+                }
+            ],
+            self.sent_messages(),
+        )
+        self.assertIsNone(self.consumer.buffered)
+
+    async def test_live_logs_are_sent_when_the_missed_ones_cannot_be_fetched(self):
+        self.consumer.buffered.append(self.log("a", START_NS + 1))
+
+        with patch(
+            "webshell.consumers.deployment_logs.LokiSearchClient.logs_after",
+            side_effect=ConnectionError("loki is down"),
+        ):
+            await self.consumer.send_missed_logs(self.query, cursor=[START_NS])
+        await self.consumer.send_logs([self.log("b", START_NS + 2)])
+
+        self.assertIsNone(self.consumer.buffered)
+        self.assertEqual(
+            [["a"], ["b"]],
+            [
+                [log["id"] for log in message["logs"]]
+                for message in self.sent_messages()
+            ],
+        )
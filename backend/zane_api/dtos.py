@@ -667,3 +667,9 @@ class RuntimeLogDto:
     @classmethod
     def from_dict(cls, data: Dict[str, Any]):
         return cls(**data)
+
+
+class ZaneServices:
+    PROXY = "zane.proxy"
+    API = "zane.api"
+    WORKER = "zane.worker"
@@ -1,7 +1,10 @@
 from datetime import datetime
 import json
+import logging
 from typing import cast
 
+from django.conf import settings
+
 
 class ColorfulFormatter:
     """Custom formatter with colors for terminal output"""
@@ -69,7 +72,7 @@ class ColorfulFormatter:
         path = data.get("request_path", "/")
         status = data.get("response_status", 0)
         duration_ms = data.get("run_time_ms", 0)
-        request_body = data.get("request_body", {})
+        request_body = data.get("request_body")
         remote_addr = data.get("remote_address", "unknown")
 
         # Get colors
@@ -87,12 +90,34 @@ class ColorfulFormatter:
             f"{self.COLORS['gray']}from {remote_addr}{self.COLORS['reset']}"
         )
 
-        # Add request body if it exists and is not empty
+        # Add request body if it exists and is not empty, it is logged as received
         if request_body:
-            body_json = json.dumps(request_body)
+            if data.get("request_body_truncated"):
+                request_body += "…"
             log_line += (
                 f"\n{self.COLORS['dim']}{self.COLORS['yellow']}Request Body:{self.COLORS['reset']}\n"
-                f"{self.COLORS['dim']}{str(body_json)}{self.COLORS['reset']}"
+                f"{self.COLORS['dim']}{request_body}{self.COLORS['reset']}"
             )
 
         return log_line
+
+
+class RequestLogFormatter(logging.Formatter):
+    """
+    Format the access logs emitted by `RequestLogMiddleware`, which are passed as the `request_log` extra,
+    either as colored lines or as JSON objects depending on `REQUEST_LOG_FORMAT`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.colorful_formatter = ColorfulFormatter()
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = getattr(record, "request_log", None)
+        if data is None:
+            return super().format(record)
+        if settings.REQUEST_LOG_FORMAT == "json":
+            return json.dumps(
+                {**data, "request_time": data["request_time"].isoformat()}
+            )
+        return self.colorful_formatter.format(data)
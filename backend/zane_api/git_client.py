@@ -1,7 +1,16 @@
-from typing import Callable, List, Optional
+import fcntl
+import hashlib
+import os
+import shutil
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+from django.conf import settings
 from git import Git, GitCommandError, RemoteProgress, Repo, Commit
 import asyncio
-from .utils import Colors
+from .utils import Colors, TieredCache
 from .process import AyncSubProcessRunner, OutputHandlerFunction
 
 
@@ -13,49 +22,241 @@ class GitCheckoutFailedError(GitCommandError):
     pass
 
 
+# the heads of the remote repositories, keyed by repository and git app:
+# the branches of a repository visible with a git app can differ from the public ones
+git_refs_cache = TieredCache(prefix="git_refs", max_local_ttl=timedelta(seconds=5))
+GIT_REFS_CACHE_TTL = timedelta(minutes=1)
+# the repository can be made accessible (or a git app installed on it) just after a failed check
+GIT_REFS_NOT_FOUND_CACHE_TTL = timedelta(seconds=10)
+GIT_NULL_COMMIT_SHA = "0" * 40
+
+
+def get_repository_id(url: str) -> str:
+    """
+    The credentials of the url (the access token of a git app) are refreshed regularly,
+    they are not part of the id of the repository.
+    """
+    parts = urlsplit(url)
+    netloc = parts.hostname or ""
+    if parts.port is not None:
+        netloc += f":{parts.port}"
+    path = parts.path.rstrip("/").removesuffix(".git")
+    repository = f"{netloc}{path}".lower()
+    return hashlib.sha256(repository.encode()).hexdigest()
+
+
+def get_git_refs_cache_key(url: str, git_app_id: Optional[str] = None) -> str:
+    if git_app_id is not None:
+        return f"{get_repository_id(url)}:{git_app_id}"
+    # without a git app, the credentials of the url decide which repositories and branches are visible:
+    # the heads seen with a token are not shared with the anonymous lookups or the other tokens
+    parts = urlsplit(url)
+    if parts.username is None and parts.password is None:
+        return f"{get_repository_id(url)}:public"
+    credentials = hashlib.sha256(
+        f"{parts.username or ''}:{parts.password or ''}".encode()
+    ).hexdigest()
+    return f"{get_repository_id(url)}:credentials-{credentials}"
+
+
+def update_cached_git_ref(
+    url: str, branch: str, commit_sha: Optional[str], git_app_id: Optional[str] = None
+):
+    """
+    Update the cached heads of a repository after a push, `commit_sha` is `None` when the branch is deleted.
+    """
+    key = get_git_refs_cache_key(url, git_app_id)
+    heads: Optional[Dict[str, str]] = git_refs_cache.get_many([key]).get(key)
+    if heads is None:
+        return
+    heads = dict(heads)
+    if commit_sha is None or commit_sha == GIT_NULL_COMMIT_SHA:
+        heads.pop(branch, None)
+    else:
+        heads[branch] = commit_sha
+    git_refs_cache.set(key, heads, GIT_REFS_CACHE_TTL)
+
+
+def get_directory_size(path: str) -> int:
+    size = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                size += os.lstat(os.path.join(dirpath, filename)).st_size
+            except FileNotFoundError:
+                pass
+    return size
+
+
+class GitMirrorCache:
+    """
+    Bare repositories kept on the worker, one per remote repository. The deployments fetch
+    the new commits of their branch into the mirror, then clone the mirror locally,
+    instead of cloning the whole history of the repository from the remote each time.
+
+    A mirror is locked while it is updated and cloned, for the builds running in other workers
+    on the same host too. The least recently used mirrors are deleted when the cache is over `max_size` bytes.
+    """
+
+    LOCK_POLL_INTERVAL = 0.1  # seconds
+
+    def __init__(self, root: str, max_size: int):
+        self.root = root
+        self.max_size = max_size
+        self.locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    def get_mirror_path(self, url: str) -> str:
+        return os.path.join(self.root, f"{get_repository_id(url)}.git")
+
+    @asynccontextmanager
+    async def lock(self, mirror_path: str):
+        os.makedirs(self.root, exist_ok=True)
+        async with self.locks[mirror_path]:
+            fd = os.open(f"{mirror_path}.lock", os.O_CREAT | os.O_RDWR)
+            try:
+                while True:
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        # another worker is using the mirror
+                        await asyncio.sleep(self.LOCK_POLL_INTERVAL)
+                yield
+            finally:
+                # closing the file releases the lock
+                os.close(fd)
+
+    def remove(self, mirror_path: str):
+        shutil.rmtree(mirror_path, ignore_errors=True)
+
+    def evict(self, keep: Optional[str] = None) -> List[str]:
+        """
+        Delete the least recently used mirrors until the cache fits in `max_size`,
+        the mirrors in use are skipped. Return the paths of the deleted mirrors.
+        """
+        if not os.path.isdir(self.root):
+            return []
+        mirrors: List[tuple[float, int, str]] = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.endswith(".git") and os.path.isdir(path):
+                mirrors.append(
+                    (os.path.getmtime(path), get_directory_size(path), path)
+                )
+
+        total_size = sum(size for _, size, _ in mirrors)
+        evicted: List[str] = []
+        for _, size, path in sorted(mirrors):
+            if total_size <= self.max_size:
+                break
+            if path == keep:
+                continue
+            fd = os.open(f"{path}.lock", os.O_CREAT | os.O_RDWR)
+            try:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                self.remove(path)
+            finally:
+                os.close(fd)
+            total_size -= size
+            evicted.append(path)
+        return evicted
+
+
+git_mirror_cache: Optional[GitMirrorCache] = None
+
+
+def get_git_mirror_cache() -> GitMirrorCache:
+    global git_mirror_cache
+    if git_mirror_cache is None:
+        git_mirror_cache = GitMirrorCache(
+            root=settings.GIT_MIRROR_CACHE_DIR,
+            max_size=settings.GIT_MIRROR_CACHE_MAX_SIZE,
+        )
+    return git_mirror_cache
+
+
 class GitClient:
     def __init__(self):
         self._git = Git()
 
+    def list_remote_heads(
+        self, url: str, git_app_id: Optional[str] = None
+    ) -> Optional[Dict[str, str]]:
+        """
+        Get the commit SHA of each branch of a remote Git repository, or `None` if the repository
+        cannot be reached. The heads are cached shortly, and concurrent lookups of the same repository
+        only run `git ls-remote` once.
+        """
+
+        def ls_remote() -> Optional[Dict[str, str]]:
+            try:
+                refs: str = self._git.ls_remote("--heads", url)
+            except GitCommandError:
+                return None
+            heads: Dict[str, str] = {}
+            for line in refs.splitlines():
+                sha, ref = line.split()
+                heads[ref.replace("refs/heads/", "", 1)] = sha
+            return heads
+
+        return git_refs_cache.get_or_set(
+            get_git_refs_cache_key(url, git_app_id),
+            ls_remote,
+            ttl=lambda heads: (
+                GIT_REFS_CACHE_TTL if heads else GIT_REFS_NOT_FOUND_CACHE_TTL
+            ),
+        )
+
     def check_if_git_repository_is_valid(
-        self, url: str, branch: Optional[str] = None
+        self,
+        url: str,
+        branch: Optional[str] = None,
+        git_app_id: Optional[str] = None,
     ) -> bool:
         """
         Check if a git repository exists and that the provided branch also exist within the repository
         """
-        try:
-            refs = self._git.ls_remote("--heads", url, branch)
-            return bool(refs.strip())
-        except GitCommandError:
+        heads = self.list_remote_heads(url, git_app_id)
+        if not heads:
             return False
+        return branch is None or branch in heads
 
-    def resolve_commit_sha_for_branch(self, url: str, branch: str) -> Optional[str]:
+    def resolve_commit_sha_for_branch(
+        self,
+        url: str,
+        branch: str,
+        git_app_id: Optional[str] = None,
+        refresh: bool = False,
+    ) -> Optional[str]:
         """
         Get the latest commit SHA for a given branch in a remote Git repository.
+        With `refresh`, the cached heads are skipped (and updated), for when a stale commit cannot be used.
         """
+        if not refresh:
+            heads = self.list_remote_heads(url, git_app_id)
+            return heads.get(branch) if heads else None
+
         try:
             refs: str = self._git.ls_remote("--heads", url, branch)
-            for line in refs.splitlines():
-                sha, ref = line.split()
-                if ref.endswith(f"refs/heads/{branch}"):
-                    return sha
-            return None
         except GitCommandError:
             return None
+        for line in refs.splitlines():
+            sha, ref = line.split()
+            if ref.endswith(f"refs/heads/{branch}"):
+                update_cached_git_ref(url, branch, sha, git_app_id)
+                return sha
+        return None
 
-    def list_branches_for_repository(self, url: str) -> List[str]:
+    def list_branches_for_repository(
+        self, url: str, git_app_id: Optional[str] = None
+    ) -> List[str]:
         """
-        Get the latest commit SHA for a given branch in a remote Git repository.
+        Get the names of the branches of a remote Git repository.
         """
-        branches: List[str] = []
-        try:
-            refs: str = self._git.ls_remote("--heads", url)
-            for line in refs.splitlines():
-                sha, ref = line.split()
-                branches.append(ref.replace("refs/heads/", ""))
-        except GitCommandError:
-            pass
-        return branches
+        return list(self.list_remote_heads(url, git_app_id) or {})
 
     def clone_repository(
         self,
@@ -93,6 +294,8 @@ class GitClient:
             cancel_event=cancel_event,
             operation_name="git clone",
             output_handler=message_handler,
+            # git redraws its progress bars with `\r`, only keep the last frame
+            coalesce_progress=True,
         )
         exit_code, _ = await runner.run()
         print(
@@ -103,6 +306,67 @@ class GitClient:
         else:
             return Repo(dest_path)
 
+    async def aclone_repository_with_mirror(
+        self,
+        url: str,
+        dest_path: str,
+        branch: str,
+        mirror_cache: GitMirrorCache,
+        message_handler: OutputHandlerFunction,
+        cancel_event: asyncio.Event,
+    ) -> Repo:
+        """
+        Fetch the new commits of `branch` into the mirror of the repository, then clone the mirror to `dest_path`.
+        The objects of the clone are hardlinked to the ones of the mirror, the clone doesn't depend on the mirror
+        once created. If the mirror cannot be updated, it is deleted and the repository is cloned from the remote.
+        """
+        mirror_path = mirror_cache.get_mirror_path(url)
+        async with mirror_cache.lock(mirror_path):
+            commands = []
+            if not os.path.isdir(mirror_path):
+                commands.append(f"/usr/bin/git init --bare --quiet {mirror_path}")
+            commands += [
+                f"/usr/bin/git --git-dir={mirror_path} fetch --progress --prune --no-tags {url} +refs/heads/{branch}:refs/heads/{branch}",
+                f"/usr/bin/git clone --progress --local --no-checkout --branch {branch} {mirror_path} {dest_path}",
+            ]
+            for command in commands:
+                await message_handler(f"Running {Colors.YELLOW}{command}{Colors.ENDC}")
+                runner = AyncSubProcessRunner(
+                    command=command,
+                    cancel_event=cancel_event,
+                    operation_name="git clone",
+                    output_handler=message_handler,
+                    coalesce_progress=True,
+                )
+                exit_code, _ = await runner.run()
+                print(
+                    f"Process finished with exit_code={Colors.ORANGE}{exit_code}{Colors.ENDC}"
+                )
+                if exit_code == 0:
+                    continue
+                if cancel_event.is_set():
+                    raise GitCloneFailedError(command, exit_code)
+                await message_handler(
+                    "Failed to use the cached mirror of the repository, cloning it from the remote..."
+                )
+                mirror_cache.remove(mirror_path)
+                shutil.rmtree(dest_path, ignore_errors=True)
+                break
+            else:
+                if os.path.isdir(mirror_path):
+                    # the mtime of the mirror is the last time it was used, for the eviction
+                    os.utime(mirror_path)
+                await asyncio.to_thread(mirror_cache.evict, keep=mirror_path)
+                return Repo(dest_path)
+
+        return await self.aclone_repository(
+            url=url,
+            dest_path=dest_path,
+            branch=branch,
+            message_handler=message_handler,
+            cancel_event=cancel_event,
+        )
+
     def checkout_repository(self, repo: Repo, commit_sha: str) -> Commit:
         try:
             repo.git.checkout(commit_sha)
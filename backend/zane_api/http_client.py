@@ -0,0 +1,120 @@
+import threading
+from typing import Callable, Sequence
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+from .prometheus import outbound_http_response_hook, outbound_http_retries
+
+# (connect, read) timeouts applied when the caller doesn't pass one
+DEFAULT_TIMEOUT = (5, 30)
+DEFAULT_RETRIES = 3
+
+
+class JitteredRetry(Retry):
+    """
+    Retry policy of the shared sessions: exponential backoff with a random jitter,
+    so that the calls failing at the same time are not retried at the same time.
+    Only the idempotent methods are retried after the request was sent, calls
+    that could not connect are retried for all methods.
+    """
+
+    def __init__(self, *args, client: str = "default", **kwargs):
+        self.client = client
+        super().__init__(*args, **kwargs)
+
+    def new(self, **kw):
+        kw.setdefault("client", self.client)
+        return super().new(**kw)
+
+    def increment(self, *args, **kwargs):
+        outbound_http_retries.labels(client=self.client).inc()
+        return super().increment(*args, **kwargs)
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    def __init__(self, *args, timeout: float | tuple[float, float], **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, timeout=None, **kwargs):
+        return super().send(
+            request, timeout=timeout if timeout is not None else self.timeout, **kwargs
+        )
+
+
+def build_http_session(
+    client: str,
+    timeout: float | tuple[float, float] = DEFAULT_TIMEOUT,
+    retries: int = DEFAULT_RETRIES,
+    pool_maxsize: int = 10,
+    hooks: Sequence[Callable] = (),
+) -> requests.Session:
+    session = requests.Session()
+    adapter = TimeoutHTTPAdapter(
+        timeout=timeout,
+        # one pool of `pool_maxsize` keep-alive connections per host
+        pool_maxsize=pool_maxsize,
+        max_retries=JitteredRetry(
+            total=retries,
+            backoff_factor=0.2,
+            backoff_jitter=0.5,
+            status_forcelist=(429, 502, 503, 504),
+            respect_retry_after_header=True,
+            # let the caller handle the last response
+            raise_on_status=False,
+            client=client,
+        ),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.hooks["response"].append(outbound_http_response_hook(client))
+    session.hooks["response"].extend(hooks)
+    return session
+
+
+_sessions: dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_http_session(
+    client: str,
+    timeout: float | tuple[float, float] = DEFAULT_TIMEOUT,
+    retries: int = DEFAULT_RETRIES,
+    pool_maxsize: int = 10,
+    hooks: Sequence[Callable] = (),
+) -> requests.Session:
+    """
+    Return the session shared by all the calls to `client` in this process,
+    its connections are kept alive between the calls.
+    The options are only used the first time the session is created.
+
+    There is no async session: the async code calls the shared sessions from a thread
+    (with `asyncio.to_thread` or `sync_to_async`), which keeps a single pool per host.
+    """
+    session = _sessions.get(client)
+    if session is not None:
+        return session
+    with _sessions_lock:
+        if client not in _sessions:
+            _sessions[client] = build_http_session(
+                client,
+                timeout=timeout,
+                retries=retries,
+                pool_maxsize=pool_maxsize,
+                hooks=hooks,
+            )
+        return _sessions[client]
+
+
+def loki_http_session() -> requests.Session:
+    return get_http_session("loki", timeout=(5, 60))
+
+
+def github_http_session() -> requests.Session:
+    return get_http_session("github")
+
+
+def gitlab_http_session() -> requests.Session:
+    return get_http_session("gitlab")
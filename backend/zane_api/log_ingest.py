@@ -0,0 +1,323 @@
+import gzip
+import ipaddress
+import json
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Optional, Sequence
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from psycopg.types.json import Jsonb
+
+from search.dtos import RuntimeLogDto, RuntimeLogLevel, RuntimeLogSource
+from search.loki_client import LokiSearchClient
+from .models import HttpLog
+from .dtos import ZaneServices
+from .utils import escape_ansi
+
+
+class LogIngestError(Exception):
+    pass
+
+
+ZANE_SERVICES_IDS = frozenset([ZaneServices.API, ZaneServices.WORKER])
+# namespace of the ids of the http logs, derived from their line to make the retries of fluentd idempotent
+HTTP_LOG_ID_NAMESPACE = uuid.UUID("0b5e7d1c-3f0a-4c36-9a43-6f1f2c3a8e51")
+
+LOG_SOURCES = frozenset(["stdout", "stderr"])
+REQUEST_METHODS = frozenset(HttpLog.RequestMethod.values)
+REQUEST_PROTOCOLS = frozenset(HttpLog.RequestProtocols.values)
+
+
+@dataclass
+class IngestedLogs:
+    simple_logs: list[RuntimeLogDto] = field(default_factory=list)
+    http_logs: list[HttpLog] = field(default_factory=list)
+    skipped: int = 0
+
+
+def decode_log_lines(body: bytes, content_encoding: Optional[str] = None) -> list:
+    """
+    Decode the logs sent by fluentd, either as a JSON array or as newline delimited JSON,
+    optionally compressed with gzip.
+    """
+    try:
+        if content_encoding == "gzip":
+            body = gzip.decompress(body)
+        if body.lstrip().startswith(b"["):
+            lines = json.loads(body)
+        else:
+            lines = [json.loads(line) for line in body.splitlines() if line.strip()]
+    except (OSError, EOFError, ValueError) as e:
+        raise LogIngestError(f"Invalid log payload: {e}") from e
+
+    if not isinstance(lines, list):
+        raise LogIngestError("Invalid log payload: expected a list of log lines")
+    return lines
+
+
+def _is_valid_log_line(log: Any) -> bool:
+    return (
+        isinstance(log, dict)
+        and isinstance(log.get("log"), str)
+        and isinstance(log.get("time"), str)
+        and isinstance(log.get("tag"), str)
+        and log.get("source") in LOG_SOURCES
+    )
+
+
+def _is_valid_headers(headers: Any) -> bool:
+    return isinstance(headers, dict) and all(
+        isinstance(values, list) for values in headers.values()
+    )
+
+
+def parse_http_log(time: str, content: dict) -> Optional[HttpLog]:
+    """
+    Build an `HttpLog` from a caddy access log, or return `None` if it's invalid or
+    it doesn't belong to a deployment.
+    """
+    req = content.get("request")
+    status = content.get("status")
+    duration = content.get("duration")
+    upstream = content.get("zane_deployment_upstream")
+    if not (
+        isinstance(req, dict)
+        and isinstance(status, int)
+        and status >= 100
+        and isinstance(duration, (int, float))
+        and isinstance(upstream, str)
+        and _is_valid_headers(content.get("resp_headers"))
+        and req.get("method") in REQUEST_METHODS
+        and req.get("proto") in REQUEST_PROTOCOLS
+        and isinstance(req.get("host"), str)
+        and isinstance(req.get("uri"), str)
+        and isinstance(req.get("remote_ip"), str)
+        and _is_valid_headers(req.get("headers"))
+    ):
+        return None
+
+    deployment_id = content.get("zane_deployment_id")
+    # For backward compatibility
+    if deployment_id is not None:
+        if "blue.zaneops.internal" in upstream:
+            deployment_id = content.get("zane_deployment_blue_hash")
+        elif "green.zaneops.internal" in upstream:
+            deployment_id = content.get("zane_deployment_green_hash")
+    if not deployment_id:
+        return None
+
+    headers: dict = req["headers"]
+    client_ip = headers.get("X-Forwarded-For", req["remote_ip"])
+    request_ip = (
+        client_ip[0].split(",")[0] if isinstance(client_ip, list) else client_ip
+    )
+    try:
+        ipaddress.ip_address(request_ip.strip())
+    except ValueError:
+        return None
+
+    user_agent = headers.get("User-Agent")
+    uri, _, _fragment = req["uri"].partition("#")
+    path, _, query = uri.partition("?")
+    return HttpLog(
+        time=time,
+        service_id=content["zane_service_id"],
+        deployment_id=deployment_id,
+        request_duration_ns=duration * 1_000_000_000,
+        request_path=path,
+        request_query=query,
+        request_protocol=req["proto"],
+        request_host=req["host"],
+        status=status,
+        request_headers=headers,
+        response_headers=content["resp_headers"],
+        request_user_agent=(user_agent[0] if isinstance(user_agent, list) else None),
+        request_ip=request_ip.strip(),
+        request_id=content.get("uuid"),
+        request_method=req["method"],
+    )
+
+
+def parse_log_lines(lines: list) -> IngestedLogs:
+    """
+    Split the lines sent by fluentd into runtime logs of services and http logs of the proxy.
+    Invalid lines are skipped, instead of rejecting the whole batch.
+    """
+    result = IngestedLogs()
+    created_at = timezone.now()
+    for log in lines:
+        if not _is_valid_log_line(log):
+            result.skipped += 1
+            continue
+        try:
+            tag = json.loads(log["tag"])
+        except json.JSONDecodeError:
+            result.skipped += 1
+            continue
+
+        service_id = tag.get("service_id") if isinstance(tag, dict) else None
+        if service_id is None or service_id in ZANE_SERVICES_IDS:
+            continue
+
+        if service_id == ZaneServices.PROXY:
+            content = log["log"]
+            # caddy access logs are JSON objects, anything else is not an http log
+            if not content.startswith("{"):
+                continue
+            try:
+                content = json.loads(content)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(content, dict) or not content.get("zane_service_id"):
+                continue
+            http_log = parse_http_log(log["time"], content)
+            if http_log is None:
+                result.skipped += 1
+            else:
+                # the same line always has the same id, a batch sent again by fluentd isn't inserted twice
+                http_log.id = uuid.uuid5(
+                    HTTP_LOG_ID_NAMESPACE, f"{log['time']}|{log['log']}"
+                )
+                result.http_logs.append(http_log)
+            continue
+
+        deployment_id = tag.get("deployment_id")
+        if deployment_id is None:
+            result.skipped += 1
+            continue
+        result.simple_logs.append(
+            RuntimeLogDto(
+                time=log["time"],
+                created_at=created_at,
+                level=(
+                    RuntimeLogLevel.INFO
+                    if log["source"] == "stdout"
+                    else RuntimeLogLevel.ERROR
+                ),
+                source=RuntimeLogSource.SERVICE,
+                service_id=service_id,
+                deployment_id=deployment_id,
+                content=log["log"],
+                content_text=escape_ansi(log["log"]),
+            )
+        )
+    return result
+
+
+# Columns of `HttpLog` with their postgres type, in the order of the rows built by `_to_copy_row`,
+# binary COPY needs the exact type of every column to encode the values
+HTTP_LOG_COPY_COLUMNS = (
+    ("id", "uuid"),
+    ("created_at", "timestamptz"),
+    ("service_id", "varchar"),
+    ("deployment_id", "varchar"),
+    ("time", "timestamptz"),
+    ("request_method", "varchar"),
+    ("status", "int4"),
+    ("request_duration_ns", "int8"),
+    ("request_headers", "jsonb"),
+    ("response_headers", "jsonb"),
+    ("request_protocol", "varchar"),
+    ("request_host", "varchar"),
+    ("request_path", "varchar"),
+    ("request_query", "varchar"),
+    ("request_ip", "inet"),
+    ("request_id", "varchar"),
+    ("request_user_agent", "text"),
+)
+
+
+def _raw_json(value: str) -> str:
+    return value
+
+
+def _to_datetime(value):
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    if value is not None and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def _to_copy_row(log: HttpLog) -> tuple:
+    return (
+        log.id,
+        _to_datetime(log.created_at),
+        log.service_id,
+        log.deployment_id,
+        _to_datetime(log.time),
+        log.request_method,
+        log.status,
+        int(log.request_duration_ns),
+        # serialized only once here, `Jsonb` would otherwise serialize them again
+        Jsonb(json.dumps(log.request_headers), dumps=_raw_json),
+        Jsonb(json.dumps(log.response_headers), dumps=_raw_json),
+        log.request_protocol,
+        log.request_host,
+        log.request_path,
+        log.request_query,
+        # `inet` is encoded from an interface, a bare address is stored with its full prefix
+        ipaddress.ip_interface(log.request_ip),
+        log.request_id,
+        log.request_user_agent,
+    )
+
+
+def copy_http_logs(logs: Sequence[HttpLog], using: str = DEFAULT_DB_ALIAS) -> int:
+    """
+    Insert the http logs with a binary `COPY ... FROM STDIN`, which is much cheaper than
+    the multi-row `INSERT` of `bulk_create` on a table with this many indexes.
+    The rows are copied in a temporary table first, and the logs already inserted are skipped,
+    so that the same batch can be sent again by fluentd. Return the number of logs inserted.
+    Unlike `bulk_create`, the instances are not modified and no signal is sent.
+    """
+    if len(logs) == 0:
+        return 0
+    table = HttpLog._meta.db_table
+    staging_table = f"{table}_ingest"
+    columns = ", ".join(column for column, _ in HTTP_LOG_COPY_COLUMNS)
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        # the temporary table lives as long as the connection, it is reused by the next batches
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE IF NOT EXISTS {staging_table} (LIKE {table} INCLUDING DEFAULTS)"
+        )
+        with cursor.copy(
+            f"COPY {staging_table} ({columns}) FROM STDIN (FORMAT BINARY)"
+        ) as copy:
+            copy.set_types([pg_type for _, pg_type in HTTP_LOG_COPY_COLUMNS])
+            for log in logs:
+                copy.write_row(_to_copy_row(log))
+        cursor.execute(
+            f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging_table}"
+            " ON CONFLICT (id, time) DO NOTHING"
+        )
+        inserted = cursor.rowcount
+        cursor.execute(f"TRUNCATE {staging_table}")
+    return inserted
+
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="log-ingest")
+_loki_client: Optional[LokiSearchClient] = None
+
+
+def get_ingest_loki_client() -> LokiSearchClient:
+    global _loki_client
+    if _loki_client is None:
+        _loki_client = LokiSearchClient(host=settings.LOKI_HOST)
+    return _loki_client
+
+
+def ingest_logs(logs: IngestedLogs):
+    """
+    Push the runtime logs to loki in a background thread while the http logs are inserted
+    in the database, so that the slowest of the two determines the latency instead of their sum.
+    """
+    loki_push = _executor.submit(get_ingest_loki_client().bulk_insert, logs.simple_logs)
+    try:
+        copy_http_logs(logs.http_logs)
+    finally:
+        loki_push.result()
@@ -0,0 +1,143 @@
+import asyncio
+import os
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...git_client import GitClient, GitMirrorCache
+from ...utils import Colors
+
+BRANCH = "main"
+
+
+def generate_commits(count: int, start: int) -> bytes:
+    """
+    A `git fast-import` stream of `count` commits on `BRANCH`, each one changing a file.
+    """
+    stream = []
+    for i in range(start, start + count):
+        message = f"commit #{i}".encode()
+        content = f"content of the commit #{i}\n".encode() * 20
+        stream.append(
+            f"commit refs/heads/{BRANCH}\n"
+            f"committer Benchmark <benchmark@zaneops.dev> {1700000000 + i} +0000\n"
+            f"data {len(message)}\n".encode()
+            + message
+            # the first commit of an incremental import continues the branch of the repository
+            + (f"\nfrom refs/heads/{BRANCH}^0" if i == start > 0 else "").encode()
+            + f"\nM 644 inline src/file_{i % 500}.txt\ndata {len(content)}\n".encode()
+            + content
+            + b"\n"
+        )
+    return b"".join(stream)
+
+
+def add_commits(repository: str, count: int, start: int):
+    subprocess.run(
+        ["git", "--git-dir", repository, "fast-import", "--quiet"],
+        input=generate_commits(count, start),
+        check=True,
+    )
+
+
+async def clone_without_mirror(client: GitClient, url: str, dest_path: str):
+    """
+    Reference implementation, this is how the repositories were cloned before the mirror cache:
+    the whole branch is cloned from the remote for each deployment.
+    """
+    return await client.aclone_repository(
+        url=url,
+        dest_path=dest_path,
+        branch=BRANCH,
+        message_handler=ignore_output,
+        cancel_event=asyncio.Event(),
+    )
+
+
+async def clone_with_mirror(
+    client: GitClient, url: str, dest_path: str, mirror_cache: GitMirrorCache
+):
+    return await client.aclone_repository_with_mirror(
+        url=url,
+        dest_path=dest_path,
+        branch=BRANCH,
+        mirror_cache=mirror_cache,
+        message_handler=ignore_output,
+        cancel_event=asyncio.Event(),
+    )
+
+
+async def ignore_output(message: str):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Benchmark the clone of a local repository with thousands of commits, without and with the git mirror cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--commits",
+            type=int,
+            default=5000,
+            help="Number of commits of the repository (default: 5000)",
+        )
+        parser.add_argument(
+            "--deployments",
+            type=int,
+            default=10,
+            help="Number of clones of each run, a commit is pushed before each one (default: 10)",
+        )
+
+    def handle(self, *args, **options):
+        root = tempfile.mkdtemp(prefix="benchmark-git-clone-")
+        try:
+            asyncio.run(self.run(root, options["commits"], options["deployments"]))
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+    async def run(self, root: str, commits: int, deployments: int):
+        repository = os.path.join(root, "remote.git")
+        subprocess.run(["git", "init", "--bare", "--quiet", repository], check=True)
+        add_commits(repository, commits, start=0)
+        # the `file://` transport packs the objects like a remote, unlike a local path
+        url = f"file://{repository}"
+        client = GitClient()
+        mirror_cache = GitMirrorCache(
+            root=os.path.join(root, "mirrors"), max_size=10 * 1024 * 1024 * 1024
+        )
+        self.stdout.write(
+            f"Repository with {Colors.BLUE}{commits}{Colors.ENDC} commits, {deployments} deployments per run"
+        )
+
+        async def timed_clones(clone) -> list[float]:
+            nonlocal commits
+            durations = []
+            for i in range(deployments):
+                # a push before each deployment
+                add_commits(repository, 1, start=commits)
+                commits += 1
+                dest_path = os.path.join(root, "build", str(i))
+                start = time.perf_counter()
+                await clone(dest_path)
+                durations.append(time.perf_counter() - start)
+                shutil.rmtree(dest_path)
+            return durations
+
+        before = await timed_clones(
+            lambda dest_path: clone_without_mirror(client, url, dest_path)
+        )
+        after = await timed_clones(
+            lambda dest_path: clone_with_mirror(client, url, dest_path, mirror_cache)
+        )
+
+        self.stdout.write(f"{'':>22} | {'first (s)':>9} | {'median (s)':>10}")
+        self.stdout.write(
+            f"{'without mirror cache':>22} | {before[0]:9.3f} | {statistics.median(before):10.3f}"
+        )
+        self.stdout.write(
+            f"{'with mirror cache':>22} | {after[0]:9.3f} | {Colors.GREEN}{statistics.median(after[1:] or after):10.3f}{Colors.ENDC}"
+        )
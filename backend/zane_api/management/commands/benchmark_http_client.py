@@ -0,0 +1,93 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.core.management.base import BaseCommand
+
+from ...http_client import build_http_session
+from ...utils import Colors
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # keep the connections open between requests, like loki, caddy and the git providers
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"status":"success"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def get_without_session(url: str):
+    """
+    Reference implementation, this is how the calls were made before the shared sessions:
+    each call opens a new connection.
+    """
+    return requests.get(url)
+
+
+def run(get, url: str, iterations: int, concurrency: int):
+    def timed_get(_):
+        start = time.perf_counter()
+        get(url).raise_for_status()
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        durations = list(executor.map(timed_get, range(iterations)))
+    return statistics.median(durations), statistics.quantiles(durations, n=100)[98]
+
+
+class Command(BaseCommand):
+    help = "Benchmark the calls to a local stub server, without and with a shared keep-alive session"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=2000,
+            help="Number of calls of each run (default: 2000)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            nargs="+",
+            default=[1, 4],
+            help="Number of threads making the calls, for each run (default: 1 4)",
+        )
+
+    def handle(self, *args, **options):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/"
+        session = build_http_session("benchmark")
+
+        self.stdout.write(
+            f"{'threads':>7} | {'no session p50/p99 (ms)':>23} | {'shared session p50/p99 (ms)':>27}"
+        )
+        try:
+            for concurrency in options["concurrency"]:
+                # warm up the pool of the session
+                run(session.get, url, concurrency, concurrency)
+                before_p50, before_p99 = run(
+                    get_without_session, url, options["iterations"], concurrency
+                )
+                after_p50, after_p99 = run(
+                    session.get, url, options["iterations"], concurrency
+                )
+                self.stdout.write(
+                    f"{concurrency:>7} | {before_p50 * 1000:10.3f} / {before_p99 * 1000:10.3f}"
+                    f" | {Colors.GREEN}{after_p50 * 1000:12.3f}{Colors.ENDC} / {after_p99 * 1000:12.3f}"
+                )
+        finally:
+            session.close()
+            server.shutdown()
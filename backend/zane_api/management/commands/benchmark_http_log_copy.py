@@ -0,0 +1,50 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from .benchmark_log_ingest import generate_log_lines
+from ...log_ingest import copy_http_logs, parse_http_log
+from ...models import HttpLog
+from ...utils import Colors
+
+
+def generate_http_logs(count: int) -> list[HttpLog]:
+    lines = generate_log_lines(count, proxy_ratio=1)
+    return [parse_http_log(line["time"], json.loads(line["log"])) for line in lines]  # type: ignore
+
+
+class Command(BaseCommand):
+    help = "Benchmark the insertion of http logs with `COPY` against `bulk_create`"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            nargs="+",
+            default=[1_000, 10_000, 100_000],
+            help="Number of rows inserted at each run (default: 1000 10000 100000)",
+        )
+
+    def time_insert(self, insert, logs: list[HttpLog]) -> float:
+        # every run is rolled back, to measure each method against the same table
+        with transaction.atomic():
+            start = time.perf_counter()
+            insert(logs)
+            elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+        return elapsed
+
+    def handle(self, *args, **options):
+        for row_count in options["rows"]:
+            logs = generate_http_logs(row_count)
+            bulk_create = self.time_insert(HttpLog.objects.bulk_create, logs)
+            # the previous run was rolled back, so the same ids can be inserted again
+            copy = self.time_insert(copy_http_logs, logs)
+            self.stdout.write(
+                f"{row_count:>7} rows | bulk_create {bulk_create * 1000:9.1f} ms"
+                f" | COPY {Colors.GREEN}{copy * 1000:9.1f} ms{Colors.ENDC}"
+                f" | {Colors.BLUE}x{bulk_create / copy:.2f}{Colors.ENDC}"
+                f" | {Colors.GREY}{row_count / copy:,.0f} rows/s{Colors.ENDC}"
+            )
@@ -0,0 +1,252 @@
+import random
+import statistics
+import time
+import uuid
+from datetime import timedelta
+from typing import Callable
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from ...log_ingest import copy_http_logs
+from ...models import HttpLog
+from ...partitions import create_daily_partitions
+from ...utils import Colors
+from ...views.logs import search_http_log_field_values
+
+SERVICE_PREFIX = "srv_bench_"
+SEEDED_DAYS = 7
+SEED_CHUNK_SIZE = 100_000
+
+# indexes added for the filters of the http logs explorer, and the ones they replaced
+EXPLORER_INDEXES = [
+    "zane_api_ht_service_7dde0a_idx",
+    "zane_api_ht_deploym_04adb5_idx",
+    "zane_api_ht_service_5d13b8_idx",
+    "httplog_service_errors_idx",
+    "httplog_host_prefix_idx",
+    "httplog_path_prefix_idx",
+    "httplog_user_agent_prefix_idx",
+    "httplog_ip_prefix_idx",
+]
+LEGACY_INDEXES = [
+    ("zane_api_ht_deploym_d671e6_idx", "deployment_id"),
+    ("zane_api_ht_service_7e2352_idx", "service_id"),
+    ("zane_api_ht_time_b680fd_idx", "time"),
+]
+
+HOSTS = [f"app-{i}.127-0-0-1.sslip.io" for i in range(5)]
+PATHS = ["/"] + [
+    f"/{section}/{i}" for section in ["api", "docs", "static", "auth"] for i in range(150)
+]
+USER_AGENTS = [f"Mozilla/5.0 (X11; Linux x86_64) Firefox/{i}.0" for i in range(40)] + [
+    f"curl/8.{i}.0" for i in range(10)
+]
+IPS = [f"10.0.{i // 256}.{i % 256}" for i in range(1000)]
+STATUSES = [200] * 80 + [201, 204, 301, 304, 400, 401, 403, 404, 404, 429] + [500, 502]
+
+
+def seed_http_logs(row_count: int, service_count: int, stdout):
+    today = timezone.now().date()
+    create_daily_partitions(
+        HttpLog._meta.db_table, start=today - timedelta(days=SEEDED_DAYS), days=SEEDED_DAYS + 1
+    )
+    random.seed(42)
+    now = timezone.now()
+    inserted = 0
+    while inserted < row_count:
+        logs = []
+        for _ in range(min(SEED_CHUNK_SIZE, row_count - inserted)):
+            service = random.randrange(service_count)
+            logs.append(
+                HttpLog(
+                    time=now - timedelta(seconds=random.randrange(SEEDED_DAYS * 86400)),
+                    service_id=f"{SERVICE_PREFIX}{service}",
+                    deployment_id=f"dpl_bench_{service}_{random.randrange(5)}",
+                    request_method=random.choice(["GET"] * 8 + ["POST", "DELETE"]),
+                    status=random.choice(STATUSES),
+                    request_duration_ns=int(random.expovariate(1 / 50_000_000)),
+                    request_headers={"Accept": ["*/*"]},
+                    response_headers={"Content-Type": ["text/html"]},
+                    request_protocol=HttpLog.RequestProtocols.HTTP_2,
+                    request_host=random.choice(HOSTS),
+                    request_path=random.choice(PATHS),
+                    request_query=None,
+                    request_ip=random.choice(IPS),
+                    request_id=str(uuid.uuid4()),
+                    request_user_agent=random.choice(USER_AGENTS),
+                )
+            )
+        inserted += copy_http_logs(logs)
+        stdout.write(f"\rSeeded {inserted:,}/{row_count:,} rows", ending="")
+    stdout.write("")
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {HttpLog._meta.db_table}")
+
+
+def search_field_values_with_like(queryset: QuerySet, field: str, prefix: str):
+    """
+    Reference implementation with `LIKE` and the default collation,
+    this is how the values were searched before `search_http_log_field_values`.
+    """
+    condition = {f"{field}__startswith": prefix} if prefix else {}
+    return (
+        queryset.filter(**condition)
+        .order_by(field)
+        .values_list(field, flat=True)
+        .distinct()[:7]
+    )
+
+
+def get_scenarios(
+    search_field_values: Callable,
+) -> dict[str, Callable[[str, str], QuerySet]]:
+    # the explorer lists 50 logs per page, `DeploymentHttpLogsPagination` fetches one more
+    page = 51
+
+    def service_logs(service_id: str, _) -> QuerySet:
+        return HttpLog.objects.filter(service_id=service_id)
+
+    return {
+        "service": lambda s, d: service_logs(s, d).order_by("-time")[:page],
+        "deployment": lambda s, d: HttpLog.objects.filter(deployment_id=d).order_by(
+            "-time"
+        )[:page],
+        "service + last hour": lambda s, d: service_logs(s, d)
+        .filter(time__gte=timezone.now() - timedelta(hours=1))
+        .order_by("-time")[:page],
+        "service + 5xx": lambda s, d: service_logs(s, d)
+        .filter(Q(status__gte=500, status__lte=599))
+        .order_by("-time")[:page],
+        "service + 4xx|5xx": lambda s, d: service_logs(s, d)
+        .filter(Q(status__gte=400, status__lte=499) | Q(status__gte=500, status__lte=599))
+        .order_by("-time")[:page],
+        "service + method + host": lambda s, d: service_logs(s, d)
+        .filter(request_method__in=["POST"], request_host__in=[HOSTS[0]])
+        .order_by("-time")[:page],
+        "service + path": lambda s, d: service_logs(s, d)
+        .filter(request_path__in=["/api/42"])
+        .order_by("-time")[:page],
+        "service + ip": lambda s, d: service_logs(s, d)
+        .filter(request_ip__in=[IPS[7]])
+        .order_by("-time")[:page],
+        "service + user agent": lambda s, d: service_logs(s, d)
+        .filter(request_user_agent__in=[USER_AGENTS[-1]])
+        .order_by("-time")[:page],
+        "service sorted by duration": lambda s, d: service_logs(s, d).order_by(
+            "-request_duration_ns"
+        )[:page],
+        "autocomplete path": lambda s, d: search_field_values(
+            service_logs(s, d), "request_path", "/api/1"
+        ),
+        "autocomplete host": lambda s, d: search_field_values(
+            service_logs(s, d), "request_host", ""
+        ),
+        "autocomplete user agent": lambda s, d: search_field_values(
+            service_logs(s, d), "request_user_agent", "curl"
+        ),
+        "autocomplete ip": lambda s, d: search_field_values(
+            service_logs(s, d), "request_ip", "10.0.3"
+        ),
+    }
+
+
+def run_scenarios(
+    scenarios: dict[str, Callable[[str, str], QuerySet]],
+    service_count: int,
+    iterations: int,
+) -> dict[str, tuple[float, float]]:
+    random.seed(7)
+    results = {}
+    for name, make_queryset in scenarios.items():
+        durations = []
+        for _ in range(iterations):
+            service = random.randrange(service_count)
+            queryset = make_queryset(
+                f"{SERVICE_PREFIX}{service}", f"dpl_bench_{service}_0"
+            )
+            start = time.perf_counter()
+            list(queryset)
+            durations.append(time.perf_counter() - start)
+        results[name] = (
+            statistics.median(durations),
+            statistics.quantiles(durations, n=100)[98],
+        )
+    return results
+
+
+class Command(BaseCommand):
+    help = "Benchmark the queries of the http logs explorer, with and without its indexes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=10_000_000,
+            help="Number of http logs to seed (default: 10000000)",
+        )
+        parser.add_argument(
+            "--services",
+            type=int,
+            default=20,
+            help="Number of services the logs are spread on (default: 20)",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=50,
+            help="Number of runs of each query (default: 50)",
+        )
+        parser.add_argument(
+            "--skip-seed",
+            action="store_true",
+            help="Reuse the logs seeded by a previous run",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the seeded logs after the benchmark",
+        )
+
+    def handle(self, *args, **options):
+        if not options["skip_seed"]:
+            seed_http_logs(options["rows"], options["services"], self.stdout)
+
+        try:
+            after = run_scenarios(
+                get_scenarios(search_http_log_field_values),
+                options["services"],
+                options["iterations"],
+            )
+
+            # the indexes are swapped in a transaction that is rolled back
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    for name in EXPLORER_INDEXES:
+                        cursor.execute(f"DROP INDEX {name}")
+                    for name, column in LEGACY_INDEXES:
+                        cursor.execute(
+                            f"CREATE INDEX {name} ON {HttpLog._meta.db_table} ({column})"
+                        )
+                    cursor.execute(f"ANALYZE {HttpLog._meta.db_table}")
+                before = run_scenarios(
+                    get_scenarios(search_field_values_with_like),
+                    options["services"],
+                    options["iterations"],
+                )
+                transaction.set_rollback(True)
+        finally:
+            if not options["keep"]:
+                HttpLog.objects.filter(service_id__startswith=SERVICE_PREFIX).delete()
+
+        self.stdout.write(
+            f"{'query':<28} | {'before p50/p99 (ms)':>21} | {'after p50/p99 (ms)':>21}"
+        )
+        for name, (after_p50, after_p99) in after.items():
+            before_p50, before_p99 = before[name]
+            self.stdout.write(
+                f"{name:<28} | {before_p50 * 1000:9.2f} / {before_p99 * 1000:9.2f}"
+                f" | {Colors.GREEN}{after_p50 * 1000:9.2f}{Colors.ENDC} / {after_p99 * 1000:9.2f}"
+            )
@@ -0,0 +1,162 @@
+import gzip
+import json
+import random
+import time
+import uuid
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ...log_ingest import decode_log_lines, parse_log_lines
+from ...models import HttpLog
+from ...utils import Colors, escape_ansi
+from ...views.serializers import (
+    DockerContainerLogsRequestSerializer,
+    HTTPServiceLogSerializer,
+)
+
+
+def generate_log_lines(count: int, proxy_ratio: float) -> list[dict]:
+    """
+    Generate a synthetic batch of logs as sent by fluentd,
+    with `proxy_ratio` of caddy access logs and the rest being service logs.
+    """
+    random.seed(42)
+    now = datetime.now().isoformat()
+    service_tag = json.dumps({"service_id": "srv_dkr_bench", "deployment_id": "dpl_dkr_bench"})
+    proxy_tag = json.dumps({"service_id": "zane.proxy"})
+    lines = []
+    for i in range(count):
+        if random.random() < proxy_ratio:
+            content = {
+                "level": "info",
+                "ts": time.time(),
+                "logger": "http.log.access",
+                "msg": "handled request",
+                "request": {
+                    "remote_ip": "10.0.0.2",
+                    "remote_port": "53524",
+                    "client_ip": "10.0.0.2",
+                    "proto": "HTTP/2.0",
+                    "method": random.choice(["GET", "POST"]),
+                    "host": "app.127-0-0-1.sslip.io",
+                    "uri": f"/api/items/{i}?page={i % 10}",
+                    "headers": {
+                        "User-Agent": ["Mozilla/5.0 (X11; Linux x86_64) Firefox/128.0"],
+                        "Accept": ["application/json"],
+                        "X-Forwarded-For": ["172.16.0.4"],
+                    },
+                },
+                "duration": random.random() / 10,
+                "size": 1024,
+                "status": random.choice([200, 200, 200, 404, 500]),
+                "resp_headers": {"Content-Type": ["application/json"]},
+                "zane_deployment_upstream": "srv-bench.blue.zaneops.internal:80",
+                "zane_deployment_green_hash": None,
+                "zane_deployment_blue_hash": "dpl_dkr_bench",
+                "zane_service_id": "srv_dkr_bench",
+                "zane_deployment_id": "dpl_dkr_bench",
+                "uuid": str(uuid.uuid4()),
+            }
+            lines.append(
+                {
+                    "log": json.dumps(content),
+                    "container_id": "8320676fc77bb91b54f0dff7015c08148fd3021db7038c8d0c18ec7378e1979e",
+                    "container_name": "/zane_proxy.1.kj2d879vqbnpishh4d66i47do",
+                    "time": now,
+                    "tag": proxy_tag,
+                    "source": "stdout",
+                }
+            )
+        else:
+            lines.append(
+                {
+                    "log": f"\x1b[32mINFO\x1b[0m [worker-{i % 8}] processed job {i} in {random.randint(1, 500)}ms",
+                    "container_id": "78dfe81bb4b3994eeb38f65f5a586084a2b4a649c0ab08b614d0f4c2cb499761",
+                    "container_name": "/srv-prj_bench-srv_dkr_bench-dpl_dkr_bench.1.zm0uncmx8w4wvnokdl6qxt55e",
+                    "time": now,
+                    "tag": service_tag,
+                    "source": random.choice(["stdout", "stderr"]),
+                }
+            )
+    return lines
+
+
+def parse_with_serializers(lines: list[dict]) -> tuple[int, int]:
+    """
+    Reference implementation validating every line with DRF serializers,
+    this is how the logs were parsed before the fast path of `LogIngestAPIView`.
+    """
+    serializer = DockerContainerLogsRequestSerializer(data=lines)
+    serializer.is_valid(raise_exception=True)
+    simple_logs, http_logs = 0, 0
+    for log in serializer.data:
+        tag = json.loads(log["tag"])
+        if tag.get("service_id") == "zane.proxy":
+            log_serializer = HTTPServiceLogSerializer(data=json.loads(log["log"]))
+            if log_serializer.is_valid():
+                content: dict = log_serializer.data  # type: ignore
+                HttpLog(
+                    time=log["time"],
+                    service_id=content["zane_service_id"],
+                    deployment_id=content["zane_deployment_blue_hash"],
+                    request_headers=content["request"]["headers"],
+                )
+                http_logs += 1
+        else:
+            escape_ansi(log["log"])
+            timezone.now()
+            simple_logs += 1
+    return simple_logs, http_logs
+
+
+class Command(BaseCommand):
+    help = "Benchmark the parsing of the logs sent by fluentd to the ingest endpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lines",
+            type=int,
+            default=20_000,
+            help="Number of log lines in the batch (default: 20000)",
+        )
+        parser.add_argument(
+            "--proxy-ratio",
+            type=float,
+            default=0.3,
+            help="Ratio of proxy access logs in the batch (default: 0.3)",
+        )
+
+    def report(self, name: str, line_count: int, elapsed: float):
+        self.stdout.write(
+            f"{name:<28} | {Colors.GREEN}{line_count / elapsed:>10,.0f} lines/s{Colors.ENDC}"
+            f" | {Colors.GREY}{elapsed * 1000:8.1f} ms{Colors.ENDC}"
+        )
+
+    def handle(self, *args, **options):
+        lines = generate_log_lines(options["lines"], options["proxy_ratio"])
+        line_count = len(lines)
+        json_array = json.dumps(lines).encode()
+        ndjson_gzip = gzip.compress(
+            b"\n".join(json.dumps(line).encode() for line in lines)
+        )
+        self.stdout.write(
+            f"{line_count} lines | JSON array {len(json_array) / 1024:.0f} KB"
+            f" | gzipped ndjson {len(ndjson_gzip) / 1024:.0f} KB"
+        )
+
+        start = time.perf_counter()
+        parse_with_serializers(json.loads(json_array))
+        self.report("DRF serializers", line_count, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        parse_log_lines(decode_log_lines(json_array))
+        self.report("fast path (JSON array)", line_count, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        logs = parse_log_lines(decode_log_lines(ndjson_gzip, "gzip"))
+        self.report("fast path (gzipped ndjson)", line_count, time.perf_counter() - start)
+        self.stdout.write(
+            f"simple logs={len(logs.simple_logs)} | http logs={len(logs.http_logs)} | skipped={logs.skipped}"
+        )
@@ -0,0 +1,109 @@
+import asyncio
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...process import BufferedLineReader
+from ...utils import Colors
+
+
+async def read_until_byte_by_byte(stream: asyncio.StreamReader) -> bytes:
+    """
+    Reference implementation reading one byte at a time,
+    this is how the subprocess output was read before `BufferedLineReader`.
+    """
+    buffer = bytearray()
+    while True:
+        character = await stream.read(1)
+        if not character:
+            break
+        buffer.extend(character)
+        if character in (b"\r", b"\n"):
+            break
+    return bytes(buffer)
+
+
+def generate_build_log(size_in_bytes: int) -> bytes:
+    """
+    Generate a synthetic `docker buildx build` log, with regular lines
+    and progress bars redrawn with `\\r`.
+    """
+    random.seed(42)
+    lines = [
+        b"#5 [builder 2/6] RUN pnpm install --frozen-lockfile\n",
+        b"#5 2.345 Progress: resolved 1024, reused 1000, downloaded 24, added 1024, done\n",
+        b"#7 [builder 4/6] RUN pnpm run build\n",
+        b"#7 12.01 vite v5.2.0 building for production...\n",
+        b"#9 exporting layers 0.4s done\n",
+        b"#9 writing image sha256:3f4b5e1d2c9a8b7f6e5d4c3b2a1f0e9d8c7b6a5f4e3d2c1b0a9f8e7d6c5b4a3f done\n",
+    ]
+    log = bytearray()
+    while len(log) < size_in_bytes:
+        if random.random() < 0.1:
+            for percent in range(0, 101, 10):
+                log.extend(f"Receiving objects: {percent:3d}% ({percent}/100)\r".encode())
+            log.extend(b"\n")
+        else:
+            log.extend(random.choice(lines))
+    return bytes(log)
+
+
+async def feed_stream(stream: asyncio.StreamReader, data: bytes, pipe_size: int):
+    # feed data the way a pipe would, in chunks of at most `pipe_size` bytes
+    for offset in range(0, len(data), pipe_size):
+        stream.feed_data(data[offset : offset + pipe_size])
+        await asyncio.sleep(0)
+    stream.feed_eof()
+
+
+async def run_benchmark(data: bytes, reader_name: str, coalesce: bool = False):
+    stream = asyncio.StreamReader(limit=2**30)
+    feeder = asyncio.create_task(feed_stream(stream, data, pipe_size=64 * 1024))
+    lines = 0
+    start = time.perf_counter()
+    if reader_name == "byte-by-byte":
+        while await read_until_byte_by_byte(stream):
+            lines += 1
+    else:
+        reader = BufferedLineReader(stream, coalesce_progress=coalesce)
+        while await reader.readline():
+            lines += 1
+    elapsed = time.perf_counter() - start
+    await feeder
+    return lines, elapsed
+
+
+class Command(BaseCommand):
+    help = "Benchmark the throughput of the subprocess output readers on a synthetic build log"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size",
+            type=int,
+            default=50,
+            help="Size of the synthetic build log in MB (default: 50)",
+        )
+        parser.add_argument(
+            "--skip-baseline",
+            action="store_true",
+            help="Do not run the (slow) byte by byte reader",
+        )
+
+    def handle(self, *args, **options):
+        size = options["size"] * 1024 * 1024
+        data = generate_build_log(size)
+        self.stdout.write(
+            f"Generated a build log of {Colors.ORANGE}{len(data) / 1024 / 1024:.1f} MB{Colors.ENDC}"
+        )
+
+        runs = [("buffered", False), ("buffered (coalesced)", True)]
+        if not options["skip_baseline"]:
+            runs.insert(0, ("byte-by-byte", False))
+
+        for name, coalesce in runs:
+            lines, elapsed = asyncio.run(run_benchmark(data, name, coalesce))
+            throughput = len(data) / 1024 / 1024 / elapsed
+            self.stdout.write(
+                f"{name:<22} {Colors.BLUE}{lines:>10} lines{Colors.ENDC} in {Colors.GREY}{elapsed:8.3f}s{Colors.ENDC} -> {Colors.GREEN}{throughput:8.2f} MB/s{Colors.ENDC}"
+            )
@@ -0,0 +1,187 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Q, QuerySet, Sum, When
+from django.test.utils import CaptureQueriesContext
+
+from ...models import Deployment, Environment, Project, Service
+from ...utils import Colors
+from ...views.projects import count_current_production_services
+
+PROJECTS = 10
+# the other deployments of a service, which the counters must skip
+PAST_DEPLOYMENTS_PER_SERVICE = 4
+STATUSES = [
+    Deployment.DeploymentStatus.HEALTHY,
+    Deployment.DeploymentStatus.HEALTHY,
+    Deployment.DeploymentStatus.UNHEALTHY,
+    Deployment.DeploymentStatus.FAILED,
+    Deployment.DeploymentStatus.SLEEPING,
+]
+
+
+def seed_services(user: User, service_count: int):
+    random.seed(42)
+    environments = []
+    for i in range(PROJECTS):
+        project = Project.objects.create(slug=f"bench-project-{i}", owner=user)
+        environments.append(
+            Environment.objects.create(
+                name=Environment.PRODUCTION_ENV_NAME, project=project
+            )
+        )
+
+    services = Service.objects.bulk_create(
+        [
+            Service(
+                slug=f"bench-service-{i}",
+                project_id=environments[i % PROJECTS].project_id,
+                environment=environments[i % PROJECTS],
+                type=Service.ServiceType.DOCKER_REGISTRY,
+                image="caddy:alpine",
+            )
+            for i in range(service_count)
+        ]
+    )
+    deployments = []
+    for service in services:
+        for _ in range(PAST_DEPLOYMENTS_PER_SERVICE):
+            deployments.append(
+                Deployment(
+                    service=service, status=Deployment.DeploymentStatus.REMOVED
+                )
+            )
+        deployments.append(
+            Deployment(
+                service=service,
+                status=random.choice(STATUSES),
+                is_current_production=True,
+            )
+        )
+    Deployment.objects.bulk_create(deployments)
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {Deployment._meta.db_table}")
+
+
+def get_projects_with_in_lists(user: User) -> QuerySet[Project]:
+    """
+    Reference implementation, this is how the counters were computed before `count_current_production_services`:
+    the ids of the services are fetched first and inlined in the query.
+    """
+    healthy_services = Deployment.objects.filter(
+        is_current_production=True, status=Deployment.DeploymentStatus.HEALTHY
+    ).values("service")
+    total_services = Deployment.objects.filter(
+        Q(is_current_production=True)
+        & (
+            Q(status=Deployment.DeploymentStatus.HEALTHY)
+            | Q(status=Deployment.DeploymentStatus.UNHEALTHY)
+            | Q(status=Deployment.DeploymentStatus.FAILED)
+        )
+    ).values("service")
+    return Project.objects.filter(owner=user).annotate(
+        healthy_services=Sum(
+            Case(
+                When(
+                    services__id__in=[item["service"] for item in healthy_services],
+                    then=1,
+                ),
+                output_field=IntegerField(),
+                default=0,
+            )
+        ),
+        total_services=Sum(
+            Case(
+                When(
+                    services__id__in=[item["service"] for item in total_services],
+                    then=1,
+                ),
+                output_field=IntegerField(),
+                default=0,
+            )
+        ),
+    )
+
+
+def get_projects_with_subqueries(user: User) -> QuerySet[Project]:
+    return Project.objects.filter(owner=user).annotate(
+        healthy_services=count_current_production_services(
+            Deployment.DeploymentStatus.HEALTHY
+        ),
+        total_services=count_current_production_services(
+            Deployment.DeploymentStatus.HEALTHY,
+            Deployment.DeploymentStatus.UNHEALTHY,
+            Deployment.DeploymentStatus.FAILED,
+        ),
+    )
+
+
+def run(get_projects, user: User, iterations: int):
+    durations = []
+    with CaptureQueriesContext(connection) as context:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            projects = list(get_projects(user))
+            durations.append(time.perf_counter() - start)
+    sql_size = max(len(query["sql"]) for query in context.captured_queries)
+    counters = sorted(
+        (project.slug, project.healthy_services, project.total_services)
+        for project in projects
+    )
+    return (
+        statistics.median(durations),
+        statistics.quantiles(durations, n=100)[98],
+        sql_size,
+        counters,
+    )
+
+
+class Command(BaseCommand):
+    help = "Benchmark the health counters of the projects list, with IN lists and with subqueries"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--services",
+            type=int,
+            nargs="+",
+            default=[50, 500, 5000],
+            help="Number of services to seed for each run (default: 50 500 5000)",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=50,
+            help="Number of runs of each query (default: 50)",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'services':>8} | {'in lists p50/p99 (ms)':>21} | {'subqueries p50/p99 (ms)':>23}"
+            f" | {'sql size (chars)':>17}"
+        )
+        for service_count in options["services"]:
+            # the seeded data is rolled back after each run
+            with transaction.atomic():
+                user = User.objects.create_user(username="benchmark-project-list")
+                seed_services(user, service_count)
+                before_p50, before_p99, before_sql, before_counters = run(
+                    get_projects_with_in_lists, user, options["iterations"]
+                )
+                after_p50, after_p99, after_sql, after_counters = run(
+                    get_projects_with_subqueries, user, options["iterations"]
+                )
+                transaction.set_rollback(True)
+
+            if before_counters != after_counters:
+                self.stdout.write(
+                    f"{Colors.RED}The counters differ for {service_count} services{Colors.ENDC}"
+                )
+            self.stdout.write(
+                f"{service_count:>8} | {before_p50 * 1000:9.2f} / {before_p99 * 1000:9.2f}"
+                f" | {Colors.GREEN}{after_p50 * 1000:11.2f}{Colors.ENDC} / {after_p99 * 1000:9.2f}"
+                f" | {before_sql:>7} -> {after_sql:<7}"
+            )
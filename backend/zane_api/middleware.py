@@ -7,10 +7,10 @@ from django.utils import timezone
 import requests
 import socket
 import time
-import json
+import atexit
 import logging
 from django.utils.deprecation import MiddlewareMixin
-from .formatters import ColorfulFormatter
+from .prometheus import api_request_duration
 
 
 class AddCommitShaHeadersMiddleware:
@@ -50,37 +50,84 @@ class TelemetryMiddleware:
         return self.get_response(request)
 
 
+class CappedBodyRecorder:
+    """
+    Wrap the body stream of a request to keep a copy of the first `max_bytes` bytes read by the view,
+    so that the body is neither read twice nor parsed for the access logs.
+    """
+
+    def __init__(self, stream, max_bytes: int):
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.captured = bytearray()
+        self.truncated = False
+
+    def _record(self, data: bytes) -> bytes:
+        remaining = self.max_bytes - len(self.captured)
+        if len(data) > remaining:
+            self.truncated = True
+        if remaining > 0:
+            self.captured += data[:remaining]
+        return data
+
+    def read(self, *args, **kwargs) -> bytes:
+        return self._record(self.stream.read(*args, **kwargs))
+
+    def readline(self, *args, **kwargs) -> bytes:
+        return self._record(self.stream.readline(*args, **kwargs))
+
+    def close(self):
+        close = getattr(self.stream, "close", None)
+        if close is not None:
+            close()
+
+
 class RequestLogMiddleware(MiddlewareMixin):
-    """Request Logging Middleware with colorful output."""
+    """
+    Request Logging Middleware with colorful output.
+    The body of the requests is only captured for the routes in `REQUEST_LOG_BODY_ROUTES`, as it is read by the view
+    and up to `REQUEST_LOG_BODY_MAX_BYTES`. The logs are formatted and written by the listener of the `request_queue`
+    handler, in a separate thread.
+    """
+
+    listener_started = False
 
     def __init__(self, get_response):
         super().__init__(get_response)
         self.get_response = get_response
         self.logger = logging.getLogger("request_logger")
-        self.formatter = ColorfulFormatter()
+        handler = logging.getHandlerByName("request_queue")
+        listener = getattr(handler, "listener", None)
+        if listener is not None and not RequestLogMiddleware.listener_started:
+            listener.start()
+            atexit.register(listener.stop)
+            RequestLogMiddleware.listener_started = True
+
+    @staticmethod
+    def should_capture_body(route: str) -> bool:
+        if route in settings.REQUEST_LOG_BODY_EXCLUDED_ROUTES:
+            return False
+        return route in settings.REQUEST_LOG_BODY_ROUTES
 
     def process_request(self, request):
         # Store start time on the request
         request._start_time = time.monotonic()
         request._time = timezone.now()
+        return None
 
-        # Capture request body early for API endpoints (before it gets consumed)
-        request._cached_body = None
-        if "/api/" in str(request.get_full_path()):
-            try:
-                # Read and cache the body
-                body_data = request.body
-                if body_data:
-                    request._cached_body = json.loads(body_data.decode("utf-8"))
-                else:
-                    request._cached_body = {}
-            except (json.JSONDecodeError, UnicodeDecodeError):
-                request._cached_body = {"error": "Could not decode request body"}
-            except Exception as e:
-                request._cached_body = {
-                    "error": f"Error reading request body: {str(e)}"
-                }
-
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # the route is only known once the URL is resolved, and the body is not read yet at this point
+        route = request.resolver_match.view_name
+        if (
+            "/api/" in request.path
+            and self.should_capture_body(route)
+            and hasattr(request, "_stream")
+            and not getattr(request, "_read_started", True)
+        ):
+            # `request.body` replaces the stream once read, so the recorder is also kept on the request
+            request._stream = request._body_recorder = CappedBodyRecorder(
+                request._stream, settings.REQUEST_LOG_BODY_MAX_BYTES
+            )
         return None
 
     def process_response(self, request, response):
@@ -88,6 +135,14 @@ class RequestLogMiddleware(MiddlewareMixin):
         start_time = getattr(request, "_start_time", time.monotonic())
         duration = (time.monotonic() - start_time) * 1000  # Convert to milliseconds
 
+        resolver_match = getattr(request, "resolver_match", None)
+        route = resolver_match.view_name if resolver_match is not None else "unknown"
+        api_request_duration.labels(
+            route=route,
+            method=request.method,
+            status=f"{response.status_code // 100}xx",
+        ).observe(duration / 1000)
+
         # Prepare log data
         log_data = {
             "request_time": getattr(request, "_time", timezone.now()),
@@ -95,16 +150,24 @@ class RequestLogMiddleware(MiddlewareMixin):
             "server_hostname": socket.gethostname(),
             "request_method": request.method,
             "request_path": request.get_full_path(),
+            "request_route": route,
             "response_status": response.status_code,
             "run_time_ms": duration,
         }
 
-        # Add cached request body if available
-        if hasattr(request, "_cached_body") and request._cached_body is not None:
-            log_data["request_body"] = request._cached_body
-
-        # Create log record with custom data
-        self.logger.info(self.formatter.format(log_data))
+        # Add the part of the request body read by the view
+        recorder: CappedBodyRecorder | None = getattr(request, "_body_recorder", None)
+        if recorder is not None and recorder.captured:
+            log_data["request_body"] = recorder.captured.decode(errors="replace")
+            log_data["request_body_truncated"] = recorder.truncated
+
+        # the record is formatted by the `request_queue` handler, from `log_data`
+        self.logger.info(
+            "%s %s",
+            request.method,
+            log_data["request_path"],
+            extra={"request_log": log_data},
+        )
 
         return response
 
@@ -0,0 +1,116 @@
+# Generated by Django 5.2 on 2026-10-17 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+BACKFILL_ROLLUPS_SQL = """
+INSERT INTO zane_api_servicemetricsrollup (
+    resolution, bucket, service_id, deployment_id, sample_count, cpu_percent_sum,
+    memory_bytes_sum, net_tx_bytes, net_rx_bytes, disk_read_bytes, disk_writes_bytes
+)
+SELECT
+    r.resolution,
+    DATE_BIN(r.step, m.created_at, '2000-01-01'::timestamptz),
+    m.service_id,
+    m.deployment_id,
+    COUNT(*),
+    SUM(m.cpu_percent),
+    SUM(m.memory_bytes),
+    SUM(m.net_tx_bytes),
+    SUM(m.net_rx_bytes),
+    SUM(m.disk_read_bytes),
+    SUM(m.disk_writes_bytes)
+FROM zane_api_servicemetrics m
+CROSS JOIN (
+    VALUES
+        ('1m', '1 minute'::interval),
+        ('15m', '15 minutes'::interval),
+        ('1h', '1 hour'::interval),
+        ('1d', '1 day'::interval)
+) AS r(resolution, step)
+GROUP BY 1, 2, 3, 4
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("zane_api", "0294_alter_previewenvmetadata_service"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="servicemetrics",
+            index=models.Index(
+                fields=["service", "created_at"], name="zane_api_se_service_06999b_idx"
+            ),
+        ),
+        migrations.CreateModel(
+            name="ServiceMetricsRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "resolution",
+                    models.CharField(
+                        choices=[
+                            ("1m", "1 minute"),
+                            ("15m", "15 minutes"),
+                            ("1h", "1 hour"),
+                            ("1d", "1 day"),
+                        ],
+                        max_length=3,
+                    ),
+                ),
+                ("bucket", models.DateTimeField()),
+                ("sample_count", models.PositiveIntegerField(default=0)),
+                ("cpu_percent_sum", models.FloatField(default=0)),
+                ("memory_bytes_sum", models.PositiveBigIntegerField(default=0)),
+                ("net_tx_bytes", models.PositiveBigIntegerField(default=0)),
+                ("net_rx_bytes", models.PositiveBigIntegerField(default=0)),
+                ("disk_read_bytes", models.PositiveBigIntegerField(default=0)),
+                ("disk_writes_bytes", models.PositiveBigIntegerField(default=0)),
+                (
+                    "deployment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="zane_api.deployment",
+                    ),
+                ),
+                (
+                    "service",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="zane_api.service",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["service", "resolution", "bucket"],
+                        name="zane_api_se_service_593340_idx",
+                    ),
+                    models.Index(
+                        fields=["resolution", "bucket"],
+                        name="zane_api_se_resolut_2f1b42_idx",
+                    ),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("deployment", "resolution", "bucket"),
+                        name="unique_metrics_rollup_bucket",
+                    )
+                ],
+            },
+        ),
+        migrations.RunSQL(BACKFILL_ROLLUPS_SQL, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,82 @@
+from django.db import migrations
+from django.utils import timezone
+
+from zane_api.partitions import create_daily_partitions
+
+HTTP_LOG_INDEXES = [
+    ("zane_api_ht_deploym_d671e6_idx", "deployment_id"),
+    ("zane_api_ht_service_7e2352_idx", "service_id"),
+    ("zane_api_ht_request_5fa6b3_idx", "request_method"),
+    ("zane_api_ht_status_28ab6e_idx", "status"),
+    ("zane_api_ht_request_3f1f93_idx", "request_host"),
+    ("zane_api_ht_request_d290e0_idx", "request_path"),
+    ("zane_api_ht_time_b680fd_idx", "time"),
+    ("zane_api_ht_request_db6570_idx", "request_user_agent"),
+    ("zane_api_ht_request_294e3f_idx", "request_ip"),
+    ("zane_api_ht_request_a15dee_idx", "request_id"),
+    ("zane_api_ht_request_6430c9_idx", "request_query"),
+]
+
+CREATE_INDEXES_SQL = "\n".join(
+    f"CREATE INDEX {name} ON zane_api_httplog ({column});"
+    for name, column in HTTP_LOG_INDEXES
+)
+
+CREATE_PARTITIONED_TABLE_SQL = """
+ALTER TABLE zane_api_httplog RENAME TO zane_api_httplog_unpartitioned;
+ALTER INDEX zane_api_httplog_pkey RENAME TO zane_api_httplog_unpartitioned_pkey;
+CREATE TABLE zane_api_httplog (
+    LIKE zane_api_httplog_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+    PRIMARY KEY (id, time)
+) PARTITION BY RANGE (time);
+CREATE TABLE zane_api_httplog_default PARTITION OF zane_api_httplog DEFAULT;
+"""
+
+# older logs go to the default partition, they are deleted from there once expired
+COPY_LOGS_SQL = (
+    """
+INSERT INTO zane_api_httplog SELECT * FROM zane_api_httplog_unpartitioned;
+DROP TABLE zane_api_httplog_unpartitioned;
+"""
+    + CREATE_INDEXES_SQL
+)
+
+REVERSE_SQL = (
+    """
+CREATE TABLE zane_api_httplog_unpartitioned (
+    LIKE zane_api_httplog INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+);
+INSERT INTO zane_api_httplog_unpartitioned SELECT * FROM zane_api_httplog;
+DROP TABLE zane_api_httplog;
+ALTER TABLE zane_api_httplog_unpartitioned RENAME TO zane_api_httplog;
+ALTER TABLE zane_api_httplog ADD PRIMARY KEY (id);
+"""
+    + CREATE_INDEXES_SQL
+)
+
+
+def create_initial_partitions(apps, schema_editor):
+    # same as `HttpLog.PARTITIONS_AHEAD`, the following ones are created by the daily cleanup schedule
+    create_daily_partitions(
+        "zane_api_httplog",
+        start=timezone.now().date(),
+        days=7 + 1,
+        using=schema_editor.connection.alias,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("zane_api", "0295_servicemetricsrollup_and_more"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            CREATE_PARTITIONED_TABLE_SQL, reverse_sql=migrations.RunSQL.noop
+        ),
+        migrations.RunPython(
+            create_initial_partitions, reverse_code=migrations.RunPython.noop
+        ),
+        migrations.RunSQL(COPY_LOGS_SQL, reverse_sql=REVERSE_SQL),
+    ]
@@ -0,0 +1,115 @@
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("zane_api", "0296_partition_httplog_by_time"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="httplog",
+            index=models.Index(
+                fields=["service_id", "-time"], name="zane_api_ht_service_7dde0a_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="httplog",
+            index=models.Index(
+                fields=["deployment_id", "-time"],
+                name="zane_api_ht_deploym_04adb5_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="httplog",
+            index=models.Index(
+                fields=["service_id", "-request_duration_ns"],
+                name="zane_api_ht_service_5d13b8_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="httplog",
+            index=models.Index(
+                condition=models.Q(("status__gte", 400)),
+                fields=["service_id", "-time"],
+                name="httplog_service_errors_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="httplog",
+            index=models.Index(
+                models.F("service_id"),
+                django.db.models.functions.comparison.Collate(
+                    models.F("request_host"), "C"
+                ),
+                name="httplog_host_prefix_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="httplog",
+            index=models.Index(
+                models.F("service_id"),
+                django.db.models.functions.comparison.Collate(
+                    models.F("request_path"), "C"
+                ),
+                name="httplog_path_prefix_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="httplog",
+            index=models.Index(
+                models.F("service_id"),
+                django.db.models.functions.comparison.Collate(
+                    models.F("request_user_agent"), "C"
+                ),
+                name="httplog_user_agent_prefix_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="httplog",
+            index=models.Index(
+                models.F("service_id"),
+                django.db.models.functions.comparison.Collate(
+                    models.Func(
+                        models.F("request_ip"),
+                        function="HOST",
+                        output_field=models.TextField(),
+                    ),
+                    "C",
+                ),
+                name="httplog_ip_prefix_idx",
+            ),
+        ),
+        # covered by the composite indexes above
+        migrations.RemoveIndex(
+            model_name="httplog",
+            name="zane_api_ht_deploym_d671e6_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="httplog",
+            name="zane_api_ht_service_7e2352_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="httplog",
+            name="zane_api_ht_time_b680fd_idx",
+        ),
+        # covered by the prefix indexes above
+        migrations.RemoveIndex(
+            model_name="httplog",
+            name="zane_api_ht_request_3f1f93_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="httplog",
+            name="zane_api_ht_request_d290e0_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="httplog",
+            name="zane_api_ht_request_db6570_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="httplog",
+            name="zane_api_ht_request_294e3f_idx",
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("zane_api", "0297_httplog_explorer_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="deployment",
+            index=models.Index(
+                condition=models.Q(("is_current_production", True)),
+                fields=["service", "status"],
+                name="deployment_current_prod_idx",
+            ),
+        ),
+    ]
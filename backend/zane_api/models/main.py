@@ -5,7 +5,7 @@ from typing import Optional
 
 from django.conf import settings
 from django.core.validators import MinLengthValidator, MinValueValidator
-from django.db import models
+from django.db import connection, models, transaction
 from django.db.models import (
     Q,
     Case,
@@ -17,6 +17,7 @@ from django.db.models import (
     OuterRef,
     Exists,
 )
+from django.db.models.functions import Collate
 from django.utils.translation import gettext_lazy as _
 from faker import Faker
 from shortuuid.django_fields import ShortUUIDField
@@ -47,7 +48,7 @@ from git_connectors.constants import (
     PREVIEW_DEPLOYMENT_BLOCKED_COMMENT_MARKDOWN_TEMPLATE,
     PREVIEW_DEPLOYMENT_DECLINED_COMMENT_MARKDOWN_TEMPLATE,
 )
-from datetime import timezone as tz
+from datetime import timedelta, timezone as tz
 
 
 class Project(TimestampedModel):
@@ -711,8 +712,14 @@ class Service(BaseService):
                         repo_url = self.git_app.gitlab.get_authenticated_repository_url(
                             repo_url
                         )
+                # a deployment must use the latest commit, not the cached one
                 commit_sha = (
-                    git_client.resolve_commit_sha_for_branch(repo_url, self.branch_name)
+                    git_client.resolve_commit_sha_for_branch(
+                        repo_url,
+                        self.branch_name,
+                        git_app_id=self.git_app_id,
+                        refresh=True,
+                    )
                     or HEAD_COMMIT
                 )
             new_deployment.commit_sha = commit_sha
@@ -1239,7 +1246,141 @@ class ServiceMetrics(TimestampedModel):
     )
 
     class Meta:
-        indexes = [models.Index(fields=["created_at"])]
+        indexes = [
+            models.Index(fields=["created_at"]),
+            models.Index(fields=["service", "created_at"]),
+        ]
+
+    @classmethod
+    def bulk_create_with_rollups(
+        cls, metrics: Sequence["ServiceMetrics"]
+    ) -> list["ServiceMetrics"]:
+        """
+        Save the metrics and add them to the rollups in the same transaction,
+        so that a sample is never counted twice or not at all.
+        """
+        with transaction.atomic():
+            created = cls.objects.bulk_create(metrics)
+            ServiceMetricsRollup.add_metrics([metric.pk for metric in created])
+        return created
+
+
+class ServiceMetricsRollup(models.Model):
+    """
+    `ServiceMetrics` pre-aggregated in buckets of increasing size, maintained as metrics are saved,
+    so that the metrics of long time ranges are not computed from raw samples.
+    Averages are obtained by dividing the sums by `sample_count`.
+    """
+
+    class Resolution(models.TextChoices):
+        ONE_MINUTE = "1m", _("1 minute")
+        FIFTEEN_MINUTES = "15m", _("15 minutes")
+        ONE_HOUR = "1h", _("1 hour")
+        ONE_DAY = "1d", _("1 day")
+
+    BUCKET_INTERVALS = {
+        Resolution.ONE_MINUTE: "1 minute",
+        Resolution.FIFTEEN_MINUTES: "15 minutes",
+        Resolution.ONE_HOUR: "1 hour",
+        Resolution.ONE_DAY: "1 day",
+    }
+    # origin of the buckets passed to `DATE_BIN`
+    BUCKET_ORIGIN = "2000-01-01"
+
+    RAW_METRICS_RETENTION = timedelta(days=2)
+    RETENTION = {
+        Resolution.ONE_MINUTE: timedelta(days=2),
+        Resolution.FIFTEEN_MINUTES: timedelta(days=7),
+        Resolution.ONE_HOUR: timedelta(days=31),
+        Resolution.ONE_DAY: timedelta(days=365),
+    }
+
+    resolution = models.CharField(max_length=3, choices=Resolution.choices)
+    bucket = models.DateTimeField()
+    sample_count = models.PositiveIntegerField(default=0)
+    cpu_percent_sum = models.FloatField(default=0)
+    memory_bytes_sum = models.PositiveBigIntegerField(default=0)
+    net_tx_bytes = models.PositiveBigIntegerField(default=0)
+    net_rx_bytes = models.PositiveBigIntegerField(default=0)
+    disk_read_bytes = models.PositiveBigIntegerField(default=0)
+    disk_writes_bytes = models.PositiveBigIntegerField(default=0)
+
+    service = models.ForeignKey(to=Service, on_delete=models.CASCADE)
+    deployment = models.ForeignKey["Deployment"](
+        to="Deployment", on_delete=models.CASCADE
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["deployment", "resolution", "bucket"],
+                name="unique_metrics_rollup_bucket",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["service", "resolution", "bucket"]),
+            models.Index(fields=["resolution", "bucket"]),
+        ]
+
+    @classmethod
+    def add_metrics(cls, metrics_ids: Sequence[int]):
+        """
+        Add the `ServiceMetrics` with these ids to the buckets of every resolution,
+        creating the buckets that don't exist yet.
+        """
+        if not metrics_ids:
+            return
+
+        rollup_table = cls._meta.db_table
+        metrics_table = ServiceMetrics._meta.db_table
+        summed_columns = [
+            "sample_count",
+            "cpu_percent_sum",
+            "memory_bytes_sum",
+            "net_tx_bytes",
+            "net_rx_bytes",
+            "disk_read_bytes",
+            "disk_writes_bytes",
+        ]
+        resolutions = ", ".join(["(%s, %s::interval)"] * len(cls.BUCKET_INTERVALS))
+        updates = ", ".join(
+            f"{column} = {rollup_table}.{column} + EXCLUDED.{column}"
+            for column in summed_columns
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {rollup_table} (
+                    resolution, bucket, service_id, deployment_id, {", ".join(summed_columns)}
+                )
+                SELECT
+                    r.resolution,
+                    DATE_BIN(r.step, m.created_at, %s::timestamptz),
+                    m.service_id,
+                    m.deployment_id,
+                    COUNT(*),
+                    SUM(m.cpu_percent),
+                    SUM(m.memory_bytes),
+                    SUM(m.net_tx_bytes),
+                    SUM(m.net_rx_bytes),
+                    SUM(m.disk_read_bytes),
+                    SUM(m.disk_writes_bytes)
+                FROM {metrics_table} m
+                CROSS JOIN (VALUES {resolutions}) AS r(resolution, step)
+                WHERE m.id = ANY(%s)
+                GROUP BY 1, 2, 3, 4
+                ON CONFLICT (deployment_id, resolution, bucket) DO UPDATE SET {updates}
+                """,
+                [
+                    cls.BUCKET_ORIGIN,
+                    *[
+                        value
+                        for resolution, interval in cls.BUCKET_INTERVALS.items()
+                        for value in (resolution.value, interval)
+                    ],
+                    list(metrics_ids),
+                ],
+            )
 
 
 class Volume(TimestampedModel):
@@ -1514,6 +1655,12 @@ class Deployment(BaseDeployment):
         indexes = [
             models.Index(fields=["status"]),
             models.Index(fields=["is_current_production"]),
+            # for the health counters of the projects list
+            models.Index(
+                fields=["service", "status"],
+                condition=models.Q(is_current_production=True),
+                name="deployment_current_prod_idx",
+            ),
         ]
 
     @property
@@ -1709,6 +1856,20 @@ class Log(models.Model):
         abstract = True
 
 
+def http_log_field_prefix_expression(field: str):
+    """
+    Expression used to search the values of `field` of the http logs by prefix.
+    The values are compared with the "C" collation, so that a prefix is a plain range of
+    the index on this expression, which is also sorted in the order of the suggestions.
+    """
+    if field == "request_ip":
+        return Collate(
+            models.Func(F(field), function="HOST", output_field=models.TextField()),
+            "C",
+        )
+    return Collate(F(field), "C")
+
+
 class HttpLog(Log):
     class RequestMethod(models.TextChoices):
         GET = "GET", _("GET")
@@ -1745,17 +1906,46 @@ class HttpLog(Log):
     request_id = models.CharField(null=True, max_length=255)
     request_user_agent = models.TextField(blank=True, null=True)
 
+    # The table is partitioned by day on `time` (see `zane_api.partitions`), partitions are created
+    # `PARTITIONS_AHEAD` days in advance and dropped entirely once they are older than `RETENTION`.
+    # The primary key in the database is `(id, time)`, as postgres requires the partition key in it.
+    RETENTION = timedelta(days=30)
+    PARTITIONS_AHEAD = 7
+
     class Meta:
         indexes = [
-            models.Index(fields=["deployment_id"]),
-            models.Index(fields=["service_id"]),
+            # the logs are always listed for a service or a deployment
+            models.Index(fields=["service_id", "-time"]),
+            models.Index(fields=["deployment_id", "-time"]),
+            models.Index(fields=["service_id", "-request_duration_ns"]),
+            models.Index(
+                fields=["service_id", "-time"],
+                condition=Q(status__gte=400),
+                name="httplog_service_errors_idx",
+            ),
+            # for the autocompletion of the filters
+            models.Index(
+                F("service_id"),
+                http_log_field_prefix_expression("request_host"),
+                name="httplog_host_prefix_idx",
+            ),
+            models.Index(
+                F("service_id"),
+                http_log_field_prefix_expression("request_path"),
+                name="httplog_path_prefix_idx",
+            ),
+            models.Index(
+                F("service_id"),
+                http_log_field_prefix_expression("request_user_agent"),
+                name="httplog_user_agent_prefix_idx",
+            ),
+            models.Index(
+                F("service_id"),
+                http_log_field_prefix_expression("request_ip"),
+                name="httplog_ip_prefix_idx",
+            ),
             models.Index(fields=["request_method"]),
             models.Index(fields=["status"]),
-            models.Index(fields=["request_host"]),
-            models.Index(fields=["request_path"]),
-            models.Index(fields=["time"]),
-            models.Index(fields=["request_user_agent"]),
-            models.Index(fields=["request_ip"]),
             models.Index(fields=["request_id"]),
             models.Index(fields=["request_query"]),
         ]
@@ -0,0 +1,110 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+# Tables partitioned by day with `PARTITION BY RANGE (time)`, each day is stored in
+# a `<table>_pYYYYMMDD` partition, rows outside of these go to `<table>_default`.
+PARTITION_SUFFIX = "_p"
+DEFAULT_PARTITION_SUFFIX = "_default"
+
+
+def partition_name(table: str, day: date) -> str:
+    return f"{table}{PARTITION_SUFFIX}{day:%Y%m%d}"
+
+
+def _day_bounds(day: date) -> tuple[datetime, datetime]:
+    start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def _partition_day(table: str, name: str) -> Optional[date]:
+    prefix = f"{table}{PARTITION_SUFFIX}"
+    if not name.startswith(prefix):
+        return None
+    try:
+        return datetime.strptime(name.removeprefix(prefix), "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+def list_partitions(table: str, using: str = DEFAULT_DB_ALIAS) -> list[str]:
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+            ORDER BY child.relname
+            """,
+            [table],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def create_daily_partitions(
+    table: str, start: date, days: int, using: str = DEFAULT_DB_ALIAS
+) -> list[str]:
+    """
+    Create the partitions of `table` for the `days` days starting at `start`, skipping the existing ones.
+    The rows of these days already stored in the default partition are moved to the new partition,
+    as postgres refuses to attach a partition whose rows are present in the default partition.
+    """
+    existing = set(list_partitions(table, using))
+    default_partition = f"{table}{DEFAULT_PARTITION_SUFFIX}"
+    created = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        name = partition_name(table, day)
+        if name in existing:
+            continue
+        lower, upper = _day_bounds(day)
+        with transaction.atomic(using=using), connections[using].cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            )
+            if default_partition in existing:
+                cursor.execute(
+                    f"""
+                    WITH moved AS (
+                        DELETE FROM {default_partition}
+                        WHERE time >= %s AND time < %s
+                        RETURNING *
+                    )
+                    INSERT INTO {name} SELECT * FROM moved
+                    """,
+                    [lower, upper],
+                )
+            # bounds of a partition can't be query parameters
+            cursor.execute(
+                f"ALTER TABLE {table} ATTACH PARTITION {name}"
+                f" FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+            )
+        created.append(name)
+    return created
+
+
+def drop_daily_partitions(
+    table: str, before: date, using: str = DEFAULT_DB_ALIAS
+) -> tuple[list[str], int]:
+    """
+    Drop the partitions of `table` for the days before `before`, which is much cheaper
+    than deleting their rows, and delete the rows older than `before` left in the default partition.
+    Returns the dropped partitions and the number of rows deleted from the default partition.
+    """
+    dropped = []
+    with connections[using].cursor() as cursor:
+        for name in list_partitions(table, using):
+            day = _partition_day(table, name)
+            if day is not None and day < before:
+                cursor.execute(f"DROP TABLE {name}")
+                dropped.append(name)
+
+        cursor.execute(
+            f"DELETE FROM {table}{DEFAULT_PARTITION_SUFFIX} WHERE time < %s",
+            [_day_bounds(before)[0]],
+        )
+        deleted_count = cursor.rowcount
+    return dropped, deleted_count
@@ -1,6 +1,8 @@
 import asyncio
 import os
+import re
 import signal
+from collections import deque
 from typing import Any, Optional, Protocol, Tuple
 from asyncio.subprocess import Process
 
@@ -12,22 +14,68 @@ async def async_noop():
     ...
 
 
-async def read_until(stream: asyncio.StreamReader, delimiters: list[bytes]):
+class BufferedLineReader:
     """
-    Custom replacement for `asyncio.StreamReader.readuntil`
-    accepting multiple delimiters instead of one.
-    Plus it doesn't throw an error if the end data doesn't have
-    the delimiter character.
+    Read lines from a stream in large chunks, instead of byte by byte.
+    Lines are split on `\r`, `\n` and `\r\n`, and the last line is returned
+    even if it doesn't end with a delimiter.
+
+    If `coalesce_progress` is set, lines ending with a lone `\r` (progress bars redrawn in place)
+    are skipped when a more recent line is already buffered, so that only the last frame is emitted.
     """
-    buffer = bytearray()
-    while True:
-        character = await stream.read(1)
-        if not character:
-            break
-        buffer.extend(character)
-        if character in delimiters:
-            break
-    return bytes(buffer)
+
+    CHUNK_SIZE = 64 * 1024
+    DELIMITERS = re.compile(rb"\r\n|\r|\n")
+
+    def __init__(
+        self,
+        stream: asyncio.StreamReader,
+        chunk_size: int = CHUNK_SIZE,
+        coalesce_progress: bool = False,
+    ):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.coalesce_progress = coalesce_progress
+        self._buffer = bytearray()
+        self._lines: deque[bytes] = deque()
+        self._eof = False
+        # a `\r` ending a chunk is emitted right away,
+        # so a `\n` starting the next chunk belongs to the same delimiter
+        self._skip_next_lf = False
+
+    async def readline(self) -> bytes:
+        """Return the next line including its delimiter, or `b""` on EOF."""
+        while not self._lines:
+            if self._eof:
+                line = bytes(self._buffer)
+                self._buffer.clear()
+                return line
+
+            chunk = await self.stream.read(self.chunk_size)
+            if not chunk:
+                self._eof = True
+                continue
+            if self._skip_next_lf:
+                self._skip_next_lf = False
+                if chunk.startswith(b"\n"):
+                    chunk = chunk[1:]
+            self._buffer.extend(chunk)
+            self._split_buffer()
+
+        line = self._lines.popleft()
+        if self.coalesce_progress:
+            while self._lines and line.endswith(b"\r"):
+                line = self._lines.popleft()
+        return line
+
+    def _split_buffer(self):
+        start = 0
+        for match in self.DELIMITERS.finditer(self._buffer):
+            self._lines.append(bytes(self._buffer[start : match.end()]))
+            start = match.end()
+        del self._buffer[:start]
+        if self._lines and self._lines[-1].endswith(b"\r") and start > 0:
+            self._skip_next_lf = len(self._buffer) == 0
 
 
 class OutputHandlerFunction(Protocol):
@@ -42,11 +90,14 @@ class AyncSubProcessRunner:
         cancel_event: asyncio.Event,
         output_handler: OutputHandlerFunction,
         operation_name: str,
+        coalesce_progress: bool = False,
     ):
         self.command = command
         self.cancel_event = cancel_event
         self.output_handler = output_handler
         self.operation_name = operation_name
+        self.coalesce_progress = coalesce_progress
+        self._reader: Optional[BufferedLineReader] = None
         self.result: Any = None
         self.exit_code: Optional[int] = None
         self._terminate_task: Optional[asyncio.Task[int]] = None
@@ -62,6 +113,10 @@ class AyncSubProcessRunner:
             # ref: https://stackoverflow.com/a/4791612/10322846
             preexec_fn=os.setsid,
         )
+        if process.stdout is not None:
+            self._reader = BufferedLineReader(
+                process.stdout, coalesce_progress=self.coalesce_progress
+            )
 
         # Start a task to monitor the cancel event
         cancel_monitor_task = asyncio.create_task(self._monitor_cancel_event(process))
@@ -116,11 +171,11 @@ class AyncSubProcessRunner:
         self, process: Process, ignore_cancel: bool = False
     ) -> bool:
         """Returns True if EOF reached"""
-        if process.stdout is None:
+        if self._reader is None:
             return True
 
         try:
-            stdout = await read_until(process.stdout, delimiters=[b"\r", b"\n"])
+            stdout = await self._reader.readline()
 
             if not stdout:
                 print(
@@ -0,0 +1,147 @@
+import os
+import re
+from urllib.parse import urlsplit
+
+import requests
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    multiprocess,
+)
+
+# Prometheus metrics of the API and of the temporal worker.
+# With several gunicorn workers, `PROMETHEUS_MULTIPROC_DIR` (set by `scripts/run_gunicorn.sh`) must be set
+# so that the metrics of all the workers are aggregated when they are exported.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+api_request_duration = Histogram(
+    "zane_http_request_duration_seconds",
+    "Duration of the requests to the API, per route",
+    labelnames=["route", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+log_ingest_lines = Counter(
+    "zane_log_ingest_lines_total",
+    "Log lines received from fluentd",
+    labelnames=["kind"],
+)
+
+loki_push_duration = Histogram(
+    "zane_loki_push_duration_seconds",
+    "Duration of the pushes of logs to loki",
+    buckets=LATENCY_BUCKETS,
+)
+loki_push_failures = Counter(
+    "zane_loki_push_failures_total",
+    "Pushes of logs to loki that failed",
+)
+
+caddy_admin_request_duration = Histogram(
+    "zane_caddy_admin_request_duration_seconds",
+    "Duration of the calls to the admin API of caddy",
+    labelnames=["method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+caddy_etag_retries = Counter(
+    "zane_caddy_etag_retries_total",
+    "Changes to the caddy config retried because its `Etag` changed in the meantime",
+    labelnames=["operation"],
+)
+
+docker_api_request_duration = Histogram(
+    "zane_docker_api_request_duration_seconds",
+    "Duration of the calls to the docker API, per resource",
+    labelnames=["method", "resource", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+temporal_activity_duration = Histogram(
+    "zane_temporal_activity_duration_seconds",
+    "Duration of the temporal activities, per activity",
+    labelnames=["activity", "outcome"],
+    buckets=LATENCY_BUCKETS + (120, 300, 600),
+)
+
+healthcheck_check_lag = Histogram(
+    "zane_healthcheck_check_lag_seconds",
+    "Delay between the time a monitoring healthcheck is due and the time it starts",
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+healthcheck_checks = Counter(
+    "zane_healthcheck_checks_total",
+    "Monitoring healthchecks run, per resulting status of the deployment",
+    labelnames=["status"],
+)
+healthcheck_monitored_deployments = Gauge(
+    "zane_healthcheck_monitored_deployments",
+    "Deployments monitored by the healthcheck monitor",
+    multiprocess_mode="livemax",
+)
+
+
+def get_metrics_registry():
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def _status_class(response: requests.Response) -> str:
+    return f"{response.status_code // 100}xx"
+
+
+def observe_caddy_admin_response(response: requests.Response, *args, **kwargs):
+    caddy_admin_request_duration.labels(
+        method=response.request.method, status=_status_class(response)
+    ).observe(response.elapsed.total_seconds())
+
+
+# `/v1.47/services/<id>/update` -> `services`
+DOCKER_API_RESOURCE_REGEX = re.compile(r"^(?:/v[\d.]+)?/([^/?]+)")
+
+
+def observe_docker_api_response(response: requests.Response, *args, **kwargs):
+    match = DOCKER_API_RESOURCE_REGEX.match(urlsplit(response.request.url).path)
+    docker_api_request_duration.labels(
+        method=response.request.method,
+        resource=match.group(1) if match else "unknown",
+        status=_status_class(response),
+    ).observe(response.elapsed.total_seconds())
+
+
+def instrument_docker_client(client):
+    """
+    Record the latency of the calls of a `docker.DockerClient`, its API client being a `requests.Session`.
+    """
+    client.api.hooks["response"].append(observe_docker_api_response)
+    return client
+
+
+outbound_http_request_duration = Histogram(
+    "zane_outbound_http_request_duration_seconds",
+    "Duration of the calls made to other services (loki, caddy, git providers), per client",
+    labelnames=["client", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+outbound_http_retries = Counter(
+    "zane_outbound_http_retries_total",
+    "Calls made to other services that were retried, per client",
+    labelnames=["client"],
+)
+
+
+def outbound_http_response_hook(client: str):
+    def observe(response: requests.Response, *args, **kwargs):
+        outbound_http_request_duration.labels(
+            client=client,
+            method=response.request.method,
+            status=_status_class(response),
+        ).observe(response.elapsed.total_seconds())
+
+    return observe
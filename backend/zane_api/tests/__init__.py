@@ -5,6 +5,8 @@ from .logs import *
 from .project import *
 from .service import *
 from .validators import *
+from .process import *
+from .semaphore import *
 from .networks import *
 from .more_deployments import *
 from .search import *
@@ -24,3 +26,9 @@ from .cleanup_deployments import *
 from .preview_environments import *
 from .preview_env_templates import *
 from .more_environments import *
+from .middleware import *
+from .http_client import *
+from .docker_events import *
+from .image_pulls import *
+from .git_mirrors import *
+from .temporal_client import *
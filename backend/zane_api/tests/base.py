@@ -29,6 +29,7 @@ from rest_framework.test import APIClient
 from temporalio.testing import WorkflowEnvironment
 from temporalio.worker import Worker
 from temporal.shared import DeploymentDetails
+from temporal.worker import LogSinkInterceptor
 
 from search.loki_client import LokiSearchClient
 from asgiref.sync import sync_to_async
@@ -49,6 +50,7 @@ from temporal.helpers import (
     DockerImageResultFromRegistry,
     SERVER_RESOURCE_LIMIT_COMMAND,
     get_config_resource_name,
+    image_registry_cache,
 )
 from temporal.workflows import (
     get_workflows_and_activities,
@@ -56,6 +58,7 @@ from temporal.workflows import (
     GitDeploymentStep,
 )
 from ..serializers import ServiceSerializer
+from ..git_client import git_refs_cache
 
 from temporal.activities import (
     get_swarm_service_name_for_deployment,
@@ -358,6 +361,8 @@ class APITestCase(TestCase):
 
     def tearDown(self):
         cache.clear()
+        image_registry_cache.clear()
+        git_refs_cache.clear()
 
     def assertDictContainsSubset(
         self,
@@ -425,6 +430,7 @@ class AuthAPITestCase(APITestCase):
             env.client,
             task_queue=task_queue,
             **get_workflows_and_activities(),  # type: ignore
+            interceptors=[LogSinkInterceptor()],
         )
         await worker.__aenter__()
 
@@ -1293,11 +1299,29 @@ class FakeGit:
             raise GitCommandError("git checkout", status="invalid commit sha")
         self.commit_sha: Optional[str] = commit_sha
 
+    # the heads listed by `ls_remote` without a branch, every branch used in the tests
+    BRANCHES = [
+        "main",
+        "master",
+        "testing",
+        "test-1",
+        "feat/test-1",
+        "feat/test-preview",
+        "feat/add-authentication",
+        "feat/update-react-router",
+        "test-fork-pr",
+        "new-topic",
+        "new-cv",
+        "docs/v-1.11",
+    ]
+
     def ls_remote(self, arg: Any, url: str, branch: Optional[str] = None):
         if url == self.NON_EXISTENT_REPOSITORY or branch == self.NON_EXISTENT_BRANCH:
             return ""
-        else:
-            return f"{self.DEFAULT_COMMIT_SHA}\trefs/heads/main\n"
+        branches = [branch] if branch is not None else self.BRANCHES
+        return "".join(
+            f"{self.DEFAULT_COMMIT_SHA}\trefs/heads/{name}\n" for name in branches
+        )
 
     class FakeRepo:
 
@@ -1384,7 +1408,9 @@ class FakeDockerClient:
                     "TaskTemplate": {
                         "Networks": [],
                     },
-                }
+                    "Labels": labels or {},
+                },
+                "Endpoint": {"Ports": (endpoint or {}).get("Ports", [])},
             }
             self.name = name
             self.parent = parent
@@ -1453,14 +1479,17 @@ class FakeDockerClient:
     class FakeContainer:
         ID = "c1e672fd6962cda72fed881a8b68e8fd2b8a9ef2a479136586323ca05196cc85"
 
-        def __init__(self):
+        def __init__(self, labels: dict | None = None):
             self.status = "running"
             self.id = self.ID
+            self.labels = labels or {}
 
         @property
         def attrs(self):
             return {
                 "Id": self.id,
+                "Labels": self.labels,
+                "Created": 1739574376,
                 "Image": "sha256:a1b98f5f2c3a5db62a77e13f477ada54cec6edf0e4d4eff58ea69f80f2365fa0",
                 "NetworkSettings": {
                     "Bridge": "",
@@ -1675,6 +1704,7 @@ class FakeDockerClient:
         self.container_map: dict[str, List[FakeDockerClient.FakeContainer]] = {}
 
         self.api.build = self.image_build
+        self.api.pull = self.image_pull_stream
 
         self.images.search = self.images_search
         self.images.pull = self.images_pull
@@ -1826,8 +1856,15 @@ class FakeDockerClient:
             if labels.items() <= service.labels.items()
         ]
 
-    def containers_list(self, filters: dict):
-        return self.container_map.get(filters["name"]) or []
+    def containers_list(self, filters: dict, **kwargs):
+        if "name" in filters:
+            return self.container_map.get(filters["name"]) or []
+        return [
+            container
+            for containers in self.container_map.values()
+            for container in containers
+            if filters.get("label") in container.labels
+        ]
 
     @staticmethod
     def events(decode: bool, filters: dict):
@@ -1954,7 +1991,11 @@ class FakeDockerClient:
             networks=kwargs.get("networks", []),
             configs=kwargs.get("configs", []),
         )
-        self.container_map[name] = [FakeDockerClient.FakeContainer()]
+        self.container_map[name] = [
+            FakeDockerClient.FakeContainer(
+                labels={"com.docker.swarm.service.name": name}
+            )
+        ]
 
     def login(self, username: str, password: str, registry: str, **kwargs):
         if username != "fredkiss3" or password != "s3cret":
@@ -1987,6 +2028,25 @@ class FakeDockerClient:
             )
         self.pulled_images.add(repository)
 
+    def image_pull_stream(self, repository: str, *args, **kwargs):
+        if repository == self.NONEXISTANT_IMAGE:
+            raise docker.errors.ImageNotFound(
+                f"The image `{repository}` does not exists."
+            )
+        self.pulled_images.add(repository)
+        return [
+            {"status": "Pulling from library/valkey", "id": "7.2-alpine"},
+            {"status": "Pulling fs layer", "id": "4abcf2066143"},
+            {
+                "status": "Downloading",
+                "progressDetail": {"current": 1024, "total": 3408729},
+                "id": "4abcf2066143",
+            },
+            {"status": "Download complete", "id": "4abcf2066143"},
+            {"status": "Pull complete", "id": "4abcf2066143"},
+            {"status": "Digest: sha256:0c9ff4d6b1ad26a6a7a0f0ef5d47d62c3a1e1c9e"},
+        ]
+
     def image_get_registry_data(self, image: str, auth_config: dict):
         if auth_config is not None:
             username, password = auth_config["username"], auth_config["password"]
@@ -1,13 +1,15 @@
 # type: ignore
 from unittest.mock import patch, MagicMock, call
 import requests
+from docker.types import EndpointSpec
 from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.db.models import Q
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 
-from .base import AuthAPITestCase
+from .base import AuthAPITestCase, FakeDockerClient
 from ..models import (
     Project,
     Deployment,
@@ -1014,6 +1016,7 @@ class DockerServiceDeploymentAddChangesViewTests(AuthAPITestCase):
         )
         self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
 
+    @override_settings(HOST_PORTS_INDEX_ENABLED=False)
     def test_validate_ports_cannot_use_unavailable_host_port(self):
         p, service = self.create_caddy_docker_service()
 
@@ -1039,6 +1042,39 @@ class DockerServiceDeploymentAddChangesViewTests(AuthAPITestCase):
         )
         self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
 
+    def test_validate_ports_cannot_use_port_published_by_a_swarm_service(self):
+        p, service = self.create_caddy_docker_service()
+        self.fake_docker_client.service_map["portainer"] = (
+            FakeDockerClient.FakeService(
+                name="portainer",
+                parent=self.fake_docker_client,
+                image="portainer/portainer-ce",
+                endpoint=EndpointSpec(ports={9443: 9443}),
+            )
+        )
+
+        changes_payload = {
+            "field": "ports",
+            "type": "ADD",
+            "new_value": {
+                "host": 9443,
+                "forwarded": 80,
+            },
+        }
+
+        response = self.client.put(
+            reverse(
+                "zane_api:services.request_deployment_changes",
+                kwargs={
+                    "project_slug": p.slug,
+                    "env_slug": "production",
+                    "service_slug": service.slug,
+                },
+            ),
+            data=changes_payload,
+        )
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
     def test_validate_ports_cannot_use_port_already_used_by_other_services(self):
         p, redis = self.create_redis_docker_service()
         redis.ports.add(
@@ -2702,6 +2738,7 @@ class DockerServiceDeploymentUpdateViewTests(AuthAPITestCase):
         )
         self.assertTrue(scaled_down)
 
+    @override_settings(HEALTHCHECK_MONITOR_ENGINE_ENABLED=False)
     async def test_update_service_remove_previous_monitor_task(self):
         project, service = await self.acreate_and_deploy_redis_docker_service()
 
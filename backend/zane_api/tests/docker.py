@@ -1,7 +1,13 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest.mock import patch
+
 from django.urls import reverse
 from rest_framework import status
 
 from .base import AuthAPITestCase
+from temporal.helpers import check_if_docker_image_exists
+from ..utils import TieredCache
 
 
 class DockerViewTests(AuthAPITestCase):
@@ -23,3 +29,66 @@ class DockerViewTests(AuthAPITestCase):
     def test_search_query_empty(self):
         response = self.client.get(reverse("zane_api:docker.image_search"))
         self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_search_docker_images_reuse_the_results_of_a_prefix(self):
+        with patch.object(
+            self.fake_docker_client.images,
+            "search",
+            wraps=self.fake_docker_client.images_search,
+        ) as search:
+            for term in ["c", "ca", "cad", "cadd", "caddy"]:
+                response = self.client.get(
+                    reverse("zane_api:docker.image_search"), QUERY_STRING=f"q={term}"
+                )
+                self.assertEqual(status.HTTP_200_OK, response.status_code)
+            search.assert_called_once()
+
+        images = response.json().get("images")
+        self.assertEqual(
+            ["caddy", "siwecos/caddy"], [image["full_image"] for image in images]
+        )
+
+    def test_check_image_exists_is_cached_per_credentials(self):
+        with patch.object(
+            self.fake_docker_client.images,
+            "get_registry_data",
+            wraps=self.fake_docker_client.image_get_registry_data,
+        ) as get_registry_data:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                results = list(
+                    executor.map(lambda _: check_if_docker_image_exists("caddy"), range(8))
+                )
+            self.assertEqual([True] * 8, results)
+            self.assertEqual(1, get_registry_data.call_count)
+
+            self.assertFalse(
+                check_if_docker_image_exists(
+                    "caddy", credentials={"username": "fredkiss3", "password": "wrong"}
+                )
+            )
+            self.assertTrue(
+                check_if_docker_image_exists(
+                    "caddy", credentials={"username": "fredkiss3", "password": "s3cret"}
+                )
+            )
+            self.assertFalse(
+                check_if_docker_image_exists(self.fake_docker_client.NONEXISTANT_IMAGE)
+            )
+            self.assertFalse(
+                check_if_docker_image_exists(self.fake_docker_client.NONEXISTANT_IMAGE)
+            )
+            self.assertEqual(4, get_registry_data.call_count)
+
+    def test_cache_lookup_that_fails_is_not_kept(self):
+        cache = TieredCache("test-failing-lookup")
+
+        def lookup():
+            raise ConnectionError("the registry is unavailable")
+
+        with self.assertRaises(ConnectionError):
+            cache.get_or_set("caddy", lookup, ttl=timedelta(minutes=1))
+        self.assertEqual({}, cache._key_locks)
+
+        self.assertTrue(
+            cache.get_or_set("caddy", lambda: True, ttl=timedelta(minutes=1))
+        )
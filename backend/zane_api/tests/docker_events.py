@@ -0,0 +1,117 @@
+import asyncio
+import copy
+import queue
+import threading
+from time import monotonic
+from unittest.mock import patch
+
+from django.conf import settings
+
+from .base import AuthAPITestCase, FakeDockerClient
+from ..models import Deployment
+from temporal.docker_events import DockerEventsListener, SWARM_SERVICE_NAME_LABEL
+
+
+class FakeDockerEventSource:
+    def __init__(self):
+        self.events: queue.Queue[dict | Exception | None] = queue.Queue()
+
+    def push(self, service_name: str, action: str):
+        self.events.put(
+            {
+                "Type": "container",
+                "Action": action,
+                "Actor": {"Attributes": {SWARM_SERVICE_NAME_LABEL: service_name}},
+            }
+        )
+
+    def close(self):
+        self.events.put(None)
+
+    def fail(self, error: Exception):
+        self.events.put(error)
+
+    def __call__(self):
+        while (event := self.events.get()) is not None:
+            if isinstance(event, Exception):
+                raise event
+            yield event
+
+
+class DockerEventsListenerTests(AuthAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.event_source = FakeDockerEventSource()
+        self.listener = DockerEventsListener(event_source=self.event_source)
+        self.listener.start()
+
+    def tearDown(self):
+        self.listener.stop()
+        self.event_source.close()
+        super().tearDown()
+
+    async def wait_for_listener_to_be_connected(self):
+        while not self.listener.is_connected:
+            await asyncio.sleep(0.01)
+
+    async def test_subscription_is_woken_up_by_the_events_of_its_service(self):
+        await self.wait_for_listener_to_be_connected()
+        with self.listener.subscribe("srv-project-service-hash") as docker_events:
+            self.event_source.push("srv-other-service", "start")
+            self.assertFalse(await docker_events.wait(timeout=0.2))
+
+            self.event_source.push("srv-project-service-hash", "start")
+            self.assertTrue(await docker_events.wait(timeout=1))
+
+        self.assertEqual({}, self.listener.subscriptions)
+
+    async def test_listener_reconnects_when_the_stream_fails_while_it_is_read(self):
+        await self.wait_for_listener_to_be_connected()
+        self.listener.RECONNECT_INTERVAL = 0.05
+        with self.listener.subscribe("srv-project-service-hash") as docker_events:
+            # the connection to the daemon is reset in the middle of the stream
+            self.event_source.fail(ConnectionResetError("connection reset by peer"))
+            # the waiters are woken up when the stream drops, then when it is reconnected
+            self.assertTrue(await docker_events.wait(timeout=1))
+            await asyncio.wait_for(self.wait_for_listener_to_be_connected(), timeout=1)
+            await docker_events.wait(timeout=0.2)
+
+            self.event_source.push("srv-project-service-hash", "start")
+            self.assertTrue(await docker_events.wait(timeout=1))
+
+    async def test_deployment_healthcheck_finishes_on_container_start_event(self):
+        await self.wait_for_listener_to_be_connected()
+        original_tasks = FakeDockerClient.FakeService.tasks
+        scheduled, started = threading.Event(), threading.Event()
+
+        def tasks(service: FakeDockerClient.FakeService, *args, **kwargs):
+            if started.is_set():
+                return original_tasks(service, *args, **kwargs)
+            if not scheduled.is_set():
+                # the container of the task starts shortly after the first attempt
+                def start():
+                    started.set()
+                    self.event_source.push(service.name, "start")
+
+                scheduled.set()
+                threading.Timer(0.2, start).start()
+            starting_task = copy.deepcopy(service.swarm_tasks[0])
+            starting_task["Status"]["State"] = "starting"
+            return [starting_task]
+
+        with (
+            patch.object(FakeDockerClient.FakeService, "tasks", tasks),
+            patch(
+                "temporal.activities.main_activities.get_docker_events_listener",
+                return_value=self.listener,
+            ),
+        ):
+            start_time = monotonic()
+            _, service = await self.acreate_and_deploy_redis_docker_service()
+            elapsed = monotonic() - start_time
+
+        latest_deployment: Deployment = await service.alatest_production_deployment  # type: ignore
+        self.assertTrue(started.is_set())
+        self.assertEqual(Deployment.DeploymentStatus.HEALTHY, latest_deployment.status)
+        # with polling, the deployment would wait for a full interval before the second attempt
+        self.assertLess(elapsed, settings.DEFAULT_HEALTHCHECK_WAIT_INTERVAL)
@@ -0,0 +1,72 @@
+import responses
+from django.test import SimpleTestCase
+from prometheus_client import REGISTRY
+
+from ..http_client import build_http_session, get_http_session
+from temporal.helpers import ZaneProxyClient
+
+
+def get_sample_value(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class HttpClientTests(SimpleTestCase):
+    @responses.activate
+    def test_idempotent_calls_are_retried_on_unavailable_upstream(self):
+        url = "https://gitlab.example.com/api/v4/projects"
+        responses.add(responses.GET, url, status=503)
+        responses.add(responses.GET, url, json=[], status=200)
+
+        response = build_http_session("test-retries").get(url)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, len(responses.calls))
+        self.assertEqual(
+            1,
+            get_sample_value("zane_outbound_http_retries_total", client="test-retries"),
+        )
+
+    @responses.activate
+    def test_non_idempotent_calls_are_not_retried(self):
+        url = "https://api.github.com/repos/zane-ops/zane-ops/issues/1/comments"
+        responses.add(responses.POST, url, status=503)
+        responses.add(responses.POST, url, status=201)
+
+        response = build_http_session("test-no-retries").post(url, json={})
+
+        self.assertEqual(503, response.status_code)
+        self.assertEqual(1, len(responses.calls))
+
+    @responses.activate
+    def test_calls_are_timed_per_client(self):
+        url = "https://gitlab.example.com/oauth/token"
+        responses.add(responses.POST, url, json={}, status=200)
+
+        build_http_session("test-metrics").post(url)
+
+        self.assertEqual(
+            1,
+            get_sample_value(
+                "zane_outbound_http_request_duration_seconds_count",
+                client="test-metrics",
+                method="POST",
+                status="2xx",
+            ),
+        )
+
+    def test_sessions_are_shared_per_client(self):
+        self.assertIs(get_http_session("test-shared"), get_http_session("test-shared"))
+        self.assertIsNot(
+            get_http_session("test-shared"), get_http_session("test-other")
+        )
+
+    @responses.activate
+    def test_positional_caddy_calls_are_not_retried(self):
+        url = "http://127.0.0.1:2019/id/zane-url-root/routes/0"
+        responses.add(responses.PUT, url, status=503)
+        responses.add(responses.PUT, url, status=200)
+
+        response = ZaneProxyClient.positional_http.put(url, json={})
+
+        self.assertEqual(503, response.status_code)
+        self.assertEqual(1, len(responses.calls))
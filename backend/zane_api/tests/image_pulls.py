@@ -0,0 +1,78 @@
+import asyncio
+import threading
+
+from .base import AuthAPITestCase
+from temporal import image_pulls as pulls
+from temporal.image_pulls import (
+    DockerImagePull,
+    DockerImagePullError,
+    start_image_pull,
+)
+
+
+class DockerImagePullTests(AuthAPITestCase):
+    async def test_concurrent_pulls_of_the_same_image_are_shared(self):
+        release_pull = threading.Event()
+        pull_calls: list[str] = []
+
+        def pull(repository: str, *args, **kwargs):
+            pull_calls.append(repository)
+            release_pull.wait(timeout=5)
+            return self.fake_docker_client.image_pull_stream(repository)
+
+        self.fake_docker_client.api.pull = pull
+
+        first_pull, first_is_shared = start_image_pull(
+            self.fake_docker_client, "valkey/valkey:7.2-alpine", None
+        )
+        second_pull, second_is_shared = start_image_pull(
+            self.fake_docker_client, "valkey/valkey:7.2-alpine", None
+        )
+        other_credentials_pull, _ = start_image_pull(
+            self.fake_docker_client,
+            "valkey/valkey:7.2-alpine",
+            {"username": "fredkiss3", "password": "s3cret"},
+        )
+
+        self.assertFalse(first_is_shared)
+        self.assertTrue(second_is_shared)
+        self.assertIs(first_pull, second_pull)
+        self.assertIsNot(first_pull, other_credentials_pull)
+
+        release_pull.set()
+        await asyncio.gather(first_pull.task, other_credentials_pull.task)  # type: ignore
+        self.assertEqual(2, len(pull_calls))
+        self.assertEqual({}, pulls.image_pulls)
+
+        # the pulls that are finished are not shared
+        next_pull, next_is_shared = start_image_pull(
+            self.fake_docker_client, "valkey/valkey:7.2-alpine", None
+        )
+        self.assertFalse(next_is_shared)
+        await next_pull.task  # type: ignore
+
+    def test_pull_progress_is_tracked_per_layer(self):
+        image_pull = DockerImagePull(self.fake_docker_client, "redis", None)
+        image_pull.update({"status": "Pulling from library/redis", "id": "latest"})
+        image_pull.update({"status": "Already exists", "id": "a1"})
+        image_pull.update(
+            {
+                "status": "Downloading",
+                "progressDetail": {"current": 512, "total": 2048},
+                "id": "b2",
+            }
+        )
+
+        self.assertEqual(["a1", "b2"], list(image_pull.layers))
+        self.assertEqual("Downloading 512 bytes / 2.00 kb", str(image_pull.layers["b2"]))
+        self.assertEqual(
+            "1/2 layers pulled, 512 bytes / 2.00 kb downloaded", image_pull.summary
+        )
+
+        image_pull.update({"status": "Pull complete", "id": "b2"})
+        self.assertEqual(
+            "2/2 layers pulled, 2.00 kb / 2.00 kb downloaded", image_pull.summary
+        )
+
+        with self.assertRaises(DockerImagePullError):
+            image_pull.update({"error": "unauthorized: authentication required"})
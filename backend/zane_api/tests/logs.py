@@ -1,19 +1,33 @@
 # type: ignore
+import asyncio
 import datetime
+import gzip
 import json
+import time
 import uuid
 
+from django.test import TestCase
 from django.urls import reverse
 from rest_framework import status
 from datetime import timedelta
 from django.conf import settings
 import base64
+from ..log_ingest import copy_http_logs, parse_http_log
+from ..partitions import (
+    create_daily_partitions,
+    drop_daily_partitions,
+    list_partitions,
+    partition_name,
+)
 from ..utils import jprint
 from .base import AuthAPITestCase
 from ..models import Deployment, Service, HttpLog
-from search.dtos import RuntimeLogSource, RuntimeLogLevel
+from search.dtos import RuntimeLogSource, RuntimeLogLevel, RuntimeLogDto
+from search.log_sink import LokiLogSink, track_log_sink_writes
+from django.utils import timezone
 
 import requests
+import responses
 
 import urllib.request
 
@@ -144,6 +158,62 @@ class RuntimeLogCollectViewTests(AuthAPITestCase):
         )
         self.assertIsNotNone(log["service_id"])
 
+    def test_ingest_gzipped_ndjson_logs_and_skip_invalid_lines(self):
+        p, service = self.create_and_deploy_redis_docker_service()
+
+        deployment: Deployment = service.deployments.first()
+
+        simple_logs = [
+            {
+                "log": "1:M 30 Jun 2024 03:17:14.375 * Server initialized",
+                "container_id": "78dfe81bb4b3994eeb38f65f5a586084a2b4a649c0ab08b614d0f4c2cb499761",
+                "container_name": "/srv-prj_ssbvBaqpbD7-srv_dkr_LeeCqAUZJnJ-dpl_dkr_KRbXo2FJput.1.zm0uncmx8w4wvnokdl6qxt55e",
+                "time": datetime.datetime.now().isoformat(),
+                "tag": json.dumps(
+                    {
+                        "deployment_id": deployment.hash,
+                        "service_id": service.id,
+                    }
+                ),
+                "source": source,
+            }
+            for source in ["stdout", "stderr", "invalid"]
+        ]
+        body = gzip.compress(
+            "\n".join(json.dumps(log) for log in simple_logs).encode()
+        )
+
+        response = self.client.generic(
+            "POST",
+            reverse("zane_api:logs.ingest"),
+            data=body,
+            content_type="application/x-ndjson",
+            headers={
+                "Content-Encoding": "gzip",
+                "Authorization": f"Basic {base64.b64encode(f'zaneops:{settings.SECRET_KEY}'.encode()).decode()}",
+            },
+        )
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(2, response.json()["simple_logs_inserted"])
+        self.assertEqual(2, self.search_client.count())
+
+        data = self.search_client.search(
+            query={"deployment_id": deployment.hash, "level": [RuntimeLogLevel.ERROR]},
+        )
+        self.assertEqual(1, len(data["results"]))
+
+    def test_reject_invalid_log_payload(self):
+        response = self.client.generic(
+            "POST",
+            reverse("zane_api:logs.ingest"),
+            data=b"not json",
+            content_type="application/json",
+            headers={
+                "Authorization": f"Basic {base64.b64encode(f'zaneops:{settings.SECRET_KEY}'.encode()).decode()}",
+            },
+        )
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
 
 now = datetime.datetime.now()
 
@@ -265,6 +335,56 @@ class RuntimeLogViewTests(AuthAPITestCase):
             elements,
         )
 
+    def test_logs_histogram(self):
+        p, service = self.create_and_deploy_redis_docker_service()
+        deployment: Deployment = service.deployments.first()
+
+        # Insert logs
+        simple_logs = [
+            {
+                "log": content,
+                "container_id": "78dfe81bb4b3994eeb38f65f5a586084a2b4a649c0ab08b614d0f4c2cb499761",
+                "container_name": "/srv-prj_ssbvBaqpbD7-srv_dkr_LeeCqAUZJnJ-dpl_dkr_KRbXo2FJput.1.zm0uncmx8w4wvnokdl6qxt55e",
+                "time": time,
+                "tag": json.dumps(
+                    {
+                        "deployment_id": deployment.hash,
+                        "service_id": service.id,
+                    }
+                ),
+                "source": "stdout" if i % 2 == 0 else "stderr",
+            }
+            for i, (time, content) in enumerate(self.sample_log_contents)
+        ]
+        response = self.client.post(
+            reverse("zane_api:logs.ingest"),
+            data=simple_logs,
+            headers={
+                "Authorization": f"Basic {base64.b64encode(f'zaneops:{settings.SECRET_KEY}'.encode()).decode()}"
+            },
+        )
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(len(simple_logs), self.search_client.count())
+
+        response = self.client.get(
+            reverse(
+                "zane_api:services.deployment.runtime_logs.histogram",
+                kwargs={
+                    "project_slug": p.slug,
+                    "env_slug": "production",
+                    "service_slug": service.slug,
+                    "deployment_hash": deployment.hash,
+                },
+            ),
+            QUERY_STRING=f"level=ERROR&buckets=10&time_after={(now - timedelta(minutes=1)).isoformat()}",
+        )
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        data = response.json()
+        self.assertEqual(len(simple_logs) // 2, data["total"])
+        self.assertEqual(
+            data["total"], sum(bucket["count"] for bucket in data["buckets"])
+        )
+
     def test_paginate(self):
         p, service = self.create_and_deploy_redis_docker_service()
         deployment: Deployment = service.deployments.first()
@@ -311,6 +431,8 @@ class RuntimeLogViewTests(AuthAPITestCase):
         data = response.json()
         self.assertEqual(5, len(data["results"]))
         self.assertIsNotNone(data["next"])
+        # the next page is known from the extra log fetched, without another query
+        self.assertIn('desc="1 queries"', response.headers["Server-Timing"])
 
     def test_paginate_get_next_page(self):
         p, service = self.create_and_deploy_redis_docker_service()
@@ -1005,6 +1127,61 @@ class HttpLogViewTests(AuthAPITestCase):
         self.assertEqual(status.HTTP_200_OK, response.status_code)
         self.assertEqual(1, len(response.json()["results"]))
 
+    def test_autocomplete_fields(self):
+        p, service = self.create_and_deploy_caddy_docker_service()
+
+        fist_deployment: Deployment = service.deployments.first()
+
+        simple_proxy_logs = [
+            {
+                "source": "stdout",
+                "container_id": "8320676fc77bb91b54f0dff7015c08148fd3021db7038c8d0c18ec7378e1979e",
+                "log": json.dumps(
+                    {
+                        **log,
+                        "zane_deployment_upstream": f"{fist_deployment.network_aliases[-1]}:80",
+                        "zane_deployment_green_hash": None,
+                        "zane_deployment_blue_hash": fist_deployment.hash,
+                        "zane_service_id": service.id,
+                        "zane_deployment_id": fist_deployment.hash,
+                        "uuid": str(uuid.uuid4()),
+                    }
+                ),
+                "container_name": "/zane_proxy.1.kj2d879vqbnpishh4d66i47do",
+                "time": "2024-06-25T14:16:25+0000",
+                "service": "proxy",
+                "tag": json.dumps({"service_id": "zane.proxy"}),
+            }
+            for log in self.sample_log_entries
+        ]
+
+        response = self.client.post(
+            reverse("zane_api:logs.ingest"),
+            headers={
+                "Authorization": f"Basic {base64.b64encode(f'zaneops:{settings.SECRET_KEY}'.encode()).decode()}"
+            },
+            data=simple_proxy_logs,
+        )
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        url = reverse(
+            "zane_api:services.http_logs.fields",
+            kwargs={
+                "project_slug": p.slug,
+                "env_slug": "production",
+                "service_slug": service.slug,
+            },
+        )
+        response = self.client.get(url, QUERY_STRING="field=request_path&value=")
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(["/abc", "/docs"], response.json())
+
+        response = self.client.get(url, QUERY_STRING="field=request_path&value=/d")
+        self.assertEqual(["/docs"], response.json())
+
+        response = self.client.get(url, QUERY_STRING="field=request_ip&value=2001")
+        self.assertEqual(["2001:db8::ff00:42:8329"], response.json())
+
 
 class HTTPLogCollectViewTests(AuthAPITestCase):
     sample_log_entries = [
@@ -1315,6 +1492,45 @@ class HTTPLogCollectViewTests(AuthAPITestCase):
         self.assertEqual(HttpLog.RequestProtocols.HTTP_2, log.request_protocol)
         self.assertIsNotNone(log.request_id)
 
+    def test_ingesting_the_same_http_logs_again_does_not_duplicate_them(self):
+        p, service = self.create_and_deploy_caddy_docker_service()
+        fist_deployment: Deployment = service.deployments.first()
+
+        simple_proxy_logs = [
+            {
+                "source": "stdout",
+                "container_id": "8320676fc77bb91b54f0dff7015c08148fd3021db7038c8d0c18ec7378e1979e",
+                "log": json.dumps(
+                    {
+                        **log,
+                        "zane_deployment_upstream": f"{fist_deployment.network_aliases[-1]}:80",
+                        "zane_deployment_green_hash": None,
+                        "zane_deployment_blue_hash": fist_deployment.hash,
+                        "zane_service_id": service.id,
+                        "zane_deployment_id": service.id,
+                        "uuid": str(uuid.uuid4()),
+                    }
+                ),
+                "container_name": "/zane_proxy.1.kj2d879vqbnpishh4d66i47do",
+                "time": "2024-06-25T14:16:25+0000",
+                "service": "proxy",
+                "tag": json.dumps({"service_id": "zane.proxy"}),
+            }
+            for log in self.sample_log_entries
+        ]
+
+        # fluentd sends the whole batch again when a previous attempt failed
+        for _ in range(2):
+            response = self.client.post(
+                reverse("zane_api:logs.ingest"),
+                data=simple_proxy_logs,
+                headers={
+                    "Authorization": f"Basic {base64.b64encode(f'zaneops:{settings.SECRET_KEY}'.encode()).decode()}"
+                },
+            )
+            self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(len(self.sample_log_entries), HttpLog.objects.count())
+
     async def test_correctly_split_logs_per_deployment(self):
         p, service = await self.acreate_and_deploy_caddy_docker_service()
         # Make a second deployment
@@ -1415,6 +1631,96 @@ class HTTPLogCollectViewTests(AuthAPITestCase):
         self.assertEqual(4, await initial_deployment.http_logs.acount())
         self.assertEqual(2, await latest_deployment.http_logs.acount())
 
+    def test_copy_http_logs_keep_all_fields(self):
+        entry = {
+            **self.sample_log_entries[0],
+            "zane_deployment_upstream": "srv-copy.blue.zaneops.internal:80",
+            "zane_deployment_green_hash": None,
+            "zane_deployment_blue_hash": "dpl_dkr_copy",
+            "zane_service_id": "srv_dkr_copy",
+            "zane_deployment_id": "dpl_dkr_copy",
+            "uuid": str(uuid.uuid4()),
+        }
+        http_log = parse_http_log("2024-06-25T14:16:25+0000", entry)
+
+        self.assertEqual(1, copy_http_logs([http_log]))
+
+        log: HttpLog = HttpLog.objects.get(id=http_log.id)
+        self.assertEqual("srv_dkr_copy", log.service_id)
+        self.assertEqual("dpl_dkr_copy", log.deployment_id)
+        self.assertEqual(entry["request"]["headers"], log.request_headers)
+        self.assertEqual(entry["resp_headers"], log.response_headers)
+        self.assertEqual("10.0.0.2", log.request_ip)
+        self.assertEqual(int(entry["duration"] * 1_000_000_000), log.request_duration_ns)
+        self.assertEqual(
+            datetime.datetime(2024, 6, 25, 14, 16, 25, tzinfo=datetime.timezone.utc),
+            log.time,
+        )
+
+
+class HttpLogPartitionsTests(TestCase):
+    def create_http_log(self, time: datetime.datetime) -> HttpLog:
+        return HttpLog.objects.create(
+            time=time,
+            service_id="srv_dkr_partition",
+            deployment_id="dpl_dkr_partition",
+            request_method=HttpLog.RequestMethod.GET,
+            status=200,
+            request_duration_ns=1_000_000,
+            request_headers={},
+            response_headers={},
+            request_host="partition.zaneops.local",
+            request_path="/",
+            request_ip="10.0.0.2",
+        )
+
+    def test_create_partition_moves_rows_from_default_partition(self):
+        table = HttpLog._meta.db_table
+        day = timezone.now().date() - timedelta(days=60)
+        log = self.create_http_log(
+            datetime.datetime.combine(
+                day, datetime.time(12), tzinfo=datetime.timezone.utc
+            )
+        )
+
+        created = create_daily_partitions(table, start=day, days=1)
+
+        self.assertEqual([partition_name(table, day)], created)
+        self.assertIn(partition_name(table, day), list_partitions(table))
+        self.assertTrue(HttpLog.objects.filter(id=log.id).exists())
+
+    def test_drop_expired_partitions(self):
+        table = HttpLog._meta.db_table
+        today = timezone.now().date()
+        expired_day = today - HttpLog.RETENTION - timedelta(days=1)
+        create_daily_partitions(table, start=expired_day, days=1)
+        expired_log = self.create_http_log(
+            datetime.datetime.combine(
+                expired_day, datetime.time(12), tzinfo=datetime.timezone.utc
+            )
+        )
+        # older than any partition, stored in the default partition
+        default_partition_log = self.create_http_log(
+            datetime.datetime.combine(
+                expired_day - timedelta(days=1),
+                datetime.time(12),
+                tzinfo=datetime.timezone.utc,
+            )
+        )
+        recent_log = self.create_http_log(timezone.now())
+
+        dropped, deleted_count = drop_daily_partitions(
+            table, before=today - HttpLog.RETENTION
+        )
+
+        self.assertIn(partition_name(table, expired_day), dropped)
+        self.assertEqual(1, deleted_count)
+        self.assertFalse(HttpLog.objects.filter(id=expired_log.id).exists())
+        self.assertFalse(
+            HttpLog.objects.filter(id=default_partition_log.id).exists()
+        )
+        self.assertTrue(HttpLog.objects.filter(id=recent_log.id).exists())
+
 
 class DeploymentSystemLogViewTests(AuthAPITestCase):
     async def test_log_intermediate_steps_when_deploying_a_service(self):
@@ -1428,3 +1734,113 @@ class DeploymentSystemLogViewTests(AuthAPITestCase):
             },
         )
         self.assertGreater(system_logs_total, 0)
+
+
+class DeploymentLogSinkTests(AuthAPITestCase):
+    async def test_deployment_logs_are_pushed_in_batches(self):
+        sink = LokiLogSink(host=settings.LOKI_HOST, max_batch_size=500)
+        now = timezone.now()
+        logs = [
+            RuntimeLogDto(
+                source=RuntimeLogSource.BUILD,
+                level=RuntimeLogLevel.INFO,
+                content=f"line {i}",
+                content_text=f"line {i}",
+                time=now + timedelta(microseconds=i),
+                created_at=now,
+                deployment_id="dpl_dkr_sink",
+                service_id="srv_dkr_sink",
+            )
+            for i in range(1_200)
+        ]
+        await sink.put(logs)
+        await sink.flush()
+
+        self.assertEqual(1_200, sink.stats.flushed_lines)
+        self.assertEqual(0, sink.stats.dropped_lines)
+        self.assertEqual(3, sink.stats.flushes)
+        self.assertEqual(
+            1_200,
+            self.search_client.count(query={"deployment_id": "dpl_dkr_sink"}),
+        )
+        await sink.close()
+
+    async def test_flush_only_waits_for_the_logs_of_the_current_activity(self):
+        sink = LokiLogSink(host=settings.LOKI_HOST, max_batch_size=10)
+        pushed: list[str] = []
+
+        def bulk_insert(docs, timeout=None):
+            time.sleep(0.005)
+            pushed.extend(doc.content for doc in docs)
+
+        sink.client.bulk_insert = bulk_insert
+        now = timezone.now()
+
+        def log(content: str):
+            return RuntimeLogDto(
+                source=RuntimeLogSource.BUILD,
+                level=RuntimeLogLevel.INFO,
+                content=content,
+                content_text=content,
+                time=now,
+                created_at=now,
+                deployment_id="dpl_dkr_sink",
+                service_id="srv_dkr_sink",
+            )
+
+        other_activity_done = asyncio.Event()
+
+        async def other_activity():
+            track_log_sink_writes()
+            # logs without interruption until the end of the test
+            while not other_activity_done.is_set():
+                await sink.put([log("other")])
+                await asyncio.sleep(0.001)
+
+        async def activity():
+            mark = track_log_sink_writes()
+            await sink.put([log(f"line {i}") for i in range(25)])
+            await sink.flush(until=mark.position)
+
+        other = asyncio.create_task(other_activity())
+        await asyncio.sleep(0.05)
+        await asyncio.wait_for(asyncio.create_task(activity()), timeout=5)
+
+        self.assertFalse(other.done())
+        self.assertEqual(
+            [f"line {i}" for i in range(25)],
+            [content for content in pushed if content != "other"],
+        )
+        other_activity_done.set()
+        await other
+        await sink.close()
+
+    @responses.activate
+    async def test_deployment_logs_are_dropped_if_loki_is_down(self):
+        responses.add(
+            responses.POST,
+            f"{settings.LOKI_HOST}/loki/api/v1/push",
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+        sink = LokiLogSink(host=settings.LOKI_HOST, max_push_attempts=2)
+        now = timezone.now()
+        await sink.put(
+            [
+                RuntimeLogDto(
+                    source=RuntimeLogSource.SYSTEM,
+                    level=RuntimeLogLevel.INFO,
+                    content="hello",
+                    content_text="hello",
+                    time=now,
+                    created_at=now,
+                    deployment_id="dpl_dkr_sink",
+                    service_id="srv_dkr_sink",
+                )
+            ]
+        )
+        await sink.flush()
+
+        self.assertEqual(0, sink.stats.flushed_lines)
+        self.assertEqual(1, sink.stats.dropped_lines)
+        self.assertEqual(2, sink.stats.failed_flushes)
+        await sink.close()
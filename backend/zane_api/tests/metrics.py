@@ -1,9 +1,10 @@
 from django.conf import settings
+from django.test import override_settings
 
 from .base import AuthAPITestCase
 
 
-from ..models import Deployment, ServiceMetrics
+from ..models import Deployment, ServiceMetrics, ServiceMetricsRollup
 from django.urls import reverse
 from rest_framework import status
 from temporal.workflows import (
@@ -11,10 +12,12 @@ from temporal.workflows import (
 )
 from temporal.schedules import (
     GetDockerDeploymentStatsWorkflow,
+    CollectNodeDeploymentStatsWorkflow,
 )
 
 
 class DockerServiceMetricsScheduleTests(AuthAPITestCase):
+    @override_settings(METRICS_NODE_COLLECTOR_ENABLED=False)
     async def test_create_metrics_schedule_when_deploying_a_service(self):
         _, service = await self.acreate_and_deploy_redis_docker_service()
 
@@ -27,6 +30,21 @@ class DockerServiceMetricsScheduleTests(AuthAPITestCase):
             self.get_workflow_schedule_by_id(initial_deployment.metrics_schedule_id)
         )
 
+    async def test_do_not_create_metrics_schedule_when_node_collector_is_enabled(
+        self,
+    ):
+        _, service = await self.acreate_and_deploy_redis_docker_service()
+
+        initial_deployment: Deployment = (
+            await service.alatest_production_deployment
+        )  # type: ignore
+
+        self.assertIsNotNone(initial_deployment)
+        self.assertIsNone(
+            self.get_workflow_schedule_by_id(initial_deployment.metrics_schedule_id)
+        )
+
+    @override_settings(METRICS_NODE_COLLECTOR_ENABLED=False)
     async def test_delete_previous_deployment_metrics_schedule_on_new_deployment(self):
         project, service = await self.acreate_and_deploy_redis_docker_service()
         initial_deployment: Deployment = (
@@ -74,3 +92,84 @@ class DockerServiceMetricsScheduleTests(AuthAPITestCase):
                 deployment__hash=deployment.hash, service=service
             ).acount()
             self.assertGreater(metrics_count, 0)
+
+    async def test_run_node_stats_collector(self):
+        async with self.workflowEnvironment() as env:
+            _, service = await self.acreate_and_deploy_redis_docker_service()
+            _, other_service = await self.acreate_and_deploy_caddy_docker_service()
+
+            await env.client.execute_workflow(
+                workflow=CollectNodeDeploymentStatsWorkflow.run,
+                id="collect-node-deployment-stats",
+                task_queue=settings.TEMPORALIO_MAIN_TASK_QUEUE,
+                execution_timeout=settings.TEMPORALIO_WORKFLOW_EXECUTION_MAX_TIMEOUT,
+            )
+            for deployed_service in [service, other_service]:
+                latest_deployment: Deployment = await deployed_service.alatest_production_deployment  # type: ignore
+                metrics_count = await ServiceMetrics.objects.filter(
+                    deployment=latest_deployment, service=deployed_service
+                ).acount()
+                self.assertEqual(1, metrics_count)
+
+
+class ServiceMetricsRollupTests(AuthAPITestCase):
+    def create_metrics(self, deployment: Deployment, count: int):
+        return ServiceMetrics.bulk_create_with_rollups(
+            [
+                ServiceMetrics(
+                    cpu_percent=10.0 * (i + 1),
+                    memory_bytes=1024 * (i + 1),
+                    net_tx_bytes=100,
+                    net_rx_bytes=200,
+                    disk_read_bytes=300,
+                    disk_writes_bytes=400,
+                    deployment=deployment,
+                    service=deployment.service,
+                )
+                for i in range(count)
+            ]
+        )
+
+    def test_saving_metrics_updates_the_rollup_of_every_resolution(self):
+        _, service = self.create_and_deploy_redis_docker_service()
+        deployment: Deployment = service.latest_production_deployment  # type: ignore
+
+        self.create_metrics(deployment, count=2)
+        self.create_metrics(deployment, count=1)
+
+        for resolution in ServiceMetricsRollup.Resolution:
+            rollups = ServiceMetricsRollup.objects.filter(
+                deployment=deployment, resolution=resolution
+            )
+            self.assertEqual(
+                3, sum(rollup.sample_count for rollup in rollups), resolution
+            )
+            self.assertEqual(
+                600, sum(rollup.net_rx_bytes for rollup in rollups), resolution
+            )
+
+    def test_read_long_time_ranges_from_rollups(self):
+        project, service = self.create_and_deploy_redis_docker_service()
+        deployment: Deployment = service.latest_production_deployment  # type: ignore
+        self.create_metrics(deployment, count=3)
+
+        # the raw samples are not used for the last month
+        ServiceMetrics.objects.filter(service=service).delete()
+
+        response = self.client.get(
+            reverse(
+                "zane_api:services.metrics",
+                kwargs={
+                    "project_slug": project.slug,
+                    "env_slug": "production",
+                    "service_slug": service.slug,
+                },
+            ),
+            QUERY_STRING="time_range=LAST_MONTH",
+        )
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        metrics = response.json()
+        self.assertEqual(1, len(metrics))
+        self.assertAlmostEqual(20.0, metrics[0]["avg_cpu"])
+        self.assertAlmostEqual(2048.0, metrics[0]["avg_memory"])
+        self.assertEqual(600, metrics[0]["total_net_rx"])
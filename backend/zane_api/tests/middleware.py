@@ -0,0 +1,99 @@
+import json
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from .base import AuthAPITestCase
+from ..prometheus import get_metrics_registry
+
+
+class RequestLogMiddlewareTests(AuthAPITestCase):
+    def get_request_log(self, logs, route: str) -> dict:
+        return next(
+            record.request_log
+            for record in logs.records
+            if record.request_log["request_route"] == route
+        )
+
+    @override_settings(
+        REQUEST_LOG_BODY_ROUTES=["zane_api:projects.list"],
+        REQUEST_LOG_BODY_MAX_BYTES=16,
+    )
+    def test_request_body_is_truncated(self):
+        self.loginUser()
+        body = json.dumps({"slug": "zane-ops", "description": "a" * 100})
+        with self.assertLogs("request_logger") as logs:
+            response = self.client.post(
+                reverse("zane_api:projects.list"),
+                data=body,
+                content_type="application/json",
+            )
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+
+        log = self.get_request_log(logs, "zane_api:projects.list")
+        self.assertEqual(body[:16], log["request_body"])
+        self.assertTrue(log["request_body_truncated"])
+
+    @override_settings(REQUEST_LOG_BODY_ROUTES=["zane_api:auth.login"])
+    def test_request_body_is_only_captured_for_the_allowed_routes(self):
+        self.loginUser()
+        with self.assertLogs("request_logger") as logs:
+            response = self.client.post(
+                reverse("zane_api:projects.list"),
+                data={"slug": "zane-ops"},
+            )
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+
+        log = self.get_request_log(logs, "zane_api:projects.list")
+        self.assertIsNone(log.get("request_body"))
+        self.assertGreater(log["run_time_ms"], 0)
+
+    def test_request_body_is_not_captured_by_default(self):
+        with self.assertLogs("request_logger") as logs:
+            self.client.post(
+                reverse("zane_api:auth.login"),
+                data={"username": "Fredkiss3", "password": "password"},
+            )
+
+        log = self.get_request_log(logs, "zane_api:auth.login")
+        self.assertIsNone(log.get("request_body"))
+
+    @override_settings(REQUEST_LOG_BODY_ROUTES=["zane_api:logs.ingest"])
+    def test_request_body_of_ingest_route_is_not_captured(self):
+        with self.assertLogs("request_logger") as logs:
+            self.client.generic(
+                "POST",
+                reverse("zane_api:logs.ingest"),
+                data="{}",
+                content_type="application/x-ndjson",
+            )
+
+        log = self.get_request_log(logs, "zane_api:logs.ingest")
+        self.assertIsNone(log.get("request_body"))
+
+
+class PrometheusMetricsViewTests(AuthAPITestCase):
+    def test_metrics_include_request_durations(self):
+        self.loginUser()
+        self.client.get(reverse("zane_api:ping"))
+
+        response = self.client.get(reverse("zane_api:prometheus.metrics"))
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertIn(
+            "zane_http_request_duration_seconds_count", response.content.decode()
+        )
+        self.assertGreaterEqual(
+            get_metrics_registry().get_sample_value(
+                "zane_http_request_duration_seconds_count",
+                {"route": "zane_api:ping", "method": "GET", "status": "2xx"},
+            ),
+            1,
+        )
+
+    def test_metrics_require_authentication(self):
+        response = self.client.get(reverse("zane_api:prometheus.metrics"))
+        self.assertIn(
+            response.status_code,
+            [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN],
+        )
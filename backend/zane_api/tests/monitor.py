@@ -1,4 +1,8 @@
+import asyncio
+import threading
+
 from django.conf import settings
+from django.test import override_settings
 
 from .base import AuthAPITestCase
 from ..dtos import HealthCheckDto
@@ -10,7 +14,7 @@ from temporal.shared import (
     HealthcheckDeploymentDetails,
     SimpleDeploymentDetails,
 )
-from temporal.schedules import MonitorDockerDeploymentWorkflow
+from temporal.schedules import HealthcheckMonitor, MonitorDockerDeploymentWorkflow
 
 
 class DockerServiceMonitorTests(AuthAPITestCase):
@@ -439,3 +443,111 @@ class DockerServiceMonitorTests(AuthAPITestCase):
                 Deployment.DeploymentStatus.UNHEALTHY,
                 latest_deployment.status,
             )
+
+
+class HealthcheckMonitorTests(AuthAPITestCase):
+    @override_settings(HEALTHCHECK_MONITOR_ENGINE_ENABLED=True)
+    async def test_deploy_service_do_not_create_monitor_schedule_with_monitor_engine(
+        self,
+    ):
+        p, service = await self.acreate_and_deploy_redis_docker_service()
+        latest_deployment: Deployment = await service.alatest_production_deployment  # type: ignore
+        self.assertEqual(
+            Deployment.DeploymentStatus.HEALTHY,
+            latest_deployment.status,
+        )
+        self.assertIsNone(
+            self.get_workflow_schedule_by_id(latest_deployment.monitor_schedule_id)
+        )
+
+    async def test_monitor_engine_saves_status_changes(self):
+        p, service = await self.acreate_and_deploy_redis_docker_service()
+        latest_deployment: Deployment = await service.alatest_production_deployment  # type: ignore
+        self.assertEqual(
+            Deployment.DeploymentStatus.HEALTHY,
+            latest_deployment.status,
+        )
+
+        class FakeService:
+            attrs = {"Spec": {"Labels": {}}}
+
+            @staticmethod
+            def tasks(*args, **kwargs):
+                return []
+
+        self.fake_docker_client.services.get = lambda _id: FakeService()
+
+        monitor = HealthcheckMonitor(
+            docker_client=self.fake_docker_client, max_concurrent_checks=4
+        )
+        await monitor.reload()
+        self.assertIn(latest_deployment.hash, monitor.deployments)
+
+        monitor.deployments[latest_deployment.hash].next_check_at = 0
+        monitor.start_due_checks()
+        await monitor.wait_for_running_checks()
+        await monitor.save_status_changes()
+
+        latest_deployment = await service.alatest_production_deployment  # type: ignore
+        self.assertEqual(
+            Deployment.DeploymentStatus.UNHEALTHY,
+            latest_deployment.status,
+        )
+        self.assertEqual(1, monitor.result.checks)
+        self.assertEqual(1, monitor.result.status_changes)
+
+    @override_settings(DEFAULT_HEALTHCHECK_TIMEOUT=0)
+    async def test_monitor_engine_timeout_starts_when_the_check_runs(self):
+        p, service = await self.acreate_and_deploy_redis_docker_service()
+        latest_deployment: Deployment = await service.alatest_production_deployment  # type: ignore
+
+        monitor = HealthcheckMonitor(
+            docker_client=self.fake_docker_client, max_concurrent_checks=1
+        )
+        monitor.TIMEOUT_GRACE = 0.2
+        monitor.get_health = lambda details: (
+            Deployment.DeploymentStatus.HEALTHY,
+            "OK",
+        )
+        await monitor.reload()
+
+        # a hung check keeps the only thread of the pool busy for longer than the timeout
+        hung_check_done = threading.Event()
+        monitor.executor.submit(hung_check_done.wait, 1)
+        monitor.deployments[latest_deployment.hash].next_check_at = 0
+        monitor.start_due_checks()
+        await asyncio.sleep(0.5)
+        hung_check_done.set()
+        await monitor.wait_for_running_checks()
+
+        self.assertEqual(1, monitor.result.checks)
+        self.assertEqual({}, monitor.status_changes)
+
+    @override_settings(DEFAULT_HEALTHCHECK_TIMEOUT=0)
+    async def test_monitor_engine_marks_hung_checks_as_unhealthy(self):
+        p, service = await self.acreate_and_deploy_redis_docker_service()
+        latest_deployment: Deployment = await service.alatest_production_deployment  # type: ignore
+
+        monitor = HealthcheckMonitor(
+            docker_client=self.fake_docker_client, max_concurrent_checks=1
+        )
+        monitor.TIMEOUT_GRACE = 0.2
+        hung_check_done = threading.Event()
+
+        def get_health(details):
+            hung_check_done.wait(1)
+            return Deployment.DeploymentStatus.HEALTHY, "OK"
+
+        monitor.get_health = get_health
+        await monitor.reload()
+
+        monitor.deployments[latest_deployment.hash].next_check_at = 0
+        monitor.start_due_checks()
+        await monitor.wait_for_running_checks()
+        hung_check_done.set()
+
+        self.assertEqual(1, monitor.result.checks)
+        self.assertEqual(
+            Deployment.DeploymentStatus.UNHEALTHY,
+            monitor.status_changes[latest_deployment.hash].status,
+        )
@@ -0,0 +1,46 @@
+import asyncio
+
+from django.test import TestCase
+
+from ..process import BufferedLineReader
+
+
+async def read_all_lines(
+    chunks: list[bytes], chunk_size: int = 4, coalesce_progress: bool = False
+):
+    stream = asyncio.StreamReader()
+    for chunk in chunks:
+        stream.feed_data(chunk)
+    stream.feed_eof()
+
+    reader = BufferedLineReader(
+        stream, chunk_size=chunk_size, coalesce_progress=coalesce_progress
+    )
+    lines: list[bytes] = []
+    while line := await reader.readline():
+        lines.append(line)
+    return lines
+
+
+class BufferedLineReaderTestCase(TestCase):
+    async def test_split_lines_on_carriage_return_and_line_feed(self):
+        lines = await read_all_lines(
+            [b"hello\nworld\rfoo\r\nbar\n"], chunk_size=1024
+        )
+        self.assertEqual([b"hello\n", b"world\r", b"foo\r\n", b"bar\n"], lines)
+
+    async def test_return_last_line_without_delimiter_on_eof(self):
+        lines = await read_all_lines([b"hello\nworld"])
+        self.assertEqual([b"hello\n", b"world"], lines)
+
+    async def test_crlf_split_across_chunks_is_a_single_delimiter(self):
+        lines = await read_all_lines([b"ab\r\ncd"], chunk_size=3)
+        self.assertEqual([b"ab\r", b"cd"], lines)
+
+    async def test_coalesce_progress_lines(self):
+        lines = await read_all_lines(
+            [b"10%\r20%\r30%\rdone\nnext\n"],
+            chunk_size=1024,
+            coalesce_progress=True,
+        )
+        self.assertEqual([b"done\n", b"next\n"], lines)
@@ -1,6 +1,12 @@
+import copy
+from unittest.mock import patch
+
 from .base import AuthAPITestCase
+from django.conf import settings
+from django.test import SimpleTestCase
 from django.urls import reverse
 from rest_framework import status
+from temporal.helpers import CaddyRoutesIndex, ZaneProxyClient
 
 
 class ProxyViewTestCase(AuthAPITestCase):
@@ -20,3 +26,207 @@ class ProxyViewTestCase(AuthAPITestCase):
             QUERY_STRING=f"domain=hello.fkiss.me",  # type: ignore
         )
         self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+
+
+class FakeCaddyResponse:
+    def __init__(self, status_code: int, data=None, etag: str | None = None):
+        self.status_code = status_code
+        self.data = data
+        self.headers = {"etag": etag} if etag is not None else {}
+
+    def json(self):
+        return self.data
+
+
+class FakeCaddyAdmin:
+    """
+    Replaces the session of `ZaneProxyClient` with the part of the caddy admin API used
+    to manage the routes of `zane-url-root`, the etag changes with every update.
+    """
+
+    def __init__(self, routes: list[dict]):
+        self.routes = list(routes)
+        self.version = 0
+        self.full_list_reads = 0
+        self.prefix = f"{settings.CADDY_PROXY_ADMIN_HOST}/id/zane-url-root/routes"
+
+    @property
+    def etag(self):
+        return f'"{self.version}"'
+
+    @property
+    def route_ids(self):
+        return [route.get("@id") for route in self.routes]
+
+    def get(self, url: str, **kwargs):
+        if url == self.prefix:
+            self.full_list_reads += 1
+            return FakeCaddyResponse(200, copy.deepcopy(self.routes), self.etag)
+        position = int(url.removeprefix(f"{self.prefix}/"))
+        if position >= len(self.routes):
+            return FakeCaddyResponse(404)
+        return FakeCaddyResponse(200, copy.deepcopy(self.routes[position]), self.etag)
+
+    def put(self, url: str, headers: dict, json: dict, **kwargs):
+        if headers.get("If-Match") != self.etag:
+            return FakeCaddyResponse(412)
+        self.routes.insert(int(url.removeprefix(f"{self.prefix}/")), json)
+        self.version += 1
+        return FakeCaddyResponse(200)
+
+    def patch(self, url: str, headers: dict, json, **kwargs):
+        if url == self.prefix:
+            if headers.get("If-Match") != self.etag:
+                return FakeCaddyResponse(412)
+            self.routes = list(json)
+        else:
+            route_id = url.rsplit("/", 1)[-1]
+            if route_id not in self.route_ids:
+                return FakeCaddyResponse(404)
+            self.routes[self.route_ids.index(route_id)] = json
+        self.version += 1
+        return FakeCaddyResponse(200)
+
+    def delete(self, url: str, **kwargs):
+        route_id = url.rsplit("/", 1)[-1]
+        if route_id not in self.route_ids:
+            return FakeCaddyResponse(404)
+        del self.routes[self.route_ids.index(route_id)]
+        self.version += 1
+        return FakeCaddyResponse(200)
+
+
+def host_route(host: str, path: str | None = None) -> dict:
+    route_id = f"{host}-{path or '*'}"
+    match: dict = {"host": [host]}
+    if path is not None:
+        match["path"] = [path]
+    return {"@id": route_id, "match": [match], "handle": []}
+
+
+class CaddyRoutesIndexTests(SimpleTestCase):
+    default_routes = [
+        {
+            "@id": "api.zaneops.internal",
+            "match": [{"host": ["app.zaneops.local"], "path": ["/api/*"]}],
+            "handle": [],
+        },
+        {
+            "@id": "frontend.zaneops.internal",
+            "match": [{"host": ["app.zaneops.local"]}],
+            "handle": [],
+        },
+        {"@id": "zane-catchall", "handle": []},
+    ]
+
+    def setUp(self):
+        self.caddy = FakeCaddyAdmin(self.default_routes)
+        self.index = CaddyRoutesIndex()
+        for patcher in (
+            patch.object(ZaneProxyClient, "http", self.caddy),
+            patch.object(ZaneProxyClient, "positional_http", self.caddy),
+            patch.object(ZaneProxyClient, "routes_index", self.index),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def service_route_ids(self) -> list[str]:
+        default_route_ids = [route["@id"] for route in self.default_routes]
+        return [
+            route_id
+            for route_id in self.caddy.route_ids
+            if route_id not in default_route_ids
+        ]
+
+    def assertRoutesAreSorted(self):
+        self.assertEqual(
+            [route["@id"] for route in ZaneProxyClient._sort_routes(self.caddy.routes)],
+            self.caddy.route_ids,
+        )
+        self.assertEqual(self.caddy.route_ids, self.index.ids)
+
+    def test_insertion_position_in_empty_index(self):
+        self.assertEqual(0, self.index.insertion_position(("any",)))
+
+        self.index.insert(0, "b", ("b",))
+        self.index.insert(self.index.insertion_position(("a",)), "a", ("a",))
+        self.index.insert(self.index.insertion_position(("c",)), "c", ("c",))
+        self.assertEqual(["a", "b", "c"], self.index.ids)
+
+        self.index.remove("b")
+        self.assertEqual(["a", "c"], self.index.ids)
+        self.assertIsNone(self.index.key_of("b"))
+
+    def test_insert_route_loads_the_index_once(self):
+        self.assertTrue(self.index.is_stale)
+
+        self.assertTrue(ZaneProxyClient._insert_route(host_route("nginx.zaneops.local")))
+
+        self.assertFalse(self.index.is_stale)
+        self.assertEqual(1, self.caddy.full_list_reads)
+        self.assertEqual(["nginx.zaneops.local-*"], self.service_route_ids())
+        self.assertRoutesAreSorted()
+
+    def test_insert_routes_in_sorted_order(self):
+        routes = [
+            host_route("nginx.zaneops.local"),
+            host_route("nginx.zaneops.local", "/api/*"),
+            host_route("adminer.zaneops.local"),
+            host_route("nginx.zaneops.local", "/api/v1/*"),
+            host_route("zen.zaneops.local"),
+            host_route("app.zaneops.local", "/static/*"),
+        ]
+        for route in routes:
+            self.assertTrue(ZaneProxyClient._insert_route(route))
+            self.assertRoutesAreSorted()
+
+        # the routes are inserted at their position, the full list is only read once
+        self.assertEqual(1, self.caddy.full_list_reads)
+        self.assertEqual("zane-catchall", self.caddy.route_ids[-1])
+
+    def test_resync_when_routes_change_in_caddy(self):
+        ZaneProxyClient._insert_route(host_route("nginx.zaneops.local"))
+
+        # another process adds a route that this index doesn't know about
+        self.caddy.routes.insert(1, host_route("adminer.zaneops.local"))
+        self.caddy.version += 1
+
+        self.assertTrue(ZaneProxyClient._insert_route(host_route("caddy.zaneops.local")))
+
+        self.assertEqual(2, self.caddy.full_list_reads)
+        self.assertEqual(
+            [
+                "adminer.zaneops.local-*",
+                "caddy.zaneops.local-*",
+                "nginx.zaneops.local-*",
+            ],
+            self.service_route_ids(),
+        )
+        self.assertRoutesAreSorted()
+
+    def test_resync_sorts_unsorted_routes(self):
+        # after the catchall, where caddy would never match it
+        self.caddy.routes.append(host_route("nginx.zaneops.local"))
+
+        ZaneProxyClient._insert_route(host_route("adminer.zaneops.local"))
+
+        self.assertEqual(
+            ["adminer.zaneops.local-*", "nginx.zaneops.local-*"],
+            self.service_route_ids(),
+        )
+        self.assertEqual("zane-catchall", self.caddy.route_ids[-1])
+        self.assertRoutesAreSorted()
+
+    def test_upsert_moves_a_route_whose_sort_key_changed(self):
+        ZaneProxyClient._insert_route(host_route("nginx.zaneops.local"))
+        ZaneProxyClient._insert_route(host_route("adminer.zaneops.local"))
+
+        moved = host_route("zen.zaneops.local")
+        moved["@id"] = "adminer.zaneops.local-*"
+        self.assertTrue(ZaneProxyClient._upsert_route(moved))
+
+        self.assertEqual(
+            ["nginx.zaneops.local-*", "adminer.zaneops.local-*"],
+            self.service_route_ids(),
+        )
+        self.assertRoutesAreSorted()
@@ -0,0 +1,74 @@
+import asyncio
+import uuid
+from datetime import timedelta
+
+from django.test import TestCase
+
+from temporal.semaphore import AsyncSemaphore
+
+
+class AsyncSemaphoreTestCase(TestCase):
+    def make_semaphore(self, key: str, **kwargs):
+        return AsyncSemaphore(key=key, limit=2, poll_interval=5, **kwargs)
+
+    def new_key(self):
+        # the keys expire with the leases of their holders, no need to clean them up
+        return f"test-{uuid.uuid4().hex}"
+
+    async def test_acquire_up_to_the_limit(self):
+        key = self.new_key()
+        first, second, third = [self.make_semaphore(key) for _ in range(3)]
+
+        self.assertTrue(await first.acquire())
+        self.assertTrue(await second.acquire())
+        self.assertFalse(await third.acquire(timeout=timedelta(milliseconds=200)))
+
+    async def test_acquire_again_with_the_same_token_does_not_take_another_slot(
+        self,
+    ):
+        key = self.new_key()
+        holder = self.make_semaphore(key, token="workflow-1")
+        self.assertTrue(await holder.acquire())
+        self.assertTrue(await self.make_semaphore(key, token="workflow-1").acquire())
+
+        self.assertTrue(await self.make_semaphore(key).acquire())
+
+    async def test_waiter_is_woken_up_on_release(self):
+        key = self.new_key()
+        holders = [self.make_semaphore(key) for _ in range(2)]
+        for holder in holders:
+            await holder.acquire()
+
+        waiter = asyncio.create_task(self.make_semaphore(key).acquire())
+        await asyncio.sleep(0.1)
+        self.assertFalse(waiter.done())
+
+        await holders[0].release()
+        # woken up by the release message, not by polling every 5 seconds
+        self.assertTrue(await asyncio.wait_for(waiter, timeout=1))
+
+    async def test_expired_holders_are_reaped(self):
+        key = self.new_key()
+        for _ in range(2):
+            crashed = self.make_semaphore(
+                key, semaphore_timeout=timedelta(milliseconds=100)
+            )
+            await crashed.acquire()
+
+        await asyncio.sleep(0.2)
+        self.assertTrue(
+            await self.make_semaphore(key).acquire(timeout=timedelta(seconds=1))
+        )
+
+    async def test_acquire_all_blocks_other_acquirers_until_reset(self):
+        key = self.new_key()
+        lock = self.make_semaphore(key)
+        self.assertTrue(await lock.acquire_all())
+        self.assertFalse(
+            await self.make_semaphore(key).acquire(
+                timeout=timedelta(milliseconds=200)
+            )
+        )
+
+        await lock.reset()
+        self.assertTrue(await self.make_semaphore(key).acquire())
@@ -5,6 +5,7 @@ from unittest.mock import patch, MagicMock
 
 import responses
 from django.conf import settings
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 
@@ -409,6 +410,7 @@ class DockerServiceCreateViewTest(AuthAPITestCase):
 
 
 class DockerServiceHealthCheckViewTests(AuthAPITestCase):
+    @override_settings(HEALTHCHECK_MONITOR_ENGINE_ENABLED=False)
     async def test_create_scheduled_task_when_deploying_a_service(self):
         p, service = await self.acreate_and_deploy_redis_docker_service()
 
@@ -434,6 +436,7 @@ class DockerServiceHealthCheckViewTests(AuthAPITestCase):
             self.get_workflow_schedule_by_id(latest_deployment.monitor_schedule_id)
         )
 
+    @override_settings(HEALTHCHECK_MONITOR_ENGINE_ENABLED=False)
     async def test_create_scheduled_task_with_healthcheck_same_interval(self):
         p, service = await self.acreate_and_deploy_redis_docker_service(
             with_healthcheck=True
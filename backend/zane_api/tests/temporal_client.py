@@ -0,0 +1,72 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+from django.test import SimpleTestCase
+
+from temporal.client import SignalWorkflowArg, StartWorkflowArg, TemporalClient
+
+
+async def noop_workflow(payload):
+    pass
+
+
+class TemporalClientBatchTests(SimpleTestCase):
+    def setUp(self):
+        patcher = patch.object(TemporalClient, "_ensure_client", new_callable=AsyncMock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_start_workflows_with_bounded_concurrency(self):
+        running, max_running, started = 0, 0, []
+
+        async def astart_workflow(workflow, arg, id, start_delay=None):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            started.append(id)
+            if id == "workflow-3":
+                raise RuntimeError("temporal is unavailable")
+
+        workflows = [
+            StartWorkflowArg(noop_workflow, i, f"workflow-{i}") for i in range(10)
+        ]
+        with (
+            patch.object(TemporalClient, "astart_workflow", astart_workflow),
+            self.assertLogs("temporal.client", level="ERROR") as logs,
+        ):
+            results = await TemporalClient.astart_workflows(
+                workflows, max_concurrency=3
+            )
+
+        self.assertEqual(3, max_running)
+        self.assertEqual(10, len(started))
+        self.assertEqual(
+            [wf.workflow_id for wf in workflows],
+            [result.workflow_id for result in results],
+        )
+        self.assertEqual(
+            ["workflow-3"], [result.workflow_id for result in results if not result.ok]
+        )
+        self.assertIsInstance(results[3].error, RuntimeError)
+        self.assertEqual(1, len(logs.records))
+        self.assertIn("workflow-3", logs.records[0].getMessage())
+
+    async def test_signal_workflows_reports_each_signal(self):
+        signaled = []
+
+        async def aworkflow_signal(workflow, workflow_id, signal, arg):
+            if workflow_id == "workflow-0":
+                raise RuntimeError("temporal is unavailable")
+            signaled.append((workflow_id, arg))
+
+        signals = [
+            SignalWorkflowArg(noop_workflow, noop_workflow, i, f"workflow-{i}")
+            for i in range(3)
+        ]
+        with patch.object(TemporalClient, "aworkflow_signal", aworkflow_signal):
+            results = await TemporalClient.asignal_workflows(signals)
+
+        self.assertEqual([("workflow-1", 1), ("workflow-2", 2)], signaled)
+        self.assertEqual([False, True, True], [result.ok for result in results])
@@ -1,5 +1,6 @@
 # type: ignore
 from unittest.mock import MagicMock
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 
@@ -13,6 +14,7 @@ from temporal.activities import (
 
 
 class DockerToggleServiceViewTests(AuthAPITestCase):
+    @override_settings(HEALTHCHECK_MONITOR_ENGINE_ENABLED=False)
     async def test_stop_service(self):
         project, service = await self.acreate_and_deploy_redis_docker_service()
 
@@ -58,6 +60,7 @@ class DockerToggleServiceViewTests(AuthAPITestCase):
         )
         self.assertFalse(monitor_schedule.is_running)
 
+    @override_settings(HEALTHCHECK_MONITOR_ENGINE_ENABLED=False)
     async def test_restart_service(self):
         project, service = await self.acreate_and_deploy_redis_docker_service()
 
@@ -155,6 +158,7 @@ class DockerToggleServiceViewTests(AuthAPITestCase):
 
         self.assertEqual(status.HTTP_409_CONFLICT, response.status_code)
 
+    @override_settings(HEALTHCHECK_MONITOR_ENGINE_ENABLED=False)
     async def test_bulk_toggle_services(self):
         await self.acreate_and_deploy_redis_docker_service()
         project, _ = await self.acreate_and_deploy_caddy_docker_service()
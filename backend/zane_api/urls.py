@@ -122,6 +122,11 @@ urlpatterns = [
         views.CheckCertificatesAPIView.as_view(),
         name="proxy.check_certificates",
     ),
+    re_path(
+        r"^metrics/?$",
+        views.PrometheusMetricsAPIView.as_view(),
+        name="prometheus.metrics",
+    ),
     re_path(
         "^logs/ingest/?$",
         views.LogIngestAPIView.as_view(),
@@ -240,6 +245,12 @@ urlpatterns = [
         views.ServiceDeploymentRuntimeLogsAPIView.as_view(),
         name="services.deployment.runtime_logs",
     ),
+    re_path(
+        rf"^projects/(?P<project_slug>{DJANGO_SLUG_REGEX})/(?P<env_slug>{DJANGO_SLUG_REGEX})/service-details"
+        rf"/(?P<service_slug>{DJANGO_SLUG_REGEX})/deployments/(?P<deployment_hash>[a-zA-Z0-9-_]+)/runtime-logs/histogram/?$",
+        views.ServiceDeploymentRuntimeLogsHistogramAPIView.as_view(),
+        name="services.deployment.runtime_logs.histogram",
+    ),
     re_path(
         rf"^projects/(?P<project_slug>{DJANGO_SLUG_REGEX})/(?P<env_slug>{DJANGO_SLUG_REGEX})/service-details"
         rf"/(?P<service_slug>{DJANGO_SLUG_REGEX})/deployments/(?P<deployment_hash>[a-zA-Z0-9-_]+)/build-logs/?$",
@@ -5,6 +5,9 @@ import json
 import random
 import shlex
 import string
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from enum import Enum
 from functools import wraps
@@ -40,6 +43,126 @@ def cache_result(timeout: timedelta | None = None, cache_key: str | None = None)
     return decorator
 
 
+_MISSING = object()
+
+
+class TieredCache:
+    """
+    Cache the results of slow lookups in the memory of the process (LRU), in front of the django cache.
+    Concurrent lookups of the same key in a process wait for the first one instead of repeating it.
+    """
+
+    SHARED_VALUE_LOCAL_TTL = timedelta(seconds=30)
+
+    def __init__(
+        self,
+        prefix: str,
+        max_size: int = 1024,
+        max_local_ttl: timedelta | None = None,
+    ):
+        self.prefix = prefix
+        self.max_size = max_size
+        # values updated by other processes are only seen once the local copy expires
+        self.max_local_ttl = max_local_ttl
+        self._local: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: dict[str, threading.Lock] = {}
+
+    def _get_local(self, key: str) -> Any:
+        entry = self._local.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._local.pop(key, None)
+            return _MISSING
+        self._local.move_to_end(key)
+        return value
+
+    def _set_local(self, key: str, value: Any, ttl: timedelta):
+        if self.max_local_ttl is not None:
+            ttl = min(ttl, self.max_local_ttl)
+        self._local[key] = (time.monotonic() + ttl.total_seconds(), value)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_size:
+            self._local.popitem(last=False)
+
+    def get_many(self, keys: Sequence[str]) -> dict[str, Any]:
+        """
+        Cached values of `keys`, the keys not in the cache are omitted.
+        The values only found in the django cache are not kept in memory, as their TTL is unknown.
+        """
+        result = {}
+        with self._lock:
+            for key in keys:
+                value = self._get_local(key)
+                if value is not _MISSING:
+                    result[key] = value
+        missing = [f"{self.prefix}:{key}" for key in keys if key not in result]
+        if missing:
+            for full_key, value in cache.get_many(missing).items():
+                result[full_key.removeprefix(f"{self.prefix}:")] = value
+        return result
+
+    def get_or_set(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        ttl: timedelta | Callable[[Any], timedelta],
+    ) -> Any:
+        """
+        Get the value of `key`, computed with `compute` on a cache miss.
+        `ttl` can be a function of the value, to cache negative results for a shorter time.
+        """
+        with self._lock:
+            value = self._get_local(key)
+            if value is not _MISSING:
+                return value
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            try:
+                with self._lock:
+                    # computed by a concurrent lookup while waiting for the lock
+                    value = self._get_local(key)
+                if value is not _MISSING:
+                    return value
+
+                full_key = f"{self.prefix}:{key}"
+                value = cache.get(full_key, _MISSING)
+                if value is _MISSING:
+                    value = compute()
+                    local_ttl = ttl(value) if callable(ttl) else ttl
+                    cache.set(full_key, value, int(local_ttl.total_seconds()))
+                else:
+                    # the remaining TTL of a value from the django cache is unknown, it is kept shortly
+                    local_ttl = min(
+                        self.SHARED_VALUE_LOCAL_TTL,
+                        ttl(value) if callable(ttl) else ttl,
+                    )
+                with self._lock:
+                    self._set_local(key, value, local_ttl)
+            finally:
+                # also when `compute()` fails, otherwise the lock of the key would never be removed
+                with self._lock:
+                    self._key_locks.pop(key, None)
+        return value
+
+    def set(self, key: str, value: Any, ttl: timedelta):
+        cache.set(f"{self.prefix}:{key}", value, int(ttl.total_seconds()))
+        with self._lock:
+            self._set_local(key, value, ttl)
+
+    def delete(self, key: str):
+        cache.delete(f"{self.prefix}:{key}")
+        with self._lock:
+            self._local.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+
+
 def strip_slash_if_exists(
     string: str,
     strip_end: bool = False,
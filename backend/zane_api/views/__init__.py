@@ -7,6 +7,7 @@ from .logs import *
 from .projects import *
 from .proxy import *
 from .ping import *
+from .prometheus import *
 from .deployments import *
 from .search import *
 from .metrics import *
@@ -3,7 +3,6 @@ import time
 from typing import List, cast
 from django.db import IntegrityError, transaction
 from drf_spectacular.utils import extend_schema
-import requests
 from rest_framework import exceptions
 from rest_framework import status
 from rest_framework.request import Request
@@ -20,6 +19,7 @@ from .serializers import (
     ReviewPreviewEnvDeploymentRequestSerializer,
     PreviewEnvDeployDecision,
 )
+from ..http_client import github_http_session
 from ..models import (
     Project,
     Service,
@@ -148,17 +148,16 @@ class CloneEnviromentAPIView(APIView):
                 f"An environment with the name `{name}` already exists in this project"
             )
         else:
-            workflows_to_run: List[StartWorkflowArg] = [
-                StartWorkflowArg(
-                    CreateEnvNetworkWorkflow.run,
-                    EnvironmentDetails(
-                        id=new_environment.id,
-                        project_id=project.id,
-                        name=new_environment.name,
-                    ),
-                    new_environment.workflow_id,
-                )
-            ]
+            network_workflow = StartWorkflowArg(
+                CreateEnvNetworkWorkflow.run,
+                EnvironmentDetails(
+                    id=new_environment.id,
+                    project_id=project.id,
+                    name=new_environment.name,
+                ),
+                new_environment.workflow_id,
+            )
+            workflows_to_run: List[StartWorkflowArg] = []
 
             if should_deploy_services:
                 for service in new_environment.services.all():
@@ -180,12 +179,9 @@ class CloneEnviromentAPIView(APIView):
                     )
 
             def on_commit():
-                for wf in workflows_to_run:
-                    TemporalClient.start_workflow(
-                        wf.workflow,
-                        wf.payload,
-                        wf.workflow_id,
-                    )
+                # the network of the environment is created before its services are deployed
+                TemporalClient.start_workflows([network_workflow])
+                TemporalClient.start_workflows(workflows_to_run)
 
             transaction.on_commit(on_commit)
 
@@ -273,6 +269,7 @@ class ReviewPreviewEnvDeployAPIView(APIView):
 
         preview_meta = cast(PreviewEnvMetadata, environment.preview_metadata)
 
+        network_workflows: List[StartWorkflowArg] = []
         workflows_to_run: List[StartWorkflowArg] = []
         match data["decision"]:
             case PreviewEnvDeployDecision.APPROVE:
@@ -281,7 +278,7 @@ class ReviewPreviewEnvDeployAPIView(APIView):
                 )
                 preview_meta.save()
 
-                workflows_to_run.append(
+                network_workflows.append(
                     StartWorkflowArg(
                         workflow=CreateEnvNetworkWorkflow.run,
                         payload=EnvironmentDetails(
@@ -360,7 +357,9 @@ class ReviewPreviewEnvDeployAPIView(APIView):
                         owner, repo = repo_full_name.split("/")
                         url = f"https://api.github.com/repos/{owner}/{repo}/issues/comments/{preview_meta.pr_comment_id}"
                         # Try to make request to update comment (we ignore the response status)
-                        response = requests.patch(url, headers=headers, json=payload)
+                        response = github_http_session().patch(
+                            url, headers=headers, json=payload
+                        )
                         if not status.is_success(response.status_code):
                             text = response.text
                             print(
@@ -385,13 +384,9 @@ class ReviewPreviewEnvDeployAPIView(APIView):
                 environment.delete()
 
         def on_commit():
-            for wf in workflows_to_run:
-                TemporalClient.start_workflow(
-                    workflow=wf.workflow,
-                    arg=wf.payload,
-                    id=wf.workflow_id,
-                    start_delay=wf.start_delay,
-                )
+            # the network of the environment is created before its services are deployed
+            TemporalClient.start_workflows(network_workflows)
+            TemporalClient.start_workflows(workflows_to_run)
 
         transaction.on_commit(on_commit)
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -732,7 +727,7 @@ class TriggerPreviewEnvironmentAPIView(APIView):
                     "Authorization": f"Bearer {github.get_access_token()}",
                     "Accept": "application/vnd.github+json",
                 }
-                response = requests.get(url, headers=headers)
+                response = github_http_session().get(url, headers=headers)
                 if response.status_code != status.HTTP_200_OK:
                     raise BadRequest(
                         f"Pull Request with number `{preview_pr_number}` does not exists does not exists on repo `{current_service.repository_url}`"
@@ -803,7 +798,9 @@ class TriggerPreviewEnvironmentAPIView(APIView):
                     }
 
                     # 3️⃣ Make the POST request
-                    response = requests.post(url, headers=headers, json=payload)
+                    response = github_http_session().post(
+                        url, headers=headers, json=payload
+                    )
                     # 4️⃣ Check the response
                     if response.status_code == status.HTTP_201_CREATED:
                         data = response.json()
@@ -836,9 +833,10 @@ class TriggerPreviewEnvironmentAPIView(APIView):
                 defaults={"value": env["value"]},
             )
 
+        network_workflows: List[StartWorkflowArg] = []
         workflows_to_run: List[StartWorkflowArg] = []
         if should_deploy:
-            workflows_to_run = [
+            network_workflows.append(
                 StartWorkflowArg(
                     CreateEnvNetworkWorkflow.run,
                     EnvironmentDetails(
@@ -848,7 +846,7 @@ class TriggerPreviewEnvironmentAPIView(APIView):
                     ),
                     new_environment.workflow_id,
                 )
-            ]
+            )
 
             for service in new_environment.services.all():
                 if service.type == Service.ServiceType.DOCKER_REGISTRY:
@@ -886,13 +884,9 @@ class TriggerPreviewEnvironmentAPIView(APIView):
                 )
 
         def on_commit():
-            for wf in workflows_to_run:
-                TemporalClient.start_workflow(
-                    workflow=wf.workflow,
-                    arg=wf.payload,
-                    id=wf.workflow_id,
-                    start_delay=wf.start_delay,
-                )
+            # the network of the environment is created before its services are deployed
+            TemporalClient.start_workflows(network_workflows)
+            TemporalClient.start_workflows(workflows_to_run)
 
         transaction.on_commit(on_commit)
 
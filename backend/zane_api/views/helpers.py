@@ -500,9 +500,3 @@ def diff_service_snapshots(
                             )
                         )
     return changes
-
-
-class ZaneServices:
-    PROXY = "zane.proxy"
-    API = "zane.api"
-    WORKER = "zane.worker"
@@ -1,5 +1,4 @@
-import json
-from urllib.parse import urlparse
+import sys
 
 from drf_spectacular.utils import extend_schema
 from rest_framework import status, exceptions
@@ -9,32 +8,37 @@ from rest_framework.throttling import ScopedRateThrottle
 from rest_framework.views import APIView
 
 from .base import InternalZaneAppPermission
-from ..utils import Colors, escape_ansi
-from datetime import datetime
-
-from .helpers import ZaneServices
-from .serializers import (
-    DockerContainerLogsResponseSerializer,
-    DockerContainerLogsRequestSerializer,
-    HTTPServiceLogSerializer,
+from ..log_ingest import (
+    LogIngestError,
+    decode_log_lines,
+    ingest_logs,
+    parse_log_lines,
 )
-from search.dtos import RuntimeLogDto, RuntimeLogLevel, RuntimeLogSource
+from ..utils import Colors
+from ..prometheus import log_ingest_lines
+
+from .serializers import DockerContainerLogsResponseSerializer
+from search.dtos import RuntimeLogSource
 from search.loki_client import LokiSearchClient
 from django.conf import settings
-from django.utils import timezone
+from django.db.models import QuerySet
 from typing import cast
 
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.generics import ListAPIView, RetrieveAPIView
 
 
-from search.serializers import RuntimeLogsSearchSerializer
+from search.serializers import (
+    RuntimeLogsHistogramSerializer,
+    RuntimeLogsSearchSerializer,
+)
 
 from .base import EMPTY_CURSOR_RESPONSE
 
 from .serializers import (
     DeploymentBuildLogsQuerySerializer,
     DeploymentRuntimeLogsQuerySerializer,
+    DeploymentRuntimeLogsHistogramQuerySerializer,
     HttpLogFieldsQuerySerializer,
     HttpLogFieldsResponseSerializer,
     DeploymentHttpLogsPagination,
@@ -47,6 +51,7 @@ from ..models import (
     Deployment,
     HttpLog,
     Environment,
+    http_log_field_prefix_expression,
 )
 from ..serializers import HttpLogSerializer
 
@@ -61,148 +66,45 @@ class LogIngestAPIView(APIView):
     serializer_class = DockerContainerLogsResponseSerializer
 
     def post(self, request: Request):
-        serializer = DockerContainerLogsRequestSerializer(data=request.data)
-        if serializer.is_valid(raise_exception=True):
-            logs = serializer.data
-
-            simple_logs: list[RuntimeLogDto] = []
-            http_logs: list[HttpLog] = []
-
-            for log in logs:
-                try:
-                    json_tag = json.loads(log["tag"])
-                except json.JSONDecodeError:
-                    # Ignore this log
-                    continue
-                else:
-                    service_id = json_tag.get("service_id")
-                    match service_id:
-                        case None:
-                            # Ignore this log
-                            continue
-                        case ZaneServices.PROXY:
-                            try:
-                                content = json.loads(log["log"])
-                            except json.JSONDecodeError:
-                                pass
-                            else:
-                                service_id = content.get("zane_service_id")
-                                if service_id:
-                                    log_serializer = HTTPServiceLogSerializer(
-                                        data=content
-                                    )
-                                    if log_serializer.is_valid():
-                                        log_content: dict = log_serializer.data  # type: ignore
-                                        upstream: str = log_content.get(
-                                            "zane_deployment_upstream"
-                                        )  # type: ignore
-                                        deployment_id = content.get(
-                                            "zane_deployment_id"
-                                        )
-                                        # For backward compatibility
-                                        if deployment_id is not None:
-                                            if "blue.zaneops.internal" in upstream:
-                                                deployment_id = log_content.get(
-                                                    "zane_deployment_blue_hash"
-                                                )
-                                            elif "green.zaneops.internal" in upstream:
-                                                deployment_id = log_content.get(
-                                                    "zane_deployment_green_hash"
-                                                )
-
-                                        if deployment_id:
-                                            req = log_content["request"]
-                                            duration_in_seconds = log_content[
-                                                "duration"
-                                            ]
-
-                                            full_url = urlparse(
-                                                f"https://{req['host']}{req['uri']}"
-                                            )
-                                            client_ip = req["headers"].get(
-                                                "X-Forwarded-For", req["remote_ip"]
-                                            )
-                                            user_agent = req["headers"].get(
-                                                "User-Agent"
-                                            )
-                                            http_logs.append(
-                                                HttpLog(
-                                                    time=log["time"],
-                                                    service_id=log_content.get(
-                                                        "zane_service_id"
-                                                    ),
-                                                    deployment_id=deployment_id,
-                                                    request_duration_ns=(
-                                                        duration_in_seconds
-                                                        * 1_000_000_000
-                                                    ),
-                                                    request_path=full_url.path,
-                                                    request_query=full_url.query,
-                                                    request_protocol=req["proto"],
-                                                    request_host=req["host"],
-                                                    status=log_content["status"],
-                                                    request_headers=req["headers"],
-                                                    response_headers=log_content[
-                                                        "resp_headers"
-                                                    ],
-                                                    request_user_agent=(
-                                                        user_agent[0]
-                                                        if isinstance(user_agent, list)
-                                                        else None
-                                                    ),
-                                                    request_ip=(
-                                                        client_ip[0].split(",")[0]
-                                                        if isinstance(client_ip, list)
-                                                        else client_ip
-                                                    ),
-                                                    request_id=log_content.get("uuid"),
-                                                    request_method=req["method"],
-                                                )
-                                            )
-                                            continue
-                        case ZaneServices.API | ZaneServices.WORKER:
-                            # do nothing for now...
-                            pass
-                        case _:
-                            deployment_id = json_tag["deployment_id"]
-                            simple_logs.append(
-                                RuntimeLogDto(
-                                    time=log["time"],
-                                    created_at=timezone.now(),
-                                    level=(
-                                        RuntimeLogLevel.INFO
-                                        if log["source"] == "stdout"
-                                        else RuntimeLogLevel.ERROR
-                                    ),
-                                    source=RuntimeLogSource.SERVICE,
-                                    service_id=service_id,
-                                    deployment_id=deployment_id,
-                                    content=log["log"],
-                                    content_text=escape_ansi(log["log"]),
-                                )
-                            )
-
-            start_time = datetime.now()
-            search_client = LokiSearchClient(host=settings.LOKI_HOST)
-            search_client.bulk_insert(simple_logs)
-            HttpLog.objects.bulk_create(http_logs)
-            end_time = datetime.now()
-
-            response = DockerContainerLogsResponseSerializer(
-                {
-                    "simple_logs_inserted": len(simple_logs),
-                    "http_logs_inserted": len(http_logs),
-                }
-            )
-            print("====== LOGS INGEST ======")
-            print(
-                f"Took {(end_time - start_time).microseconds / 1000}{Colors.GREY}ms{Colors.ENDC}"
-            )
-            print(
-                f"Simple logs inserted = {Colors.BLUE}{len(simple_logs)}{Colors.ENDC}"
-            )
-            print(f"HTTP logs inserted = {Colors.BLUE}{len(http_logs)}{Colors.ENDC}")
-            return Response(response.data, status=status.HTTP_200_OK)
+        # The lines are validated by hand instead of with `DockerContainerLogsRequestSerializer`,
+        # as running a serializer per line is too slow for the volume of logs sent by fluentd
+        try:
+            lines = decode_log_lines(
+                request.body, request.headers.get("Content-Encoding")
+            )
+        except LogIngestError as e:
+            raise exceptions.ValidationError(str(e))
+
+        logs = parse_log_lines(lines)
+        ingest_logs(logs)
+        log_ingest_lines.labels(kind="runtime").inc(len(logs.simple_logs))
+        log_ingest_lines.labels(kind="http").inc(len(logs.http_logs))
+        log_ingest_lines.labels(kind="invalid").inc(logs.skipped)
+
+        response = DockerContainerLogsResponseSerializer(
+            {
+                "simple_logs_inserted": len(logs.simple_logs),
+                "http_logs_inserted": len(logs.http_logs),
+            }
+        )
+        return Response(response.data, status=status.HTTP_200_OK)
+
+
+def search_http_log_field_values(queryset: QuerySet, field: str, prefix: str):
+    """
+    Return the first distinct values of `field` starting with `prefix`, for autocompletion.
+    """
+    values = queryset.annotate(value=http_log_field_prefix_expression(field))
+    if len(prefix) > 0:
+        # with the "C" collation, the values starting with `prefix` are all between `prefix`
+        # and `prefix` with its last character incremented, and unlike `LIKE`,
+        # this range can be read in order from the index
+        values = values.filter(value__gte=prefix)
+        if ord(prefix[-1]) < sys.maxunicode:
+            values = values.filter(value__lt=prefix[:-1] + chr(ord(prefix[-1]) + 1))
+        else:
+            values = values.filter(value__startswith=prefix)
+    return values.order_by("value").values_list("value", flat=True).distinct()[:7]
 
 
 class ServiceHttpLogsFieldsAPIView(APIView):
@@ -245,18 +147,8 @@ class ServiceHttpLogsFieldsAPIView(APIView):
                 field = form.data["field"]  # type: ignore
                 value = form.data["value"]  # type: ignore
 
-                condition = {}
-                if len(value) > 0:
-                    condition = {f"{field}__startswith": value}
-
-                values = (
-                    HttpLog.objects.filter(
-                        service_id=service.id,
-                        **condition,
-                    )
-                    .order_by(field)
-                    .values_list(field, flat=True)
-                    .distinct()[:7]
+                values = search_http_log_field_values(
+                    HttpLog.objects.filter(service_id=service.id), field, value
                 )
 
                 seriaziler = HttpLogFieldsResponseSerializer([item for item in values])
@@ -409,7 +301,74 @@ class ServiceDeploymentRuntimeLogsAPIView(APIView):
                 data = search_client.search(
                     query=dict(**form.validated_data, deployment_id=deployment.hash),  # type: ignore
                 )
-                return Response(data)
+                return Response(
+                    data,
+                    headers={"Server-Timing": search_client.stats.as_server_timing()},
+                )
+
+
+class ServiceDeploymentRuntimeLogsHistogramAPIView(APIView):
+    serializer_class = RuntimeLogsHistogramSerializer
+
+    @extend_schema(
+        summary="Get deployment logs histogram",
+        parameters=[DeploymentRuntimeLogsHistogramQuerySerializer],
+    )
+    def get(
+        self,
+        request: Request,
+        project_slug: str,
+        service_slug: str,
+        deployment_hash: str,
+        env_slug: str = Environment.PRODUCTION_ENV_NAME,
+    ):
+        try:
+            project = Project.objects.get(slug=project_slug, owner=self.request.user)
+
+            environment = Environment.objects.get(
+                name=env_slug.lower(), project=project
+            )
+            service = Service.objects.get(
+                slug=service_slug, project=project, environment=environment
+            )
+            deployment = Deployment.objects.get(service=service, hash=deployment_hash)
+        except Project.DoesNotExist:
+            raise exceptions.NotFound(
+                detail=f"A project with the slug `{project_slug}` does not exist."
+            )
+        except Environment.DoesNotExist:
+            raise exceptions.NotFound(
+                detail=f"An environment with the name `{env_slug}` does not exist in this project"
+            )
+        except Service.DoesNotExist:
+            raise exceptions.NotFound(
+                detail=f"A service with the slug `{service_slug}` does not exist within the environment `{env_slug}` of the project `{project_slug}`"
+            )
+        except Deployment.DoesNotExist:
+            raise exceptions.NotFound(
+                detail=f"A deployment with the hash `{deployment_hash}` does not exist for this service."
+            )
+        else:
+            form = DeploymentRuntimeLogsHistogramQuerySerializer(
+                data=request.query_params
+            )
+            if form.is_valid(raise_exception=True):
+                params = cast(ReturnDict, form.validated_data)
+                search_client = LokiSearchClient(host=settings.LOKI_HOST)
+                data = search_client.histogram(
+                    query=dict(
+                        time_before=params.get("time_before"),
+                        time_after=params.get("time_after"),
+                        query=params.get("query"),
+                        level=params.get("level"),
+                        deployment_id=deployment.hash,
+                    ),
+                    buckets=params["buckets"],
+                )
+                return Response(
+                    RuntimeLogsHistogramSerializer(data).data,
+                    headers={"Server-Timing": search_client.stats.as_server_timing()},
+                )
 
 
 class ServiceDeploymentBuildLogsAPIView(APIView):
@@ -465,7 +424,10 @@ class ServiceDeploymentBuildLogsAPIView(APIView):
                         source=[RuntimeLogSource.BUILD, RuntimeLogSource.SYSTEM],
                     ),  # type: ignore
                 )
-                return Response(data)
+                return Response(
+                    data,
+                    headers={"Server-Timing": search_client.stats.as_server_timing()},
+                )
 
 
 class ServiceDeploymentHttpLogsFieldsAPIView(APIView):
@@ -515,19 +477,13 @@ class ServiceDeploymentHttpLogsFieldsAPIView(APIView):
                 field = form.data["field"]  # type: ignore # type: ignore
                 value = form.data["value"]  # type: ignore # type: ignore
 
-                condition = {}
-                if len(value) > 0:
-                    condition = {f"{field}__startswith": value}
-
-                values = (
+                values = search_http_log_field_values(
                     HttpLog.objects.filter(
                         deployment_id=deployment.hash,
                         service_id=service.id,
-                        **condition,
-                    )
-                    .order_by(field)
-                    .values_list(field, flat=True)
-                    .distinct()[:7]
+                    ),
+                    field,
+                    value,
                 )
 
                 seriaziler = HttpLogFieldsResponseSerializer([item for item in values])
@@ -10,6 +10,7 @@ from ..models import (
     Project,
     Service,
     ServiceMetrics,
+    ServiceMetricsRollup,
     Deployment,
     Environment,
 )
@@ -23,7 +24,9 @@ from django.db.models import (
     Func,
     Value,
     DateTimeField,
+    FloatField,
 )
+from django.db.models.functions import Cast
 
 
 # Define a custom function to extract epoch seconds from a datetime.
@@ -83,38 +86,71 @@ class ServiceMetricsAPIView(APIView):
                 time_range: Literal["LAST_HOUR", "LAST_6HOURS", "LAST_DAY", "LAST_WEEK", "LAST_MONTH"] = form.validated_data.get("time_range")  # type: ignore
 
                 now = timezone.now()
-                qs = ServiceMetrics.objects.filter(service=service)
-                if deployment is not None:
-                    qs = qs.filter(deployment=deployment)
 
                 match time_range:
                     case "LAST_HOUR":
                         start_time = now - timedelta(hours=1)
                         interval = "30 seconds"
+                        resolution = None
                     case "LAST_6HOURS":
                         start_time = now - timedelta(hours=6)
                         interval = "5 minutes"
+                        resolution = ServiceMetricsRollup.Resolution.ONE_MINUTE
                     case "LAST_DAY":
                         start_time = now - timedelta(hours=24)
                         interval = "15 minutes"
+                        resolution = ServiceMetricsRollup.Resolution.FIFTEEN_MINUTES
                     case "LAST_WEEK":
                         start_time = now - timedelta(days=7)
                         interval = "1 hours"
+                        resolution = ServiceMetricsRollup.Resolution.ONE_HOUR
                     case "LAST_MONTH":
                         start_time = now - timedelta(days=30)
                         interval = "1 days"
+                        resolution = ServiceMetricsRollup.Resolution.ONE_DAY
                     case _:
                         raise NotImplementedError("This should be unreachable")
 
-                qs = qs.filter(
-                    created_at__gte=start_time,
-                )
-
                 """
                 The general algorithm is like this :
                 - group all queries by intervals, with the `start_time` of the interval (called bucket_epoch underneath)
                 - then get the average of the cpu/mem and sum of network/disk in these intervals 
+
+                Except for the last hour, the metrics are read from the coarsest rollup 
+                whose buckets fit in the interval, instead of the raw samples.
                 """
+                if resolution is None:
+                    qs = ServiceMetrics.objects.filter(
+                        service=service, created_at__gte=start_time
+                    )
+                    time_field = "created_at"
+                    aggregates = dict(
+                        avg_cpu=Avg("cpu_percent"),
+                        avg_memory=Avg("memory_bytes"),
+                        total_net_tx=Sum("net_tx_bytes"),
+                        total_net_rx=Sum("net_rx_bytes"),
+                        total_disk_read=Sum("disk_read_bytes"),
+                        total_disk_write=Sum("disk_writes_bytes"),
+                    )
+                else:
+                    qs = ServiceMetricsRollup.objects.filter(
+                        service=service, resolution=resolution, bucket__gte=start_time
+                    )
+                    time_field = "bucket"
+                    aggregates = dict(
+                        avg_cpu=Cast(Sum("cpu_percent_sum"), FloatField())
+                        / Sum("sample_count"),
+                        avg_memory=Cast(Sum("memory_bytes_sum"), FloatField())
+                        / Sum("sample_count"),
+                        total_net_tx=Sum("net_tx_bytes"),
+                        total_net_rx=Sum("net_rx_bytes"),
+                        total_disk_read=Sum("disk_read_bytes"),
+                        total_disk_write=Sum("disk_writes_bytes"),
+                    )
+
+                if deployment is not None:
+                    qs = qs.filter(deployment=deployment)
+
                 qs = qs.annotate(
                     bucket_epoch=Func(
                         # from the docs :
@@ -123,8 +159,8 @@ class ServiceMetricsAPIView(APIView):
                         # In PostgreSQL, the DATE_BIN() function enables us to “bin” a timestamp into a given interval aligned with a specific origin.
                         # In other words, we can use this function to map (or force) a timestamp to the nearest specified interval.
                         Value(interval),
-                        F("created_at"),
-                        Value("2000-01-01"),
+                        F(time_field),
+                        Value(ServiceMetricsRollup.BUCKET_ORIGIN),
                         function="DATE_BIN",
                         output_field=DateTimeField(),
                     )
@@ -133,14 +169,7 @@ class ServiceMetricsAPIView(APIView):
                 # Group by bucket_epoch and aggregate metrics.
                 aggregated = (
                     qs.values("bucket_epoch")
-                    .annotate(
-                        avg_cpu=Avg("cpu_percent"),
-                        avg_memory=Avg("memory_bytes"),
-                        total_net_tx=Sum("net_tx_bytes"),
-                        total_net_rx=Sum("net_rx_bytes"),
-                        total_disk_read=Sum("disk_read_bytes"),
-                        total_disk_write=Sum("disk_writes_bytes"),
-                    )
+                    .annotate(**aggregates)
                     .order_by("bucket_epoch")
                 )
 
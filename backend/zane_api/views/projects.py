@@ -4,9 +4,7 @@ from django.db import IntegrityError, transaction
 from django.db.models import (
     Q,
     When,
-    IntegerField,
     QuerySet,
-    Sum,
     Case,
     Prefetch,
     Count,
@@ -15,6 +13,7 @@ from django.db.models import (
     Value,
     CharField,
 )
+from django.db.models.functions import Coalesce
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import (
     extend_schema,
@@ -68,6 +67,27 @@ from temporal.workflows import (
 )
 
 
+def count_current_production_services(*statuses: str) -> Coalesce:
+    """
+    Count the services of each project whose current production deployment has one of `statuses`,
+    as a correlated subquery on the partial index of the current production deployments.
+    """
+    return Coalesce(
+        Subquery(
+            Deployment.objects.filter(
+                service__project_id=OuterRef("pk"),
+                is_current_production=True,
+                status__in=statuses,
+            )
+            .order_by()
+            .values("service__project_id")
+            .annotate(count=Count("service_id", distinct=True))
+            .values("count")
+        ),
+        0,
+    )
+
+
 class ProjectsListAPIView(ListCreateAPIView):
     serializer_class = ProjectSerializer
     pagination_class = None
@@ -86,43 +106,14 @@ class ProjectsListAPIView(ListCreateAPIView):
             .order_by("-updated_at")
         )
 
-        healthy_services = Deployment.objects.filter(
-            is_current_production=True, status=Deployment.DeploymentStatus.HEALTHY
-        ).values("service")
-
-        total_services = Deployment.objects.filter(
-            Q(is_current_production=True)
-            & (
-                Q(status=Deployment.DeploymentStatus.HEALTHY)
-                | Q(status=Deployment.DeploymentStatus.UNHEALTHY)
-                | Q(status=Deployment.DeploymentStatus.FAILED)
-            )
-        ).values("service")
-
         queryset = queryset.annotate(
-            healthy_services=Sum(
-                Case(
-                    When(
-                        services__id__in=[item["service"] for item in healthy_services],
-                        then=1,
-                    ),
-                    output_field=IntegerField(),
-                    default=0,
-                )
+            healthy_services=count_current_production_services(
+                Deployment.DeploymentStatus.HEALTHY
             ),
-            total_services=Sum(
-                Case(
-                    When(
-                        Q(
-                            services__id__in=[
-                                item["service"] for item in total_services
-                            ]
-                        ),
-                        then=1,
-                    ),
-                    output_field=IntegerField(),
-                    default=0,
-                )
+            total_services=count_current_production_services(
+                Deployment.DeploymentStatus.HEALTHY,
+                Deployment.DeploymentStatus.UNHEALTHY,
+                Deployment.DeploymentStatus.FAILED,
             ),
         )
 
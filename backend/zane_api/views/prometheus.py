@@ -0,0 +1,23 @@
+from django.http import HttpResponse
+from drf_spectacular.utils import extend_schema
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from rest_framework import permissions
+from rest_framework.request import Request
+from rest_framework.views import APIView
+
+from .base import InternalZaneAppPermission
+from ..prometheus import get_metrics_registry
+
+
+class PrometheusMetricsAPIView(APIView):
+    """
+    Metrics of the API in the prometheus text format, scrapers authenticate like fluentd.
+    """
+
+    permission_classes = [InternalZaneAppPermission | permissions.IsAuthenticated]
+
+    @extend_schema(exclude=True)
+    def get(self, request: Request):
+        return HttpResponse(
+            generate_latest(get_metrics_registry()), content_type=CONTENT_TYPE_LATEST
+        )
@@ -1,7 +1,7 @@
 from io import StringIO
 from typing import cast
 from dotenv import dotenv_values
-import requests
+from ...http_client import github_http_session
 from rest_framework import serializers, status
 from ...validators import validate_git_commit_sha
 from ...models import (
@@ -95,7 +95,7 @@ class TriggerPreviewEnvRequestSerializer(serializers.Serializer):
                 "Accept": "application/vnd.github+json",
             }
             # Get existing PR
-            response = requests.get(url, headers=headers)
+            response = github_http_session().get(url, headers=headers)
             if response.status_code != status.HTTP_200_OK:
                 raise serializers.ValidationError(
                     f"Pull Request with number `{pr_number}` does not exists does not exists on repo `{service.repository_url}`"
@@ -161,7 +161,7 @@ class TriggerPreviewEnvRequestSerializer(serializers.Serializer):
             )
 
         is_valid_repository = git.check_if_git_repository_is_valid(
-            computed_repository_url, branch_name
+            computed_repository_url, branch_name, git_app_id=gitapp.id
         )
         if not is_valid_repository:
             raise serializers.ValidationError(
@@ -168,6 +168,23 @@ class DeploymentRuntimeLogsQuerySerializer(serializers.Serializer):
         return cursor
 
 
+class DeploymentRuntimeLogsHistogramQuerySerializer(serializers.Serializer):
+    time_before = serializers.DateTimeField(required=False)
+    time_after = serializers.DateTimeField(required=False)
+    query = serializers.CharField(
+        required=False, allow_blank=True, trim_whitespace=False
+    )
+    level = serializers.ListField(
+        child=serializers.ChoiceField(
+            choices=[RuntimeLogLevel.INFO, RuntimeLogLevel.ERROR]
+        ),
+        required=False,
+    )
+    buckets = serializers.IntegerField(
+        required=False, min_value=1, max_value=500, default=60
+    )
+
+
 class CursorSerializer(serializers.Serializer):
     sort = serializers.ListField(required=True, child=serializers.CharField())
     order = serializers.ChoiceField(choices=["desc", "asc"], required=True)
@@ -147,7 +147,9 @@ class GitServiceCreateRequestSerializer(serializers.Serializer):
                 )
 
         is_valid_repository = client.check_if_git_repository_is_valid(
-            computed_repository_url, branch_name
+            computed_repository_url,
+            branch_name,
+            git_app_id=attrs.get("git_app_id"),
         )
         if not is_valid_repository:
             raise serializers.ValidationError(
@@ -756,7 +758,7 @@ class PortItemChangeSerializer(BaseChangeItemSerializer):
             )
 
         if public_port is not None and not check_if_port_is_available_on_host(
-            public_port
+            public_port, service_id=service.id
         ):
             raise serializers.ValidationError(
                 {
@@ -880,7 +882,9 @@ class GitSourceRequestSerializer(serializers.Serializer):
                 )
 
         is_valid_repository = git.check_if_git_repository_is_valid(
-            computed_repository_url, branch_name
+            computed_repository_url,
+            branch_name,
+            git_app_id=attrs.get("git_app_id"),
         )
         if not is_valid_repository:
             raise serializers.ValidationError(